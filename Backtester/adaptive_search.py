@@ -0,0 +1,141 @@
+# Nama File: adaptive_search.py
+"""
+Pencarian adaptif sebagai pengganti grid penuh (itertools.product x semua bulan).
+
+Successive halving dengan budget = jumlah bulan: semua kandidat dinilai pada
+beberapa bulan dulu, hanya 1/eta teratas yang naik ke budget berikutnya
+(eta x lebih banyak bulan), dan kandidat yang bertahan sampai rung terakhir
+dinilai pada seluruh periode. Bulan tiap rung dipilih tersebar merata di periode
+(bukan hanya bulan-bulan awal) dan bersarang antar rung, sehingga bulan yang
+sudah dihitung di rung sebelumnya tinggal dibaca dari checkpoint.
+
+Opsional: bila grid terlalu besar, hanya max_candidates titik yang dievaluasi;
+sebagian diambil acak, sisanya diusulkan sampler berbasis model aditif
+sederhana (rata-rata skor per nilai parameter) dari hasil rung pertama.
+"""
+import math
+import random
+
+import numpy as np
+
+from walk_forward import collect_combo_months, WF_METRICS
+from utils import send_status
+
+SAMPLERS = ('random', 'model')
+
+
+def spread_order(n: int) -> list:
+    """Urutan index 0..n-1 yang tersebar merata (van der Corput); prefix berapa pun mencakup seluruh periode."""
+    order, seen = [], set()
+    j = 0
+    while len(order) < n:
+        v, denom, k = 0.0, 1.0, j
+        while k:
+            denom *= 2
+            v += (k % 2) / denom
+            k //= 2
+        i = min(n - 1, int(v * n))
+        if i not in seen:
+            seen.add(i)
+            order.append(i)
+        j += 1
+    return order
+
+
+def halving_schedule(n_candidates: int, n_months: int, eta: int = 3, min_months: int = 1) -> list:
+    """Rung [(jumlah bulan, jumlah kandidat)]; rung terakhir = seluruh bulan."""
+    eta = max(2, int(eta))
+    budget = max(1, min(int(min_months), n_months))
+    n = n_candidates
+    rungs = []
+    while budget < n_months and n > 1:
+        rungs.append((budget, n))
+        n = max(1, math.ceil(n / eta))
+        budget = min(n_months, budget * eta)
+    rungs.append((n_months, n))
+    return rungs
+
+
+def _scores(combos: list, metric: str) -> np.ndarray:
+    return np.array([c.stats(0, len(c.profit))[metric] for c in combos], dtype=float)
+
+
+def propose_candidates(pool: list, evaluated: list, scores, n: int) -> list:
+    """
+    Usulkan n titik dari pool yang belum dievaluasi: prediksi skor = jumlah rata-rata
+    z-skor per nilai parameter (model aditif); nilai yang belum pernah dicoba bernilai 0.
+    """
+    if n <= 0 or not evaluated:
+        return []
+    scores = np.asarray(scores, dtype=float)
+    z = (scores - scores.mean()) / scores.std() if scores.std() > 0 else np.zeros(len(scores))
+    effects = {}
+    for params, zi in zip(evaluated, z):
+        for key, value in params.items():
+            effects.setdefault((key, repr(value)), []).append(zi)
+    effects = {k: float(np.mean(v)) for k, v in effects.items()}
+    tried = {repr(sorted(p.items())) for p in evaluated}
+    fresh = [p for p in pool if repr(sorted(p.items())) not in tried]
+    predicted = [sum(effects.get((k, repr(v)), 0.0) for k, v in p.items()) for p in fresh]
+    order = np.argsort(predicted, kind='stable')[::-1]
+    return [fresh[i] for i in order[:n]]
+
+
+def successive_halving(param_sets: list, mt5, months: list, eta: int = 3, min_months: int = 1,
+                       metric: str = 'balance_score', max_candidates: int = None, sampler: str = 'random',
+                       seed: int = 0, fill=None, status=send_status):
+    """
+    Jalankan successive halving atas param_sets (list dict parameter CLI worker).
+    fill(param_sets, months): opsional, mengisi checkpoint bulan secara paralel sebelum tiap
+    rung dinilai (tanpa fill, bulan yang belum ada dihitung di proses ini).
+    Return (finalis terurut skor terbaik dulu, riwayat rung).
+    """
+    if metric not in WF_METRICS:
+        raise ValueError(f"Metrik pencarian tidak dikenal: {metric}")
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Sampler tidak dikenal: {sampler}")
+    order = spread_order(len(months))
+    rng = random.Random(seed)
+
+    candidates = list(param_sets)
+    proposals = 0
+    if max_candidates and max_candidates < len(candidates):
+        n_random = max_candidates if sampler == 'random' else max(1, max_candidates // 2)
+        candidates = rng.sample(candidates, n_random)
+        proposals = max_candidates - n_random
+
+    schedule = halving_schedule(len(candidates) + proposals, len(months), eta, min_months)
+    history = []
+    for r, (budget, _) in enumerate(schedule):
+        rung_months = sorted(months[i] for i in order[:budget])
+        if fill is not None:
+            fill(candidates, rung_months)
+        status({"status": f"Rung {r + 1}/{len(schedule)}: {len(candidates)} kandidat x {budget} bulan",
+                "progress": r, "total": len(schedule)})
+        combos = collect_combo_months(candidates, mt5, rung_months, status=lambda data: None)
+        scores = _scores(combos, metric)
+
+        if r == 0 and proposals:
+            # kandidat tambahan usulan model, dinilai pada budget rung pertama
+            extra = propose_candidates(param_sets, [c.params for c in combos], scores, proposals)
+            if extra:
+                if fill is not None:
+                    fill(extra, rung_months)
+                extra_combos = collect_combo_months(extra, mt5, rung_months, status=lambda data: None)
+                combos += extra_combos
+                scores = np.concatenate([scores, _scores(extra_combos, metric)])
+
+        ranked = np.argsort(-scores, kind='stable')
+        keep = schedule[r + 1][1] if r + 1 < len(schedule) else len(combos)
+        history.append({
+            'rung': r + 1,
+            'months': [f"{y:04d}-{m:02d}" for y, m in rung_months],
+            'candidates': len(combos),
+            'promoted': min(keep, len(combos)),
+            'best_score': float(scores[ranked[0]]) if len(ranked) else None,
+            'best_params': combos[ranked[0]].params if len(ranked) else None,
+        })
+        candidates = [combos[i].params for i in ranked[:keep]]
+
+    status({"status": "Pencarian adaptif selesai", "progress": len(schedule), "total": len(schedule)})
+    return candidates, history
@@ -0,0 +1,85 @@
+# Nama File: checkpoint.py
+"""
+Checkpoint per bulan untuk backtest yang bisa dilanjutkan (resume).
+
+Setiap bulan yang selesai disimpan sebagai satu file biner ringkas
+(pickle + zlib) di:
+    <root>/<symbol>/<run_key>/<YYYY-MM>.ckpt
+run_key = hash parameter yang memengaruhi hasil. Di dalam file disimpan juga
+versi data (sidik bar bulan itu) dan saldo awal bulan; checkpoint hanya dipakai
+bila keduanya masih sama, jadi data yang berubah / saldo rolling yang bergeser
+otomatis memicu hitung ulang.
+"""
+import os
+import sys
+import json
+import zlib
+import pickle
+import hashlib
+
+from trade_log import TradeLog
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR') or os.path.join(_REPO_ROOT, 'data', 'checkpoints')
+
+_MAGIC = b'PWCK1'
+
+# Kunci config yang tidak memengaruhi hasil backtest (lokasi data, cache, output opsional)
+_NON_RESULT_KEYS = {
+    'bar_store_dir', 'use_bar_store', 'tick_store_dir', 'tick_chunk_size', 'use_indicator_cache', 'indicator_cache_dir',
+    'shared_manifest', 'plot_individual_trades', 'chart_workers', 'charts_per_page',
+    'equity_write_parquet', 'equity_write_csv',
+    'resume', 'checkpoint_dir', 'use_checkpoint', 'result_db', 'use_result_store', 'render_reports',
+    # pasca-proses & kontrol run di atas report bulanan (tidak mengubah isi checkpoint)
+    'risk_scenarios', 'mc_paths', 'mc_method', 'mc_block_size', 'mc_ruin_pct', 'mc_seed',
+    'abort_max_drawdown_pct', 'abort_min_balance', 'abort_min_profit_factor', 'abort_min_trades', 'abort_on_margin_call',
+}
+
+
+def run_key(config: dict) -> str:
+    """Hash parameter run (config tanpa kunci non-hasil)."""
+    payload = {k: v for k, v in config.items() if k not in _NON_RESULT_KEYS}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+class MonthCheckpoint:
+    """Simpan / baca report_details bulanan untuk satu kombinasi parameter."""
+
+    def __init__(self, config: dict, root: str = None):
+        self.root = root or DEFAULT_CHECKPOINT_DIR
+        self.run_dir = os.path.join(self.root, str(config.get('symbol')), run_key(config))
+
+    def _path(self, year: int, month: int) -> str:
+        return os.path.join(self.run_dir, f"{year:04d}-{month:02d}.ckpt")
+
+    def load(self, year: int, month: int, data_version: str, initial_balance: float):
+        """report_details tersimpan, atau None jika tidak ada / versi data atau saldo awal berbeda."""
+        try:
+            with open(self._path(year, month), 'rb') as f:
+                blob = f.read()
+            if not blob.startswith(_MAGIC):
+                return None
+            entry = pickle.loads(zlib.decompress(blob[len(_MAGIC):]))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if entry.get('data_version') != data_version:
+            return None
+        if round(float(entry.get('initial_balance', float('nan'))), 6) != round(float(initial_balance), 6):
+            return None
+        report = entry.get('report')
+        if report is not None and not isinstance(report.get('completed_trades'), TradeLog):
+            report['completed_trades'] = TradeLog.coerce(report.get('completed_trades'))  # checkpoint format lama (list dict)
+        return report
+
+    def save(self, year: int, month: int, data_version: str, initial_balance: float, report: dict) -> None:
+        """Tulis checkpoint secara atomik (file sementara -> rename)."""
+        entry = {'data_version': data_version, 'initial_balance': float(initial_balance), 'report': report}
+        path = self._path(year, month)
+        try:
+            os.makedirs(self.run_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(_MAGIC + zlib.compress(pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL), 6))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Gagal menyimpan checkpoint {path}: {e}", file=sys.stderr)
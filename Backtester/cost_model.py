@@ -0,0 +1,107 @@
+# Nama File: cost_model.py
+"""
+Model biaya eksekusi berbasis array (spread, slippage, komisi).
+
+Versi vektor dari utils.exec_price / commission_leg_usd, spread per bar dan
+atribusi biaya per trade (_augment_trade_fields lama):
+  - spread per bar sebagai satu kolom float (tanpa df.iloc per bar),
+  - harga eksekusi market ASK/BID untuk semua bar sekaligus,
+  - gross / spread / slippage / komisi / net untuk seluruh trade sekaligus.
+Rumus dan urutan operasi sama dengan versi skalar, jadi hasilnya identik.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from trade_log import SIDES, REASONS
+
+_LEVEL_REASONS = [REASONS.index('sl'), REASONS.index('tp')]
+
+
+def spread_points_array(df, use_dyn_spread: bool, fallback_spread_pts: float) -> np.ndarray:
+    """Spread (points) per bar: kolom 'spread' bila dinamis & tersedia, selain itu fallback konstan."""
+    if use_dyn_spread and 'spread' in getattr(df, 'columns', []):
+        return df['spread'].to_numpy(dtype=float)
+    return np.full(len(df), float(fallback_spread_pts))
+
+
+def market_exec_prices(close_bid: np.ndarray, spread_pts: np.ndarray, point: float, slippage_pts: float):
+    """
+    (ask_exec, bid_exec) per bar untuk order market.
+    BUY masuk / SELL keluar di ask_exec (BID + spread + slippage);
+    BUY keluar / SELL masuk di bid_exec (BID - slippage).
+    """
+    s = np.asarray(spread_pts, dtype=float) * float(point)
+    slip = float(slippage_pts) * float(point)
+    close_bid = np.asarray(close_bid, dtype=float)
+    return close_bid + s + slip, close_bid - slip
+
+
+def level_exec_prices(is_buy: np.ndarray, level_price: np.ndarray, spread_pts: np.ndarray,
+                      point: float, slippage_pts: float) -> np.ndarray:
+    """Harga eksekusi exit pada level BID (SL/TP): BUY di level - slippage, SELL di level + spread + slippage."""
+    s = np.asarray(spread_pts, dtype=float) * float(point)
+    slip = float(slippage_pts) * float(point)
+    level_price = np.asarray(level_price, dtype=float)
+    return np.where(is_buy, level_price - slip, level_price + s + slip)
+
+
+def level_exit_bids(is_buy: np.ndarray, exit_exec: np.ndarray, spread_pts: np.ndarray,
+                    point: float, slippage_pts: float) -> np.ndarray:
+    """Kebalikan level_exec_prices: level BID tempat exit SL/TP terisi, dari harga eksekusinya."""
+    s = np.asarray(spread_pts, dtype=float) * float(point)
+    slip = float(slippage_pts) * float(point)
+    exit_exec = np.asarray(exit_exec, dtype=float)
+    return np.where(is_buy, exit_exec + slip, exit_exec - s - slip)
+
+
+def attribute_costs(is_buy: np.ndarray, entry_bid: np.ndarray, exit_bid: np.ndarray,
+                    spread_entry_pts: np.ndarray, spread_exit_pts: np.ndarray,
+                    slippage_entry_pts, slippage_exit_pts, commission_entry, commission_exit,
+                    lot: float, contract_size: float, point: float) -> dict:
+    """
+    Atribusi biaya per trade (BID->BID, tanpa look-ahead):
+      gross  = gerak harga murni; spread dibayar di leg ASK (entry BUY / exit SELL);
+      net    = gross - (spread + slippage + komisi).
+    """
+    lot, cs = float(lot), float(contract_size)
+    entry_bid = np.asarray(entry_bid, dtype=float)
+    exit_bid = np.asarray(exit_bid, dtype=float)
+    gross = np.where(is_buy, (exit_bid - entry_bid) * lot * cs, (entry_bid - exit_bid) * lot * cs)
+    spread_cost = np.where(is_buy, spread_entry_pts, spread_exit_pts) * point * lot * cs
+    slippage = (np.asarray(slippage_entry_pts, dtype=float) + float(slippage_exit_pts)) * point * lot * cs
+    commission = np.asarray(commission_entry, dtype=float) + np.asarray(commission_exit, dtype=float)
+    slippage, commission = np.broadcast_to(slippage, gross.shape), np.broadcast_to(commission, gross.shape)
+    return {
+        'gross_pnl_usd': gross,
+        'spread_cost_usd': spread_cost,
+        'slippage_usd': slippage,
+        'commission_total_usd': commission,
+        'net_pnl_usd': gross - (spread_cost + slippage + commission),
+    }
+
+
+def apply_cost_attribution(log, close_bid: np.ndarray, spread_pts: np.ndarray, lot: float,
+                           contract_size: float, point: float, slippage_pts: float) -> None:
+    """
+    Isi kolom biaya TradeLog (in place) dari bar entry/exit tiap trade. Exit market dihitung
+    dari close BID bar exit, exit SL/TP dari level tempat trade benar-benar terisi.
+    """
+    rows = log.rows
+    if not len(rows):
+        return
+    exit_i = rows['entry_index'] + rows['bars_held']
+    is_buy = rows['side'] == SIDES.index('BUY')
+    spread_exit = np.asarray(spread_pts, dtype=float)[exit_i]
+    is_level = np.isin(rows['reason'], _LEVEL_REASONS)
+    exit_bid = np.where(is_level, level_exit_bids(is_buy, rows['exit_price'], spread_exit, point, slippage_pts),
+                        np.asarray(close_bid, dtype=float)[exit_i])
+    costs = attribute_costs(
+        is_buy, rows['entry_price_ref_close_bid'], exit_bid,
+        rows['entry_spread_points'], spread_exit,
+        rows['entry_slippage_points'], slippage_pts, rows['commission_entry_usd'], rows['commission_exit_usd'],
+        lot, contract_size, point,
+    )
+    for name, values in costs.items():
+        rows[name] = values
+    rows['lot'] = float(lot)
@@ -0,0 +1,126 @@
+# Nama File: equity_downsample.py
+"""
+Downsampling kurva ekuitas berbasis array (satu panggilan per bulan, bukan per bar).
+
+Input: array penuh t_ms, equity, dan penanda event (exit / entry / forced close)
+sesuai urutan simulasi. Dua mode:
+  - 'minmax' (default): titik event + sampel periodik tiap N titik + (min, max, last)
+    per window W; jika melebihi cap diperkasar per bucket (min, max, last).
+    Hasil identik dengan _EquityDownsampler per-bar versi lama.
+  - 'lttb': Largest-Triangle-Three-Buckets dengan target jumlah titik = lebar
+    gambar dalam piksel, ditambah semua titik event.
+Output: list [(t_ms, equity)] terurut waktu, satu titik per timestamp.
+"""
+from __future__ import annotations
+import math
+
+import numpy as np
+
+# Urutan sisipan titik kandidat dalam satu add() versi lama (menentukan titik mana
+# yang dipertahankan saat timestamp kembar)
+_SLOT_EVT, _SLOT_PER, _SLOT_MIN, _SLOT_MAX, _SLOT_LAST = 0, 1, 2, 3, 4
+_N_SLOTS = 5
+
+DOWNSAMPLE_MODES = ('minmax', 'lttb')
+
+
+def _bucket_extrema(values: np.ndarray, size: int):
+    """(argmin, argmax, last) per bucket berurutan berukuran `size` (bucket terakhir boleh parsial)."""
+    n = len(values)
+    n_buckets = -(-n // size)
+    pad = n_buckets * size - n
+    offsets = np.arange(n_buckets) * size
+    lo = np.concatenate([values, np.full(pad, np.inf)]).reshape(n_buckets, size)
+    hi = np.concatenate([values, np.full(pad, -np.inf)]).reshape(n_buckets, size)
+    i_min = offsets + lo.argmin(axis=1)
+    i_max = offsets + hi.argmax(axis=1)
+    i_last = np.minimum(offsets + size, n) - 1
+    return i_min, i_max, i_last
+
+
+def _first_per_timestamp(t_ms: np.ndarray, idx: np.ndarray, seq: np.ndarray) -> np.ndarray:
+    """Urutkan kandidat menurut (t, seq) lalu ambil kandidat pertama untuk tiap t."""
+    order = np.lexsort((seq, t_ms[idx]))
+    idx = idx[order]
+    t_sorted = t_ms[idx]
+    keep = np.ones(len(idx), dtype=bool)
+    keep[1:] = t_sorted[1:] != t_sorted[:-1]
+    return idx[keep]
+
+
+def _minmax_indices(t_ms, eq, is_event, every_n: int, window: int, max_points: int) -> np.ndarray:
+    n = len(eq)
+    k = np.arange(n)
+    evt = k[is_event]
+    per = k[k % every_n == 0]
+    w_min, w_max, w_last = _bucket_extrema(eq, window)
+
+    idx = np.concatenate([evt, per, w_min, w_max, w_last])
+    seq = np.concatenate([
+        evt * _N_SLOTS + _SLOT_EVT,
+        per * _N_SLOTS + _SLOT_PER,
+        w_last * _N_SLOTS + _SLOT_MIN,   # titik window disisipkan saat window ditutup
+        w_last * _N_SLOTS + _SLOT_MAX,
+        w_last * _N_SLOTS + _SLOT_LAST,
+    ])
+    out = _first_per_timestamp(t_ms, idx, seq)
+
+    if len(out) > max_points:
+        step = int(math.ceil(len(out) / max_points))
+        b_min, b_max, b_last = _bucket_extrema(eq[out], step)
+        out = out[np.unique(np.concatenate([b_min, b_max, b_last]))]
+    return out
+
+
+def _lttb_indices(t_ms, eq, n_out: int) -> np.ndarray:
+    """Index titik terpilih LTTB (titik pertama & terakhir selalu ikut)."""
+    n = len(eq)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = (t_ms - t_ms[0]).astype(float)
+    y = eq
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    # rata-rata bucket berikutnya (bucket terakhir = titik terakhir) via cumsum
+    cx = np.concatenate([[0.0], np.cumsum(x)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+    nxt_start = edges[1:]
+    nxt_end = np.append(edges[2:], n)
+    cnt = np.maximum(nxt_end - nxt_start, 1)
+    avg_x = (cx[nxt_end] - cx[nxt_start]) / cnt
+    avg_y = (cy[nxt_end] - cy[nxt_start]) / cnt
+
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        s, e = edges[b], edges[b + 1]
+        area = np.abs((x[a] - avg_x[b]) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (avg_y[b] - y[a]))
+        a = s + int(area.argmax())
+        picked[b + 1] = a
+    return picked
+
+
+def downsample_equity(t_ms, eq, is_event, every_n_bars: int = 5, window_size: int = 20,
+                      max_points: int = 20000, mode: str = 'minmax', pixel_width: int = 4800) -> list:
+    """Kurva ekuitas ringkas [(t_ms, equity)] dari array penuh hasil simulasi."""
+    t_ms = np.asarray(t_ms, dtype=np.int64)
+    eq = np.asarray(eq, dtype=float)
+    is_event = np.asarray(is_event, dtype=bool)
+    if len(eq) == 0:
+        return []
+
+    if mode == 'lttb':
+        picked = np.union1d(_lttb_indices(t_ms, eq, max(3, int(pixel_width))), np.flatnonzero(is_event))
+        out = _first_per_timestamp(t_ms, picked, picked)
+    elif mode == 'minmax':
+        out = _minmax_indices(
+            t_ms, eq, is_event,
+            every_n=max(1, int(every_n_bars)),
+            window=max(2, int(window_size)),
+            max_points=max(1000, int(max_points)),
+        )
+    else:
+        raise ValueError(f"Mode downsample ekuitas tidak dikenal: {mode}")
+    return list(zip(t_ms[out].tolist(), eq[out].tolist()))
@@ -0,0 +1,122 @@
+# indicator_cache.py
+"""
+Cache indikator bersama untuk sweep parameter.
+
+Kolom indikator (BBands, ADX, ATR, ...) dihitung sekali per
+(simbol, timeframe, periode, indikator, parameter, versi data) lalu dipakai ulang:
+  - di memori (LRU) untuk run lain di proses yang sama,
+  - di disk (.npz) untuk proses worker lain dalam sweep yang sama / berikutnya.
+Versi data = versi partisi bar store (murah, dari metadata) bila bar berasal dari store;
+hanya data di luar store (terminal langsung, tick) yang di-hash (index + OHLC).
+"""
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.environ.get('INDICATOR_CACHE_DIR') or os.path.join(_REPO_ROOT, 'data', 'indicator_cache')
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """Hash singkat dari index waktu + OHLC, untuk memvalidasi entri cache."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(np.ascontiguousarray(df.index.asi8).tobytes())
+    for col in ('open', 'high', 'low', 'close'):
+        if col in df.columns:
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype=float)).tobytes())
+    return h.hexdigest()
+
+
+class IndicatorCache:
+    """Cache kolom indikator dua tingkat (memori + disk)."""
+
+    def __init__(self, cache_dir: str = None, max_memory_entries: int = 256, use_disk: bool = True):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_memory_entries = max(1, int(max_memory_entries))
+        self.use_disk = bool(use_disk)
+        self._memory = OrderedDict()   # key -> (columns, 2D array)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(symbol, timeframe, period: str, indicator: str, params: dict, fingerprint: str) -> str:
+        payload = json.dumps(
+            [str(symbol), int(timeframe), str(period), indicator, params, fingerprint],
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, symbol, timeframe, indicator: str, key: str) -> str:
+        return os.path.join(self.cache_dir, str(symbol), str(int(timeframe)), indicator, f"{key}.npz")
+
+    def _remember(self, key: str, entry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_or_compute(self, df: pd.DataFrame, symbol, timeframe, period: str,
+                       indicator: str, params: dict, compute, data_version: str = None) -> pd.DataFrame:
+        """
+        Kembalikan DataFrame indikator (index = df.index). `compute()` hanya
+        dipanggil jika entri belum ada di memori maupun disk. Tanpa data_version
+        (mis. BarStore.data_version), df di-hash sebagai versinya.
+        """
+        if data_version:
+            # df bisa potongan dari data versi ini (mis. tanpa baris warm-up): bentuk potongan ikut kunci
+            t = df.index.asi8
+            version = f"{data_version}|{len(t)}|{t[:1].sum()}|{t[-1:].sum()}|{t.sum()}"
+        else:
+            version = data_fingerprint(df)
+        key = self.make_key(symbol, timeframe, period, indicator, params, version)
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        elif self.use_disk:
+            path = self._disk_path(symbol, timeframe, indicator, key)
+            try:
+                with np.load(path, allow_pickle=False) as npz:
+                    entry = (list(npz['columns']), npz['values'])
+                self._remember(key, entry)
+            except (OSError, KeyError, ValueError):
+                entry = None
+
+        if entry is not None:
+            self.hits += 1
+            columns, values = entry
+            return pd.DataFrame(values, index=df.index, columns=columns)
+
+        self.misses += 1
+        result = compute()
+        if isinstance(result, pd.Series):
+            result = result.to_frame()
+        columns = [str(c) for c in result.columns]
+        values = result.to_numpy(dtype=float)
+        self._remember(key, (columns, values))
+
+        if self.use_disk:
+            path = self._disk_path(symbol, timeframe, indicator, key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path[:-4]}.tmp-{os.getpid()}.npz"
+                np.savez(tmp_path, columns=np.array(columns), values=values)
+                os.replace(tmp_path, path)
+            except OSError:
+                pass  # cache disk bersifat opsional
+        return pd.DataFrame(values, index=df.index, columns=columns)
+
+
+_caches = {}
+
+
+def get_indicator_cache(cache_dir: str = None) -> IndicatorCache:
+    """Instance cache bersama per folder (dipakai semua run di proses yang sama)."""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    if cache_dir not in _caches:
+        _caches[cache_dir] = IndicatorCache(cache_dir)
+    return _caches[cache_dir]
@@ -0,0 +1,93 @@
+# Nama File: intrabar.py
+"""
+Model jalur harga di dalam bar untuk bar ambigu (SL dan TP sama-sama tersentuh).
+
+Tanpa tick, urutan sentuhan high/low dalam satu bar tidak diketahui. Bar yang hanya
+menyentuh satu level tidak perlu model; hanya bar ambigu yang diputuskan di sini:
+  - 'sl_first' : SL dianggap kena lebih dulu (konservatif, default),
+  - 'ohlc'     : jalur O->L->H->C untuk bar naik (close > open), O->H->L->C untuk bar
+                 turun; doji -> ekstrem yang lebih dekat ke open lebih dulu,
+  - 'lower_tf' : sentuhan pertama dicari di bar timeframe lebih kecil (mis. M1) dari
+                 bar store, hanya untuk bar ambigu; bila SL & TP kena di bar kecil yang
+                 sama -> heuristik 'ohlc' pada bar kecil itu. Tanpa data -> 'ohlc'.
+Keputusan deterministik dan bekerja atas array (banyak bar sekaligus).
+"""
+from __future__ import annotations
+
+import numpy as np
+
+INTRABAR_MODELS = ('sl_first', 'ohlc', 'lower_tf')
+
+
+def low_first_ohlc(open_, high, low, close) -> np.ndarray:
+    """True bila low dianggap tersentuh sebelum high (heuristik OHLC)."""
+    open_, high, low, close = (np.asarray(a, dtype=float) for a in (open_, high, low, close))
+    return (close > open_) | ((close == open_) & (open_ - low <= high - open_))
+
+
+class IntrabarModel:
+    """Penentu urutan sentuhan SL/TP pada bar ambigu; `lower_tf_loader(start_s, end_s)` -> rates atau None."""
+
+    def __init__(self, mode: str, open_, high, low, close, t_ms=None, bar_ms: int = None, lower_tf_loader=None):
+        mode = str(mode or 'sl_first').lower()
+        if mode not in INTRABAR_MODELS:
+            raise ValueError(f"intrabar_model '{mode}' tidak dikenal (pilihan: {', '.join(INTRABAR_MODELS)})")
+        self.mode = mode
+        self.open, self.high, self.low, self.close = (np.asarray(a, dtype=float) for a in (open_, high, low, close))
+        self.t_ms = None if t_ms is None else np.asarray(t_ms, dtype=np.int64)
+        self.bar_ms = bar_ms
+        self.lower_tf_loader = lower_tf_loader if mode == 'lower_tf' else None
+        self._months = {}          # bulan (datetime64[M]) -> rates timeframe kecil atau None
+        self.ambiguous_bars = 0    # jumlah bar ambigu yang diputuskan
+        self.lower_tf_resolved = 0  # ... yang diputuskan dari data timeframe kecil
+
+    def sl_first(self, bars, is_buy, sl_level, tp_level) -> np.ndarray:
+        """Untuk bar ambigu `bars`: True bila SL kena sebelum TP."""
+        bars = np.atleast_1d(np.asarray(bars, dtype=np.int64))
+        is_buy, sl_level, tp_level = (np.broadcast_to(np.asarray(a), bars.shape) for a in (is_buy, sl_level, tp_level))
+        self.ambiguous_bars += len(bars)
+        if self.mode == 'sl_first':
+            return np.ones(len(bars), dtype=bool)
+        # SL posisi BUY ada di sisi low, SL posisi SELL di sisi high
+        low_first = low_first_ohlc(self.open[bars], self.high[bars], self.low[bars], self.close[bars])
+        out = np.where(is_buy, low_first, ~low_first)
+        if self.lower_tf_loader is not None:
+            for k, i in enumerate(bars):
+                decided = self._lower_tf_sl_first(int(i), bool(is_buy[k]), float(sl_level[k]), float(tp_level[k]))
+                if decided is not None:
+                    out[k] = decided
+                    self.lower_tf_resolved += 1
+        return out
+
+    def _lower_tf(self, start_ms: int, end_ms: int):
+        """Bar timeframe kecil dengan time di [start_ms, end_ms); dimuat sekali per bulan."""
+        month = np.datetime64(int(start_ms), 'ms').astype('datetime64[M]')
+        if month not in self._months:
+            lo_s = int(month.astype('datetime64[s]').astype(np.int64))
+            hi_s = int((month + 1).astype('datetime64[s]').astype(np.int64)) - 1
+            rates = self.lower_tf_loader(lo_s, hi_s)
+            self._months[month] = rates if rates is not None and len(rates) else None
+        rates = self._months[month]
+        if rates is None:
+            return None
+        a, b = np.searchsorted(rates['time'], [int(start_ms) // 1000, int(end_ms) // 1000])
+        return rates[a:b]
+
+    def _lower_tf_sl_first(self, i: int, is_buy: bool, sl: float, tp: float):
+        """Keputusan dari bar timeframe kecil di dalam bar i, atau None bila data tidak membantu."""
+        if self.t_ms is None or not self.bar_ms:
+            return None
+        rates = self._lower_tf(self.t_ms[i], self.t_ms[i] + self.bar_ms)
+        if rates is None or not len(rates):
+            return None
+        lo, hi = rates['low'], rates['high']
+        sl_hits = np.flatnonzero(lo <= sl if is_buy else hi >= sl)
+        tp_hits = np.flatnonzero(hi >= tp if is_buy else lo <= tp)
+        if not len(sl_hits) or not len(tp_hits):
+            # hanya satu sisi yang tampak di data kecil (mis. beda feed); bar kosong -> tidak memutuskan
+            return bool(len(sl_hits)) if len(sl_hits) or len(tp_hits) else None
+        if sl_hits[0] != tp_hits[0]:
+            return bool(sl_hits[0] < tp_hits[0])
+        j = sl_hits[0]
+        low_first = bool(low_first_ohlc(rates['open'][j], hi[j], lo[j], rates['close'][j]))
+        return low_first if is_buy else not low_first
@@ -0,0 +1,133 @@
+# Nama File: monte_carlo.py
+"""
+Monte Carlo urutan trade: estimasi ketahanan (robustness) sebuah hasil backtest.
+
+PnL per trade di-resample menjadi matriks path x trade sekaligus, lalu saldo,
+drawdown & ruin dihitung per baris dengan operasi array (tanpa loop per path).
+Metode:
+  - 'shuffle'  : permutasi urutan trade (hasil akhir sama, drawdown berubah)
+  - 'bootstrap': sampling trade dengan pengembalian (i.i.d.)
+  - 'block'    : circular block bootstrap, blok trade berurutan dipertahankan
+                 sehingga streak menang/kalah tetap terwakili
+Path diproses per batch agar memori tetap kecil untuk ribuan path.
+monte_carlo_trades menganggap semua trade satu akun bersambung (rolling / kontinu);
+monte_carlo_months me-reset akun tiap bulan seperti equity_mode per_month.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from Library.reporting.metrics import running_drawdown
+
+MC_METHODS = ('shuffle', 'bootstrap', 'block')
+_BATCH_CELLS = 4_000_000   # batas elemen matriks per batch (~32 MB float64)
+
+
+def default_block_size(n_trades: int) -> int:
+    """Panjang blok default ~ n^(1/3) (aturan umum block bootstrap)."""
+    return max(1, int(round(n_trades ** (1 / 3))))
+
+
+def resample_indices(n_trades: int, n_paths: int, method: str = 'block', block_size: int = None,
+                     rng: np.random.Generator = None) -> np.ndarray:
+    """Matriks index trade (n_paths x n_trades) untuk metode resampling terpilih."""
+    rng = rng if rng is not None else np.random.default_rng()
+    if method == 'shuffle':
+        return rng.permuted(np.broadcast_to(np.arange(n_trades), (n_paths, n_trades)), axis=1)
+    if method == 'bootstrap':
+        return rng.integers(0, n_trades, size=(n_paths, n_trades))
+    if method == 'block':
+        b = max(1, int(block_size or default_block_size(n_trades)))
+        n_blocks = -(-n_trades // b)
+        starts = rng.integers(0, n_trades, size=(n_paths, n_blocks, 1))
+        idx = (starts + np.arange(b)) % n_trades
+        return idx.reshape(n_paths, n_blocks * b)[:, :n_trades]
+    raise ValueError(f"Metode Monte Carlo tidak dikenal: {method}")
+
+
+def _percentiles(values: np.ndarray, qs) -> dict:
+    return {f"p{q:02d}": float(v) for q, v in zip(qs, np.percentile(values, qs))}
+
+
+def _simulate_paths(pnl: np.ndarray, initial_balance: float, n_paths: int, method: str, block_size,
+                    ruin_level: float, rng: np.random.Generator):
+    """(saldo akhir, max drawdown %, ruin) per path untuk satu akun yang memakai seluruh `pnl`."""
+    n = len(pnl)
+    finals = np.empty(n_paths)
+    max_dd_pct = np.empty(n_paths)
+    ruined = np.empty(n_paths, dtype=bool)
+    batch = max(1, _BATCH_CELLS // n)
+    for lo in range(0, n_paths, batch):
+        hi = min(lo + batch, n_paths)
+        idx = resample_indices(n, hi - lo, method, block_size, rng)
+        balance = float(initial_balance) + np.cumsum(pnl[idx], axis=1)
+        balance[np.minimum.accumulate(balance, axis=1) <= 0] = 0.0   # saldo habis = akun berhenti (margin call)
+        peak, dd = running_drawdown(balance, start_peak=initial_balance)
+        dd_pct = np.divide(dd, peak, out=np.zeros_like(dd), where=peak > 0)
+        finals[lo:hi] = balance[:, -1]
+        max_dd_pct[lo:hi] = dd_pct.max(axis=1) * 100
+        ruined[lo:hi] = (balance <= ruin_level).any(axis=1)
+    return finals, max_dd_pct, ruined
+
+
+def _summary(finals, max_dd_pct, ruined, initial_balance: float, n_paths: int, method: str, block_size,
+             ruin_pct: float, seed, account: str) -> dict:
+    return {
+        'paths': int(n_paths),
+        'method': method,
+        'block_size': block_size if method == 'block' else None,
+        'seed': seed,
+        'account': account,
+        'final_balance': {**_percentiles(finals, (5, 25, 50, 75, 95)), 'mean': float(finals.mean())},
+        'max_drawdown_pct': {**_percentiles(max_dd_pct, (50, 75, 95, 99)), 'max': float(max_dd_pct.max())},
+        'ruin_pct': float(ruin_pct),
+        'prob_ruin': float(ruined.mean()),
+        'prob_loss': float((finals < initial_balance).mean()),
+    }
+
+
+def monte_carlo_trades(pnl, initial_balance: float, n_paths: int = 1000, method: str = 'block',
+                       block_size: int = None, ruin_pct: float = 50.0, seed: int = None) -> dict:
+    """
+    Distribusi saldo akhir, max drawdown (% dari puncak berjalan) dan peluang ruin
+    (saldo pernah <= initial x (1 - ruin_pct%)) dari resampling PnL per trade.
+    Semua trade dianggap satu akun bersambung (account='chained', mis. rolling / kontinu).
+    Saldo yang menyentuh 0 tetap 0 sampai akhir path.
+    """
+    pnl = np.asarray(pnl, dtype=float)
+    n = len(pnl)
+    if n == 0 or n_paths <= 0:
+        return {}
+    rng = np.random.default_rng(seed)
+    ruin_level = float(initial_balance) * (1 - float(ruin_pct) / 100)
+    block_size = int(block_size or default_block_size(n))
+    finals, max_dd_pct, ruined = _simulate_paths(pnl, initial_balance, n_paths, method, block_size, ruin_level, rng)
+    return _summary(finals, max_dd_pct, ruined, initial_balance, n_paths, method, block_size, ruin_pct, seed, 'chained')
+
+
+def monte_carlo_months(pnl_by_month, initial_balance: float, n_paths: int = 1000, method: str = 'block',
+                       block_size: int = None, ruin_pct: float = 50.0, seed: int = None) -> dict:
+    """
+    Seperti monte_carlo_trades untuk equity_mode per_month (account='per_month'): tiap bulan
+    di-resample terpisah dari initial_balance. Per path: saldo akhir = initial + jumlah profit
+    bulanan, drawdown = drawdown bulanan terbesar, ruin = ada bulan yang ruin.
+    Tanpa block_size, panjang blok mengikuti jumlah trade tiap bulan (dilaporkan per bulan).
+    """
+    months = [np.asarray(p, dtype=float) for p in pnl_by_month]
+    months = [p for p in months if len(p)]
+    n = sum(len(p) for p in months)
+    if n == 0 or n_paths <= 0:
+        return {}
+    rng = np.random.default_rng(seed)
+    ruin_level = float(initial_balance) * (1 - float(ruin_pct) / 100)
+    finals = np.full(n_paths, float(initial_balance))
+    max_dd_pct = np.zeros(n_paths)
+    ruined = np.zeros(n_paths, dtype=bool)
+    block_sizes = [int(block_size or default_block_size(len(pnl))) for pnl in months]
+    for pnl, b in zip(months, block_sizes):
+        m_finals, m_dd, m_ruined = _simulate_paths(pnl, initial_balance, n_paths, method, b, ruin_level, rng)
+        finals += m_finals - float(initial_balance)
+        np.maximum(max_dd_pct, m_dd, out=max_dd_pct)
+        ruined |= m_ruined
+    return _summary(finals, max_dd_pct, ruined, initial_balance, n_paths, method,
+                    int(block_size) if block_size else block_sizes, ruin_pct, seed, 'per_month')
@@ -4,12 +4,12 @@ import subprocess
 import platform
 import itertools
 import os
-import math
 import time
 import sys
 import json
 import threading
 import queue
+from collections import deque
 from datetime import datetime
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn, TaskProgressColumn
@@ -20,48 +20,18 @@ from rich.layout import Layout
 from rich.align import Align
 import argparse
 
-HISTORY_DIR = os.path.join('Backtester', 'History_Logs')
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(current_dir)
+sys.path.append(parent_dir)
 
-def load_history(symbol: str):
-    """Memuat data histori dari file JSON spesifik untuk satu simbol."""
-    history_file = os.path.join(HISTORY_DIR, f"{symbol}_history.json")
-    try:
-        if not os.path.exists(history_file):
-            return {} # Kembalikan dictionary kosong jika file belum ada
-        with open(history_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return {}
-
-def save_history(symbol: str, data: dict):
-    """Menyimpan data histori ke file JSON spesifik untuk satu simbol."""
-    os.makedirs(HISTORY_DIR, exist_ok=True) # Pastikan folder histori ada
-    history_file = os.path.join(HISTORY_DIR, f"{symbol}_history.json")
-    with open(history_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
-
-def get_run_id(params: dict) -> str:
-    """ID unik kombinasi parameter (toleran nama lama/baru)."""
-    def pick(*names, default=None):
-        for n in names:
-            if n in params and params.get(n) is not None:
-                return params.get(n)
-        return default
-
-    use_adx = bool(pick('use_adx', 'use_adx_filter', default=False))
-    use_sl  = bool(pick('use_sl', 'use_stop_loss', default=False))
-
-    norm = {
-        'lot_size':    pick('lot_size', 'fixed_lot_size'),
-        'start_time':  pick('start_time', 'trade_start_time'),
-        'end_time':    pick('end_time', 'trade_end_time'),
-        'wave_period': pick('wave_period'),
-        'use_adx':     use_adx,
-        'adx_threshold': pick('adx_threshold') if use_adx else None,
-        'use_sl':      use_sl,
-        'sl_points':   pick('sl_points', 'stop_loss_points') if use_sl else None,
-    }
-    return json.dumps(norm, sort_keys=True)
+from result_store import ResultStore, get_run_id
+
+HISTORY_DIR = os.path.join('Backtester', 'History_Logs')
+WORKER_MEM_MB = 600  # Perkiraan RAM per proses worker (interpreter + pandas + matplotlib + data)
+# Thread BLAS/OpenMP dibatasi 1 per worker agar N worker tidak saling berebut core
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                   'NUMEXPR_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
 
 def simulate_equity_stops(equity_curve, initial_balance, gain_target_percent, loss_limit_percent):
     if not equity_curve: return "Data kurva ekuitas tidak tersedia."
@@ -86,24 +56,135 @@ def simulate_equity_stops(equity_curve, initial_balance, gain_target_percent, lo
     return "Equity tidak menyentuh target TP/SL."
 
 def output_reader(proc, out_queue):
-    """Membaca output dari proses dan memasukkannya ke dalam queue."""
+    """Membaca output proses ke queue bersama sebagai (proc, baris); (proc, None) setelah proses selesai."""
     try:
         for line in iter(proc.stdout.readline, b''):
-            out_queue.put(line.decode('utf-8').strip())
+            out_queue.put((proc, line.decode('utf-8').strip()))
     except Exception as e:
         # Mungkin terjadi error jika pipe ditutup secara tak terduga
-        out_queue.put(json.dumps({"status": f"Reader error: {e}", "progress": 1, "total": 1}))
+        out_queue.put((proc, json.dumps({"status": f"Reader error: {e}", "progress": 1, "total": 1})))
+    finally:
+        proc.wait()
+        out_queue.put((proc, None))
 
-def run_parallel_backtests(symbol: str, symbol_history: dict):
-    error_log_path = os.path.join('Backtester', 'error_log.txt')
-    if os.path.exists(error_log_path):
-        os.remove(error_log_path)
-    console = Console()
+def stderr_reader(proc, lines: list):
+    """Mengumpulkan stderr proses (dibaca terus agar pipe tidak penuh)."""
+    try:
+        for line in iter(proc.stderr.readline, b''):
+            lines.append(line.decode('utf-8', errors='ignore'))
+    except Exception:
+        pass
+
+def worker_env() -> dict:
+    """Environment untuk proses worker: thread BLAS/OpenMP di-pin ke 1."""
+    env = os.environ.copy()
+    for name in THREAD_ENV_VARS:
+        env[name] = '1'
+    return env
+
+def available_memory_mb():
+    """RAM tersedia (MB) via psutil atau /proc/meminfo; None jika tidak diketahui."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / 2**20
+    except ImportError:
+        pass
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def default_worker_count(max_workers: int = None, mem_budget_gb: float = None, worker_mem_mb: float = WORKER_MEM_MB) -> int:
+    """Jumlah worker = jumlah core (atau max_workers), dibatasi budget memori."""
+    n = max_workers or os.cpu_count() or 1
+    if mem_budget_gb is not None:
+        budget_mb = mem_budget_gb * 1024
+    else:
+        avail = available_memory_mb()
+        budget_mb = avail * 0.8 if avail else None
+    if budget_mb:
+        n = min(n, int(budget_mb // worker_mem_mb))
+    return max(1, n)
+
+def chart_workers_per_job(num_workers: int) -> int:
+    """Proses render chart per worker: sisa core dibagi rata (0 = chart dirender di proses worker sendiri)."""
+    return max(0, (os.cpu_count() or 1) // max(1, num_workers) - 1)
+
+def estimate_job_cost(params: dict) -> float:
+    """Perkiraan relatif biaya satu kombinasi (untuk mengurutkan antrian, terberat dulu)."""
+    months = max(1, int(params.get('end_month', 7)) - int(params.get('start_month', 1)) + 1)
+    cost = float(months)
+    if params.get('engine', 'loop') == 'loop':
+        cost *= 4.0
+    elif params.get('engine') == 'tick':
+        cost *= 3.0
+    if params.get('plot_trades'):
+        cost *= 5.0
+    return cost
+
+def split_balanced(items: list, costs: list, n_chunks: int) -> list:
+    """Bagi items ke n_chunks dengan total biaya seimbang (greedy, terberat dulu)."""
+    chunks = [[] for _ in range(max(1, min(n_chunks, len(items))))]
+    loads = [0.0] * len(chunks)
+    for cost, item in sorted(zip(costs, items), key=lambda x: -x[0]):
+        k = loads.index(min(loads))
+        chunks[k].append(item)
+        loads[k] += cost
+    return [(load, chunk) for load, chunk in zip(loads, chunks) if chunk]
+
+def publish_shared_dataset(symbol: str, full_params: list, manifest_path: str):
+    """
+    Muat bar semua bulan sweep + BBands/ADX untuk semua panjang yang dipakai,
+    publish sekali ke shared memory dan tulis manifest untuk worker.
+    Return SharedDataset (pemilik segmen) atau None jika gagal.
+    """
+    from Library.data_handler.offline_mt5 import load_mt5, OfflineMT5
+    from Library.data_handler.bar_store import BarStore
+    from shared_data import publish_sweep_dataset, continuous_period, default_warmup_bars
+
+    first = full_params[0]
+    mt5 = OfflineMT5(store_root=first.get('bar_store_dir')) if first.get('offline') else load_mt5(allow_offline=True)
+    if not mt5.initialize():
+        return None
+    try:
+        months = {
+            (int(p.get('year', 2025)), m)
+            for p in full_params if not p.get('continuous')
+            for m in range(int(p.get('start_month', 1)), int(p.get('end_month', 7)) + 1)
+        }
+        # Mode kontinu: satu rentang (bulan + prefix warm-up) per panjang warm-up, kunci sama dengan worker
+        spans = {
+            continuous_period(
+                int(p.get('year', 2025)), int(p.get('start_month', 1)), int(p.get('end_month', 7)),
+                p.get('warmup_bars') or default_warmup_bars(int(p.get('wave_period', 36)),
+                                                            int(p.get('adx_period', 14)) if p.get('use_adx') else 0),
+                mt5.TIMEFRAME_M5,
+            )
+            for p in full_params if p.get('continuous')
+        }
+        bb_lengths = {int(p.get('wave_period', 36)) for p in full_params}
+        adx_periods = {int(p.get('adx_period', 14)) for p in full_params if p.get('use_adx')}
+        bar_store = None if first.get('no_bar_store') else BarStore(first.get('bar_store_dir'))
+        dataset = publish_sweep_dataset(mt5, symbol, mt5.TIMEFRAME_M5, months, bb_lengths, adx_periods,
+                                        bar_store=bar_store, spans=spans)
+    finally:
+        mt5.shutdown()
+    try:
+        dataset.save_manifest(manifest_path)
+    except BaseException:
+        dataset.close()
+        raise
+    return dataset
+
+def sweep_grid(symbol: str):
+    """Parameter dasar & grid optimasi (dipakai sweep biasa maupun walk-forward)."""
     # =================================================================
     # >> AREA KONFIGURASI <<
     # =================================================================
-    BATCH_SIZE = 3
-    # --- PERUBAHAN 1: Gunakan variabel 'symbol' yang diterima dari argumen ---
     base_params = {
         'symbol': symbol, 'year': 2025,
         'initial_balance': 10000.0,
@@ -120,15 +201,173 @@ def run_parallel_backtests(symbol: str, symbol_history: dict):
         'use_sl': [False]
     }
     # =================================================================
+    return base_params, optimization_params
 
+def grid_combinations(optimization_params: dict) -> list:
+    """Semua kombinasi (product) dari grid optimasi."""
     keys, values = zip(*optimization_params.items())
-    all_possible_combinations = [dict(zip(keys, v)) for v in itertools.product(*values)]
+    return [dict(zip(keys, v)) for v in itertools.product(*values)]
+
+def run_job_pool(jobs: list, num_workers: int, header: str, console: Console, error_log_path: str):
+    """Jalankan job (biaya, label, perintah) dengan maksimal num_workers proses sekaligus + tampilan live."""
+    # Antrian terberat dulu: worker yang kosong langsung mengambil job berikutnya
+    pending = deque(sorted(jobs, key=lambda j: -j[0]))
+    env = worker_env()
+
+    total_completed = 0
+    progress_bar = Progress(TextColumn("[bold blue]Total Progress:"), BarColumn(bar_width=None), TaskProgressColumn(), TextColumn("•"), TimeElapsedColumn())
+    main_task = progress_bar.add_task("Processing...", total=len(jobs))
+    
+    layout = Layout()
+    layout.split(
+        Layout(name="header", size=3),
+        Layout(name="main_progress", size=3),
+        Layout(name="active_tasks", ratio=2),
+        Layout(name="footer", ratio=1, minimum_size=5)
+    )
+    layout["header"].update(Align.center(header))
+    layout["main_progress"].update(progress_bar)
+    layout["footer"].update(Panel("Menunggu proses... Laporan error akan muncul di sini jika ada.", title="[yellow]Log Error[/yellow]"))
+    
+    error_logs = []
+    # Status dari semua worker + tanda selesai masuk ke satu queue; loop utama menunggu event (tanpa polling)
+    events = queue.Queue()
+    active_processes = {}
+
+    def start_job():
+        _, param_str, command_list = pending.popleft()
+        proc = subprocess.Popen(command_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                cwd=parent_dir, env=env)
+        t = threading.Thread(target=output_reader, args=(proc, events))
+        t.daemon = True
+        t.start()
+        # stderr dibaca terus-menerus agar pipe tidak penuh dan worker tidak macet
+        stderr_lines = []
+        t_err = threading.Thread(target=stderr_reader, args=(proc, stderr_lines))
+        t_err.daemon = True
+        t_err.start()
+        active_processes[proc] = {
+            "params": param_str,
+            "stderr_thread": t_err,
+            "stderr_lines": stderr_lines,
+            "status_msg": "Inisialisasi...",
+            "progress": 0,
+            "total": 1
+        }
+
+    def handle_event(proc, line):
+        nonlocal total_completed
+        data = active_processes[proc]
+        if line is not None:
+            try:
+                status_data = json.loads(line)
+                data["status_msg"] = status_data.get("status", data["status_msg"])
+                data["progress"] = status_data.get("progress", data["progress"])
+                data["total"] = status_data.get("total", data["total"])
+            except json.JSONDecodeError:
+                data["status_msg"] = line
+            return
+        # worker selesai: slotnya langsung dipakai job berikutnya
+        del active_processes[proc]
+        total_completed += 1
+        if proc.returncode != 0:
+            data['stderr_thread'].join(timeout=1)
+            error_message = "".join(data['stderr_lines']).strip()
+            full_error_log = f"❌ Error pada Parameter: {data['params']}\n---\n{error_message}\n\n"
+            with open(error_log_path, 'a', encoding='utf-8') as f:
+                f.write(full_error_log)
+            error_logs.append(f"❌ [bold red]Error pada: {data['params']}[/bold red] (Detail lihat di {error_log_path})")
+            layout["footer"].update(Panel("\n".join(error_logs), title="[yellow]Log Error[/yellow]", border_style="yellow"))
+
+    def render():
+        task_table = Table(title=f"Worker Aktif {len(active_processes)}/{num_workers} • Antrian {len(pending)}", expand=True)
+        task_table.add_column("No.", style="magenta", width=5)
+        task_table.add_column("Parameter Aktif", style="cyan", ratio=3)
+        task_table.add_column("Status Terkini", style="yellow", ratio=2)
+        task_table.add_column("Progress Langkah", style="green", ratio=2)
+        for idx, data in enumerate(active_processes.values()):
+            step_progress = Progress(BarColumn(), TextColumn("{task.completed}/{task.total}"))
+            step_progress.add_task("step", total=data['total'], completed=data['progress'])
+            task_table.add_row(str(idx + 1), data['params'], data['status_msg'], step_progress)
+        progress_bar.update(main_task, completed=total_completed)
+        layout["active_tasks"].update(Align.center(task_table))
+
+    with Live(layout, console=console, screen=True, redirect_stderr=False, vertical_overflow="visible"):
+        while pending or active_processes:
+            # Isi slot worker yang kosong dari antrian
+            while pending and len(active_processes) < num_workers:
+                start_job()
+            render()
+            # Blok sampai ada status / worker selesai, lalu proses semua event yang sudah mengantri
+            event = events.get()
+            while event is not None:
+                handle_event(*event)
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    event = None
+        render()
+
+def run_successive_halving(symbol: str, base_params: dict, combinations: list, num_workers: int, console: Console,
+                           error_log_path: str, eta: int = 3, min_months: int = 1, max_candidates: int = None,
+                           sampler: str = 'random', metric: str = 'balance_score') -> list:
+    """
+    Saring kombinasi dengan successive halving atas bulan-bulan sweep; bulan tiap rung dihitung
+    paralel ke checkpoint lalu dinilai di launcher. Return kombinasi finalis (tanpa base_params).
+    """
+    from adaptive_search import successive_halving
+    from Library.data_handler.offline_mt5 import load_mt5
+
+    year = int(base_params.get('year', 2025))
+    months = [(year, m) for m in range(int(base_params.get('start_month', 1)), int(base_params.get('end_month', 7)) + 1)]
+    full_params = [{**base_params, **p} for p in combinations]
+
+    def _fill(param_sets, rung_months):
+        fill_month_checkpoints(symbol, param_sets, rung_months, num_workers, console, error_log_path,
+                               f"[bold]Successive Halving [cyan]{symbol}[/cyan]: {len(param_sets)} kandidat x {len(rung_months)} bulan[/bold]")
+
+    mt5 = load_mt5(allow_offline=True)
+    if not mt5.initialize():
+        console.print(f"[bold red]initialize() gagal, error code = {mt5.last_error()}[/bold red]")
+        return []
+    try:
+        finalists, history = successive_halving(full_params, mt5, months, eta=eta, min_months=min_months, metric=metric,
+                                                max_candidates=max_candidates, sampler=sampler, fill=_fill,
+                                                status=lambda data: None)
+    finally:
+        mt5.shutdown()
+
+    table = Table(title=f"Successive Halving {symbol} ({metric})")
+    table.add_column("Rung", justify="right")
+    table.add_column("Bulan", justify="right")
+    table.add_column("Kandidat", justify="right")
+    table.add_column("Naik", justify="right")
+    table.add_column("Skor Terbaik", justify="right")
+    for h in history:
+        table.add_row(str(h['rung']), str(len(h['months'])), str(h['candidates']), str(h['promoted']),
+                      f"{h['best_score']:,.2f}" if h['best_score'] is not None else "N/A")
+    console.print(table)
+    month_runs = sum(h['candidates'] * len(h['months']) for h in history)
+    console.print(f"[bold]Backtest bulanan:[/bold] {month_runs} (grid penuh: {len(combinations) * len(months)})")
+    return [{k: v for k, v in p.items() if k not in base_params} for p in finalists]
+
+def run_parallel_backtests(symbol: str, store: ResultStore, mode: str = 'process',
+                           max_workers: int = None, mem_budget_gb: float = None, shared_memory: bool = False,
+                           resume: bool = False, metrics_only: bool = False, search: str = 'grid',
+                           eta: int = 3, min_months: int = 1, max_candidates: int = None,
+                           sampler: str = 'random', search_metric: str = 'balance_score', abort_params: dict = None):
+    error_log_path = os.path.join('Backtester', 'error_log.txt')
+    if os.path.exists(error_log_path):
+        os.remove(error_log_path)
+    console = Console()
+    num_workers = default_worker_count(max_workers, mem_budget_gb)
+    base_params, optimization_params = sweep_grid(symbol)
+    all_possible_combinations = grid_combinations(optimization_params)
     total_possible = len(all_possible_combinations)
 
-    # --- Logika filter yang sekarang akan bekerja karena `symbol_history` sudah didefinisikan ---
+    # --- Kombinasi yang sudah ada di store (unique index symbol+run_id) dilewati ---
     console.print("[yellow]Mengecek histori untuk melewati backtest yang sudah ada...[/yellow]")
-    past_runs = symbol_history.get('all_runs', [])
-    past_run_ids = {get_run_id(run['parameters']) for run in past_runs}
+    past_run_ids = store.run_ids(symbol, abort_params)
 
     combinations_to_run = []
     for params in all_possible_combinations:
@@ -146,13 +385,20 @@ def run_parallel_backtests(symbol: str, symbol_history: dict):
             title="[bold blue]Status Proses[/bold blue]", expand=False))
         return None 
 
+    if mode == 'sweep':
+        mode_info = "[bold]Mode:[/bold] sweep in-process (data & indikator dimuat sekali per proses)\n"
+    else:
+        mode_info = "[bold]Mode:[/bold] satu proses worker per kombinasi\n"
+    mode_info += f"[bold]Jumlah Worker:[/bold] {num_workers} (core: {os.cpu_count()}, ~{WORKER_MEM_MB} MB/worker)"
+    if search == 'halving':
+        mode_info += (f"\n[bold]Pencarian:[/bold] successive halving (eta {eta}, mulai {min_months} bulan, metrik {search_metric}"
+                      + (f", maks {max_candidates} kandidat via sampler {sampler}" if max_candidates else "") + ")")
     panel_info = (
         f"[bold]Total Semua Kombinasi Parameter:[/bold] {total_possible}\n"
         f"[bold yellow]Sudah Pernah Dites (Dilewati):[/bold yellow] {num_skipped}\n"
         f"--------------------------------------------------\n"
         f"[bold green]Akan Dites Sekarang:[/bold green] {num_to_run}\n\n"
-        f"[bold]Ukuran Batch:[/bold] {BATCH_SIZE} proses/kelompok\n"
-        f"[bold]Total Batch Baru:[/bold] {math.ceil(num_to_run / BATCH_SIZE)}"
+        f"{mode_info}"
     )
     console.print(Panel(panel_info, title="[bold blue]Konfigurasi Tes Paralel (Update)[/bold blue]", expand=False))
 
@@ -162,114 +408,186 @@ def run_parallel_backtests(symbol: str, symbol_history: dict):
     except (KeyboardInterrupt, EOFError):
         console.print("\n[yellow]Proses dibatalkan.[/yellow]"); return None
 
+    if search == 'halving':
+        combinations_to_run = run_successive_halving(symbol, base_params, combinations_to_run, num_workers, console,
+                                                     error_log_path, eta, min_months, max_candidates, sampler, search_metric)
+        if not combinations_to_run:
+            console.print("[bold red]Pencarian adaptif tidak menghasilkan kandidat.[/bold red]")
+            return None
+        resume = True  # semua bulan finalis sudah ada di checkpoint dari rung terakhir
+
     # --- Sisa kode di bawah ini sudah benar dan tidak perlu diubah ---
     launcher_dir = os.path.dirname(os.path.abspath(__file__))
     worker_script_path = os.path.join(launcher_dir, 'worker_backtest.py')
     python_executable = sys.executable
-    total_completed = 0
-    progress_bar = Progress(TextColumn("[bold blue]Total Progress:"), BarColumn(bar_width=None), TaskProgressColumn(), TextColumn("•"), TimeElapsedColumn())
-    main_task = progress_bar.add_task("Processing...", total=num_to_run)
-    
-    layout = Layout()
-    layout.split(
-        Layout(name="header", size=3),
-        Layout(name="main_progress", size=3),
-        Layout(name="active_tasks", ratio=2),
-        Layout(name="footer", ratio=1, minimum_size=5)
-    )
-    layout["header"].update(Align.center(f"[bold]Memulai Backtest Paralel untuk [cyan]{symbol}[/cyan][/bold]")) # Menggunakan `symbol` dari argumen
-    layout["main_progress"].update(progress_bar)
-    layout["footer"].update(Panel("Menunggu proses... Laporan error akan muncul di sini jika ada.", title="[yellow]Log Error[/yellow]"))
-    
-    error_logs = []
 
-    with Live(layout, console=console, screen=True, redirect_stderr=False, vertical_overflow="visible") as live:
-        for i in range(0, num_to_run, BATCH_SIZE):
-            batch = combinations_to_run[i:i + BATCH_SIZE]
-            current_batch_num = (i // BATCH_SIZE) + 1
-            total_batches = math.ceil(num_to_run / BATCH_SIZE)
-            active_processes = {}
-
-            for params in batch:
-                current_params = {**base_params, **params}
-                cmd_args_list = []
-                for key, value in current_params.items():
-                    if isinstance(value, bool) and value: cmd_args_list.append(f'--{key}')
-                    elif not isinstance(value, bool): cmd_args_list.append(f'--{key} {value}')
-                
-                command_list = [python_executable, worker_script_path] + " ".join(cmd_args_list).split()
-                proc = subprocess.Popen(command_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=os.path.dirname(launcher_dir))
-
-                q = queue.Queue()
-                t = threading.Thread(target=output_reader, args=(proc, q))
-                t.daemon = True
-                t.start()
-
-                param_str = ", ".join(f"{k}={v}" for k,v in params.items())
-                active_processes[proc] = {
-                    "params": param_str,
-                    "queue": q,
-                    "thread": t,
-                    "status_msg": "Inisialisasi...",
-                    "progress": 0,
-                    "total": 1
-                }
-
-            while active_processes:
-                task_table = Table(title=f"Batch {current_batch_num}/{total_batches}", expand=True)
-                task_table.add_column("No.", style="magenta", width=5)
-                task_table.add_column("Parameter Aktif", style="cyan", ratio=3)
-                task_table.add_column("Status Terkini", style="yellow", ratio=2)
-                task_table.add_column("Progress Langkah", style="green", ratio=2)
-
-                for proc, data in active_processes.items():
-                    try:
-                        while True: 
-                            line = data["queue"].get_nowait()
-                            try:
-                                status_data = json.loads(line)
-                                data["status_msg"] = status_data.get("status", data["status_msg"])
-                                data["progress"] = status_data.get("progress", data["progress"])
-                                data["total"] = status_data.get("total", data["total"])
-                            except json.JSONDecodeError:
-                                data["status_msg"] = line 
-                    except queue.Empty:
-                        pass
-
-                done_procs = []
-                for idx, (proc, data) in enumerate(active_processes.items()):
-                    if proc.poll() is not None:
-                        done_procs.append(proc)
-                        total_completed += 1
-                        if proc.returncode != 0:
-                            data['thread'].join(timeout=1)
-                            stderr_output = proc.stderr.read()
-                            error_message = stderr_output.decode('utf-8', errors='ignore').strip()
-                            full_error_log = f"❌ Error pada Parameter: {data['params']}\n---\n{error_message}\n\n"
-                            with open(error_log_path, 'a', encoding='utf-8') as f:
-                                f.write(full_error_log)
-                            error_logs.append(f"❌ [bold red]Error pada: {data['params']}[/bold red] (Detail lihat di {error_log_path})")
-                            layout["footer"].update(Panel("\n".join(error_logs), title="[yellow]Log Error[/yellow]", border_style="yellow"))
-                    else:
-                        step_progress = Progress(BarColumn(), TextColumn("{task.completed}/{task.total}"))
-                        step_progress.add_task("step", total=data['total'], completed=data['progress'])
-                        task_table.add_row(
-                            str(idx + 1), 
-                            data['params'], 
-                            data['status_msg'],
-                            step_progress
-                        )
-                
-                for proc in done_procs:
-                    del active_processes[proc]
-                
-                progress_bar.update(main_task, completed=total_completed)
-                layout["active_tasks"].update(Align.center(task_table))
-                time.sleep(0.5)
+    # Opsional: bar + indikator dipublish sekali ke shared memory, worker attach zero-copy
+    shared_dataset = None
+    manifest_path = os.path.join(launcher_dir, f"shared_manifest_{symbol}.json")
+    if shared_memory:
+        console.print("[yellow]Mempublish data & indikator ke shared memory...[/yellow]")
+        shared_dataset = publish_shared_dataset(symbol, [{**base_params, **p} for p in combinations_to_run], manifest_path)
+        if shared_dataset is None:
+            console.print("[bold red]Gagal menyiapkan shared memory, worker memuat data sendiri.[/bold red]")
+    extra_params = {'shared_manifest': manifest_path} if shared_dataset is not None else {}
+    if resume:
+        extra_params['resume'] = True  # worker melewati bulan yang sudah punya checkpoint
+    if metrics_only:
+        extra_params['metrics_only'] = True  # tanpa gambar/PDF; render belakangan lewat render_reports.py
+    if 'chart_workers' not in base_params:
+        # tiap worker sudah memakai satu core: pool chart tidak boleh melipatgandakan jumlah proses
+        extra_params['chart_workers'] = chart_workers_per_job(num_workers)
+    # Kriteria early-abort: worker menghentikan kombinasi yang jelas buruk & slotnya langsung dipakai job berikutnya
+    extra_params.update({k: v for k, v in (abort_params or {}).items() if v not in (None, False)})
+
+    # Daftar job: (perkiraan biaya, label parameter, perintah).
+    # Mode 'sweep' = kombinasi dibagi ke beberapa proses sweep dengan biaya seimbang.
+    jobs = []
+    if mode == 'sweep':
+        full_params = [{**base_params, **params, **extra_params} for params in combinations_to_run]
+        sweep_script_path = os.path.join(launcher_dir, 'sweep_runner.py')
+        chunks = split_balanced(full_params, [estimate_job_cost(p) for p in full_params], num_workers * 2)
+        for k, (load, chunk) in enumerate(chunks):
+            params_file = os.path.join(launcher_dir, f"sweep_params_{symbol}_{k}.json")
+            with open(params_file, 'w', encoding='utf-8') as f:
+                json.dump(chunk, f, indent=4)
+            jobs.append((load, f"Sweep #{k + 1}: {len(chunk)} kombinasi",
+                         [python_executable, sweep_script_path, '--params_file', params_file]))
+    else:
+        for params in combinations_to_run:
+            current_params = {**base_params, **params}
+            cmd_args_list = []
+            for key, value in current_params.items():
+                if isinstance(value, bool) and value: cmd_args_list.append(f'--{key}')
+                elif not isinstance(value, bool): cmd_args_list.append(f'--{key} {value}')
+
+            command_list = [python_executable, worker_script_path] + " ".join(cmd_args_list).split()
+            for key, value in extra_params.items():
+                command_list += [f'--{key}'] if value is True else [f'--{key}', str(value)]
+            jobs.append((estimate_job_cost(current_params), ", ".join(f"{k}={v}" for k,v in params.items()), command_list))
+
+    try:
+        run_job_pool(jobs, num_workers, f"[bold]Memulai Backtest Paralel untuk [cyan]{symbol}[/cyan][/bold]", console, error_log_path)
+    finally:
+        # Worker selesai / launcher dihentikan: lepas segmen shared memory (launcher adalah pemiliknya)
+        if shared_dataset is not None:
+            shared_dataset.close()
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
 
     console.print(Panel("[bold green]✅ SEMUA PROSES BACKTEST BARU TELAH SELESAI.[/bold green]"))
     return num_to_run
 
+def fill_month_checkpoints(symbol: str, param_sets: list, months: list, num_workers: int,
+                           console: Console, error_log_path: str, header: str):
+    """Hitung (kombinasi x bulan) paralel lewat walk_forward.py --months_only; hasil disimpan sebagai checkpoint."""
+    launcher_dir = os.path.dirname(os.path.abspath(__file__))
+    wf_script_path = os.path.join(launcher_dir, 'walk_forward.py')
+    month_list = ",".join(f"{y:04d}-{m:02d}" for y, m in months)
+    month_params = [{**p, 'start_month': 1, 'end_month': len(months)} for p in param_sets]  # hanya untuk estimasi biaya
+    jobs = []
+    for k, (load, chunk) in enumerate(split_balanced(param_sets, [estimate_job_cost(p) for p in month_params], num_workers * 2)):
+        params_file = os.path.join(launcher_dir, f"wf_params_{symbol}_{k}.json")
+        with open(params_file, 'w', encoding='utf-8') as f:
+            json.dump(chunk, f, indent=4)
+        jobs.append((load, f"Bulan #{k + 1}: {len(chunk)} kombinasi x {len(months)} bulan",
+                     [sys.executable, wf_script_path, '--params_file', params_file, '--months', month_list, '--months_only']))
+    run_job_pool(jobs, num_workers, header, console, error_log_path)
+
+def run_walk_forward_backtests(symbol: str, wf_start: str, wf_end: str, is_months: int, oos_months: int,
+                               step: int = None, anchored: bool = False, metric: str = 'balance_score',
+                               max_workers: int = None, mem_budget_gb: float = None):
+    """
+    Walk-forward atas grid optimasi: worker mengisi checkpoint (kombinasi x bulan) secara
+    paralel, lalu pemilihan parameter per window & kurva OOS dihitung di launcher dari checkpoint.
+    Return dict hasil walk-forward (None jika dibatalkan / gagal).
+    """
+    import walk_forward as wf
+
+    error_log_path = os.path.join('Backtester', 'error_log.txt')
+    if os.path.exists(error_log_path):
+        os.remove(error_log_path)
+    console = Console()
+    num_workers = default_worker_count(max_workers, mem_budget_gb)
+    base_params, optimization_params = sweep_grid(symbol)
+    base_params = {k: v for k, v in base_params.items() if k not in ('year', 'start_month', 'end_month')}
+    full_params = [{**base_params, **p} for p in grid_combinations(optimization_params)]
+    months = wf.month_range(wf_start, wf_end)
+    windows = wf.walk_forward_windows(len(months), is_months, oos_months, step, anchored)
+    if not windows:
+        console.print(f"[bold red]Rentang {wf_start}..{wf_end} terlalu pendek untuk IS {is_months} + OOS {oos_months} bulan.[/bold red]")
+        return None
+
+    console.print(Panel(
+        f"[bold]Total Kombinasi Parameter:[/bold] {len(full_params)}\n"
+        f"[bold]Rentang:[/bold] {wf_start} s/d {wf_end} ({len(months)} bulan)\n"
+        f"[bold]Window:[/bold] {len(windows)} x (IS {is_months} bln{' anchored' if anchored else ''} / OOS {oos_months} bln), metrik: {metric}\n"
+        f"--------------------------------------------------\n"
+        f"[bold green]Backtest per bulan:[/bold green] {len(full_params) * len(months)} (bulan dengan checkpoint valid dilewati)\n"
+        f"[bold]Jumlah Worker:[/bold] {num_workers}",
+        title="[bold blue]Konfigurasi Walk-Forward[/bold blue]", expand=False))
+
+    try:
+        if console.input("\n[bold]Lanjutkan? (y/n):[/bold] ").lower() != 'y':
+            console.print("[yellow]Proses dibatalkan.[/yellow]"); return None
+    except (KeyboardInterrupt, EOFError):
+        console.print("\n[yellow]Proses dibatalkan.[/yellow]"); return None
+
+    # Tahap 1: hasil per (kombinasi, bulan) dihitung paralel & disimpan sebagai checkpoint
+    fill_month_checkpoints(symbol, full_params, months, num_workers, console, error_log_path,
+                           f"[bold]Walk-Forward Paralel untuk [cyan]{symbol}[/cyan][/bold]")
+
+    # Tahap 2: semua bulan sudah di checkpoint -> pemilihan & penyambungan OOS (tanpa backtest ulang)
+    console.print("[yellow]Memilih parameter per window dari checkpoint...[/yellow]")
+    from Library.data_handler.offline_mt5 import load_mt5
+    mt5 = load_mt5(allow_offline=True)
+    if not mt5.initialize():
+        console.print(f"[bold red]initialize() gagal, error code = {mt5.last_error()}[/bold red]")
+        return None
+    try:
+        result = wf.run_walk_forward(full_params, mt5, months, is_months, oos_months, step, anchored, metric,
+                                     status=lambda data: None)
+    finally:
+        mt5.shutdown()
+    if result:
+        result['output_path'] = wf.save_walk_forward(result, os.path.join(HISTORY_DIR, f"{symbol}_walk_forward.json"))
+    return result
+
+def _month_span(labels: list) -> str:
+    return labels[0] if len(labels) == 1 else f"{labels[0]}..{labels[-1]}"
+
+def display_walk_forward(result, console):
+    """Tabel window walk-forward + ringkasan kurva OOS gabungan."""
+    table = Table(title=f"Walk-Forward {result['symbol']} ({result['metric']})", expand=True)
+    table.add_column("In-Sample", style="cyan")
+    table.add_column("Out-of-Sample", style="cyan")
+    table.add_column("Parameter Terpilih", ratio=3)
+    table.add_column("Skor IS", justify="right")
+    table.add_column("Profit IS", justify="right")
+    table.add_column("Profit OOS", justify="right")
+    table.add_column("DD OOS", justify="right")
+    for w in result['windows']:
+        is_stats, oos_stats = w['in_sample_stats'], w['out_of_sample_stats']
+        params = ", ".join(f"{k}={v}" for k, v in w['best_params'].items() if k not in ('symbol', 'initial_balance'))
+        oos_color = "green" if oos_stats['total_profit'] > 0 else "red"
+        table.add_row(
+            _month_span(w['in_sample']), _month_span(w['out_of_sample']),
+            params, f"{is_stats[result['metric']]:,.2f}", f"${is_stats['total_profit']:,.2f}",
+            f"[{oos_color}]${oos_stats['total_profit']:,.2f}[/{oos_color}]", f"{oos_stats['max_drawdown_pct']:.2f}%",
+        )
+    console.print(table)
+
+    wfe = result.get('walk_forward_efficiency')
+    console.print(Panel(
+        f"[bold green]Total Profit OOS: ${result['oos_total_profit']:,.2f}[/bold green]\n"
+        f"[bold red]Max Drawdown OOS: {result['oos_max_drawdown_pct']:,.2f}%[/bold red]\n"
+        f"[bold]Total Trades:[/bold] {result['oos_total_trades']}{'':<10}"
+        f"[bold]Win Rate:[/bold] {result['oos_win_rate']:.2f}%{'':<10}"
+        f"[bold]Profit Factor:[/bold] {result['oos_profit_factor']:.2f}\n"
+        f"[bold]Walk-Forward Efficiency:[/bold] {f'{wfe:.2f}' if wfe is not None else 'N/A'}\n\n"
+        f"[bold]Hasil Lengkap:[/bold]\n[cyan]{result.get('output_path', 'N/A')}[/cyan]",
+        title=f"📈 {result['symbol']}: Kurva Out-of-Sample Gabungan", expand=False, border_style="yellow"))
+
 def display_result_panel(result, title, console):
     """Fungsi bantuan untuk menampilkan panel hasil yang diformat dengan rapi."""
     if not result:
@@ -354,17 +672,64 @@ def main():
     # --- Langkah 0: Parsing Argumen ---
     parser = argparse.ArgumentParser(description="Menjalankan backtest paralel untuk simbol tertentu.")
     parser.add_argument('--symbol', type=str, required=True, help='Simbol trading untuk di backtest, misal: XAUUSD')
+    parser.add_argument('--mode', type=str, choices=['process', 'sweep'], default='process',
+                        help='process: satu proses worker per kombinasi; sweep: kombinasi dibagi ke beberapa proses sweep')
+    parser.add_argument('--workers', type=int, default=None, help='Jumlah worker paralel (default: jumlah core, dibatasi memori)')
+    parser.add_argument('--shared_memory', action='store_true', help='Publish bar & indikator sekali ke shared memory untuk semua worker')
+    parser.add_argument('--resume', action='store_true', help='Lanjutkan run yang terputus: bulan dengan checkpoint valid dilewati')
+    parser.add_argument('--metrics_only', action='store_true', help='Worker hanya menghitung metrik (tanpa gambar/PDF); render terpilih lewat render_reports.py')
+    parser.add_argument('--mem_budget_gb', type=float, default=None, help='Budget RAM total untuk worker (default: 80%% RAM tersedia)')
+    parser.add_argument('--abort_max_dd', type=float, default=None, help='Worker menghentikan kombinasi bila max drawdown melewati X%%')
+    parser.add_argument('--abort_min_balance', type=float, default=None, help='Worker menghentikan kombinasi bila saldo di bawah nilai ini')
+    parser.add_argument('--abort_min_pf', type=float, default=None, help='Worker menghentikan kombinasi bila profit factor di bawah nilai ini')
+    parser.add_argument('--abort_min_trades', type=int, default=None, help='Jumlah trade minimal sebelum kriteria profit factor berlaku (default worker: 30)')
+    parser.add_argument('--abort_on_margin_call', action='store_true', help='Worker menghentikan kombinasi pada margin call pertama')
+    parser.add_argument('--search', type=str, choices=['grid', 'halving'], default='grid',
+                        help='grid: semua kombinasi x semua bulan; halving: successive halving atas jumlah bulan')
+    parser.add_argument('--eta', type=int, default=3, help='Successive halving: 1/eta kandidat naik, budget bulan x eta per rung')
+    parser.add_argument('--min_months', type=int, default=1, help='Successive halving: jumlah bulan pada rung pertama')
+    parser.add_argument('--max_candidates', type=int, default=None, help='Successive halving: batasi jumlah titik grid yang dievaluasi')
+    parser.add_argument('--sampler', type=str, choices=['random', 'model'], default='random',
+                        help='Pemilih titik bila --max_candidates < grid: acak, atau separuh acak + usulan model aditif')
+    parser.add_argument('--search_metric', type=str, choices=['balance_score', 'total_profit', 'sharpe_ratio', 'profit_factor'],
+                        default='balance_score', help='Skor pemeringkatan kandidat tiap rung')
+    parser.add_argument('--walk_forward', action='store_true', help='Walk-forward: window IS/OOS bergulir, parameter terbaik per window, kurva OOS gabungan')
+    parser.add_argument('--wf_start', type=str, default='2025-01', help='Bulan pertama walk-forward (YYYY-MM)')
+    parser.add_argument('--wf_end', type=str, default='2025-07', help='Bulan terakhir walk-forward (YYYY-MM)')
+    parser.add_argument('--is_months', type=int, default=3, help='Panjang window in-sample (bulan)')
+    parser.add_argument('--oos_months', type=int, default=1, help='Panjang window out-of-sample (bulan)')
+    parser.add_argument('--wf_step', type=int, default=None, help='Geser window tiap langkah (default: oos_months)')
+    parser.add_argument('--anchored', action='store_true', help='In-sample selalu mulai dari bulan pertama (expanding window)')
+    parser.add_argument('--wf_metric', type=str, choices=['balance_score', 'total_profit', 'sharpe_ratio', 'profit_factor'],
+                        default='balance_score', help='Skor pemilihan parameter di in-sample')
     args = parser.parse_args()
     symbol = args.symbol
     console = Console()
     console.set_window_title(f"Backtester - {symbol}")
 
-    # --- Langkah 1: Muat & Tampilkan Histori Lama ---
-    console.print(Panel(f"[bold]Membaca histori dari file untuk [cyan]{symbol}[/cyan]...[/bold]", border_style="blue"))
-    symbol_history = load_history(symbol) # Langsung load file spesifik
-    best_results_old = symbol_history.get('best_results', {})
+    if args.walk_forward:
+        start_time = time.time()
+        result = run_walk_forward_backtests(symbol, args.wf_start, args.wf_end, args.is_months, args.oos_months,
+                                            step=args.wf_step, anchored=args.anchored, metric=args.wf_metric,
+                                            max_workers=args.workers, mem_budget_gb=args.mem_budget_gb)
+        if result is None:
+            console.print("[yellow]Walk-forward tidak menghasilkan hasil.[/yellow]")
+            return
+        display_walk_forward(result, console)
+        minutes, seconds = divmod(time.time() - start_time, 60)
+        console.print(f"[bold]Total Waktu Walk-Forward:[/bold] {int(minutes)} menit {int(seconds)} detik")
+        return
 
-    if not best_results_old:
+    # --- Langkah 1: Muat & Tampilkan Histori Lama ---
+    console.print(Panel(f"[bold]Membaca histori dari store untuk [cyan]{symbol}[/cyan]...[/bold]", border_style="blue"))
+    store = ResultStore()
+    legacy_history_file = os.path.join(HISTORY_DIR, f"{symbol}_history.json")
+    if store.count(symbol) == 0 and os.path.exists(legacy_history_file):
+        migrated = store.import_history_json(symbol, legacy_history_file)
+        console.print(f"[yellow]{migrated} run dari {legacy_history_file} dipindahkan ke store.[/yellow]")
+    best_results_old = store.best_results(symbol)
+
+    if not any(best_results_old.values()):
         console.print(f"[yellow]Belum ada histori backtest ditemukan untuk {symbol}.[/yellow]\n")
     else:
         console.print("[bold]--------------- 🏆 HASIL TERBAIK TERAKHIR 🏆 ---------------[/bold]")
@@ -374,79 +739,37 @@ def main():
 
     # --- Langkah 2: Jalankan Backtest Baru ---
     start_time = time.time()
-    num_combinations_run = run_parallel_backtests(symbol, symbol_history)
+    num_combinations_run = run_parallel_backtests(symbol, store, mode=args.mode,
+                                                  max_workers=args.workers, mem_budget_gb=args.mem_budget_gb,
+                                                  shared_memory=args.shared_memory, resume=args.resume,
+                                                  metrics_only=args.metrics_only, search=args.search, eta=args.eta,
+                                                  min_months=args.min_months, max_candidates=args.max_candidates,
+                                                  sampler=args.sampler, search_metric=args.search_metric,
+                                                  abort_params={
+                                                      'abort_max_dd': args.abort_max_dd,
+                                                      'abort_min_balance': args.abort_min_balance,
+                                                      'abort_min_pf': args.abort_min_pf,
+                                                      'abort_min_trades': args.abort_min_trades,
+                                                      'abort_on_margin_call': args.abort_on_margin_call,
+                                                  })
     if num_combinations_run is None:
         console.print("[yellow]Tidak ada backtest baru yang dijalankan.[/yellow]")
         return
     end_time = time.time()
     
-    # --- Langkah 3: Analisis, Gabungkan, dan Simpan Hasil ---
-    console.print(Panel(f"[bold]Menganalisis & Menggabungkan Hasil untuk [cyan]{symbol}[/cyan]...[/bold]", style="cyan"))
-    results_path = os.path.join('Backtester', 'Hasil Laporan PDF', symbol)
-    newly_completed_results = []
-    
-    if os.path.exists(results_path):
-        for root, _, files in os.walk(results_path):
-            if 'result.json' in files:
-                try:
-                    with open(os.path.join(root, 'result.json'), 'r') as f:
-                        data = json.load(f)
-                        profit = data.get('total_profit', 0)
-                        dd_details = data.get('total_drawdown_details')
-                        if dd_details and 'percentage' in dd_details:
-                            drawdown = dd_details.get('percentage', 100)
-                        else:
-                            # Jika tidak ada, gunakan fallback ke format lama
-                            drawdown = data.get('max_drawdown', 100)
-                        data['balance_score'] = (profit / drawdown) if drawdown > 0.01 else (profit * 1000)
-                        if 'max_drawdown' not in data:
-                            data['max_drawdown'] = drawdown
-                        newly_completed_results.append(data)
-                except Exception as e:
-                    console.print(f"[bold red]Error membaca file JSON di {root}: {e}[/bold red]")
-
-    # --- Gabungkan dengan histori lama, hindari duplikat ---
-    all_runs_for_symbol = symbol_history.get('all_runs', [])
-    existing_run_ids = {get_run_id(run['parameters']) for run in all_runs_for_symbol}
-
-    for new_run in newly_completed_results:
-        run_id = get_run_id(new_run['parameters'])
-        if run_id not in existing_run_ids:
-            all_runs_for_symbol.append(new_run)
-
-    if not all_runs_for_symbol:
+    # --- Langkah 3: Hasil sudah ditulis worker ke store; cukup query terindeks ---
+    console.print(Panel(f"[bold]Menganalisis Hasil untuk [cyan]{symbol}[/cyan]...[/bold]", style="cyan"))
+    if store.count(symbol) == 0:
         console.print(f"[bold red]Tidak ada hasil backtest yang bisa dianalisis untuk {symbol}.[/bold red]")
         return
 
     # --- Langkah 4: Cari Juara Baru dari SEMUA data (lama + baru) ---
     console.print("[bold]--------------- 🥇 HASIL TERBAIK KESELURUHAN (UPDATE) 🥇 ---------------[/bold]")
-    
-    # 1. Paling Seimbang
-    best_balance_result = max(all_runs_for_symbol, key=lambda x: x.get('balance_score', -float('inf')))
-    display_result_panel(best_balance_result, f"⚖️ {symbol}: Paling Seimbang (Terbaru)", console)
-    
-    # 2. Profit Tertinggi
-    best_profit_result = max(all_runs_for_symbol, key=lambda x: x.get('total_profit', -float('inf')))
-    display_result_panel(best_profit_result, f"💰 {symbol}: Profit Tertinggi (Terbaru)", console)
-
-    # 3. Paling Aman (Drawdown Terendah dari yang Profit)
-    profitable_results = [r for r in all_runs_for_symbol if r.get('total_profit', 0) > 0]
-    safest_result = min(profitable_results, key=lambda x: x.get('max_drawdown', float('inf'))) if profitable_results else None
-    display_result_panel(safest_result, f"🛡️ {symbol}: Paling Aman & Profit (Terbaru)", console)
-
-    # --- Langkah 5: Simpan Histori yang Sudah Diperbarui ---
-    new_symbol_history_data = {
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'best_results': {
-            'most_balanced': best_balance_result,
-            'most_profitable': best_profit_result,
-            'safest_profitable': safest_result
-        },
-        'all_runs': all_runs_for_symbol
-    }
-    save_history(symbol, new_symbol_history_data)
-    history_file_path = os.path.join(HISTORY_DIR, f"{symbol}_history.json")
-    console.print(f"\n[bold green]✅ Histori untuk {symbol} telah diperbarui di [cyan]{history_file_path}[/cyan][/bold green]")
+    best_results = store.best_results(symbol)
+    display_result_panel(best_results['most_balanced'], f"⚖️ {symbol}: Paling Seimbang (Terbaru)", console)
+    display_result_panel(best_results['most_profitable'], f"💰 {symbol}: Profit Tertinggi (Terbaru)", console)
+    display_result_panel(best_results['safest_profitable'], f"🛡️ {symbol}: Paling Aman & Profit (Terbaru)", console)
+    console.print(f"\n[bold green]✅ Histori untuk {symbol} tersimpan di [cyan]{store.db_path}[/cyan][/bold green]")
 
     # --- Laporan Kinerja Program (tetap sama) ---
     total_duration = end_time - start_time
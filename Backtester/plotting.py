@@ -1,6 +1,9 @@
 # plotting.py
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
 import mplfinance as mpf
 
@@ -58,14 +61,17 @@ def plot_equity_curve_impl(equity_data: list, report_details: dict):
     # return filename
 
 
-def plot_completed_trade_impl(df_slice: pd.DataFrame, trade: dict, trade_index: int, output_folder: str):
-    """Implementasi asli _plot_completed_trade, tanpa mengubah parameter/kontrak."""
+def _trade_style():
     style = mpf.make_marketcolors(up='green', down='red', inherit=True)
-    s = mpf.make_mpf_style(marketcolors=style, gridstyle=':')
+    return mpf.make_mpf_style(marketcolors=style, gridstyle=':')
 
+
+def _trade_addplots(df_slice: pd.DataFrame, trade: dict, ax=None) -> list:
+    """Marker entry/exit + garis BB untuk satu trade (ax=None: mode figure milik mplfinance)."""
     entry_time, exit_time = trade['entry_time'], trade['exit_time']
-    trade_type, profit = trade['type'], trade['profit_usd']
+    trade_type = trade['type']
     padding = 0.005
+    on_ax = {'ax': ax} if ax is not None else {}
 
     # Marker ENTRY
     entry_series = pd.Series(float('nan'), index=df_slice.index)
@@ -77,7 +83,7 @@ def plot_completed_trade_impl(df_slice: pd.DataFrame, trade: dict, trade_index:
         entry_marker_shape = 'v'
     entry_series[entry_time] = y_pos
     entry_marker = mpf.make_addplot(
-        entry_series, type='scatter', color='green', marker=entry_marker_shape, markersize=120
+        entry_series, type='scatter', color='green', marker=entry_marker_shape, markersize=120, **on_ax
     )
 
     # Marker EXIT
@@ -90,12 +96,21 @@ def plot_completed_trade_impl(df_slice: pd.DataFrame, trade: dict, trade_index:
         exit_marker_shape = '^'
     exit_series[exit_time] = y_pos
     exit_marker = mpf.make_addplot(
-        exit_series, type='scatter', color='red', marker=exit_marker_shape, markersize=120
+        exit_series, type='scatter', color='red', marker=exit_marker_shape, markersize=120, **on_ax
     )
 
     # Tambahkan garis indikator BB kalau ada
     bb_cols = [col for col in df_slice.columns if 'BB' in col]
-    addplots = [entry_marker, exit_marker] + [mpf.make_addplot(df_slice[col], width=0.7) for col in bb_cols]
+    return [entry_marker, exit_marker] + [mpf.make_addplot(df_slice[col], width=0.7, **on_ax) for col in bb_cols]
+
+
+def _trade_title(trade: dict, trade_index: int) -> str:
+    return f"Trade #{trade_index} — {trade['type']} — Profit: ${trade['profit_usd']:,.2f}"
+
+
+def plot_completed_trade_impl(df_slice: pd.DataFrame, trade: dict, trade_index: int, output_folder: str):
+    """Implementasi asli _plot_completed_trade, tanpa mengubah parameter/kontrak."""
+    trade_type, profit = trade['type'], trade['profit_usd']
 
     # Simpan
     os.makedirs(output_folder, exist_ok=True)
@@ -104,12 +119,117 @@ def plot_completed_trade_impl(df_slice: pd.DataFrame, trade: dict, trade_index:
     mpf.plot(
         df_slice,
         type='candle',
-        style=s,
-        title=f"Trade #{trade_index} — {trade_type} — Profit: ${profit:,.2f}",
+        style=_trade_style(),
+        title=_trade_title(trade, trade_index),
         ylabel='Price',
-        addplot=addplots,
+        addplot=_trade_addplots(df_slice, trade),
         figsize=(16, 8),
         savefig=filename
     )
     print(f"Chart untuk trade #{trade_index} disimpan.")
     # Sama seperti sebelumnya, tidak perlu return value.
+
+
+# ==============================================================================
+#  RENDER CHART TRADE DI LUAR LOOP SIMULASI (antrian + process pool)
+# ==============================================================================
+# State per proses render: style & figure dipakai ulang antar chart (key = trade per halaman)
+_CHART_STATE = {}
+
+
+def _init_chart_worker():
+    """Initializer proses render: backend Agg (tanpa GUI)."""
+    matplotlib.use('Agg', force=True)
+    plt.switch_backend('Agg')
+
+
+def _chart_page(per_page: int):
+    state = _CHART_STATE.get(per_page)
+    if state is None:
+        style = _CHART_STATE.setdefault('style', _trade_style())
+        fig = mpf.figure(style=style, figsize=(16, 8 * per_page))
+        axes = [fig.add_subplot(per_page, 1, k + 1) for k in range(per_page)]
+        state = _CHART_STATE[per_page] = (fig, axes)
+    return state
+
+
+def render_trade_batch(jobs: list, per_page: int = 1) -> int:
+    """
+    Render satu batch chart trade ke PNG dengan figure yang dipakai ulang.
+    jobs: list (df_slice, trade, trade_index, output_folder), urut trade_index.
+    per_page > 1: beberapa trade berurutan digabung dalam satu gambar.
+    """
+    done = 0
+    for start in range(0, len(jobs), per_page):
+        page = jobs[start:start + per_page]
+        fig, axes = _chart_page(len(page))
+        for ax, (df_slice, trade, trade_index, _) in zip(axes, page):
+            ax.clear()
+            mpf.plot(df_slice, ax=ax, type='candle', ylabel='Price', addplot=_trade_addplots(df_slice, trade, ax=ax))
+            ax.set_title(_trade_title(trade, trade_index))
+
+        output_folder = page[0][3]
+        os.makedirs(output_folder, exist_ok=True)
+        if len(page) == 1:
+            _, trade, trade_index, _ = page[0]
+            filename = f"{output_folder}/{trade_index:03d}_{trade['type']}_PROFIT_{trade['profit_usd']:,.0f}.png"
+        else:
+            filename = f"{output_folder}/{page[0][2]:03d}-{page[-1][2]:03d}_TRADES.png"
+        fig.savefig(filename)
+        done += len(page)
+    return done
+
+
+class TradeChartRenderer:
+    """
+    Antrian chart trade. Simulasi hanya menyalin potongan data (submit) lalu lanjut;
+    chart dirender per batch oleh process pool (workers=0: di proses ini, saat flush).
+    """
+    _TRADE_KEYS = ('entry_time', 'exit_time', 'type', 'profit_usd')
+
+    def __init__(self, workers: int = 1, per_page: int = 1, batch_size: int = 24):
+        self.workers = max(0, int(workers))
+        self.per_page = max(1, int(per_page))
+        # batch kelipatan per_page agar satu halaman tidak terpecah ke dua proses
+        self.batch_size = max(self.per_page, int(batch_size) // self.per_page * self.per_page)
+        self._pending = []
+        self._futures = []
+        self._pool = None
+        self._rendered_inline = 0
+
+    def submit(self, df_slice: pd.DataFrame, trade: dict, trade_index: int, output_folder: str) -> None:
+        cols = [c for c in df_slice.columns if c in ('open', 'high', 'low', 'close') or 'BB' in c]
+        job = (df_slice[cols].copy(), {k: trade[k] for k in self._TRADE_KEYS}, int(trade_index), output_folder)
+        # halaman gabungan hanya untuk trade di folder yang sama
+        if self._pending and self._pending[-1][3] != output_folder:
+            self._dispatch()
+        self._pending.append(job)
+        if len(self._pending) >= self.batch_size:
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        if not self._pending:
+            return
+        jobs, self._pending = self._pending, []
+        if self.workers == 0:
+            _init_chart_worker()
+            self._rendered_inline += render_trade_batch(jobs, self.per_page)
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_chart_worker)
+        self._futures.append(self._pool.submit(render_trade_batch, jobs, self.per_page))
+
+    def close(self) -> int:
+        """Render sisa antrian & tunggu semua batch selesai. Return jumlah chart yang dirender."""
+        self._dispatch()
+        done, self._rendered_inline = self._rendered_inline, 0
+        for future in self._futures:
+            try:
+                done += future.result()
+            except Exception as e:
+                print(f"Gagal merender chart trade: {e}", file=sys.stderr)
+        self._futures = []
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        return done
@@ -0,0 +1,415 @@
+# Nama File: portfolio_backtest.py
+"""
+Backtest portofolio multi-simbol: satu akun, satu saldo, satu batas posisi terbuka.
+
+Berbeda dengan master_launcher (satu terminal & satu backtest terisolasi per simbol),
+di sini bar semua simbol digabung menjadi SATU aliran event terurut waktu lewat
+heap merge (heapq.merge atas array waktu per simbol, O(log N) per bar). Logika
+PoseidonWave per simbol sama dengan engine loop (MTM -> SL/TP -> reverse -> entry),
+tetapi realized balance, margin call dan batas max_concurrent_trades (seperti
+TradeManager live) dibagi bersama: entry yang melewati batas dilewati dan dihitung.
+Pada timestamp yang sama, simbol diproses menurut urutan --symbols.
+
+Pemakaian:
+    python Backtester/portfolio_backtest.py --symbols XAUUSD,EURUSD --max_concurrent_trades 2 \
+        --year 2025 --start_month 1 --end_month 3 [--params_file per_simbol.json] [--offline] [argumen worker...]
+Argumen yang tidak dikenal diteruskan ke parser worker_backtest (berlaku untuk semua simbol);
+--params_file berisi list dict parameter per simbol (wajib ada "symbol") yang menimpa argumen bersama.
+"""
+import sys
+import os
+import json
+import heapq
+import calendar
+import argparse
+import itertools
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import worker_backtest as wb
+from sweep_runner import params_to_argv
+from trade_log import TradeLog, TradeLogBuilder
+from cost_model import spread_points_array, market_exec_prices, apply_cost_attribution
+from equity_downsample import downsample_equity
+from utils import (
+    send_status, epoch_ms_array,
+    exec_price as _u_exec_price,
+    commission_leg_usd as _u_commission_leg_usd,
+    pnl_usd as _u_pnl_usd,
+    unrealized_pnl as _u_unrealized_pnl,
+)
+from Library.reporting import metrics
+
+DEFAULT_OUTPUT_DIR = os.path.join(current_dir, 'History_Logs')
+
+
+class SymbolBook:
+    """Bar, sinyal & harga eksekusi satu simbol (list Python untuk akses skalar cepat) + posisi berjalannya."""
+
+    def __init__(self, strategy, ctx: dict, df):
+        config = strategy.config
+        self.symbol = strategy.symbol
+        self.df = df
+        self.n = len(df)
+        bb_length = ctx['bb_length']
+        mid_col, adx_col = f'BBM_{bb_length}_2.0', f"ADX_{ctx['adx_period']}"
+
+        close = df['close'].to_numpy(dtype=float)
+        mid = df[mid_col].to_numpy(dtype=float)
+        bull = np.zeros(self.n, dtype=bool)
+        bear = np.zeros(self.n, dtype=bool)
+        if self.n > 1:
+            bull[1:] = (close[:-1] < mid[:-1]) & (close[1:] > mid[1:])
+            bear[1:] = (close[:-1] > mid[:-1]) & (close[1:] < mid[1:])
+        if ctx['use_adx_filter']:
+            valid = df[adx_col].to_numpy(dtype=float) > ctx['adx_threshold']
+        else:
+            valid = np.ones(self.n, dtype=bool)
+        entry_ok = (bull | bear) & strategy._session_mask(df.index) & valid
+
+        self.point, self.contract_size = float(ctx['point']), float(ctx['contract_size'])
+        self.slippage_pts = float(ctx['slippage_pts'])
+        self.spread = spread_points_array(df, ctx['use_dyn_spread'], ctx['fallback_spread_pts'])
+        self.close = close
+        ask_exec, bid_exec = market_exec_prices(close, self.spread, self.point, self.slippage_pts)
+        self.intrabar = strategy._intrabar_model(df)
+
+        self.t_ms = epoch_ms_array(df.index).tolist()
+        self.close_l, self.spread_l = close.tolist(), self.spread.tolist()
+        self.high_l = df['high'].to_numpy(dtype=float).tolist()
+        self.low_l = df['low'].to_numpy(dtype=float).tolist()
+        self.ask_exec, self.bid_exec = ask_exec.tolist(), bid_exec.tolist()
+        self.signal = np.where(bull, 1, np.where(bear, -1, 0)).tolist()
+        self.entry_ok = entry_ok.tolist()
+
+        self.lot = float(ctx['lot_size'])
+        self.lot_for_costs = float(config.get('fixed_lot_size', 0.1))
+        self.comm_leg = _u_commission_leg_usd(ctx['commission_rt_usd'], self.lot)
+        self.use_sl, self.sl_points = bool(ctx['use_stop_loss']), float(ctx['stop_loss_points'])
+        self.use_tp, self.tp_points = bool(ctx['use_take_profit']), float(ctx['take_profit_points'])
+
+        # fitur saat entry (sama dengan engine loop)
+        self.features = {'bb_len': None, 'bb_m': mid.tolist()}
+        for nm in (f'BBU_{bb_length}_2.0', f'BBL_{bb_length}_2.0'):
+            if nm in df.columns:
+                self.features[nm] = df[nm].to_numpy(dtype=float).tolist()
+        if ctx['use_adx_filter'] and adx_col in df.columns:
+            self.features['adx'] = df[adx_col].to_numpy(dtype=float).tolist()
+        self.bb_length = int(bb_length)
+
+        self.trades = TradeLogBuilder()
+        self.position = None   # dict trade yang sedang terbuka
+        self.unreal = 0.0      # unrealized PnL posisi di close terakhir
+        self.last_i = 0        # bar terakhir yang sudah diproses
+        self.skipped_entries = 0
+
+    def entry_features(self, i: int) -> dict:
+        feats = {'bb_len': self.bb_length}
+        feats.update({k: float(v[i]) for k, v in self.features.items() if v is not None})
+        feats['spread_points'] = float(self.spread_l[i])
+        feats['close_bid'] = float(self.close_l[i])
+        return feats
+
+    def trade_log(self) -> TradeLog:
+        """Trade tertutup sebagai TradeLog dengan atribusi biaya (indeks bar milik simbol ini)."""
+        log = self.trades.build()
+        apply_cost_attribution(log, self.close, self.spread, self.lot_for_costs, self.contract_size,
+                               self.point, self.slippage_pts)
+        return log
+
+
+class PortfolioBacktest:
+    """Satu akun untuk banyak SymbolBook; event bar semua simbol diproses berurutan waktu."""
+
+    def __init__(self, books: list, initial_balance: float, max_concurrent_trades: int = 1):
+        self.books = books
+        self.initial_balance = float(initial_balance)
+        self.max_concurrent_trades = max(1, int(max_concurrent_trades))
+
+    def _open(self, book: SymbolBook, i: int, side: str) -> None:
+        entry_exec = book.ask_exec[i] if side == 'BUY' else book.bid_exec[i]
+        book.position = {
+            'trade_id': len(book.trades) + 1,
+            'side': side,
+            'entry_index': i,
+            'entry_ts_epoch_ms': book.t_ms[i],
+            'entry_price': entry_exec,
+            'entry_price_ref_close_bid': book.close_l[i],
+            'entry_spread_points': book.spread_l[i],
+            'entry_slippage_points': book.slippage_pts,
+            'commission_entry_usd': book.comm_leg,
+            'features_at_entry': book.entry_features(i),
+            'mfe_usd': 0.0,
+            'mae_usd': 0.0,
+        }
+        book.unreal = 0.0
+
+    def _close(self, book: SymbolBook, i: int, exit_exec: float, reason: str) -> float:
+        """Tutup posisi book di bar i; return PnL bersih (komisi dua leg sudah dipotong)."""
+        pos = book.position
+        gross = _u_pnl_usd(pos['side'], pos['entry_price'], exit_exec, book.lot, book.contract_size)
+        net = gross - (pos['commission_entry_usd'] + book.comm_leg)
+        pos.update({
+            'exit_ts_epoch_ms': book.t_ms[i],
+            'exit_price': exit_exec,
+            'bars_held': i - pos['entry_index'],
+            'profit_usd': net,
+            'gross_pnl_usd': gross,
+            'commission_exit_usd': book.comm_leg,
+            'commission_total_usd': pos['commission_entry_usd'] + book.comm_leg,
+            'reason_exit': reason,
+        })
+        book.trades.append(pos)
+        book.position = None
+        book.unreal = 0.0
+        return net
+
+    def run(self) -> dict:
+        books = self.books
+        realized = self.initial_balance
+        total_unreal = 0.0
+        open_count = 0
+        max_open = 0
+        margin_called = False
+        eq_t, eq_v, eq_evt = [], [], []
+
+        streams = [zip(b.t_ms[1:], itertools.repeat(k), range(1, b.n)) for k, b in enumerate(books)]
+        for t, k, i in heapq.merge(*streams):
+            book = books[k]
+            if realized < 0:
+                # margin call akun: semua posisi ditutup di harga terakhir simbolnya, run berhenti
+                margin_called = True
+                book.last_i = i
+                for b in books:
+                    if b.position is not None:
+                        j = b.last_i
+                        exit_exec = b.bid_exec[j] if b.position['side'] == 'BUY' else b.ask_exec[j]
+                        realized += self._close(b, j, exit_exec, 'margin_call')
+                total_unreal, open_count = 0.0, 0
+                eq_t.append(t); eq_v.append(realized); eq_evt.append(True)
+                break
+
+            book.last_i = i
+            pos = book.position
+            close_bid = book.close_l[i]
+            if pos is not None:
+                side = pos['side']
+                u = _u_unrealized_pnl(side, pos['entry_price'], close_bid, book.lot, book.contract_size)
+                total_unreal += u - book.unreal
+                book.unreal = u
+            eq_t.append(t); eq_v.append(realized + total_unreal); eq_evt.append(False)
+
+            if pos is not None:
+                entry_bid = pos['entry_price_ref_close_bid']
+                hi, lo = book.high_l[i], book.low_l[i]
+                scale = book.lot * book.contract_size
+                up, down = max(0.0, (hi - entry_bid) * scale), max(0.0, (entry_bid - lo) * scale)
+                mfe, mae = (up, down) if side == 'BUY' else (down, up)
+                pos['mfe_usd'] = max(pos['mfe_usd'], mfe)
+                pos['mae_usd'] = max(pos['mae_usd'], mae)
+
+                if book.use_sl or book.use_tp:
+                    is_buy = side == 'BUY'
+                    if is_buy:
+                        sl_level = pos['entry_price'] - book.sl_points
+                        tp_level = pos['entry_price'] + book.tp_points
+                        sl_hit = book.use_sl and lo <= sl_level
+                        tp_hit = book.use_tp and hi >= tp_level
+                    else:
+                        sl_level = pos['entry_price'] + book.sl_points
+                        tp_level = pos['entry_price'] - book.tp_points
+                        sl_hit = book.use_sl and hi >= sl_level
+                        tp_hit = book.use_tp and lo <= tp_level
+                    if sl_hit and tp_hit:
+                        sl_hit = bool(book.intrabar.sl_first(i, is_buy, sl_level, tp_level)[0])
+                    if sl_hit or tp_hit:
+                        level, reason = (sl_level, 'sl') if sl_hit else (tp_level, 'tp')
+                        exit_exec = _u_exec_price(side, close_bid, book.spread_l[i], 'exit', book.point,
+                                                  book.slippage_pts, False, level)
+                        total_unreal -= book.unreal
+                        realized += self._close(book, i, exit_exec, reason)
+                        open_count -= 1
+                        eq_t.append(t); eq_v.append(realized + total_unreal); eq_evt.append(True)
+                        continue
+
+            signal = book.signal[i]
+            if pos is not None and signal == (1 if side == 'SELL' else -1):
+                exit_exec = book.bid_exec[i] if side == 'BUY' else book.ask_exec[i]
+                total_unreal -= book.unreal
+                realized += self._close(book, i, exit_exec, 'reverse')
+                open_count -= 1
+                eq_t.append(t); eq_v.append(realized + total_unreal); eq_evt.append(True)
+
+            if book.position is None and book.entry_ok[i]:
+                if open_count >= self.max_concurrent_trades:
+                    book.skipped_entries += 1
+                else:
+                    self._open(book, i, 'BUY' if signal > 0 else 'SELL')
+                    open_count += 1
+                    max_open = max(max_open, open_count)
+                    eq_t.append(t); eq_v.append(realized + total_unreal); eq_evt.append(True)
+
+        if not margin_called:
+            # posisi yang masih terbuka ditutup di bar terakhir simbolnya
+            for b in books:
+                if b.position is not None:
+                    j = b.n - 1
+                    exit_exec = b.bid_exec[j] if b.position['side'] == 'BUY' else b.ask_exec[j]
+                    total_unreal -= b.unreal
+                    realized += self._close(b, j, exit_exec, 'forced_close')
+                    # posisi simbol lain yang belum ditutup tetap dihitung mark-to-market
+                    eq_t.append(b.t_ms[j]); eq_v.append(realized + total_unreal); eq_evt.append(True)
+
+        order = np.argsort(np.asarray(eq_t, dtype=np.int64), kind='stable')
+        return {
+            'logs': {b.symbol: b.trade_log() for b in books},
+            'realized_balance': realized,
+            'final_balance': 0.0 if margin_called else realized,
+            'margin_called': margin_called,
+            'max_open_positions': max_open,
+            'eq_t_ms': np.asarray(eq_t, dtype=np.int64)[order],
+            'eq_values': np.asarray(eq_v, dtype=float)[order],
+            'eq_is_event': np.asarray(eq_evt, dtype=bool)[order],
+        }
+
+
+def load_books(configs: list, mt5, year: int, start_month: int, end_month: int, initial_balance: float,
+               status=send_status) -> list:
+    """
+    SymbolBook per config simbol (bar + warm-up indikator seperti mode kontinu).
+    ValueError bila ada simbol tanpa info / data, agar salah ketik tidak diam-diam mengecilkan portofolio.
+    """
+    books, missing = [], []
+    for k, config in enumerate(configs):
+        status({"status": f"Memuat {config['symbol']}", "progress": k, "total": len(configs)})
+        strategy = wb.PoseidonWave(mt5, config)
+        last_end = f"{year}-{end_month:02d}-{calendar.monthrange(year, end_month)[1]}"
+        ctx = strategy._begin_run(f"{year}-{start_month:02d}-01", last_end, initial_balance)
+        if ctx is None:
+            missing.append(config['symbol'])
+            continue
+        df = strategy._load_continuous_frame(year, start_month, end_month, ctx)
+        if df is None or len(df) < 2:
+            missing.append(config['symbol'])
+            continue
+        books.append(SymbolBook(strategy, ctx, df))
+    if missing:
+        raise ValueError(f"Tidak ada info simbol / data historis untuk: {', '.join(missing)}")
+    return books
+
+
+def build_report(sim: dict, books: list, initial_balance: float, max_concurrent_trades: int, configs: list) -> dict:
+    """Ringkasan portofolio + per simbol, kurva ekuitas ringkas dan daftar trade (dengan simbol)."""
+    logs = sim['logs']
+    all_pnl = np.concatenate([log.pnl for log in logs.values()]) if logs else np.zeros(0)
+    all_exit = np.concatenate([log.exit_ms for log in logs.values()]) if logs else np.zeros(0, dtype=np.int64)
+    stats = metrics.trade_stats(all_pnl[np.argsort(all_exit, kind='stable')])
+    eq = sim['eq_values']
+    dd = metrics.drawdown_stats(eq, start_peak=initial_balance)
+    cfg0 = configs[0] if configs else {}
+
+    per_symbol = {}
+    trades = []
+    for book in books:
+        log = logs[book.symbol]
+        s = metrics.trade_stats(log.pnl)
+        per_symbol[book.symbol] = {
+            'total_trades': s['total_trades'],
+            'win_rate': s['win_rate'],
+            'profit_factor': s['profit_factor'],
+            'net_pnl_usd': float(log.pnl.sum()),
+            'skipped_entries': int(book.skipped_entries),
+            'bars': int(book.n - 1),
+        }
+        trades += [{**row, 'symbol': book.symbol} for row in log.to_json_records()]
+    trades.sort(key=lambda row: (row['exit_ts'], row['entry_ts']))
+
+    return {
+        'symbols': [b.symbol for b in books],
+        'initial_balance': initial_balance,
+        'final_balance': sim['final_balance'],
+        'total_profit': sim['final_balance'] - initial_balance,
+        'margin_called': sim['margin_called'],
+        'max_concurrent_trades': int(max_concurrent_trades),
+        'max_open_positions': int(sim['max_open_positions']),
+        'max_drawdown': dd['max_drawdown'],
+        'max_drawdown_pct': dd['percentage'],
+        'trading_dynamics': stats,
+        'per_symbol': per_symbol,
+        'equity_curve_data': downsample_equity(
+            sim['eq_t_ms'], eq, sim['eq_is_event'],
+            every_n_bars=int(cfg0.get('equity_every_n_bars', 5)),
+            window_size=int(cfg0.get('equity_window_size', 20)),
+            max_points=int(cfg0.get('equity_max_points', 20000)),
+            mode=str(cfg0.get('equity_downsample', 'minmax')).lower(),
+            pixel_width=int(cfg0.get('equity_pixel_width', 4800)),
+        ),
+        'trades': trades,
+        'parameters': {c['symbol']: c for c in configs},
+    }
+
+
+def save_portfolio(result: dict, output_path: str = None) -> str:
+    """Tulis hasil ke JSON (default History_Logs/portfolio_<simbol..>.json)."""
+    path = output_path or os.path.join(DEFAULT_OUTPUT_DIR, f"portfolio_{'_'.join(result['symbols'])}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, default=str)
+    return path
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Backtest portofolio multi-simbol Poseidon Wave (satu akun bersama).")
+    parser.add_argument('--symbols', type=str, default=None, help='Daftar simbol dipisah koma (urutan = prioritas pada timestamp sama)')
+    parser.add_argument('--params_file', type=str, default=None, help='File JSON list dict parameter per simbol (wajib ada "symbol")')
+    parser.add_argument('--max_concurrent_trades', type=int, default=1, help='Batas posisi terbuka bersamaan di semua simbol')
+    parser.add_argument('--output', type=str, default=None, help='Path JSON hasil (default: History_Logs/portfolio_<simbol>.json)')
+    return parser
+
+
+if __name__ == '__main__':
+    cli, worker_argv = build_arg_parser().parse_known_args()
+
+    per_symbol = []
+    if cli.params_file:
+        with open(cli.params_file, 'r', encoding='utf-8') as f:
+            per_symbol = json.load(f)
+    elif cli.symbols:
+        per_symbol = [{'symbol': s.strip()} for s in cli.symbols.split(',') if s.strip()]
+    if not per_symbol:
+        print("Isi --symbols atau --params_file.", file=sys.stderr)
+        sys.exit(1)
+
+    worker_parser = wb.build_arg_parser()
+    symbol_args = [worker_parser.parse_args(worker_argv + params_to_argv(p)) for p in per_symbol]
+    base = symbol_args[0]
+
+    mt5 = wb.mt5
+    if base.offline or getattr(mt5, 'is_offline', False):
+        mt5 = wb.OfflineMT5(store_root=base.bar_store_dir)
+    if not mt5.initialize():
+        print("initialize() gagal, error code =", mt5.last_error(), file=sys.stderr)
+        sys.exit(1)
+
+    configs = []
+    for args in symbol_args:
+        config = wb.build_config(args, mt5)
+        config.update({'render_reports': False, 'plot_individual_trades': False, 'continuous_run': True})
+        configs.append(config)
+
+    try:
+        books = load_books(configs, mt5, base.year, base.start_month, base.end_month, base.initial_balance)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        mt5.shutdown()
+        sys.exit(1)
+    send_status({"status": f"Simulasi portofolio {len(books)} simbol...", "progress": 0, "total": 1})
+    sim = PortfolioBacktest(books, base.initial_balance, cli.max_concurrent_trades).run()
+    result = build_report(sim, books, base.initial_balance, cli.max_concurrent_trades, configs)
+    result.update({'year': base.year, 'start_month': base.start_month, 'end_month': base.end_month})
+    path = save_portfolio(result, cli.output)
+    send_status({"status": f"Portofolio selesai: {path}", "progress": 1, "total": 1})
+    mt5.shutdown()
@@ -0,0 +1,91 @@
+# Nama File: render_reports.py
+"""
+Render PDF & gambar untuk run yang dijalankan dengan --metrics_only.
+
+Run dipilih dari store hasil (result_store): N teratas menurut metrik atau
+run_id tertentu. Setiap run dijalankan ulang dengan argumen CLI aslinya
+(`cli_args` di hasil) dan --resume, sehingga bulan-bulan diambil dari checkpoint
+tanpa simulasi ulang; yang dikerjakan hanya gambar equity bulanan + PDF.
+
+Pemakaian:
+    python Backtester/render_reports.py --symbol XAUUSD --top 5 [--by total_profit] [--offline]
+    python Backtester/render_reports.py --symbol XAUUSD --run_id '<run_id JSON>'
+"""
+import sys
+import os
+import argparse
+import traceback
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import worker_backtest as wb
+from result_store import ResultStore, get_run_id
+from utils import send_status
+
+
+def render_result(result: dict, mt5_instance, store: ResultStore, plot_trades: bool = False):
+    """Render PDF satu hasil tersimpan lalu perbarui barisnya di store. Return path PDF atau None."""
+    cli_args = result.get('cli_args')
+    if not cli_args:
+        print(f"Hasil {get_run_id(result.get('parameters', {}))} tidak punya cli_args, dilewati.", file=sys.stderr)
+        return None
+
+    args = argparse.Namespace(**{**vars(wb.build_arg_parser().parse_args([])), **cli_args})
+    args.metrics_only = False
+    args.resume = True
+    args.no_result_store = True   # baris di store diperbarui di bawah, bukan ditambah
+    args.plot_trades = bool(plot_trades or args.plot_trades)
+
+    config = wb.build_config(args, mt5_instance)
+    strategy = wb.PoseidonWave(mt5_instance, config)
+    rendered = wb.run_backtest_job(strategy, config, args)
+    if not rendered or not rendered.get('pdf_report_path'):
+        return None
+    store.update_result(config['symbol'], rendered)
+    return rendered['pdf_report_path']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Render PDF untuk hasil backtest metrics-only terpilih.")
+    parser.add_argument('--symbol', type=str, required=True, help='Simbol trading')
+    parser.add_argument('--top', type=int, default=None, help='Render N hasil teratas')
+    parser.add_argument('--by', type=str, choices=['balance_score', 'total_profit', 'max_drawdown'], default='balance_score',
+                        help='Metrik urutan untuk --top')
+    parser.add_argument('--run_id', type=str, action='append', default=[], help='run_id (JSON) yang dirender; bisa diulang')
+    parser.add_argument('--plot_trades', action='store_true', help='Render juga chart per transaksi (simulasi diulang)')
+    parser.add_argument('--result_db', type=str, default=None, help='File SQLite hasil backtest')
+    parser.add_argument('--offline', action='store_true', help='Jalankan tanpa terminal MT5 (data dari bar store lokal)')
+    parser.add_argument('--bar_store_dir', type=str, default=None, help='Folder bar store lokal untuk mode offline')
+    cli = parser.parse_args()
+
+    store = ResultStore(cli.result_db)
+    selected = store.top_results(cli.symbol, cli.top, cli.by) if cli.top else []
+    for run_id in cli.run_id:
+        result = store.get_result(cli.symbol, run_id)
+        if result is None:
+            print(f"run_id tidak ditemukan di store: {run_id}", file=sys.stderr)
+        else:
+            selected.append(result)
+    if not selected:
+        print("Tidak ada hasil yang dipilih untuk dirender (gunakan --top atau --run_id).", file=sys.stderr)
+        sys.exit(1)
+
+    mt5 = wb.mt5
+    if cli.offline or getattr(mt5, 'is_offline', False):
+        mt5 = wb.OfflineMT5(store_root=cli.bar_store_dir)
+    if not mt5.initialize():
+        print("initialize() gagal, error code =", mt5.last_error(), file=sys.stderr)
+        sys.exit(1)
+
+    total = len(selected)
+    for k, result in enumerate(selected):
+        send_status({"status": f"Render {k + 1}/{total}", "progress": k, "total": total})
+        try:
+            pdf_path = render_result(result, mt5, store, plot_trades=cli.plot_trades)
+            if pdf_path:
+                print(f"PDF dibuat: {pdf_path}")
+        except Exception:
+            print(f"❌ Gagal merender {get_run_id(result.get('parameters', {}))}\n---\n{traceback.format_exc()}", file=sys.stderr)
+    send_status({"status": "Selesai", "progress": total, "total": total})
+    mt5.shutdown()
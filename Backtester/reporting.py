@@ -1,26 +1,19 @@
 import os, sys, shutil
 from datetime import datetime
 from fpdf import FPDF, XPos, YPos
-
-def create_final_pdf_report_impl(monthly_reports, config,
-                                 create_summary_content_image,
-                                 create_mini_equity_pages_images):
-    if not monthly_reports:
-        print("Tidak ada laporan bulanan untuk dibuat menjadi PDF.", file=sys.stderr)
-        return None
-
-    # --- Setup Path & Nama File dengan Pair, Tahun, dan Ekuitas ---
+from result_store import normalized_params, run_hash
+
+def report_output_dir(config: dict) -> str:
+    """
+    Folder hasil per kombinasi parameter (PDF & result.json), tanpa membuatnya.
+    Dibangun dari normalized_params yang sama dengan run_id: folder terakhir = hash run_id,
+    jadi run yang beda parameter apa pun (TP, intrabar, engine, biaya, ...) tidak saling menimpa.
+    """
+    norm = normalized_params(config)
     symbol = config.get('symbol')
-    year = config.get('year')
-    lot_size = config.get('fixed_lot_size', 0.1)
-    initial_balance = int(config.get('initial_balance', 1000))
-    use_adx = config.get('use_adx_filter', False)
-    use_sl = config.get('use_stop_loss', False)
-    wave_period = config.get('wave_period', 36)
-    adx_thresh = config.get('adx_threshold', 15)
-    sl_pts = config.get('stop_loss_points', 10.0)
-    start_time_str = config.get('trade_start_time', '00:00').replace(':', '')
-    end_time_str = config.get('trade_end_time', '23:59').replace(':', '')
+    use_adx, use_sl = norm['use_adx'], norm['use_sl']
+    start_time_str = norm['start_time'].replace(':', '')
+    end_time_str = norm['end_time'].replace(':', '')
 
     if use_adx and use_sl: level1_folder = "ADX_and_SL"
     elif use_adx:          level1_folder = "ADX_Only"
@@ -28,15 +21,29 @@ def create_final_pdf_report_impl(monthly_reports, config,
     else:                  level1_folder = "NoFilter"
 
     path_components = [
-        'Backtester', 'Hasil Laporan PDF', symbol, str(year), level1_folder,
-        f"wave({wave_period})", f"lot({lot_size})"
+        'Backtester', 'Hasil Laporan PDF', symbol, str(norm['year']), level1_folder,
+        f"wave({norm['wave_period']})", f"lot({norm['lot_size']})"
     ]
-    if level1_folder == "ADX_and_SL": path_components.append(f"ADX({adx_thresh})_SL({sl_pts})")
-    elif level1_folder == "ADX_Only": path_components.append(f"ADX({adx_thresh})")
-    elif level1_folder == "SL_Only":  path_components.append(f"SL({sl_pts})")
+    if level1_folder == "ADX_and_SL": path_components.append(f"ADX({norm['adx_threshold']:g})_SL({norm['sl_points']})")
+    elif level1_folder == "ADX_Only": path_components.append(f"ADX({norm['adx_threshold']:g})")
+    elif level1_folder == "SL_Only":  path_components.append(f"SL({norm['sl_points']})")
 
     path_components.append(f"{start_time_str}-{end_time_str}")
-    output_dir = os.path.join(*path_components)
+    tp_str = f"TP({norm['tp_points']})" if norm['use_tp'] else "NoTP"
+    path_components.append(f"{tp_str}_{norm['intrabar_model']}_{norm['engine']}_{run_hash(config)}")
+    return os.path.join(*path_components)
+
+def create_final_pdf_report_impl(monthly_reports, config,
+                                 create_summary_content_image,
+                                 create_mini_equity_pages_images):
+    if not monthly_reports:
+        print("Tidak ada laporan bulanan untuk dibuat menjadi PDF.", file=sys.stderr)
+        return None
+
+    # --- Setup Path & Nama File dengan Pair, Tahun, dan Ekuitas ---
+    symbol = config.get('symbol')
+    initial_balance = int(config.get('initial_balance', 1000))
+    output_dir = report_output_dir(config)
     os.makedirs(output_dir, exist_ok=True)
 
     param_str_file = monthly_reports[0]['param_str']
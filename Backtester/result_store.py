@@ -0,0 +1,331 @@
+# Nama File: result_store.py
+"""
+Penyimpanan hasil backtest terindeks (SQLite) pengganti {symbol}_history.json.
+
+Worker / sweep menambahkan hasilnya langsung ke satu tabel `runs`:
+  - unique index (symbol, run_id) -> dedup lewat upsert / lookup index (run yang
+    dihentikan dini menyimpan kriteria abort-nya dan boleh ditimpa run ulang),
+  - kolom metrik utama (profit, drawdown, balance score, ...) berindeks untuk
+    memilih hasil terbaik tanpa membaca semua hasil,
+  - payload = JSON hasil lengkap (zlib), hanya dibaca untuk baris yang ditampilkan.
+Mode WAL + busy timeout agar banyak proses worker bisa menulis bersamaan.
+"""
+import os
+import json
+import zlib
+import sqlite3
+import hashlib
+from datetime import datetime
+
+_BACKTESTER_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.environ.get('RESULT_DB_PATH') or os.path.join(_BACKTESTER_DIR, 'History_Logs', 'backtest_results.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id             INTEGER PRIMARY KEY,
+    symbol         TEXT NOT NULL,
+    run_id         TEXT NOT NULL,
+    created_at     TEXT NOT NULL,
+    total_profit   REAL,
+    max_drawdown   REAL,
+    balance_score  REAL,
+    win_rate       REAL,
+    total_trades   INTEGER,
+    profit_factor  REAL,
+    sharpe_ratio   REAL,
+    lot_size       REAL,
+    wave_period    INTEGER,
+    start_time     TEXT,
+    end_time       TEXT,
+    use_adx        INTEGER,
+    adx_threshold  REAL,
+    use_sl         INTEGER,
+    sl_points      REAL,
+    use_tp         INTEGER,
+    tp_points      REAL,
+    intrabar_model TEXT,
+    engine         TEXT,
+    pdf_report_path TEXT,
+    pruned         INTEGER NOT NULL DEFAULT 0,
+    prune_criteria TEXT,
+    payload        BLOB NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_runs_symbol_run_id ON runs(symbol, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_symbol_score ON runs(symbol, balance_score);
+CREATE INDEX IF NOT EXISTS idx_runs_symbol_profit ON runs(symbol, total_profit);
+CREATE INDEX IF NOT EXISTS idx_runs_symbol_drawdown ON runs(symbol, max_drawdown);
+"""
+
+_METRIC_COLUMNS = (
+    'run_id', 'created_at', 'total_profit', 'max_drawdown', 'balance_score', 'win_rate', 'total_trades',
+    'profit_factor', 'sharpe_ratio', 'lot_size', 'wave_period', 'start_time', 'end_time',
+    'use_adx', 'adx_threshold', 'use_sl', 'sl_points', 'use_tp', 'tp_points', 'intrabar_model', 'engine',
+    'pdf_report_path', 'pruned', 'prune_criteria',
+)
+
+# kolom yang ditambahkan setelah tabel pertama dibuat (dimigrasi saat store dibuka)
+_ADDED_COLUMNS = {
+    'pruned': 'INTEGER NOT NULL DEFAULT 0',
+    'prune_criteria': 'TEXT',
+    'use_tp': 'INTEGER',
+    'tp_points': 'REAL',
+    'intrabar_model': 'TEXT',
+    'engine': 'TEXT',
+}
+
+# Versi skema run_id (PRAGMA user_version); store lama dimigrasi saat dibuka
+_RUN_ID_VERSION = 1
+
+# Default argumen worker_backtest: kunci yang tidak disebut launcher tetap terisi sama dengan config worker
+_DEFAULTS = {
+    'year': 2025, 'start_month': 1, 'end_month': 7, 'initial_balance': 1000.0,
+    'equity_mode': 'per_month', 'server_tz': 'UTC', 'session_base_tz': 'UTC',
+    'lot_size': 0.2, 'start_time': '14:30', 'end_time': '19:30', 'wave_period': 36,
+    'adx_period': 14, 'adx_threshold': 15, 'sl_points': 10.0, 'tp_points': 20.0,
+    'intrabar_model': 'sl_first', 'engine': 'loop',
+    'commission': 7.0, 'slippage_points': 2.0, 'avg_spread_points': 20.0,
+}
+
+
+def normalized_params(params: dict) -> dict:
+    """
+    Semua parameter yang memengaruhi hasil, dinormalisasi (toleran nama lama/baru, default = default worker).
+    Dasar run_id (result_store) dan folder laporan (reporting.report_output_dir).
+    """
+    def pick(*names, default=None):
+        for n in names:
+            if n in params and params.get(n) is not None:
+                return params.get(n)
+        return default
+
+    def number(cast, *names):
+        return cast(pick(*names, default=_DEFAULTS[names[0]]))
+
+    use_adx = bool(pick('use_adx', 'use_adx_filter', default=False))
+    use_sl  = bool(pick('use_sl', 'use_stop_loss', default=False))
+    use_tp  = bool(pick('use_tp', 'use_take_profit', default=False))
+    continuous = bool(pick('continuous', 'continuous_run', default=False))
+
+    return {
+        'year':           number(int, 'year'),
+        'start_month':    number(int, 'start_month'),
+        'end_month':      number(int, 'end_month'),
+        'initial_balance': number(float, 'initial_balance'),
+        'equity_mode':    str(pick('equity_mode', default=_DEFAULTS['equity_mode'])),
+        'continuous':     continuous,
+        'warmup_bars':    pick('warmup_bars') if continuous else None,
+        'server_tz':      str(pick('server_tz', default=_DEFAULTS['server_tz'])),
+        'session_base_tz': str(pick('session_base_tz', default=_DEFAULTS['session_base_tz'])),
+        'lot_size':       number(float, 'lot_size', 'fixed_lot_size'),
+        'start_time':     str(pick('start_time', 'trade_start_time', default=_DEFAULTS['start_time'])),
+        'end_time':       str(pick('end_time', 'trade_end_time', default=_DEFAULTS['end_time'])),
+        'wave_period':    number(int, 'wave_period'),
+        'use_adx':        use_adx,
+        'adx_period':     number(int, 'adx_period') if use_adx else None,
+        'adx_threshold':  number(float, 'adx_threshold') if use_adx else None,
+        'use_sl':         use_sl,
+        'sl_points':      number(float, 'sl_points', 'stop_loss_points') if use_sl else None,
+        'use_tp':         use_tp,
+        'tp_points':      number(float, 'tp_points', 'take_profit_points') if use_tp else None,
+        'intrabar_model': str(pick('intrabar_model', default=_DEFAULTS['intrabar_model'])).lower(),
+        'engine':         str(pick('engine', default=_DEFAULTS['engine'])).lower(),
+        'commission':     number(float, 'commission', 'commission_per_lot_roundturn', 'commission_per_lot_roundturn_usd'),
+        'slippage_points': number(float, 'slippage_points'),
+        'use_dynamic_spread': bool(pick('use_dynamic_spread', default=False)),
+        'avg_spread_points': number(float, 'avg_spread_points'),
+    }
+
+
+def abort_criteria(params: dict) -> str:
+    """Tanda kriteria early-abort (nama argumen CLI worker/launcher) yang menghentikan sebuah run."""
+    min_pf = params.get('abort_min_pf')
+    min_trades = params.get('abort_min_trades')
+    return json.dumps({
+        'max_dd': params.get('abort_max_dd'),
+        'min_balance': params.get('abort_min_balance'),
+        'min_pf': min_pf,
+        'min_trades': (30 if min_trades is None else int(min_trades)) if min_pf is not None else None,
+        'margin_call': bool(params.get('abort_on_margin_call')),
+    }, sort_keys=True)
+
+
+def get_run_id(params: dict) -> str:
+    """ID unik kombinasi parameter (toleran nama lama/baru)."""
+    return json.dumps(normalized_params(params), sort_keys=True)
+
+
+def run_hash(params: dict) -> str:
+    """Hash pendek run_id (mis. untuk nama folder laporan)."""
+    return hashlib.sha1(get_run_id(params).encode('utf-8')).hexdigest()[:10]
+
+
+def result_drawdown(result: dict) -> float:
+    """Max drawdown % total; fallback ke format lama `max_drawdown`."""
+    dd_details = result.get('total_drawdown_details')
+    if dd_details and 'percentage' in dd_details:
+        return float(dd_details.get('percentage', 100))
+    return float(result.get('max_drawdown', 100))
+
+
+def balance_score(profit: float, drawdown: float) -> float:
+    return (profit / drawdown) if drawdown > 0.01 else (profit * 1000)
+
+
+class ResultStore:
+    """Tabel hasil backtest per simbol dengan query terindeks."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        # store versi lama: tambahkan kolom yang belum ada (run gugur lama tanpa kriteria -> selalu dicoba ulang)
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(runs)')}
+        with self.conn:
+            for name, decl in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    self.conn.execute(f'ALTER TABLE runs ADD COLUMN {name} {decl}')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_symbol_tp ON runs(symbol, use_tp, tp_points)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_symbol_exec ON runs(symbol, engine, intrabar_model)')
+            if self.conn.execute('PRAGMA user_version').fetchone()[0] < _RUN_ID_VERSION:
+                self._migrate_run_ids()
+                self.conn.execute(f'PRAGMA user_version = {_RUN_ID_VERSION}')
+
+    def _migrate_run_ids(self) -> None:
+        """run_id skema lama (kunci baru hanya bila non-default) -> skema sekarang, dihitung ulang dari payload."""
+        rows = self.conn.execute('SELECT id, payload FROM runs').fetchall()
+        for row_id, payload in rows:
+            params = json.loads(zlib.decompress(payload).decode('utf-8')).get('parameters', {})
+            # baris lama yang bentrok (mis. histori JSON tanpa parameter lengkap) tetap memakai run_id lamanya
+            self.conn.execute('UPDATE OR IGNORE runs SET run_id = ? WHERE id = ?', (get_run_id(params), row_id))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # --- Tulis ---
+    @staticmethod
+    def _row(symbol: str, result: dict) -> tuple:
+        params = result.get('parameters', {})
+        norm = normalized_params(params)
+        profit = float(result.get('total_profit', 0) or 0)
+        drawdown = result_drawdown(result)
+        dynamics = result.get('trading_dynamics') or {}
+        payload = zlib.compress(json.dumps(result, default=str).encode('utf-8'), 6)
+        pruned = bool(result.get('pruned'))
+        return (
+            symbol, get_run_id(params), datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            profit, drawdown, balance_score(profit, drawdown),
+            result.get('overall_win_rate'), result.get('total_trades'),
+            dynamics.get('profit_factor'), dynamics.get('sharpe_ratio'),
+            norm['lot_size'], norm['wave_period'], norm['start_time'], norm['end_time'],
+            int(norm['use_adx']), norm['adx_threshold'], int(norm['use_sl']), norm['sl_points'],
+            int(norm['use_tp']), norm['tp_points'], norm['intrabar_model'], norm['engine'],
+            result.get('pdf_report_path'), int(pruned),
+            abort_criteria(result.get('cli_args') or {}) if pruned else None, payload,
+        )
+
+    def add_results(self, symbol: str, results: list) -> int:
+        """
+        Tambahkan hasil (kombinasi yang sudah ada dilewati, kecuali run yang dulu dihentikan
+        dini -> ditimpa hasil baru). Return jumlah baris baru/tertimpa.
+        """
+        rows = [self._row(symbol, r) for r in results if r]
+        if not rows:
+            return 0
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT INTO runs (symbol, {', '.join(_METRIC_COLUMNS)}, payload) "
+                f"VALUES ({', '.join('?' * (len(_METRIC_COLUMNS) + 2))}) "
+                f"ON CONFLICT(symbol, run_id) DO UPDATE SET "
+                f"{', '.join(f'{c} = excluded.{c}' for c in _METRIC_COLUMNS[1:] + ('payload',))} "
+                f"WHERE runs.pruned = 1",
+                rows,
+            )
+            return self.conn.total_changes - before
+
+    def add_result(self, symbol: str, result: dict) -> bool:
+        return self.add_results(symbol, [result]) == 1
+
+    def update_result(self, symbol: str, result: dict) -> None:
+        """Perbarui baris run yang sudah ada (mis. setelah PDF dirender belakangan)."""
+        row = self._row(symbol, result)
+        columns = _METRIC_COLUMNS[2:] + ('payload',)   # run_id & created_at tetap
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE runs SET {', '.join(f'{c} = ?' for c in columns)} WHERE symbol = ? AND run_id = ?",
+                row[3:] + (symbol, row[1]),
+            )
+
+    def import_history_json(self, symbol: str, history_file: str) -> int:
+        """Migrasi satu kali dari {symbol}_history.json lama (jika ada)."""
+        try:
+            with open(history_file, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return 0
+        return self.add_results(symbol, history.get('all_runs', []))
+
+    # --- Baca ---
+    def count(self, symbol: str) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM runs WHERE symbol = ?", (symbol,)).fetchone()[0]
+
+    def run_ids(self, symbol: str, abort_params: dict = None) -> set:
+        """
+        run_id simbol ini yang tidak perlu dijalankan lagi (dibaca dari index, tanpa payload).
+        Run yang dihentikan dini hanya dihitung bila kriteria abort-nya sama dengan `abort_params`.
+        """
+        return {row[0] for row in self.conn.execute(
+            "SELECT run_id FROM runs WHERE symbol = ? AND (pruned = 0 OR prune_criteria = ?)",
+            (symbol, abort_criteria(abort_params or {})),
+        )}
+
+    @staticmethod
+    def _decode(row) -> dict:
+        result = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+        result['balance_score'], result['max_drawdown'] = row[1], row[2]
+        return result
+
+    def _load_one(self, sql: str, args: tuple):
+        row = self.conn.execute(sql, args).fetchone()
+        return self._decode(row) if row is not None else None
+
+    def get_result(self, symbol: str, run_id: str):
+        return self._load_one(
+            "SELECT payload, balance_score, max_drawdown FROM runs WHERE symbol = ? AND run_id = ?", (symbol, run_id)
+        )
+
+    def top_results(self, symbol: str, n: int, order_by: str = 'balance_score') -> list:
+        """N hasil teratas menurut kolom metrik (max_drawdown: terkecil dulu); run yang dihentikan dini tidak ikut."""
+        if order_by not in ('balance_score', 'total_profit', 'max_drawdown'):
+            raise ValueError(f"Kolom urutan tidak dikenal: {order_by}")
+        direction = 'ASC' if order_by == 'max_drawdown' else 'DESC'
+        cur = self.conn.execute(
+            f"SELECT payload, balance_score, max_drawdown FROM runs WHERE symbol = ? AND pruned = 0 "
+            f"ORDER BY {order_by} {direction}, id LIMIT ?", (symbol, int(n)),
+        )
+        return [self._decode(row) for row in cur]
+
+    def best_results(self, symbol: str) -> dict:
+        """Juara per kategori: paling seimbang, profit tertinggi, paling aman (drawdown terendah yang profit)."""
+        select = "SELECT payload, balance_score, max_drawdown FROM runs WHERE symbol = ? AND pruned = 0"
+        return {
+            'most_balanced': self._load_one(f"{select} ORDER BY balance_score DESC, id LIMIT 1", (symbol,)),
+            'most_profitable': self._load_one(f"{select} ORDER BY total_profit DESC, id LIMIT 1", (symbol,)),
+            'safest_profitable': self._load_one(
+                f"{select} AND total_profit > 0 ORDER BY max_drawdown ASC, id LIMIT 1", (symbol,)
+            ),
+        }
+
+
+_stores = {}
+
+
+def get_result_store(db_path: str = None) -> ResultStore:
+    """Instance store bersama per file (satu koneksi per proses)."""
+    db_path = db_path or DEFAULT_DB_PATH
+    if db_path not in _stores:
+        _stores[db_path] = ResultStore(db_path)
+    return _stores[db_path]
@@ -0,0 +1,164 @@
+# Nama File: risk_scenarios.py
+"""
+Simulator manajemen risiko akun (SL% / TP% / aturan reset) untuk banyak skenario sekaligus.
+
+Semantik sama dengan PoseidonWave.run_advanced_simulation versi lama (state
+TRADING/STOPPED, SL/TP relatif saldo awal fase, restart berdasarkan tanggal),
+tetapi semua skenario dievaluasi bersamaan: satu pass atas kurva ekuitas dengan
+state tiap skenario sebagai vektor NumPy. Statistik trade per skenario diambil
+dari prefix-sum trade yang diurutkan menurut tanggal exit.
+"""
+from __future__ import annotations
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from trade_log import TradeLog
+
+_DAY_MS = 86_400_000
+_RESET_PERIOD_MS = {'days': _DAY_MS, 'weeks': 7 * _DAY_MS, 'months': 30 * _DAY_MS}
+_RESET_PERIOD_LABEL = {'days': 'hari', 'weeks': 'minggu', 'months': 'bulan'}
+
+# status per skenario
+_ST_COMPLETED, _ST_TP, _ST_SL_RESET, _ST_SL_STOP = 0, 1, 2, 3
+
+EMPTY_RESULT = {
+    'status': 'Data Kosong', 'net_profit': 0, 'trades': 0, 'max_drawdown': 0, 'win_rate': 0,
+    'profit_factor': 0, 'end_date': 'N/A', 'reset_count': 0, 'gross_profit': 0, 'gross_loss': 0, 'num_wins': 0,
+}
+
+RESET_RULES = (
+    None,
+    {'period': 'days', 'value': 1},
+    {'period': 'weeks', 'value': 1},
+    {'period': 'weeks', 'value': 2},
+    {'period': 'months', 'value': 1},
+)
+
+
+def scenario_grid(sl_values=None, tp_ratios=(1.0, 1.5, 2.0, 3.0), reset_rules=RESET_RULES) -> list:
+    """Matriks skenario SL% x (TP = SL x rasio) x aturan reset."""
+    if sl_values is None:
+        sl_values = np.arange(5.0, 50.0 + 1e-9, 2.5)
+    scenarios = []
+    for sl, ratio, rule in itertools.product(sl_values, tp_ratios, reset_rules):
+        sl, tp = float(sl), float(sl) * float(ratio)
+        name = f"SL {sl:g}% / TP {tp:g}%"
+        if rule:
+            name += f", Reset {rule['value']} {_RESET_PERIOD_LABEL.get(rule['period'], rule['period'])}"
+        scenarios.append({'name': name, 'sl': sl, 'tp': tp, 'reset_rule': rule})
+    return scenarios
+
+
+def _reset_delta_ms(rule) -> int:
+    """Durasi jeda setelah SL (ms); 0 = tanpa reset (stop permanen)."""
+    if not rule or rule.get('value', 0) <= 0:
+        return 0
+    return int(_RESET_PERIOD_MS.get(rule.get('period'), _DAY_MS) * rule['value'])
+
+
+def simulate_risk_scenarios(equity_curve: list, initial_balance: float, completed_trades: TradeLog, scenarios: list) -> list:
+    """
+    Jalankan semua skenario {'name', 'sl', 'tp', 'reset_rule'} atas equity_curve [(t_ms, balance)].
+    Return list dict hasil (format run_advanced_simulation + 'name') sesuai urutan skenario.
+    """
+    if not scenarios:
+        return []
+    if not equity_curve:
+        return [{**EMPTY_RESULT, 'name': sc.get('name', 'N/A')} for sc in scenarios]
+
+    t_ms = np.fromiter((int(t) for t, _ in equity_curve), dtype=np.int64, count=len(equity_curve))
+    actual = np.fromiter((float(b) for _, b in equity_curve), dtype=float, count=len(equity_curve))
+    day = t_ms // _DAY_MS
+
+    n_sc = len(scenarios)
+    sl_pct = np.array([float(sc['sl']) for sc in scenarios])
+    tp_pct = np.array([float(sc['tp']) for sc in scenarios])
+    reset_ms = np.array([_reset_delta_ms(sc.get('reset_rule')) for sc in scenarios], dtype=np.int64)
+    has_reset = reset_ms > 0
+
+    sim = np.full(n_sc, float(initial_balance))
+    peak = sim.copy()
+    max_dd = np.zeros(n_sc)
+    phase_start = sim.copy()
+    last_known = sim.copy()
+    stopped = np.zeros(n_sc, dtype=bool)
+    done = np.zeros(n_sc, dtype=bool)
+    restart_day = np.zeros(n_sc, dtype=np.int64)
+    reset_count = np.zeros(n_sc, dtype=np.int64)
+    status = np.full(n_sc, _ST_COMPLETED, dtype=np.int8)
+    stop_idx = np.full(n_sc, len(actual) - 1, dtype=np.int64)
+
+    for i in range(len(actual)):
+        a = actual[i]
+        restart = stopped & ~done & (day[i] >= restart_day)
+        if restart.any():
+            stopped &= ~restart
+            phase_start[restart] = sim[restart]
+            reset_count += restart
+        trading = ~stopped & ~done
+        if trading.any():
+            sim[trading] += a - last_known[trading]
+            np.maximum(peak, sim, out=peak, where=trading)
+            dd = np.divide(peak - sim, peak, out=np.zeros(n_sc), where=trading & (peak > 0))
+            np.maximum(max_dd, dd, out=max_dd)
+
+            tp_hit = trading & (sim >= phase_start * (1 + tp_pct / 100))
+            sl_hit = trading & ~tp_hit & (sim <= phase_start * (1 - sl_pct / 100))
+            if tp_hit.any() or sl_hit.any():
+                stop_idx[tp_hit | sl_hit] = i
+                status[tp_hit] = _ST_TP
+                pause = sl_hit & has_reset
+                stopped |= pause
+                restart_day[pause] = (t_ms[i] + reset_ms[pause]) // _DAY_MS
+                status[pause] = _ST_SL_RESET
+                halt = sl_hit & ~has_reset
+                status[halt] = _ST_SL_STOP
+                done |= tp_hit | halt
+        last_known[~done] = a
+        if done.all():
+            break
+
+    # Statistik trade sampai tanggal stop tiap skenario (prefix-sum, urut tanggal exit)
+    completed_trades = TradeLog.coerce(completed_trades)
+    if len(completed_trades):
+        exit_day = completed_trades.exit_ms // _DAY_MS
+        pnl = completed_trades.pnl
+        order = np.argsort(exit_day, kind='stable')
+        exit_day, pnl = exit_day[order], pnl[order]
+        cum_wins = np.concatenate([[0], np.cumsum(pnl > 0)])
+        cum_gp = np.concatenate([[0.0], np.cumsum(np.where(pnl > 0, pnl, 0.0))])
+        cum_gl = np.concatenate([[0.0], np.cumsum(np.where(pnl < 0, pnl, 0.0))])
+        n_trades = np.searchsorted(exit_day, day[stop_idx], side='right')
+    else:
+        cum_wins, cum_gp, cum_gl = np.zeros(1, dtype=np.int64), np.zeros(1), np.zeros(1)
+        n_trades = np.zeros(n_sc, dtype=np.int64)
+
+    stop_dates = pd.to_datetime(t_ms[stop_idx], unit='ms', utc=True).strftime('%Y-%m-%d')
+    results = []
+    for s, sc in enumerate(scenarios):
+        k = int(n_trades[s])
+        num_wins = int(cum_wins[k])
+        gross_profit, gross_loss = float(cum_gp[k]), float(cum_gl[k])
+        status_text = {
+            _ST_COMPLETED: "Completed",
+            _ST_TP: f"TP {tp_pct[s]:.1f}% Hit",
+            _ST_SL_RESET: "SL Hit, Resetting",
+            _ST_SL_STOP: f"SL {sl_pct[s]:.1f}% Hit & Stop",
+        }[int(status[s])]
+        results.append({
+            'name': sc.get('name', 'N/A'),
+            'status': status_text,
+            'net_profit': float(sim[s]) - initial_balance,
+            'trades': k,
+            'max_drawdown': float(max_dd[s]) * 100,
+            'win_rate': (num_wins / k) * 100 if k > 0 else 0,
+            'profit_factor': abs(gross_profit / gross_loss) if gross_loss != 0 else 999.9,
+            'end_date': stop_dates[s],
+            'reset_count': int(reset_count[s]),
+            'gross_profit': gross_profit,
+            'gross_loss': gross_loss,
+            'num_wins': num_wins,
+        })
+    return results
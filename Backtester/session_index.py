@@ -0,0 +1,74 @@
+# Nama File: session_index.py
+"""
+Mask jam trading (bool per bar) yang dihitung sekali per bulan lalu dipakai ulang.
+
+Pengganti in_session per bar (tz_convert satu Timestamp + banding time()):
+in_session_mask mengonversi seluruh DatetimeIndex sekaligus (DST tetap benar
+karena offset zona waktu dihitung per elemen). Hasil di-cache di memori per
+(simbol, bulan, jendela sesi, basis zona waktu) sehingga bar warm-up yang
+tumpang tindih, fitur pasar per bulan dan run lain di proses yang sama
+(sweep_runner) tidak menghitung ulang. Timestamp pertama/terakhir dan jumlah bar
+bulan itu ikut dalam kunci (O(1), tanpa hash seluruh array), jadi potongan bulan
+yang berbeda atau data yang bertambah otomatis memicu hitung ulang.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from utils import epoch_ms_array, in_session_mask
+
+
+class SessionIndex:
+    """Cache LRU mask sesi per bulan kalender (UTC)."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max(1, int(max_entries))
+        self._memory = OrderedDict()   # key -> array bool (read-only)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(symbol, month: str, start_trade_time, end_trade_time, session_base: str, server_tz_name: str,
+                 t_ms: np.ndarray) -> tuple:
+        base = 'UTC' if str(session_base).upper() == 'UTC' else 'SERVER'
+        tz = str(server_tz_name) if base == 'SERVER' else 'UTC'
+        span = (int(t_ms[0]), int(t_ms[-1]), len(t_ms)) if len(t_ms) else (0, 0, 0)
+        return (str(symbol), month, start_trade_time.isoformat(), end_trade_time.isoformat(), base, tz, span)
+
+    def mask(self, index, symbol, start_trade_time, end_trade_time, session_base: str, server_tz_name: str) -> np.ndarray:
+        """Array bool in-session untuk seluruh index (tz-aware UTC), disusun dari potongan per bulan."""
+        n = len(index)
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+        t_ms = epoch_ms_array(index)
+        months = t_ms.astype('datetime64[ms]').astype('datetime64[M]')
+        bounds = np.concatenate([[0], np.flatnonzero(months[1:] != months[:-1]) + 1, [n]])
+
+        parts = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            key = self.make_key(symbol, str(months[lo]), start_trade_time, end_trade_time,
+                                session_base, server_tz_name, t_ms[lo:hi])
+            part = self._memory.get(key)
+            if part is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                part = in_session_mask(index[lo:hi], start_trade_time, end_trade_time, session_base, server_tz_name)
+                part.flags.writeable = False
+                self._memory[key] = part
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+            parts.append(part)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+_session_index = None
+
+
+def get_session_index() -> SessionIndex:
+    """Instance bersama per proses (dipakai semua run / bulan)."""
+    global _session_index
+    if _session_index is None:
+        _session_index = SessionIndex()
+    return _session_index
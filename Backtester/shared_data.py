@@ -0,0 +1,228 @@
+# Nama File: shared_data.py
+"""
+Dataset bar + indikator di shared memory untuk worker sweep.
+
+Launcher mem-publish OHLC, spread dan kolom indikator (BBands/ADX) per
+simbol-bulan SEKALI lewat multiprocessing.shared_memory, lalu menulis manifest
+JSON. Worker meng-attach view NumPy read-only (zero-copy) dari manifest itu,
+sehingga memori bertambah per dataset, bukan per worker.
+
+Struktur manifest:
+    {"symbol": ..., "timeframe": ...,
+     "periods": {"<start>_<end>": {"columns": {kolom: spec},
+                                   "indicators": {key: {"columns": [...], "values": spec}}}}}
+dengan spec = {"shm": nama segmen, "dtype": "<f8", "shape": [...]}.
+"""
+import os
+import json
+import math
+import calendar
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from utils import BACKTEST_COLUMNS, timeframe_minutes
+
+
+def indicator_key(indicator: str, params: dict) -> str:
+    """Kunci indikator di manifest (sama untuk launcher & worker)."""
+    return json.dumps([indicator, params], sort_keys=True)
+
+
+def period_key(start_date_str: str, end_date_str: str) -> str:
+    return f"{start_date_str}_{end_date_str}"
+
+
+def month_period(year: int, month: int) -> tuple:
+    """(start_date_str, end_date_str) satu bulan kalender, format sama dengan worker."""
+    num_days = calendar.monthrange(year, month)[1]
+    return f"{year}-{month:02d}-01", f"{year}-{month:02d}-{num_days}"
+
+
+def default_warmup_bars(bb_length: int, adx_period: int = 0) -> int:
+    """Bar warm-up indikator mode kontinu: 2x periode terpanjang + 10."""
+    return 2 * int(max(bb_length, adx_period)) + 10
+
+
+def continuous_period(year: int, start_month: int, end_month: int, warmup_bars: int, timeframe: int) -> tuple:
+    """
+    (warm_start_str, period_end_str) data mode kontinu: start_month..end_month plus prefix
+    warm-up; period_end = tanggal 1 bulan sesudah end_month (eksklusif). Sama untuk launcher & worker.
+    """
+    warmup_days = math.ceil(int(warmup_bars) * timeframe_minutes(timeframe) / 1440 * 1.5) + 4
+    period_start = pd.Timestamp(year, start_month, 1)
+    period_end = pd.Timestamp(year + (end_month == 12), end_month % 12 + 1, 1)
+    return (period_start - pd.Timedelta(days=warmup_days)).strftime('%Y-%m-%d'), period_end.strftime('%Y-%m-%d')
+
+
+# Nama segmen yang dibuat di proses ini (pemilik tetap terdaftar di resource_tracker)
+_OWNED_SEGMENTS = set()
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Attach tanpa didaftarkan ke resource_tracker (segmen milik launcher, bukan worker)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # Python >= 3.13
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix' and name not in _OWNED_SEGMENTS:
+            from multiprocessing import resource_tracker
+            try:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        return shm
+
+
+class SharedDataset:
+    """Pemilik (launcher) atau pengguna (worker) kumpulan array di shared memory."""
+
+    def __init__(self, manifest: dict = None):
+        self.manifest = manifest or {'periods': {}}
+        self._segments = []
+        self._owner = False
+
+    # --- Sisi launcher ---
+    def _publish_array(self, arr: np.ndarray) -> dict:
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        self._segments.append(shm)   # terdaftar dulu agar close() tetap meng-unlink bila salin gagal
+        _OWNED_SEGMENTS.add(shm.name)
+        self._owner = True
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        return {'shm': shm.name, 'dtype': arr.dtype.str, 'shape': list(arr.shape)}
+
+    def publish_period(self, period: str, rates: np.ndarray) -> None:
+        """Publish semua field structured array rates (time, open, ..., spread)."""
+        entry = self.manifest['periods'].setdefault(period, {'columns': {}, 'indicators': {}})
+        for name in rates.dtype.names:
+            entry['columns'][name] = self._publish_array(rates[name])
+
+    def publish_indicator(self, period: str, indicator: str, params: dict, frame) -> None:
+        """Publish hasil indikator (DataFrame/Series sepanjang bar periode) sebagai satu blok float64."""
+        if isinstance(frame, pd.Series):
+            frame = frame.to_frame()
+        entry = self.manifest['periods'][period]
+        entry['indicators'][indicator_key(indicator, params)] = {
+            'columns': [str(c) for c in frame.columns],
+            'values': self._publish_array(frame.to_numpy(dtype=float)),
+        }
+
+    def save_manifest(self, path: str) -> str:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        return path
+
+    # --- Sisi worker ---
+    @classmethod
+    def attach(cls, manifest_path: str) -> 'SharedDataset':
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _view(self, spec: dict) -> np.ndarray:
+        shm = _attach_segment(spec['shm'])
+        self._segments.append(shm)
+        arr = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=shm.buf)
+        arr.flags.writeable = False
+        return arr
+
+    def has_period(self, period: str) -> bool:
+        return period in self.manifest.get('periods', {})
+
+    def bars_frame(self, period: str):
+        """DataFrame bar (index waktu UTC) berisi view zero-copy; None jika periode tidak ada."""
+        entry = self.manifest.get('periods', {}).get(period)
+        if not entry or 'time' not in entry['columns']:
+            return None
+        cols = {name: self._view(spec) for name, spec in entry['columns'].items()}
+        index = pd.DatetimeIndex(pd.to_datetime(cols.pop('time'), unit='s', utc=True), name='time')
+        return pd.DataFrame(cols, index=index, copy=False)
+
+    def indicator_frame(self, period: str, indicator: str, params: dict, index):
+        """DataFrame indikator (view zero-copy) atau None jika tidak dipublish."""
+        entry = self.manifest.get('periods', {}).get(period, {})
+        spec = entry.get('indicators', {}).get(indicator_key(indicator, params))
+        if spec is None:
+            return None
+        # Hanya cocok untuk df penuh periode (sebelum dropna): cek panjang & ujung waktu
+        t = self._view(entry['columns']['time'])
+        if len(t) != len(index) or not len(t) or (
+            int(t[0]) != index[0].timestamp() or int(t[-1]) != index[-1].timestamp()
+        ):
+            return None
+        values = self._view(spec['values'])
+        return pd.DataFrame(values, index=index, columns=spec['columns'], copy=False)
+
+    # --- Pembersihan ---
+    def close(self, unlink: bool = None) -> None:
+        """Tutup semua segmen; pemilik (launcher) sekaligus menghapusnya."""
+        unlink = self._owner if unlink is None else unlink
+        for shm in self._segments:
+            try:
+                shm.close()
+            except BufferError:
+                pass   # masih ada view yang hidup; mapping dilepas saat view di-GC
+            if unlink:
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+                _OWNED_SEGMENTS.discard(shm.name)
+        self._segments = []
+
+    def __enter__(self) -> 'SharedDataset':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def publish_sweep_dataset(mt5_instance, symbol: str, timeframe: int, months: list,
+                          bb_lengths=(), adx_periods=(), bar_store=None, spans=()) -> SharedDataset:
+    """
+    Muat bar tiap (tahun, bulan) sekali lalu publish bar + BBands/ADX untuk semua
+    panjang yang dipakai sweep. Indikator dihitung persis seperti di worker (df penuh, sebelum dropna).
+    spans: rentang (warm_start_str, period_end_str) mode kontinu (continuous_period), bar >= period_end dibuang
+    seperti di worker. Gagal di tengah jalan -> segmen yang sudah dibuat langsung di-unlink.
+    """
+    import pandas_ta  # noqa: F401  (registrasi accessor df.ta)
+
+    periods = [(*month_period(year, month), False) for year, month in sorted(set(months))]
+    periods += [(start_str, end_str, True) for start_str, end_str in sorted(set(spans))]
+    dataset = SharedDataset({'symbol': symbol, 'timeframe': int(timeframe), 'periods': {}})
+    try:
+        _publish_periods(dataset, mt5_instance, symbol, timeframe, periods, bb_lengths, adx_periods, bar_store)
+    except BaseException:
+        dataset.close()
+        raise
+    return dataset
+
+
+def _publish_periods(dataset: SharedDataset, mt5_instance, symbol: str, timeframe: int, periods: list,
+                     bb_lengths, adx_periods, bar_store) -> None:
+    """Isi dataset periode per periode (bar + indikator)."""
+    for start_str, end_str, end_exclusive in periods:
+        start_date = datetime.strptime(start_str, '%Y-%m-%d')
+        end_date = datetime.strptime(end_str, '%Y-%m-%d')
+        if bar_store is not None:
+            rates = bar_store.copy_rates_range(mt5_instance, symbol, timeframe, start_date, end_date, columns=BACKTEST_COLUMNS)
+        else:
+            rates = mt5_instance.copy_rates_range(symbol, timeframe, start_date, end_date)
+        if rates is not None and end_exclusive:
+            rates = rates[rates['time'] < int(pd.Timestamp(end_str, tz='UTC').timestamp())]
+        if rates is None or len(rates) == 0:
+            continue
+
+        period = period_key(start_str, end_str)
+        dataset.publish_period(period, rates)
+
+        df = pd.DataFrame(rates)
+        df['time'] = pd.to_datetime(df['time'], unit='s', utc=True)
+        df.set_index('time', inplace=True)
+        for length in sorted(set(bb_lengths)):
+            dataset.publish_indicator(period, 'bbands', {'length': length, 'std': 2},
+                                      df.ta.bbands(length=length, std=2))
+        for length in sorted(set(adx_periods)):
+            dataset.publish_indicator(period, 'adx', {'length': length}, df.ta.adx(length=length))
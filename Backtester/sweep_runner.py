@@ -0,0 +1,117 @@
+# Nama File: sweep_runner.py
+"""
+Sweep in-process: banyak kombinasi parameter dievaluasi dalam SATU proses.
+
+Interpreter, import dan koneksi MT5 dibayar sekali per proses sweep (launcher
+menjalankan beberapa proses sweep, masing-masing membayarnya sendiri), bukan per
+kombinasi. Bar tiap simbol-bulan dimuat sekali (rates_memo) dan kolom indikator
+dipakai ulang lewat cache indikator. Hasil ditulis ke store SQLite (result_store)
+per batch dalam satu transaksi (tiap `flush_every` kombinasi dan di akhir sweep),
+bukan upsert per kombinasi atau result.json.
+
+Pemakaian:
+    python Backtester/sweep_runner.py --params_file kombinasi.json [--offline]
+kombinasi.json berisi list dict parameter dengan nama argumen CLI worker_backtest
+(mis. {"symbol": "XAUUSD", "lot_size": 0.5, "use_adx": true, ...}).
+"""
+import sys
+import os
+import json
+import argparse
+import traceback
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import worker_backtest as wb
+from utils import send_status
+from result_store import get_result_store
+
+FLUSH_EVERY = 50  # kombinasi per transaksi store (hasil yang belum ditulis hilang bila proses mati)
+
+
+def params_to_argv(params: dict) -> list:
+    """Dict parameter -> list argumen CLI worker (bool True jadi flag, False dilewati)."""
+    argv = []
+    for key, value in params.items():
+        if isinstance(value, bool):
+            if value:
+                argv.append(f'--{key}')
+        elif value is not None:
+            argv.extend([f'--{key}', str(value)])
+    return argv
+
+
+def _flush(pending: dict) -> None:
+    """Tulis hasil tertunda per (file store, simbol) dalam satu transaksi (executemany)."""
+    for (db_path, symbol), batch in pending.items():
+        if batch:
+            get_result_store(db_path).add_results(symbol, batch)
+    pending.clear()
+
+
+def run_sweep(param_sets: list, mt5_instance=None, status=send_status, flush_every: int = FLUSH_EVERY) -> list:
+    """
+    Evaluasi semua dict parameter dalam proses ini; hasil ditulis ke store per batch `flush_every`.
+    Return: list hasil (final_result_data) — kombinasi yang gagal dilewati (error ke stderr).
+    """
+    mt5 = mt5_instance if mt5_instance is not None else wb.mt5
+    if not mt5.initialize():
+        print("initialize() gagal, error code =", mt5.last_error(), file=sys.stderr)
+        return []
+
+    parser = wb.build_arg_parser()
+    rates_memo = {}
+    results = []
+    pending = {}  # (result_db, simbol) -> hasil yang belum ditulis ke store
+    total = len(param_sets)
+
+    try:
+        for k, params in enumerate(param_sets):
+            label = ", ".join(f"{key}={v}" for key, v in params.items())
+
+            def _combo_status(data, k=k):
+                status({"status": f"[{k + 1}/{total}] {data.get('status', '')}", "progress": k, "total": total})
+
+            try:
+                args = parser.parse_args(params_to_argv(params))
+                config = wb.build_config(args, mt5)
+                use_store = config.get('use_result_store', True)
+                config['use_result_store'] = False  # ditulis per batch di bawah, bukan upsert per kombinasi
+                strategy = wb.PoseidonWave(mt5, config, rates_memo=rates_memo)
+                try:
+                    result = wb.run_backtest_job(strategy, config, args, status=_combo_status, write_result_json=False)
+                finally:
+                    strategy.close()
+                if result:
+                    results.append(result)
+                    if use_store:
+                        pending.setdefault((config.get('result_db'), config['symbol']), []).append(result)
+            except Exception:
+                print(f"❌ Error pada Parameter: {label}\n---\n{traceback.format_exc()}", file=sys.stderr)
+            if sum(len(batch) for batch in pending.values()) >= flush_every:
+                _flush(pending)
+    finally:
+        _flush(pending)
+
+    status({"status": "Selesai", "progress": total, "total": total})
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sweep parameter Poseidon Wave dalam satu proses.")
+    parser.add_argument('--params_file', type=str, required=True, help='File JSON berisi list dict parameter')
+    parser.add_argument('--offline', action='store_true', help='Jalankan tanpa terminal MT5 (data dari bar store lokal)')
+    parser.add_argument('--bar_store_dir', type=str, default=None, help='Folder bar store lokal untuk mode offline')
+    cli = parser.parse_args()
+
+    with open(cli.params_file, 'r', encoding='utf-8') as f:
+        param_sets = json.load(f)
+
+    mt5 = wb.mt5
+    if cli.offline or getattr(mt5, 'is_offline', False):
+        mt5 = wb.OfflineMT5(store_root=cli.bar_store_dir)
+
+    results = run_sweep(param_sets, mt5)
+    send_status({"status": f"{len(results)} hasil ditambahkan ke store", "progress": 1, "total": 1})
+    mt5.shutdown()
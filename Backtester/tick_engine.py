@@ -0,0 +1,91 @@
+# tick_engine.py
+"""
+Engine replay tick untuk PoseidonWave.backtest (config 'engine': 'tick').
+
+Sinyal tetap dihitung di bar (hasil agregasi tick, indikator kausal per bar),
+tetapi eksekusi mengikuti tick BID/ASK asli dari TickStore:
+  - entry / exit market di tick penutup bar sinyal (BUY di ASK, SELL di BID, + slippage),
+  - SL/TP diperiksa per tick (BID menyentuh level) dan diisi di harga tick itu
+    (gap melewati level -> fill lebih buruk, bukan tepat di level); urutan SL vs TP
+    di satu bar langsung diketahui dari tick, tanpa model intrabar,
+  - MFE/MAE dari BID min/max seluruh tick selama posisi terbuka,
+  - spread per trade = ASK - BID tick aktual (tidak dibulatkan ke points bar).
+Tick tidak pernah dimuat penuh: pencarian SL dan MFE/MAE berjalan per potongan
+memmap (TickSeries.chunks), logika posisi/margin sama dengan vector_engine.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from utils import epoch_ms_array
+from vector_engine import simulate_poseidon_vectorized
+
+
+class TickFills:
+    """Eksekusi di level tick; `ref` (penanda titik harga) = posisi global tick."""
+
+    def __init__(self, ticks, bar_t_ms: np.ndarray, bar_ms: int, point: float, slippage_pts: float):
+        self.ticks = ticks
+        self.point = float(point)
+        self.slip = float(slippage_pts) * float(point)
+        self.tick_lo = ticks.searchsorted(bar_t_ms, side='left')
+        self.tick_hi = ticks.searchsorted(np.asarray(bar_t_ms, dtype=np.int64) + int(bar_ms), side='left')
+        # tick penutup bar = tick terakhir sebelum bar berakhir (bar tanpa tick -> kuotasi terakhir sebelumnya)
+        self.close_pos = np.maximum(self.tick_hi - 1, 0)
+        _, self.close_bid, self.close_ask = ticks.take(self.close_pos)
+
+    def _price(self, side: str, leg: str, bid: float, ask: float) -> float:
+        if (side == 'BUY') == (leg == 'entry'):
+            return float(ask) + self.slip
+        return float(bid) - self.slip
+
+    def market(self, side: str, i: int, leg: str):
+        """(harga eksekusi market di tick penutup bar i, ref)."""
+        return self._price(side, leg, self.close_bid[i], self.close_ask[i]), int(self.close_pos[i])
+
+    def levels(self, side: str, e: int, e_ref: int, window_end: int, sl_level, tp_level):
+        """
+        Tick pertama setelah entry s/d penutup bar window_end yang menyentuh SL/TP
+        -> (bar, harga exit, ref, 'sl'|'tp') atau None. Level None = tidak aktif.
+        """
+        lo, hi = e_ref + 1, int(self.close_pos[window_end]) + 1
+        is_buy = side == 'BUY'
+        sl_pos = self.ticks.first_hit(lo, hi, sl_level, below=is_buy) if sl_level is not None else None
+        # TP cukup dicari sebelum sentuhan SL
+        tp_hi = hi if sl_pos is None else sl_pos
+        tp_pos = self.ticks.first_hit(lo, tp_hi, tp_level, below=not is_buy) if tp_level is not None else None
+        pos, reason = (tp_pos, 'tp') if tp_pos is not None else (sl_pos, 'sl')
+        if pos is None:
+            return None
+        x = int(np.searchsorted(self.tick_hi, pos, side='right'))
+        _, bid, ask = self.ticks.take([pos])
+        return x, self._price(side, 'exit', bid[0], ask[0]), pos, reason
+
+    def extrema(self, e_arr, x_arr, e_ref, x_ref, is_margin):
+        """(max BID, min BID) tick selama trade; tick bar margin call tidak ikut dihitung."""
+        stops = np.where(is_margin, self.tick_lo[x_arr] if len(x_arr) else x_ref, x_ref + 1)
+        hi = np.full(len(e_ref), np.nan)
+        lo = np.full(len(e_ref), np.nan)
+        for k, (a, b) in enumerate(zip(e_ref + 1, stops)):
+            hi[k], lo[k] = self.ticks.range_extrema(a, b)
+        return hi, lo
+
+    def quotes(self, refs):
+        """(epoch ms, BID, spread points) di tick `refs`."""
+        t, bid, ask = self.ticks.take(refs)
+        return t, bid, np.round((ask - bid) / self.point, 6)
+
+    def exit_quotes(self, refs, is_buy, exit_exec, is_level):
+        """quotes() titik exit; ref SL/TP sudah tick tempat trade terisi."""
+        return self.quotes(refs)
+
+
+def simulate_poseidon_ticks(df: pd.DataFrame, ticks, *, bar_seconds: int, **kwargs) -> dict:
+    """
+    Jalankan PoseidonWave dengan eksekusi per tick. `ticks` = TickSeries yang mencakup
+    seluruh df; argumen lain sama dengan simulate_poseidon_vectorized (format return identik).
+    """
+    fills = TickFills(ticks, epoch_ms_array(df.index), int(bar_seconds) * 1000,
+                      kwargs['point'], kwargs['slippage_pts'])
+    return simulate_poseidon_vectorized(df, fills=fills, **kwargs)
@@ -0,0 +1,211 @@
+# Nama File: trade_log.py
+"""
+Log trade kolumnar: satu structured array NumPy per periode, bukan list dict per trade.
+
+Waktu disimpan sebagai epoch ms (int64), sisi & alasan exit sebagai kode int8,
+fitur saat entry sebagai structured array kedua (dtype mengikuti fitur run).
+Report bulanan, checkpoint, agregasi run, risk scenario, Monte Carlo dan
+walk-forward memakai kolom ini langsung; dict hanya dibentuk di batas keluar
+(chart per trade via record(), JSON hasil via to_json_records()).
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from utils import to_epoch_ms
+
+SIDES = ('BUY', 'SELL')
+REASONS = ('sl', 'reverse', 'forced_close', 'margin_call', 'tp')
+_MARGIN_CALL = REASONS.index('margin_call')
+
+_INT_FIELDS = ('trade_id', 'entry_index', 'bars_held', 'entry_ms', 'exit_ms')
+_CODE_FIELDS = ('side', 'reason')
+_FLOAT_FIELDS = (
+    'entry_price', 'entry_price_ref_close_bid', 'entry_spread_points', 'entry_slippage_points',
+    'commission_entry_usd', 'mfe_usd', 'mae_usd', 'exit_price', 'gross_pnl_usd',
+    'commission_exit_usd', 'commission_total_usd', 'lot', 'slippage_usd', 'spread_cost_usd', 'net_pnl_usd',
+)
+TRADE_DTYPE = np.dtype(
+    [(f, np.int64) for f in _INT_FIELDS] + [(f, np.int8) for f in _CODE_FIELDS] + [(f, np.float64) for f in _FLOAT_FIELDS]
+)
+_EMPTY_FEATURES = np.zeros(0, dtype=np.dtype([]))
+
+
+def _features_dtype(features: dict) -> np.dtype:
+    """dtype fitur dari satu contoh: int tetap int64 (mis. bb_len), sisanya float64."""
+    return np.dtype([(k, np.int64 if isinstance(v, (int, np.integer)) and not isinstance(v, bool) else np.float64)
+                     for k, v in features.items()])
+
+
+class TradeLog:
+    """Kumpulan trade terurut waktu exit; irisan (slice) tetap TradeLog tanpa salin dict."""
+
+    __slots__ = ('rows', 'features')
+
+    def __init__(self, rows: np.ndarray = None, features: np.ndarray = None):
+        self.rows = rows if rows is not None else np.zeros(0, dtype=TRADE_DTYPE)
+        self.features = features if features is not None else _EMPTY_FEATURES[:0]
+        if len(self.features) != len(self.rows):
+            self.features = np.zeros(len(self.rows), dtype=self.features.dtype)
+
+    @classmethod
+    def from_columns(cls, features: dict = None, **columns) -> 'TradeLog':
+        """Bangun dari array per kolom (nama kolom = nama field TRADE_DTYPE)."""
+        n = len(columns['trade_id'])
+        rows = np.zeros(n, dtype=TRADE_DTYPE)
+        for name, values in columns.items():
+            rows[name] = values
+        feats = None
+        if features:
+            feats = np.zeros(n, dtype=np.dtype([(k, np.asarray(v).dtype) for k, v in features.items()]))
+            for name, values in features.items():
+                feats[name] = values
+        return cls(rows, feats)
+
+    @classmethod
+    def from_records(cls, records) -> 'TradeLog':
+        """Dari list dict trade (format lama, mis. checkpoint sebelum log kolumnar)."""
+        builder = TradeLogBuilder()
+        for trade in records:
+            builder.append(trade)
+        return builder.build()
+
+    @classmethod
+    def coerce(cls, trades) -> 'TradeLog':
+        """TradeLog apa adanya; list dict lama dikonversi."""
+        return trades if isinstance(trades, TradeLog) else cls.from_records(trades or [])
+
+    @classmethod
+    def concat(cls, logs) -> 'TradeLog':
+        """Gabungkan beberapa log (mis. semua bulan satu run); log kosong dilewati."""
+        logs = [cls.coerce(log) for log in logs]
+        logs = [log for log in logs if len(log)]
+        if not logs:
+            return cls()
+        if len(logs) == 1:
+            return logs[0]
+        return cls(np.concatenate([log.rows for log in logs]), np.concatenate([log.features for log in logs]))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return TradeLog(self.rows[key], self.features[key])
+        return self.record(key)
+
+    def __getstate__(self):
+        return {'rows': self.rows, 'features': self.features}
+
+    def __setstate__(self, state):
+        self.rows, self.features = state['rows'], state['features']
+
+    @property
+    def pnl(self) -> np.ndarray:
+        """PnL bersih per trade (USD)."""
+        return self.rows['net_pnl_usd']
+
+    @property
+    def entry_ms(self) -> np.ndarray:
+        return self.rows['entry_ms']
+
+    @property
+    def exit_ms(self) -> np.ndarray:
+        return self.rows['exit_ms']
+
+    def duration_seconds(self) -> np.ndarray:
+        return (self.rows['exit_ms'] - self.rows['entry_ms']) / 1000.0
+
+    def record(self, i: int) -> dict:
+        """Satu trade sebagai dict (format report lama, waktu sebagai Timestamp UTC)."""
+        r = self.rows[i]
+        side = SIDES[r['side']]
+        trade = {name: int(r[name]) for name in ('trade_id', 'entry_index', 'bars_held')}
+        trade.update({name: float(r[name]) for name in _FLOAT_FIELDS})
+        trade.update({
+            'type': side,
+            'side': side,
+            'entry_time': pd.Timestamp(int(r['entry_ms']), unit='ms', tz='UTC'),
+            'exit_time': pd.Timestamp(int(r['exit_ms']), unit='ms', tz='UTC'),
+            'entry_ts_epoch_ms': int(r['entry_ms']),
+            'exit_ts_epoch_ms': int(r['exit_ms']),
+            'reason_exit': REASONS[r['reason']],
+            'profit_usd': float(r['net_pnl_usd']),
+            'commission_usd': float(r['commission_total_usd']),
+            'features_at_entry': self._features(i),
+        })
+        if r['reason'] == _MARGIN_CALL:
+            trade['status'] = 'MARGIN CALL'
+        return trade
+
+    def _features(self, i: int) -> dict:
+        f = self.features[i]
+        return {name: (int(f[name]) if self.features.dtype[name].kind == 'i' else float(f[name]))
+                for name in self.features.dtype.names or ()}
+
+    def to_json_records(self) -> list:
+        """Daftar trade ringkas untuk result.json / result store."""
+        rows = self.rows
+        cols = {name: rows[name].tolist() for name in rows.dtype.names}
+        feats = [self._features(i) for i in range(len(rows))]
+        return [{
+            "trade_id": cols['trade_id'][k],
+            "side": SIDES[cols['side'][k]],  # BUY/SELL
+            "entry_ts": cols['entry_ms'][k],
+            "exit_ts": cols['exit_ms'][k],
+            "entry_price": cols['entry_price'][k],
+            "exit_price": cols['exit_price'][k],
+            "lot": cols['lot'][k],
+            "gross_pnl_usd": cols['gross_pnl_usd'][k],         # murni gerak harga
+            "commission_usd": cols['commission_total_usd'][k],
+            "slippage_usd": cols['slippage_usd'][k],
+            "spread_cost_usd": cols['spread_cost_usd'][k],
+            "net_pnl_usd": cols['net_pnl_usd'][k],
+            "bars_held": cols['bars_held'][k],
+            "reason_exit": REASONS[cols['reason'][k]],
+            # Opsional ML
+            "mfe_usd": cols['mfe_usd'][k],
+            "mae_usd": cols['mae_usd'][k],
+            "spread_points_at_entry": cols['entry_spread_points'][k],
+            "features_at_entry": feats[k],
+        } for k in range(len(rows))]
+
+
+class TradeLogBuilder:
+    """Pengumpul trade untuk engine loop: tiap trade tertutup langsung jadi satu baris tuple."""
+
+    def __init__(self):
+        self._rows = []
+        self._features = []
+        self._features_dtype = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append(self, trade: dict) -> None:
+        row = []
+        for name in _INT_FIELDS:
+            if name == 'entry_ms':
+                row.append(int(trade.get('entry_ts_epoch_ms') or to_epoch_ms(trade['entry_time'])))
+            elif name == 'exit_ms':
+                row.append(int(trade.get('exit_ts_epoch_ms') or to_epoch_ms(trade['exit_time'])))
+            else:
+                row.append(int(trade.get(name, 0)))
+        row.append(SIDES.index(trade.get('side', trade.get('type'))))
+        reason = trade.get('reason_exit') or ('margin_call' if trade.get('status') == 'MARGIN CALL' else 'forced_close')
+        row.append(REASONS.index(reason))
+        defaults = {'net_pnl_usd': trade.get('profit_usd', 0.0),
+                    'commission_total_usd': trade.get('commission_usd', 0.0)}
+        row.extend(float(trade.get(name, defaults.get(name, 0.0))) for name in _FLOAT_FIELDS)
+        self._rows.append(tuple(row))
+
+        features = trade.get('features_at_entry') or {}
+        if self._features_dtype is None:
+            self._features_dtype = _features_dtype(features)
+        self._features.append(tuple(features.get(name, 0) for name in self._features_dtype.names))
+
+    def build(self) -> TradeLog:
+        rows = np.array(self._rows, dtype=TRADE_DTYPE) if self._rows else None
+        feats = np.array(self._features, dtype=self._features_dtype) if self._rows else None
+        return TradeLog(rows, feats)
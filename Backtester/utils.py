@@ -4,8 +4,14 @@ from datetime import datetime
 from typing import Iterable, Tuple, Union
 from typing import Optional
 from zoneinfo import ZoneInfo
+import numpy as np
 import pandas as pd
 
+from Library.data_handler.bar_store import timeframe_seconds
+
+# Kolom rates yang dibutuhkan backtest (pruning saat membaca bar store)
+BACKTEST_COLUMNS = ('open', 'high', 'low', 'close', 'spread')
+
 def send_status(data: dict) -> None:
     """Kirim status (dict) sebagai JSON ke stdout (langsung flush)."""
     print(json.dumps(data), flush=True)
@@ -58,15 +64,6 @@ def simulate_equity_stops(
             return f"❌ SL {loss_limit_percent}% Equity Tersentuh: {dt:%Y-%m-%d}"
     return "Equity tidak menyentuh target TP/SL."
 
-def spread_pts(i: int, df, use_dyn_spread: bool, fallback_spread_pts: float) -> float:
-    """Ambil spread (dalam points) untuk bar ke-i, dengan fallback aman."""
-    if use_dyn_spread and 'spread' in getattr(df, 'columns', []):
-        try:
-            return float(df.iloc[i]['spread'])
-        except Exception:
-            return float(fallback_spread_pts)
-    return float(fallback_spread_pts)
-
 def exec_price(
     side: str,
     close_bid: float,
@@ -116,19 +113,38 @@ def unrealized_pnl(side: Optional[str], entry_px: float, close_bid: float, lot:
     diff = (float(close_bid) - float(entry_px)) if side == 'BUY' else (float(entry_px) - float(close_bid))
     return diff * float(lot) * float(contract_size)
 
-def in_session(
-    ts_utc,                           # pandas.Timestamp tz-aware (UTC)
+def _time_of_day_us(t) -> int:
+    """datetime.time -> mikrodetik sejak tengah malam."""
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 1_000_000 + t.microsecond
+
+def in_session_mask(
+    index_utc,                        # pandas.DatetimeIndex tz-aware (UTC)
     start_trade_time, end_trade_time, # datetime.time
     session_base: str,                # 'UTC' | 'server'
-    server_tz_name: str,              # e.g. 'Europe/London'
-) -> bool:
-    """Cek apakah timestamp UTC berada di dalam jam trading yang ditentukan."""
+    server_tz_name: str,
+) -> np.ndarray:
+    """Array bool: bar mana di index UTC yang berada di dalam jam trading (seluruh index sekaligus)."""
     try:
         if session_base == 'UTC':
-            t = ts_utc.tz_convert('UTC').time()
+            local = index_utc.tz_convert('UTC')
         else:
-            t = ts_utc.tz_convert(ZoneInfo(server_tz_name)).time()
+            local = index_utc.tz_convert(ZoneInfo(server_tz_name))
     except Exception:
-        # fallback aman
-        t = ts_utc.tz_convert('UTC').time()
-    return start_trade_time <= t <= end_trade_time
\ No newline at end of file
+        local = index_utc.tz_convert('UTC')
+    tod = (
+        ((local.hour.to_numpy(dtype=np.int64) * 60 + local.minute.to_numpy(dtype=np.int64)) * 60
+         + local.second.to_numpy(dtype=np.int64)) * 1_000_000
+        + local.microsecond.to_numpy(dtype=np.int64)
+    )
+    return (tod >= _time_of_day_us(start_trade_time)) & (tod <= _time_of_day_us(end_trade_time))
+
+def epoch_ms_array(index) -> np.ndarray:
+    """DatetimeIndex (tz-aware/naive UTC) -> array int64 epoch milliseconds."""
+    values = pd.DatetimeIndex(index)
+    if values.tz is not None:
+        values = values.tz_convert('UTC').tz_localize(None)
+    return values.to_numpy().astype('datetime64[ms]').astype(np.int64)
+
+def timeframe_minutes(timeframe: int) -> int:
+    """Durasi satu bar (menit) dari konstanta TIMEFRAME_* MT5 (lihat bar_store.timeframe_seconds)."""
+    return timeframe_seconds(timeframe) // 60
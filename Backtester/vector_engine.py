@@ -0,0 +1,374 @@
+# vector_engine.py
+"""
+Engine eksekusi vektor untuk PoseidonWave.backtest (config 'engine': 'vectorized').
+
+Semua kondisi per bar (cross BB-midline, filter ADX, sesi, sentuhan SL, MFE/MAE,
+ekuitas mark-to-market) dihitung sebagai operasi array untuk satu bulan penuh.
+Karena posisi bersifat stateful, loop Python hanya berjalan per TRADE (lompat dari
+event ke event via searchsorted), bukan per bar. Hasil identik dengan loop lama.
+
+Harga eksekusi, sentuhan SL/TP dan MFE/MAE diambil dari objek `fills`: BarFills
+(default, OHLC bar; bar yang menyentuh SL & TP sekaligus diputuskan IntrabarModel)
+atau TickFills di tick_engine (replay tick BID/ASK).
+"""
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from utils import (
+    epoch_ms_array,
+    exec_price as _u_exec_price,
+    commission_leg_usd as _u_commission_leg_usd,
+    pnl_usd as _u_pnl_usd,
+)
+from trade_log import TradeLog, SIDES, REASONS
+from cost_model import market_exec_prices, attribute_costs, level_exit_bids
+from intrabar import IntrabarModel
+
+# urutan add() dalam satu bar pada loop asli: MTM -> exit -> entry -> forced close
+_SUB_MTM, _SUB_EXIT, _SUB_ENTRY, _SUB_FORCED = 0, 1, 2, 3
+
+
+def _first_at_or_after(sorted_idx: np.ndarray, i: int) -> Optional[int]:
+    """Index pertama di sorted_idx yang >= i, atau None."""
+    k = int(np.searchsorted(sorted_idx, i, side='left'))
+    return int(sorted_idx[k]) if k < len(sorted_idx) else None
+
+
+def _segment_reduce(ufunc, values: np.ndarray, starts: np.ndarray, stops: np.ndarray, empty: float) -> np.ndarray:
+    """ufunc.reduce per segmen [start, stop); segmen kosong -> `empty`."""
+    out = np.full(len(starts), empty, dtype=float)
+    ok = stops > starts
+    if ok.any():
+        padded = np.append(values, values[-1:])  # sentinel agar stop == n tetap valid
+        bounds = np.column_stack([starts[ok], stops[ok]]).ravel()
+        out[ok] = ufunc.reduceat(padded, bounds)[::2]
+    return out
+
+
+class BarFills:
+    """
+    Eksekusi di level bar: entry/exit market di close bar, SL/TP via high/low bar.
+    `ref` (penanda titik harga) = indeks bar.
+    """
+
+    def __init__(self, t_ms, close, high, low, spread_points, point, slippage_pts, intrabar: IntrabarModel = None):
+        self.t_ms, self.close, self.high, self.low = t_ms, close, high, low
+        self.spread_points = spread_points
+        self.point, self.slippage_pts = point, slippage_pts
+        self.intrabar = intrabar
+        self.ask_exec, self.bid_exec = market_exec_prices(close, spread_points, point, slippage_pts)
+
+    def market(self, side: str, i: int, leg: str):
+        """(harga eksekusi market di bar i, ref)."""
+        price = self.ask_exec[i] if (side == 'BUY') == (leg == 'entry') else self.bid_exec[i]
+        return float(price), i
+
+    def levels(self, side: str, e: int, e_ref: int, window_end: int, sl_level, tp_level):
+        """
+        Sentuhan SL/TP pertama di bar (e, window_end] -> (bar, harga exit, ref, 'sl'|'tp') atau None.
+        Level None = tidak aktif; bar yang menyentuh keduanya diputuskan model intrabar.
+        """
+        lows, highs = self.low[e + 1:window_end + 1], self.high[e + 1:window_end + 1]
+        no_hit = np.zeros(len(lows), dtype=bool)
+        if side == 'BUY':
+            sl_hits = lows <= sl_level if sl_level is not None else no_hit
+            tp_hits = highs >= tp_level if tp_level is not None else no_hit
+        else:
+            sl_hits = highs >= sl_level if sl_level is not None else no_hit
+            tp_hits = lows <= tp_level if tp_level is not None else no_hit
+        hits = np.flatnonzero(sl_hits | tp_hits)
+        if not len(hits):
+            return None
+        k = int(hits[0])
+        x = e + 1 + k
+        is_sl = bool(sl_hits[k])
+        if is_sl and tp_hits[k]:
+            is_sl = self.intrabar is None or bool(self.intrabar.sl_first(x, side == 'BUY', sl_level, tp_level)[0])
+        level = sl_level if is_sl else tp_level
+        price = _u_exec_price(side, self.close[x], self.spread_points[x], 'exit', self.point,
+                              self.slippage_pts, False, level)
+        return x, price, x, 'sl' if is_sl else 'tp'
+
+    def extrema(self, e_arr, x_arr, e_ref, x_ref, is_margin):
+        """(max BID, min BID) selama trade; bar margin call tidak ikut dihitung."""
+        seg_stop = x_arr + np.where(is_margin, 0, 1)
+        return (_segment_reduce(np.maximum, self.high, e_arr + 1, seg_stop, np.nan),
+                _segment_reduce(np.minimum, self.low, e_arr + 1, seg_stop, np.nan))
+
+    def quotes(self, refs):
+        """(epoch ms, BID, spread points) di titik harga `refs`."""
+        return self.t_ms[refs], self.close[refs], self.spread_points[refs]
+
+    def exit_quotes(self, refs, is_buy, exit_exec, is_level):
+        """quotes() titik exit; exit SL/TP memakai level BID tempat trade terisi, bukan close bar."""
+        t, bid, spread = self.quotes(refs)
+        level_bid = level_exit_bids(is_buy, exit_exec, spread, self.point, self.slippage_pts)
+        return t, np.where(is_level, level_bid, bid), spread
+
+
+def simulate_poseidon_vectorized(
+    df: pd.DataFrame,
+    *,
+    middle_band_col: str,
+    adx_col: str,
+    bb_length: int,
+    use_adx_filter: bool,
+    adx_threshold: float,
+    use_stop_loss: bool,
+    stop_loss_points: float,
+    session_mask: np.ndarray,
+    spread_points: np.ndarray,
+    lot_size: float,
+    lot_for_costs: float,
+    contract_size: float,
+    point: float,
+    commission_rt_usd: float,
+    slippage_pts: float,
+    initial_balance: float,
+    use_take_profit: bool = False,
+    take_profit_points: float = 0.0,
+    intrabar: IntrabarModel = None,
+    fills=None,
+) -> dict:
+    """
+    Jalankan simulasi PoseidonWave secara vektor.
+
+    Return dict:
+      completed_trades (TradeLog), equity_curve [(Timestamp, balance)], current_balance,
+      realized_balance, margin_called, dan array titik ekuitas untuk
+      downsample_equity (eq_t_ms, eq_values, eq_is_event) -- TANPA titik seed bar pertama.
+    """
+    n = len(df)
+    index = df.index
+    close = df['close'].to_numpy(dtype=float)
+    high = df['high'].to_numpy(dtype=float)
+    low = df['low'].to_numpy(dtype=float)
+    mid = df[middle_band_col].to_numpy(dtype=float)
+    t_ms = epoch_ms_array(index)
+
+    bull = np.zeros(n, dtype=bool)
+    bear = np.zeros(n, dtype=bool)
+    if n > 1:
+        bull[1:] = (close[:-1] < mid[:-1]) & (close[1:] > mid[1:])
+        bear[1:] = (close[:-1] > mid[:-1]) & (close[1:] < mid[1:])
+    if use_adx_filter:
+        valid = df[adx_col].to_numpy(dtype=float) > adx_threshold
+    else:
+        valid = np.ones(n, dtype=bool)
+    entry_ok = (bull | bear) & np.asarray(session_mask, dtype=bool) & valid
+
+    entry_idx = np.flatnonzero(entry_ok)
+    bull_idx = np.flatnonzero(bull)
+    bear_idx = np.flatnonzero(bear)
+
+    comm_leg = _u_commission_leg_usd(commission_rt_usd, lot_size)
+
+    spread_points = np.asarray(spread_points, dtype=float)
+    if fills is None:
+        fills = BarFills(t_ms, close, high, low, spread_points, point, slippage_pts, intrabar)
+
+    def _open(side, e):
+        price, ref = fills.market(side, e, 'entry')
+        return {'side': side, 'e': e, 'entry_exec': price, 'e_ref': ref}
+
+    # --- Lompat dari event ke event (per trade, bukan per bar) ---
+    trades = []            # dict mentah: side, e, x, entry_exec, exit_exec, reason
+    realized = float(initial_balance)
+    realized_path = [realized]
+    margin_bar = None
+    position = None        # trade mentah yang sedang terbuka
+    cursor = 1             # bar pertama yang belum diproses saat flat
+
+    while True:
+        if position is None:
+            if realized < 0 and cursor < n:
+                margin_bar = cursor
+                break
+            e = _first_at_or_after(entry_idx, max(cursor, 1))
+            if e is None:
+                break
+            position = _open('BUY' if bull[e] else 'SELL', e)
+
+        side, e = position['side'], position['e']
+        opp = _first_at_or_after(bear_idx if side == 'BUY' else bull_idx, e + 1)
+        window_end = opp if opp is not None else n - 1
+
+        level_hit = None
+        if (use_stop_loss or use_take_profit) and window_end > e:
+            sl_level = tp_level = None
+            if side == 'BUY':
+                if use_stop_loss:
+                    sl_level = position['entry_exec'] - stop_loss_points
+                if use_take_profit:
+                    tp_level = position['entry_exec'] + take_profit_points
+            else:
+                if use_stop_loss:
+                    sl_level = position['entry_exec'] + stop_loss_points
+                if use_take_profit:
+                    tp_level = position['entry_exec'] - take_profit_points
+            level_hit = fills.levels(side, e, position['e_ref'], window_end, sl_level, tp_level)
+
+        if level_hit is not None:
+            x, exit_exec, x_ref, reason = level_hit
+        elif opp is not None:
+            x, reason = opp, 'reverse'
+            exit_exec, x_ref = fills.market(side, x, 'exit')
+        else:
+            break  # posisi bertahan sampai akhir data -> forced close di bawah
+
+        gross = _u_pnl_usd(side, position['entry_exec'], exit_exec, lot_size, contract_size)
+        net = gross - (comm_leg + comm_leg)
+        realized += net
+        realized_path.append(realized)
+        position.update({'x': x, 'x_ref': x_ref, 'exit_exec': exit_exec, 'reason': reason,
+                         'gross': gross, 'net': net, 'balance_after': realized})
+        trades.append(position)
+        position = None
+        cursor = x + 1
+
+        if reason == 'reverse' and entry_ok[x]:
+            position = _open('BUY' if bull[x] else 'SELL', x)
+            if realized < 0 and x + 1 < n:
+                margin_bar = x + 1
+                break
+            if x + 1 >= n:
+                break
+
+    margin_called = margin_bar is not None
+    stop = margin_bar if margin_called else n
+
+    # posisi yang masih terbuka: margin call di margin_bar, atau forced close di bar terakhir
+    current_balance = realized
+    if position is not None and n > 0:
+        side = position['side']
+        if margin_called:
+            x, reason = margin_bar, 'margin_call'
+        else:
+            x, reason = n - 1, 'forced_close'
+        exit_exec, x_ref = fills.market(side, x, 'exit')
+        gross = _u_pnl_usd(side, position['entry_exec'], exit_exec, lot_size, contract_size)
+        net = gross - (comm_leg + comm_leg)
+        if margin_called:
+            current_balance = 0.0
+        else:
+            realized += net
+            realized_path.append(realized)
+            current_balance = realized
+        position.update({'x': x, 'x_ref': x_ref, 'exit_exec': exit_exec, 'reason': reason,
+                         'gross': gross, 'net': net, 'balance_after': current_balance})
+        trades.append(position)
+        position = None
+
+    # --- MFE/MAE per trade via reduksi segmen ---
+    e_arr = np.array([t['e'] for t in trades], dtype=np.int64)
+    x_arr = np.array([t['x'] for t in trades], dtype=np.int64)
+    e_ref = np.array([t['e_ref'] for t in trades], dtype=np.int64)
+    x_ref = np.array([t['x_ref'] for t in trades], dtype=np.int64)
+    is_margin = np.array([t['reason'] == 'margin_call' for t in trades], dtype=bool)
+    seg_hi, seg_lo = fills.extrema(e_arr, x_arr, e_ref, x_ref, is_margin)
+
+    # --- Stream ekuitas (MTM per bar + event) ---
+    bars = np.arange(1, stop, dtype=np.int64)
+    # setiap bar dipegang paling banyak oleh satu trade -> owner[i] = indeks trade
+    owner = np.full(n, -1, dtype=np.int64)
+    for k, t in enumerate(trades):
+        last = t['x'] if t['reason'] != 'margin_call' else t['x'] - 1
+        if last >= t['e'] + 1:
+            owner[t['e'] + 1:last + 1] = k
+    side_sign = np.zeros(n, dtype=float)
+    entry_px = np.zeros(n, dtype=float)
+    held = owner >= 0
+    if held.any():
+        signs = np.array([1.0 if t['side'] == 'BUY' else -1.0 for t in trades])
+        pxs = np.array([t['entry_exec'] for t in trades], dtype=float)
+        side_sign[held] = signs[owner[held]]
+        entry_px[held] = pxs[owner[held]]
+
+    # saldo realized di awal bar i = saldo setelah semua exit di bar < i (non-margin)
+    closed_exits = np.array([t['x'] for t in trades if t['reason'] != 'margin_call'], dtype=np.int64)
+    path = np.array(realized_path, dtype=float)
+    bal_start = path[np.searchsorted(closed_exits, bars, side='left')]
+
+    c_b = close[bars]
+    s_b = side_sign[bars]
+    diff = np.where(s_b > 0, c_b - entry_px[bars], entry_px[bars] - c_b)
+    unreal = np.where(s_b != 0, diff * float(lot_size) * float(contract_size), 0.0)
+    mtm = bal_start + unreal
+
+    keys = [bars * 4 + _SUB_MTM]
+    vals = [mtm]
+    evts = [np.zeros(len(bars), dtype=bool)]
+    ev_keys, ev_vals = [], []
+    for k, t in enumerate(trades):
+        if t['reason'] in ('sl', 'tp', 'reverse'):
+            ev_keys.append(t['x'] * 4 + _SUB_EXIT); ev_vals.append(t['balance_after'])
+        elif t['reason'] == 'forced_close':
+            ev_keys.append(t['x'] * 4 + _SUB_FORCED); ev_vals.append(t['balance_after'])
+        # saldo saat entry = saldo setelah k trade sebelumnya ditutup
+        ev_keys.append(t['e'] * 4 + _SUB_ENTRY)
+        ev_vals.append(float(path[k]))
+    keys.append(np.array(ev_keys, dtype=np.int64))
+    vals.append(np.array(ev_vals, dtype=float))
+    evts.append(np.ones(len(ev_keys), dtype=bool))
+    keys = np.concatenate(keys); vals = np.concatenate(vals); evts = np.concatenate(evts)
+    order = np.argsort(keys, kind='stable')
+    keys, vals, evts = keys[order], vals[order], evts[order]
+
+    # --- Kolom trade; biaya diatribusi sekaligus lewat cost_model ---
+    equity_curve = [(index[0] if n else pd.Timestamp.now(tz='UTC'), initial_balance)]
+    equity_curve += [(index[t['x']], t['balance_after']) for t in trades]
+    cs = float(contract_size)
+    is_buy = np.array([t['side'] == 'BUY' for t in trades], dtype=bool)
+    entry_ms, entry_bid, spr_entry = fills.quotes(e_ref)
+    exit_exec = np.array([t['exit_exec'] for t in trades], dtype=float)
+    is_level = np.array([t['reason'] in ('sl', 'tp') for t in trades], dtype=bool)
+    exit_ms, exit_bid, spr_exit = fills.exit_quotes(x_ref, is_buy, exit_exec, is_level)
+
+    up = np.where(np.isnan(seg_hi), 0.0, np.maximum(0.0, (seg_hi - entry_bid) * float(lot_size) * cs))
+    down = np.where(np.isnan(seg_lo), 0.0, np.maximum(0.0, (entry_bid - seg_lo) * float(lot_size) * cs))
+
+    features = {'bb_len': np.full(len(trades), bb_length, dtype=np.int64), 'bb_m': mid[e_arr]}
+    for nm in (f'BBU_{bb_length}_2.0', f'BBL_{bb_length}_2.0'):
+        if nm in df.columns:
+            features[nm] = df[nm].to_numpy(dtype=float)[e_arr]
+    if use_adx_filter and adx_col in df.columns:
+        features['adx'] = df[adx_col].to_numpy(dtype=float)[e_arr]
+    features['spread_points'] = spr_entry
+    features['close_bid'] = entry_bid
+
+    completed_trades = TradeLog.from_columns(
+        features=features,
+        trade_id=np.arange(1, len(trades) + 1),
+        entry_index=e_arr,
+        bars_held=x_arr - e_arr,
+        entry_ms=entry_ms,
+        exit_ms=exit_ms,
+        side=np.where(is_buy, SIDES.index('BUY'), SIDES.index('SELL')),
+        reason=np.array([REASONS.index(t['reason']) for t in trades], dtype=np.int8),
+        entry_price=np.array([t['entry_exec'] for t in trades], dtype=float),
+        entry_price_ref_close_bid=entry_bid,
+        entry_spread_points=spr_entry,
+        entry_slippage_points=slippage_pts,
+        commission_entry_usd=comm_leg,
+        mfe_usd=np.where(is_buy, up, down),
+        mae_usd=np.where(is_buy, down, up),
+        exit_price=exit_exec,
+        commission_exit_usd=comm_leg,
+        lot=float(lot_for_costs),
+        **attribute_costs(is_buy, entry_bid, exit_bid, spr_entry, spr_exit, slippage_pts, slippage_pts,
+                          comm_leg, comm_leg, lot_for_costs, contract_size, point),
+    )
+
+    return {
+        'completed_trades': completed_trades,
+        'equity_curve': equity_curve,
+        'current_balance': current_balance,
+        'realized_balance': realized,
+        'margin_called': margin_called,
+        'eq_t_ms': t_ms[keys // 4],
+        'eq_values': vals,
+        'eq_is_event': evts,
+    }
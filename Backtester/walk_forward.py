@@ -0,0 +1,321 @@
+# Nama File: walk_forward.py
+"""
+Walk-forward optimization di atas sweep in-process.
+
+Rentang bulan dipecah menjadi window bergulir in-sample (IS) / out-of-sample (OOS).
+Di tiap window, kombinasi parameter terbaik menurut skor IS dipilih lalu dipakai
+untuk bulan OOS berikutnya; kurva ekuitas OOS semua window disambung menjadi satu.
+
+Hasil dihitung per (kombinasi, bulan) dalam mode per_month sehingga tidak
+bergantung pada awal window: tiap bulan dihitung sekali lalu disimpan sebagai
+checkpoint (checkpoint.py) dan dipakai ulang oleh semua window yang tumpang
+tindih, run walk-forward berikutnya, maupun sweep biasa dengan parameter sama.
+
+Pemakaian:
+    python Backtester/walk_forward.py --params_file kombinasi.json --start 2025-01 --end 2025-12 \
+        --is_months 3 --oos_months 1 [--step 1] [--anchored] [--metric balance_score] [--offline]
+Dengan --months_only proses hanya mengisi checkpoint bulanan (dipakai worker parallel_launcher);
+daftar bulan bisa diberikan langsung lewat --months 2025-01,2025-04,...
+"""
+import sys
+import os
+import json
+import argparse
+import calendar
+import traceback
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+import worker_backtest as wb
+from checkpoint import MonthCheckpoint
+from trade_log import TradeLog
+from result_store import balance_score
+from sweep_runner import params_to_argv
+from utils import send_status
+from Library.reporting import metrics
+
+WF_METRICS = ('balance_score', 'total_profit', 'sharpe_ratio', 'profit_factor')
+DEFAULT_OUTPUT_DIR = os.path.join(current_dir, 'History_Logs')
+
+
+def month_range(start: str, end: str) -> list:
+    """'YYYY-MM'..'YYYY-MM' (inklusif) -> list (tahun, bulan)."""
+    y0, m0 = (int(x) for x in start.split('-'))
+    y1, m1 = (int(x) for x in end.split('-'))
+    first, last = y0 * 12 + m0 - 1, y1 * 12 + m1 - 1
+    return [(k // 12, k % 12 + 1) for k in range(first, last + 1)]
+
+
+def walk_forward_windows(n_months: int, is_months: int, oos_months: int, step: int = None, anchored: bool = False) -> list:
+    """
+    Window (is_lo, is_hi, oos_hi) sebagai index bulan: IS = [is_lo, is_hi), OOS = [is_hi, oos_hi).
+    step default = oos_months (OOS tidak tumpang tindih). anchored: IS selalu mulai dari bulan pertama.
+    """
+    step = max(1, int(step or oos_months))
+    windows = []
+    is_hi = is_months
+    while is_hi < n_months:
+        is_lo = 0 if anchored else is_hi - is_months
+        windows.append((is_lo, is_hi, min(is_hi + oos_months, n_months)))
+        is_hi += step
+    return windows
+
+
+class ComboMonths:
+    """Hasil bulanan satu kombinasi, disambung menjadi satu kurva untuk diiris per window."""
+
+    def __init__(self, params: dict, config: dict, reports: list):
+        self.params = params
+        self.config = config
+        self.initial_balance = float(config.get('initial_balance', 10000.0))
+        t_parts, eq_parts, self.pnl, self.profit = [], [], [], []
+        bounds = [0]
+        running = self.initial_balance
+        for report in reports:
+            curve = report.get('equity_curve') if report else None
+            if curve:
+                # mode per_month: tiap bulan mulai dari initial_balance; geser ke saldo berjalan
+                offset = running - float(report['initial_balance'])
+                t_parts.append(np.fromiter((int(t) for t, _ in curve), dtype=np.int64, count=len(curve)))
+                eq_parts.append(np.fromiter((float(b) for _, b in curve), dtype=float, count=len(curve)) + offset)
+                running = float(report['final_balance']) + offset
+            self.pnl.append(TradeLog.coerce(report['completed_trades']).pnl if report else np.zeros(0))
+            self.profit.append(float(report['total_profit']) if report else 0.0)
+            bounds.append(bounds[-1] + (len(curve) if curve else 0))
+        self.t_ms = np.concatenate(t_parts) if t_parts else np.zeros(0, dtype=np.int64)
+        self.equity = np.concatenate(eq_parts) if eq_parts else np.zeros(0)
+        self.bounds = np.array(bounds)
+        # saldo berjalan di awal tiap bulan (untuk menggeser irisan kembali ke initial_balance)
+        self.start_balance = self.initial_balance + np.concatenate([[0.0], np.cumsum(self.profit)])
+
+    def curve(self, lo: int, hi: int):
+        """(t_ms, equity) bulan [lo, hi) dengan saldo awal = initial_balance."""
+        a, b = self.bounds[lo], self.bounds[hi]
+        return self.t_ms[a:b], self.equity[a:b] - (self.start_balance[lo] - self.initial_balance)
+
+    def stats(self, lo: int, hi: int) -> dict:
+        """Metrik bulan [lo, hi) seperti satu backtest per_month atas rentang itu."""
+        _, eq = self.curve(lo, hi)
+        pnl = np.concatenate(self.pnl[lo:hi]) if hi > lo else np.zeros(0)
+        dd = metrics.drawdown_stats(eq, start_peak=self.initial_balance)
+        trades = metrics.trade_stats(pnl)
+        profit = float(sum(self.profit[lo:hi]))
+        return {
+            'total_profit': profit,
+            'total_trades': int(trades['total_trades']),
+            'win_rate': float(trades['win_rate']),
+            'max_drawdown_pct': float(dd['percentage']),
+            'profit_factor': float(trades['profit_factor']),
+            'sharpe_ratio': float(trades['sharpe_ratio']),
+            'balance_score': balance_score(profit, float(dd['percentage'])),
+        }
+
+
+def load_month_reports(strategy, config: dict, months: list, status=None) -> list:
+    """
+    report_details tiap (tahun, bulan) untuk satu kombinasi: dari checkpoint bila valid,
+    selain itu dihitung lalu disimpan. Bulan tanpa data -> None.
+    """
+    use_checkpoint = config.get('use_checkpoint', True)
+    checkpoints = {}
+    reports = []
+    for i, (year, month) in enumerate(months):
+        start_date = f"{year}-{month:02d}-01"
+        end_date = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]}"
+        if status:
+            status(i, f"{calendar.month_name[month]} {year}")
+        report, data_version = None, ''
+        if use_checkpoint:
+            # run_key memuat 'year', jadi checkpoint sama dengan sweep biasa untuk tahun itu
+            if year not in checkpoints:
+                checkpoints[year] = MonthCheckpoint({**config, 'year': year}, config.get('checkpoint_dir'))
+            data_version = strategy.data_version(start_date, end_date)
+            if data_version:
+                report = checkpoints[year].load(year, month, data_version, config['initial_balance'])
+        if report is None:
+            report = strategy.backtest(start_date_str=start_date, end_date_str=end_date,
+                                       initial_balance=config['initial_balance'])
+            if report and data_version:
+                checkpoints[year].save(year, month, data_version, config['initial_balance'], report)
+        reports.append(report or None)
+    return reports
+
+
+def _combo_config(parser, params: dict, mt5) -> dict:
+    args = parser.parse_args(params_to_argv(params))
+    config = wb.build_config(args, mt5)
+    # Hasil bulanan harus independen dari awal window agar bisa dipakai ulang
+    config['equity_mode'] = 'per_month'
+    config['continuous_run'] = False
+    config['render_reports'] = False
+    config['plot_individual_trades'] = False
+    return config
+
+
+def _label(params: dict) -> str:
+    return ", ".join(f"{k}={v}" for k, v in params.items() if k not in ('symbol', 'offline', 'bar_store_dir'))
+
+
+def collect_combo_months(param_sets: list, mt5, months: list, status=send_status) -> list:
+    """ComboMonths untuk semua kombinasi (kombinasi yang gagal dilewati, error ke stderr)."""
+    parser = wb.build_arg_parser()
+    rates_memo = {}   # bar tiap bulan dimuat sekali untuk semua kombinasi
+    combos = []
+    total = len(param_sets) * len(months)
+    for k, params in enumerate(param_sets):
+        def _month_status(i, name, k=k):
+            status({"status": f"[{k + 1}/{len(param_sets)}] {name}", "progress": k * len(months) + i, "total": total})
+
+        try:
+            config = _combo_config(parser, params, mt5)
+            strategy = wb.PoseidonWave(mt5, config, rates_memo=rates_memo)
+            reports = load_month_reports(strategy, config, months, status=_month_status)
+            combos.append(ComboMonths(params, config, reports))
+        except Exception:
+            print(f"❌ Error pada Parameter: {_label(params)}\n---\n{traceback.format_exc()}", file=sys.stderr)
+    return combos
+
+
+def select_and_stitch(combos: list, months: list, windows: list, metric: str = 'balance_score') -> dict:
+    """Pilih kombinasi terbaik per window IS, lalu sambung kurva OOS kombinasi terpilih."""
+    if metric not in WF_METRICS:
+        raise ValueError(f"Metrik walk-forward tidak dikenal: {metric}")
+    initial_balance = combos[0].initial_balance
+    label = [f"{y:04d}-{m:02d}" for y, m in months]
+
+    window_rows = []
+    t_parts, eq_parts, oos_pnl = [], [], []
+    running = initial_balance
+    for is_lo, is_hi, oos_hi in windows:
+        is_stats = [c.stats(is_lo, is_hi) for c in combos]
+        scores = np.array([s[metric] for s in is_stats], dtype=float)
+        best = int(np.argmax(scores))   # seri -> kombinasi pertama
+        chosen = combos[best]
+        oos_stats = chosen.stats(is_hi, oos_hi)
+
+        t, eq = chosen.curve(is_hi, oos_hi)
+        if len(eq):
+            t_parts.append(t)
+            eq_parts.append(eq + (running - initial_balance))
+        running += oos_stats['total_profit']
+        oos_pnl.extend(chosen.pnl[is_hi:oos_hi])
+
+        is_per_month = is_stats[best]['total_profit'] / (is_hi - is_lo)
+        oos_per_month = oos_stats['total_profit'] / (oos_hi - is_hi)
+        window_rows.append({
+            'in_sample': label[is_lo:is_hi],
+            'out_of_sample': label[is_hi:oos_hi],
+            'best_params': chosen.params,
+            'in_sample_stats': is_stats[best],
+            'out_of_sample_stats': oos_stats,
+            'efficiency': oos_per_month / is_per_month if is_per_month > 0 else None,
+        })
+
+    t_all = np.concatenate(t_parts) if t_parts else np.zeros(0, dtype=np.int64)
+    eq_all = np.concatenate(eq_parts) if eq_parts else np.zeros(0)
+    dd = metrics.drawdown_stats(eq_all, start_peak=initial_balance)
+    trades = metrics.trade_stats(np.concatenate(oos_pnl) if oos_pnl else np.zeros(0))
+    oos_profit = running - initial_balance
+    is_month_profit = [w['in_sample_stats']['total_profit'] / len(w['in_sample']) for w in window_rows]
+    oos_month_profit = [w['out_of_sample_stats']['total_profit'] / len(w['out_of_sample']) for w in window_rows]
+    mean_is = float(np.mean(is_month_profit)) if is_month_profit else 0.0
+    return {
+        'metric': metric,
+        'initial_balance': initial_balance,
+        'combinations': len(combos),
+        'windows': window_rows,
+        'oos_total_profit': oos_profit,
+        'oos_total_trades': int(trades['total_trades']),
+        'oos_win_rate': float(trades['win_rate']),
+        'oos_profit_factor': float(trades['profit_factor']),
+        'oos_max_drawdown_pct': float(dd['percentage']),
+        'oos_balance_score': balance_score(oos_profit, float(dd['percentage'])),
+        'walk_forward_efficiency': float(np.mean(oos_month_profit)) / mean_is if mean_is > 0 else None,
+        'oos_equity_curve': list(zip(t_all.tolist(), eq_all.tolist())),
+    }
+
+
+def run_walk_forward(param_sets: list, mt5, months: list, is_months: int, oos_months: int, step: int = None,
+                     anchored: bool = False, metric: str = 'balance_score', status=send_status) -> dict:
+    """Walk-forward lengkap; None jika rentang terlalu pendek atau tidak ada kombinasi yang berhasil."""
+    windows = walk_forward_windows(len(months), is_months, oos_months, step, anchored)
+    if not windows:
+        print(f"Rentang {len(months)} bulan terlalu pendek untuk IS {is_months} + OOS {oos_months} bulan.", file=sys.stderr)
+        return None
+    combos = collect_combo_months(param_sets, mt5, months, status=status)
+    if not combos:
+        return None
+    status({"status": "Memilih parameter per window...", "progress": 1, "total": 1})
+    result = select_and_stitch(combos, months, windows, metric)
+    result.update({
+        'symbol': combos[0].config.get('symbol'),
+        'start': f"{months[0][0]:04d}-{months[0][1]:02d}",
+        'end': f"{months[-1][0]:04d}-{months[-1][1]:02d}",
+        'is_months': int(is_months),
+        'oos_months': int(oos_months),
+        'step': int(step or oos_months),
+        'anchored': bool(anchored),
+    })
+    return result
+
+
+def save_walk_forward(result: dict, output_path: str = None) -> str:
+    """Tulis hasil walk-forward ke JSON (default History_Logs/<symbol>_walk_forward.json)."""
+    path = output_path or os.path.join(DEFAULT_OUTPUT_DIR, f"{result['symbol']}_walk_forward.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, default=str)
+    return path
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Walk-forward optimization Poseidon Wave.")
+    parser.add_argument('--params_file', type=str, required=True, help='File JSON berisi list dict parameter')
+    parser.add_argument('--start', type=str, default=None, help='Bulan pertama (YYYY-MM)')
+    parser.add_argument('--end', type=str, default=None, help='Bulan terakhir (YYYY-MM)')
+    parser.add_argument('--months', type=str, default=None, help='Daftar bulan YYYY-MM dipisah koma (pengganti --start/--end, untuk --months_only)')
+    parser.add_argument('--is_months', type=int, default=3, help='Panjang window in-sample (bulan)')
+    parser.add_argument('--oos_months', type=int, default=1, help='Panjang window out-of-sample (bulan)')
+    parser.add_argument('--step', type=int, default=None, help='Geser window tiap langkah (default: oos_months)')
+    parser.add_argument('--anchored', action='store_true', help='In-sample selalu mulai dari bulan pertama (expanding window)')
+    parser.add_argument('--metric', type=str, choices=WF_METRICS, default='balance_score', help='Skor pemilihan parameter di in-sample')
+    parser.add_argument('--months_only', action='store_true', help='Hanya isi checkpoint bulanan, tanpa pemilihan parameter')
+    parser.add_argument('--output', type=str, default=None, help='Path JSON hasil (default: History_Logs/<symbol>_walk_forward.json)')
+    parser.add_argument('--offline', action='store_true', help='Jalankan tanpa terminal MT5 (data dari bar store lokal)')
+    parser.add_argument('--bar_store_dir', type=str, default=None, help='Folder bar store lokal untuk mode offline')
+    return parser
+
+
+if __name__ == '__main__':
+    cli = build_arg_parser().parse_args()
+
+    with open(cli.params_file, 'r', encoding='utf-8') as f:
+        param_sets = json.load(f)
+
+    mt5 = wb.mt5
+    if cli.offline or getattr(mt5, 'is_offline', False):
+        mt5 = wb.OfflineMT5(store_root=cli.bar_store_dir)
+    if not mt5.initialize():
+        print("initialize() gagal, error code =", mt5.last_error(), file=sys.stderr)
+        sys.exit(1)
+
+    if cli.months:
+        months = [tuple(int(x) for x in m.split('-')) for m in cli.months.split(',')]
+    elif cli.start and cli.end:
+        months = month_range(cli.start, cli.end)
+    else:
+        print("Isi --start & --end atau --months.", file=sys.stderr)
+        sys.exit(1)
+    if cli.months_only:
+        combos = collect_combo_months(param_sets, mt5, months)
+        send_status({"status": f"{len(combos)} kombinasi x {len(months)} bulan tersimpan", "progress": 1, "total": 1})
+    else:
+        result = run_walk_forward(param_sets, mt5, months, cli.is_months, cli.oos_months, cli.step,
+                                  cli.anchored, cli.metric)
+        if result:
+            path = save_walk_forward(result, cli.output)
+            send_status({"status": f"Walk-forward selesai: {path}", "progress": 1, "total": 1})
+    mt5.shutdown()
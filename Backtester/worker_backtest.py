@@ -8,32 +8,48 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
-import MetaTrader5 as mt5
 import pandas as pd
-import pandas_ta
 import numpy as np
-import mplfinance as mpf
 import matplotlib.pyplot as plt
 import calendar
 import json
 import math
+import argparse
 from zoneinfo import ZoneInfo
-from fpdf.enums import XPos, YPos
 from datetime import datetime, time, timezone
 # Asumsikan library ini ada di folder 'Library' Anda
 from Library.data_handler.data_handler import get_rates, get_symbol_info 
-from fpdf import FPDF
+from Library.data_handler.bar_store import BarStore, timeframe_seconds
+from Library.data_handler.offline_mt5 import load_mt5, OfflineMT5
+from Library.data_handler.tick_store import TickStore, DEFAULT_CHUNK_SIZE
+from Library.reporting import metrics
 from utils import (
     send_status, simulate_equity_stops, to_epoch_ms as _to_epoch_ms,
-    spread_pts as _u_spread_pts,
     exec_price as _u_exec_price,
     commission_leg_usd as _u_commission_leg_usd,
     pnl_usd as _u_pnl_usd,
     unrealized_pnl as _u_unrealized_pnl,
-    in_session as _u_in_session,
+    epoch_ms_array as _epoch_ms_array,
+    timeframe_minutes,
+    BACKTEST_COLUMNS,
 )
-from plotting import plot_equity_curve_impl, plot_completed_trade_impl
-from reporting import create_final_pdf_report_impl
+from vector_engine import simulate_poseidon_vectorized
+from intrabar import IntrabarModel, INTRABAR_MODELS
+from tick_engine import simulate_poseidon_ticks
+from trade_log import TradeLog, TradeLogBuilder, REASONS
+from session_index import get_session_index
+from cost_model import spread_points_array, market_exec_prices, apply_cost_attribution
+from equity_downsample import downsample_equity, DOWNSAMPLE_MODES
+from risk_scenarios import simulate_risk_scenarios, scenario_grid
+from monte_carlo import monte_carlo_trades, monte_carlo_months, MC_METHODS
+from indicator_cache import get_indicator_cache, data_fingerprint
+from checkpoint import MonthCheckpoint
+from result_store import get_result_store
+from shared_data import SharedDataset, period_key as _period_key, continuous_period, default_warmup_bars
+from plotting import plot_equity_curve_impl, TradeChartRenderer
+from reporting import create_final_pdf_report_impl, report_output_dir
+
+mt5 = load_mt5(allow_offline=True)
 
 # ==============================================================================
 #  SELURUH KELAS PoseidonWave ANDA DITEMPATKAN DI SINI TANPA PERUBAHAN
@@ -60,78 +76,36 @@ class PoseidonWave:
         "adx_period": {"display_name": "ADX Period", "type": "int", "default": 14},
         "adx_threshold": {"display_name": "ADX Threshold", "type": "int", "default": 25},
         "use_stop_loss": {"display_name": "Use Stop Loss", "type": "bool", "default": True},
-        "stop_loss_points": {"display_name": "SL Points", "type": "float", "default": 5.0}
+        "stop_loss_points": {"display_name": "SL Points", "type": "float", "default": 5.0},
+        "use_take_profit": {"display_name": "Use Take Profit", "type": "bool", "default": False},
+        "take_profit_points": {"display_name": "TP Points", "type": "float", "default": 10.0}
     }
 
-    class _EquityDownsampler:
-        """Keep event points, periodic samples, and min/max/last per window.
-        Jika melebihi cap, otomatis diperkasar per bucket (min, max, last)."""
-        def __init__(self, every_n_bars: int, window_size: int, max_points: int):
-            self.every_n = max(1, int(every_n_bars))
-            self.W = max(2, int(window_size))
-            self.cap = max(1000, int(max_points))
-            self._points = []              # (t_ms, eq, tag)
-            self._bar_index = -1
-            self._w_cache = []             # cache window aktif
-
-        @staticmethod
-        def _dedupe_sorted(seq):
-            out, last_t = [], None
-            for t, e, tag in seq:
-                if t != last_t:
-                    out.append((t, e))
-                    last_t = t
-            return out
+    class _EquityRecorder:
+        """Simpan SEMUA titik ekuitas (t_ms, eq, is_event) apa adanya; diringkas sekali lewat downsample_equity."""
+        def __init__(self):
+            self.t_ms, self.eq, self.is_event = [], [], []
 
         def add(self, t_ms: int, eq: float, is_event: bool):
-            self._bar_index += 1
-            self._w_cache.append((t_ms, eq))
-            if is_event:
-                self._points.append((t_ms, eq, 'evt'))
-            if self._bar_index % self.every_n == 0:
-                self._points.append((t_ms, eq, 'per'))
-            if len(self._w_cache) >= self.W:
-                t_vals, e_vals = zip(*self._w_cache)
-                i_min = int(min(range(len(e_vals)), key=lambda i: e_vals[i]))
-                i_max = int(max(range(len(e_vals)), key=lambda i: e_vals[i]))
-                self._points.append((t_vals[i_min], e_vals[i_min], 'min'))
-                self._points.append((t_vals[i_max], e_vals[i_max], 'max'))
-                self._points.append((t_vals[-1],    e_vals[-1],    'last'))
-                self._w_cache.clear()
-
-        def finalize(self):
-            if self._w_cache:
-                t_vals, e_vals = zip(*self._w_cache)
-                i_min = int(min(range(len(e_vals)), key=lambda i: e_vals[i]))
-                i_max = int(max(range(len(e_vals)), key=lambda i: e_vals[i]))
-                self._points.append((t_vals[i_min], e_vals[i_min], 'min'))
-                self._points.append((t_vals[i_max], e_vals[i_max], 'max'))
-                self._points.append((t_vals[-1],    e_vals[-1],    'last'))
-                self._w_cache.clear()
-            self._points.sort(key=lambda x: x[0])
-            out = self._dedupe_sorted(self._points)
-            if len(out) > self.cap:
-                step = int(math.ceil(len(out) / self.cap))
-                buckets = [out[i:i+step] for i in range(0, len(out), step)]
-                reduced = []
-                for b in buckets:
-                    t_vals, e_vals = zip(*b)
-                    i_min = int(min(range(len(e_vals)), key=lambda i: e_vals[i]))
-                    i_max = int(max(range(len(e_vals)), key=lambda i: e_vals[i]))
-                    reduced.append(b[i_min])
-                    if i_max != i_min:
-                        reduced.append(b[i_max])
-                    reduced.append(b[-1])
-                # re-sort & unique timestamp, keep last equity per t
-                tmp = {}
-                for t, e in reduced:
-                    tmp[t] = e
-                out = sorted(tmp.items())
-            return out
+            self.t_ms.append(t_ms)
+            self.eq.append(eq)
+            self.is_event.append(is_event)
+
+        def extend(self, t_ms: np.ndarray, eq: np.ndarray, is_event: np.ndarray):
+            self.t_ms.extend(np.asarray(t_ms, dtype=np.int64).tolist())
+            self.eq.extend(np.asarray(eq, dtype=float).tolist())
+            self.is_event.extend(np.asarray(is_event, dtype=bool).tolist())
+
+        def arrays(self):
+            return (np.asarray(self.t_ms, dtype=np.int64), np.asarray(self.eq, dtype=float),
+                    np.asarray(self.is_event, dtype=bool))
     
-    def __init__(self, mt5_instance, config: dict):
+    def __init__(self, mt5_instance, config: dict, rates_memo: dict = None):
         self.mt5 = mt5_instance
         self.config = config
+        # Opsional: dict bersama antar instance (sweep in-process) agar tiap bulan hanya dimuat sekali
+        self.rates_memo = rates_memo
+        self.data_versions = {}   # period_key -> versi partisi bar store (kunci cache indikator tanpa hash)
         self.symbol = config.get('symbol')
         self.timeframe = config.get('timeframe_int')
 
@@ -148,8 +122,138 @@ class PoseidonWave:
         self.eq_every_n_bars  = int(self.config.get('equity_every_n_bars', 5))
         self.eq_window_size   = int(self.config.get('equity_window_size', 20))
         self.eq_max_points    = int(self.config.get('equity_max_points', 20000))
+        self.eq_downsample    = str(self.config.get('equity_downsample', 'minmax')).lower()
+        self.eq_pixel_width   = int(self.config.get('equity_pixel_width', 4800))
         self.eq_write_parquet = bool(self.config.get('equity_write_parquet', True))
         self.eq_write_csv     = bool(self.config.get('equity_write_csv', False))
+        # Mode metrics-only: tanpa matplotlib/mplfinance/FPDF, gambar & PDF dirender belakangan
+        self.render_reports = bool(self.config.get('render_reports', True))
+        self.plot_trades = self.render_reports and bool(self.config.get('plot_individual_trades'))
+        self.chart_renderer = None  # antrian chart trade (dibuat saat chart pertama)
+
+        # Bar store lokal: terminal hanya dipakai untuk mengisi bulan yang belum tersimpan
+        self.bar_store = BarStore(self.config.get('bar_store_dir')) if self.config.get('use_bar_store', True) else None
+        # Cache indikator bersama: run lain dengan data & parameter indikator sama tidak menghitung ulang
+        self.indicator_cache = (
+            get_indicator_cache(self.config.get('indicator_cache_dir'))
+            if self.config.get('use_indicator_cache', True) else None
+        )
+        # Mask jam trading per bulan, dihitung vektor sekali per proses
+        self.session_index = get_session_index()
+        # Mode tick: bar diagregasi dari tick lokal, eksekusi (SL, exit) diputar ulang per tick
+        self.tick_store = None
+        if str(self.config.get('engine', 'loop')).lower() == 'tick':
+            self.tick_store = TickStore(self.config.get('tick_store_dir') or self.config.get('bar_store_dir'))
+            self.tick_chunk_size = int(self.config.get('tick_chunk_size') or DEFAULT_CHUNK_SIZE)
+        # Dataset shared memory dari launcher (bar + indikator zero-copy), bila ada
+        self.shared_data = None
+        manifest_path = self.config.get('shared_manifest')
+        if manifest_path and os.path.exists(manifest_path) and self.tick_store is None:
+            shared = SharedDataset.attach(manifest_path)
+            if shared.manifest.get('symbol') == self.symbol and shared.manifest.get('timeframe') == self.timeframe:
+                self.shared_data = shared
+
+    def _load_bars(self, start_date_str: str, end_date_str: str):
+        """DataFrame bar (index waktu UTC) untuk periode ini; dipakai ulang lewat rates_memo bila ada."""
+        key = (self.symbol, self.timeframe, start_date_str, end_date_str, self.bar_store is not None,
+               self.tick_store is not None)
+        period = _period_key(start_date_str, end_date_str)
+        if self.rates_memo is not None and key in self.rates_memo:
+            df, version = self.rates_memo[key]
+            if version:
+                self.data_versions[period] = version
+            return df.copy(deep=False)   # df tidak diubah di tempat (lihat _prepare_indicators)
+        if self.shared_data is not None:
+            df = self.shared_data.bars_frame(period)
+            if df is not None:
+                return df
+
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+        version = None
+        if self.tick_store is not None:
+            tf_ms = timeframe_seconds(self.timeframe, strict=True) * 1000
+            ticks = self._open_ticks(_to_epoch_ms(start_date),
+                                     _to_epoch_ms(end_date) + tf_ms)
+            symbol_info = self.mt5.symbol_info(self.symbol)
+            rates = ticks.aggregate_bars(tf_ms // 1000, getattr(symbol_info, 'point', 0.01) if symbol_info else 0.01)
+        elif self.bar_store is not None:
+            before = self.bar_store.data_version(self.symbol, self.timeframe, start_date, end_date)
+            rates = self.bar_store.copy_rates_range(
+                self.mt5, self.symbol, self.timeframe, start_date, end_date, columns=BACKTEST_COLUMNS
+            )
+            # versi store hanya berlaku bila tidak ada partisi yang (di)tulis ulang selama pembacaan
+            after = self.bar_store.data_version(self.symbol, self.timeframe, start_date, end_date)
+            version = after if after is not None and after == before else None
+        else:
+            rates = self.mt5.copy_rates_range(self.symbol, self.timeframe, start_date, end_date)
+        if rates is None or len(rates) == 0:
+            return None
+
+        df = pd.DataFrame(rates)
+        df['time'] = pd.to_datetime(df['time'], unit='s', utc=True)
+        df.set_index('time', inplace=True)
+        if version:
+            self.data_versions[period] = version
+        if self.rates_memo is not None:
+            self.rates_memo[key] = (df.copy(), version)
+        return df
+
+    def _open_ticks(self, start_ms: int, end_ms: int):
+        """TickSeries (memmap per hari) untuk [start_ms, end_ms); hari yang belum tersimpan diisi dari terminal."""
+        return self.tick_store.open_range(self.mt5, self.symbol, start_ms, end_ms, self.tick_chunk_size)
+
+    def _intrabar_model(self, df: pd.DataFrame) -> IntrabarModel:
+        """Model urutan SL/TP di dalam bar (config 'intrabar_model'); 'lower_tf' membaca M1 dari bar store."""
+        mode = str(self.config.get('intrabar_model', 'sl_first')).lower()
+        loader = None
+        if mode == 'lower_tf':
+            lower_tf = self.config.get('intrabar_timeframe_int') or self.mt5.TIMEFRAME_M1
+
+            def load_lower_tf(start_s: int, end_s: int):
+                start = datetime.fromtimestamp(start_s, tz=timezone.utc).replace(tzinfo=None)
+                end = datetime.fromtimestamp(end_s, tz=timezone.utc).replace(tzinfo=None)
+                if self.bar_store is not None:
+                    return self.bar_store.copy_rates_range(self.mt5, self.symbol, lower_tf, start, end,
+                                                           columns=('open', 'high', 'low', 'close'))
+                return self.mt5.copy_rates_range(self.symbol, lower_tf, start, end)
+            loader = load_lower_tf
+        return IntrabarModel(
+            mode, df['open'].to_numpy(dtype=float), df['high'].to_numpy(dtype=float),
+            df['low'].to_numpy(dtype=float), df['close'].to_numpy(dtype=float),
+            t_ms=_epoch_ms_array(df.index), bar_ms=timeframe_minutes(self.timeframe) * 60_000,
+            lower_tf_loader=loader,
+        )
+
+    def _session_mask(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """Mask bool jam trading untuk index (UTC), dari cache SessionIndex."""
+        return self.session_index.mask(
+            index, self.symbol, self.start_trade_time, self.end_trade_time,
+            str(self.config.get('session_base_tz', 'UTC')).upper(), str(self.config.get('server_tz', 'UTC')),
+        )
+
+    def data_version(self, start_date_str: str, end_date_str: str) -> str:
+        """Sidik bar periode ini (validasi checkpoint); string kosong jika tidak ada data."""
+        df = self._load_bars(start_date_str, end_date_str)
+        return data_fingerprint(df) if df is not None else ''
+
+    def _indicator_frame(self, df: pd.DataFrame, period_key: str, indicator: str, params: dict, compute) -> pd.DataFrame:
+        """Kolom indikator untuk df (DataFrame sepanjang df), lewat shared memory / cache bila aktif."""
+        def _compute():
+            import pandas_ta  # noqa: F401  (registrasi accessor df.ta; hanya bila indikator benar-benar dihitung)
+            return compute()
+
+        result = None
+        if self.shared_data is not None:
+            result = self.shared_data.indicator_frame(period_key, indicator, params, df.index)
+        if result is None and self.indicator_cache is None:
+            result = _compute()
+        elif result is None:
+            result = self.indicator_cache.get_or_compute(
+                df, self.symbol, self.timeframe, period_key, indicator, params, _compute,
+                data_version=self.data_versions.get(period_key),
+            )
+        return result.to_frame() if isinstance(result, pd.Series) else result
 
     def check_signal(self, open_positions_count: int = 0):
         tick = self.mt5.symbol_info_tick(self.symbol)
@@ -180,6 +284,7 @@ class PoseidonWave:
             status["condition"] = "Insufficient Historical Data"
             return status
         
+        import pandas_ta  # noqa: F401  (registrasi accessor df.ta)
         df.ta.bbands(length=bb_length, std=2, append=True)
 
         df.dropna(inplace=True)
@@ -215,9 +320,29 @@ class PoseidonWave:
         return plot_equity_curve_impl(equity_data, report_details)
 
     def _plot_completed_trade(self, df_slice: pd.DataFrame, trade: dict, trade_index: int, output_folder: str):
-        return plot_completed_trade_impl(df_slice, trade, trade_index, output_folder)
-
-    def backtest(self, start_date_str: str, end_date_str: str, initial_balance: float = 1000.0):
+        """Masukkan chart trade ke antrian render; simulasi tidak menunggu gambarnya."""
+        if self.chart_renderer is None:
+            self.chart_renderer = TradeChartRenderer(
+                workers=self.config.get('chart_workers', 1), per_page=self.config.get('charts_per_page', 1)
+            )
+        self.chart_renderer.submit(df_slice, trade, trade_index, output_folder)
+
+    def finish_charts(self) -> int:
+        """Tunggu semua chart trade di antrian selesai dirender. Return jumlah chart."""
+        if self.chart_renderer is None:
+            return 0
+        done = self.chart_renderer.close()
+        self.chart_renderer = None
+        return done
+
+    def close(self) -> None:
+        """Lepas segmen shared memory yang di-attach (segmen tetap milik launcher)."""
+        if self.shared_data is not None:
+            self.shared_data.close(unlink=False)
+            self.shared_data = None
+
+    def _begin_run(self, start_date_str: str, end_date_str: str, initial_balance: float):
+        """Parameter run, folder hasil & info simbol (dipakai backtest dan backtest_continuous)."""
         lot_size = self.config.get("fixed_lot_size", 0.1)
         bb_length = self.config.get("wave_period", 36)
         use_adx_filter = self.config.get("use_adx_filter", False)
@@ -225,17 +350,18 @@ class PoseidonWave:
         adx_threshold = self.config.get("adx_threshold", 25)
         use_stop_loss = self.config.get("use_stop_loss", True)
         stop_loss_points = self.config.get("stop_loss_points", 5.0)
+        use_take_profit = bool(self.config.get("use_take_profit", False))
+        take_profit_points = self.config.get("take_profit_points", 10.0)
 
         time_str_for_filename = f"{self.start_trade_time.strftime('%H%M')}-{self.end_trade_time.strftime('%H%M')}"
         param_str = f"ADX({adx_threshold})" if use_adx_filter else "NoFilter"
         if use_stop_loss:
             param_str += f"_SL({stop_loss_points})"
+        if use_take_profit:
+            param_str += f"_TP({take_profit_points})"
 
-        run_directory = os.path.join(
-            'Backtester', 'Hasil Laporan PDF', self.symbol, 
-            start_date_str.split('-')[0], # Tahun
-            f"L{lot_size}_W{bb_length}_S{time_str_for_filename}" # Folder Sesi
-        )
+        # Folder per run_id (sama dengan PDF & result.json): run yang beda parameter tidak saling menimpa gambar
+        run_directory = report_output_dir(self.config)
         os.makedirs(run_directory, exist_ok=True)
 
         print(f"--- Memulai Backtest untuk [{self.strategy_name}] ---")
@@ -243,8 +369,11 @@ class PoseidonWave:
         symbol_info = self.mt5.symbol_info(self.symbol)
         if not symbol_info:
             print(f"Error: Gagal mendapatkan info untuk simbol {self.symbol}")
-            return
+            return None
         contract_size = symbol_info.trade_contract_size
+        if self.bar_store is not None and not getattr(self.mt5, 'is_offline', False):
+            # snapshot metadata simbol agar run offline memakai point/contract size yang sama
+            self.bar_store.write_symbol_info(self.symbol, symbol_info)
         print(f"Initial Balance: ${initial_balance:,.2f} | Lot Size: {lot_size} | Contract Size: {contract_size}")
         print(f"Jam Trading: {self.start_trade_time.strftime('%H:%M')} - {self.end_trade_time.strftime('%H:%M')}")
         print("----------------------------------------------------")
@@ -255,12 +384,200 @@ class PoseidonWave:
         slippage_pts = float(self.config.get('slippage_points', 0.0))
         use_dyn_spread = bool(self.config.get('use_dynamic_spread', False))
         fallback_spread_pts = float(self.config.get('avg_spread_points', 0.0))
+        server_tz_name = str(self.config.get('server_tz', 'UTC'))
+        session_base = str(self.config.get('session_base_tz', 'UTC')).upper()
+
+        return {
+            'lot_size': lot_size, 'bb_length': bb_length,
+            'use_adx_filter': use_adx_filter, 'adx_period': adx_period, 'adx_threshold': adx_threshold,
+            'use_stop_loss': use_stop_loss, 'stop_loss_points': stop_loss_points,
+            'use_take_profit': use_take_profit, 'take_profit_points': take_profit_points,
+            'time_str_for_filename': time_str_for_filename, 'param_str': param_str, 'run_directory': run_directory,
+            'contract_size': contract_size, 'point': point, 'digits': digits,
+            'commission_rt_usd': commission_rt_usd, 'slippage_pts': slippage_pts,
+            'use_dyn_spread': use_dyn_spread, 'fallback_spread_pts': fallback_spread_pts,
+            'server_tz_name': server_tz_name, 'session_base': session_base,
+        }
+
+    def _prepare_indicators(self, df: pd.DataFrame, period_key: str, ctx: dict) -> pd.DataFrame:
+        """
+        df + BBands (+ADX bila dipakai) tanpa baris warm-up (NaN). Frame baru dirakit dari view
+        kolom (copy=False) lalu dipotong posisional, jadi bar & indikator shared memory tidak disalin.
+        """
+        bb_length, adx_period = ctx['bb_length'], ctx['adx_period']
+        frames = [self._indicator_frame(df, period_key, 'bbands', {'length': bb_length, 'std': 2},
+                                        lambda: df.ta.bbands(length=bb_length, std=2))]
+        if ctx['use_adx_filter']:
+            frames.append(self._indicator_frame(df, period_key, 'adx', {'length': adx_period},
+                                                lambda: df.ta.adx(length=adx_period)))
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        for frame in frames:
+            columns.update((name, frame[name].to_numpy()) for name in frame.columns)
+        out = pd.DataFrame(columns, index=df.index, copy=False)
+
+        valid = np.ones(len(out), dtype=bool)
+        for values in columns.values():
+            if values.dtype.kind == 'f':
+                valid &= ~np.isnan(values)
+        first_valid = int(np.argmax(valid)) if valid.any() else len(valid)
+        if valid[first_valid:].all():
+            return out.iloc[first_valid:]
+        return out[valid]   # NaN di tengah data (jarang): sama seperti dropna, dengan salinan
+
+    def backtest(self, start_date_str: str, end_date_str: str, initial_balance: float = 1000.0):
+        ctx = self._begin_run(start_date_str, end_date_str, initial_balance)
+        if ctx is None:
+            return
+
+        df = self._load_bars(start_date_str, end_date_str)
+        if df is None:
+            print(f"Error: Tidak ada data historis untuk {start_date_str}.", file=sys.stderr)
+            return None
+
+        period_key = _period_key(start_date_str, end_date_str)
+        df = self._prepare_indicators(df, period_key, ctx)
+
+        recorder = self._EquityRecorder()
+        sim = self._simulate(df, initial_balance, ctx, recorder)
+        final_balance = sim['current_balance'] if not sim['margin_called'] else 0
+        return self._build_report(df, sim, self._downsample_equity(*recorder.arrays()), initial_balance, final_balance,
+                                  start_date_str, end_date_str, period_key, ctx)
+
+    def _load_continuous_frame(self, year: int, start_month: int, end_month: int, ctx: dict):
+        """
+        Bar start_month..end_month plus prefix warm-up, sudah berindikator; bar pertama
+        = satu bar sebelum periode (candle_sebelumnya). None jika tidak ada data.
+        """
+        first_start = f"{year}-{start_month:02d}-01"
+        last_end = f"{year}-{end_month:02d}-{calendar.monthrange(year, end_month)[1]}"
+        # Prefix warm-up: cukup bar agar BBands/ADX sudah valid di bar pertama bulan awal
+        warmup_bars = self.config.get('warmup_bars')
+        if warmup_bars is None:
+            warmup_bars = default_warmup_bars(ctx['bb_length'], ctx['adx_period'] if ctx['use_adx_filter'] else 0)
+        # rentang yang sama dipublish launcher ke shared memory (continuous_period)
+        warm_start_str, period_end_str = continuous_period(year, start_month, end_month, warmup_bars, self.timeframe)
+        period_start = pd.Timestamp(first_start, tz='UTC')
+        period_end = pd.Timestamp(period_end_str, tz='UTC')
+
+        df = self._load_bars(warm_start_str, period_end_str)
+        if df is not None:
+            df = df.iloc[:int(df.index.searchsorted(period_end))]
+        if df is None or df.empty or not (df.index >= period_start).any():
+            print(f"Error: Tidak ada data historis untuk {first_start} s/d {last_end}.", file=sys.stderr)
+            return None
+
+        df = self._prepare_indicators(df, _period_key(warm_start_str, period_end_str), ctx)
+        # Sisakan satu bar warm-up sebelum periode (dipakai sebagai candle_sebelumnya bar pertama)
+        first_i = int(df.index.searchsorted(period_start))
+        if first_i >= len(df):
+            return None
+        return df.iloc[max(0, first_i - 1):]
+
+    def backtest_continuous(self, year: int, start_month: int, end_month: int, initial_balance: float = 1000.0) -> list:
+        """
+        Satu pass kontinu untuk start_month..end_month: data dimuat sekali (plus prefix
+        warm-up indikator), saldo & posisi terbawa antar bulan, lalu report_details
+        bulanan diturunkan dengan memotong trade & kurva ekuitas per bulan kalender.
+        """
+        first_start = f"{year}-{start_month:02d}-01"
+        last_end = f"{year}-{end_month:02d}-{calendar.monthrange(year, end_month)[1]}"
+        ctx = self._begin_run(first_start, last_end, initial_balance)
+        if ctx is None:
+            return []
+
+        df = self._load_continuous_frame(year, start_month, end_month, ctx)
+        if df is None:
+            return []
+
+        recorder = self._EquityRecorder()
+        sim = self._simulate(df, initial_balance, ctx, recorder)
+
+        rec_t, rec_eq, rec_evt = recorder.arrays()
+        trades = sim['completed_trades']
+        trade_exit_ms = trades.exit_ms
+        curve = sim['equity_curve']
+        curve_ms = np.asarray([_to_epoch_ms(t) for t, _ in curve], dtype=np.int64)
+        bar_ms = _epoch_ms_array(df.index)
+        end_ms = int(rec_t[-1]) if len(rec_t) else 0
+
+        reports = []
+        for month in range(start_month, end_month + 1):
+            m_start = pd.Timestamp(year, month, 1, tz='UTC')
+            m_end = pd.Timestamp(year + (month == 12), month % 12 + 1, 1, tz='UTC')
+            ms, me = _to_epoch_ms(m_start), _to_epoch_ms(m_end)
+            b0, b1 = np.searchsorted(bar_ms, [ms, me])
+            if b0 >= b1:
+                continue  # tidak ada bar di bulan ini
+            r0, r1 = np.searchsorted(rec_t, [ms, me])
+            if r0 >= r1:
+                break  # simulasi sudah berhenti (margin call) sebelum bulan ini
+            c0, c1 = np.searchsorted(curve_ms, [ms, me])
+            t0, t1 = np.searchsorted(trade_exit_ms, [ms, me])
+
+            month_df = df.iloc[b0:b1]
+            month_start_balance = float(curve[c0 - 1][1]) if c0 > 0 else float(initial_balance)
+            month_curve = [(month_df.index[0], month_start_balance)] + list(curve[c0:c1])
+
+            # Kurva ringkas per bulan, diawali titik terakhir bulan sebelumnya (sambungan kurva tetap presisi)
+            seed = max(r0 - 1, 0)
+            month_evt = np.concatenate([[True], rec_evt[r0:r1]])
+            month_curve_ds = self._downsample_equity(
+                np.concatenate([rec_t[seed:seed + 1], rec_t[r0:r1]]),
+                np.concatenate([rec_eq[seed:seed + 1], rec_eq[r0:r1]]),
+                month_evt,
+            )
+
+            margin_month = sim['margin_called'] and ms <= end_ms < me
+            final_balance = 0 if margin_month else float(month_curve[-1][1])
+            month_sim = {
+                'completed_trades': trades[t0:t1],
+                'equity_curve': month_curve,
+                'start_time': month_df.index[0],
+            }
+            start_str = m_start.strftime('%Y-%m-%d')
+            end_str = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]}"
+            reports.append(self._build_report(
+                month_df, month_sim, month_curve_ds, month_start_balance, final_balance,
+                start_str, end_str, _period_key(start_str, end_str), ctx,
+            ))
+            if margin_month:
+                break
+        return reports
+
+    def _downsample_equity(self, t_ms: np.ndarray, eq: np.ndarray, is_event: np.ndarray) -> list:
+        """Kurva ekuitas ringkas [(t_ms, eq)] dari array penuh satu periode (mode & batas dari config)."""
+        return downsample_equity(
+            t_ms, eq, is_event,
+            every_n_bars=self.eq_every_n_bars, window_size=self.eq_window_size, max_points=self.eq_max_points,
+            mode=self.eq_downsample, pixel_width=self.eq_pixel_width,
+        )
+
+    def _simulate(self, df: pd.DataFrame, initial_balance: float, ctx: dict, eq_ds) -> dict:
+        """
+        Jalankan engine (loop / vectorized / tick) pada df berindikator. Semua titik ekuitas
+        dikirim ke eq_ds (add per titik / extend per array) lalu diringkas sekali di akhir.
+        """
+        lot_size, bb_length = ctx['lot_size'], ctx['bb_length']
+        use_adx_filter, adx_period, adx_threshold = ctx['use_adx_filter'], ctx['adx_period'], ctx['adx_threshold']
+        use_stop_loss, stop_loss_points = ctx['use_stop_loss'], ctx['stop_loss_points']
+        use_take_profit, take_profit_points = ctx['use_take_profit'], ctx['take_profit_points']
+        run_directory = ctx['run_directory']
+        contract_size, point = ctx['contract_size'], ctx['point']
+        commission_rt_usd, slippage_pts = ctx['commission_rt_usd'], ctx['slippage_pts']
+        use_dyn_spread, fallback_spread_pts = ctx['use_dyn_spread'], ctx['fallback_spread_pts']
+
+        # Biaya eksekusi sebagai array per bar (tanpa df.iloc per akses spread)
+        spread_arr = spread_points_array(df, use_dyn_spread, fallback_spread_pts)
+        close_arr = df['close'].to_numpy(dtype=float)
+        ask_exec, bid_exec = market_exec_prices(close_arr, spread_arr, point, slippage_pts)
 
         def _spread_pts(i: int) -> float:
-            return _u_spread_pts(i, df, use_dyn_spread, fallback_spread_pts)
+            return float(spread_arr[i])
 
-        def _exec_price(side, close_bid, spr_pts, leg, is_market=True, level_price=None):
-            return _u_exec_price(side, close_bid, spr_pts, leg, point, slippage_pts, is_market, level_price)
+        def _exec_price(side, i, leg, is_market=True, level_price=None):
+            if is_market:
+                return float(ask_exec[i] if (side == 'BUY') == (leg == 'entry') else bid_exec[i])
+            return _u_exec_price(side, close_arr[i], spread_arr[i], leg, point, slippage_pts, is_market, level_price)
 
         def _commission_leg_usd(lot: float) -> float:
             return _u_commission_leg_usd(commission_rt_usd, lot)
@@ -270,107 +587,68 @@ class PoseidonWave:
         
         def _unrealized_pnl(side, entry_px, close_bid, lot) -> float:
             return _u_unrealized_pnl(side, entry_px, close_bid, lot, contract_size)
-        
-        def _in_session(ts_utc) -> bool:
-            return _u_in_session(ts_utc, self.start_trade_time, self.end_trade_time, session_base, server_tz_name)
-        
-        def _augment_trade_fields(side: str, exit_i: int, spr_pts_exit: float,
-                                  close_bid_exit: float, commission_exit: float,
-                                  net_pnl_exec_based: float):
-            """
-            Syarat:
-              - active_trade punya: entry_price_ref_close_bid, entry_spread_points,
-                entry_slippage_points, commission_entry_usd, entry_index, mfe_usd, mae_usd
-              - spread/slippage dihitung TANPA look-ahead.
-            """
-            lot = float(self.config.get("fixed_lot_size", 0.1))
-            entry_bid = float(active_trade.get('entry_price_ref_close_bid'))
-            exit_bid  = float(close_bid_exit)
-
-            # PnL gerak harga murni (gross PnL sebelum semua biaya), pakai BID→BID
-            if side == 'BUY':
-                gross_move_usd = (exit_bid - entry_bid) * lot * float(contract_size)
-                spread_cost_usd = float(active_trade.get('entry_spread_points', 0.0)) * point * lot * float(contract_size)
-            else:  # SELL
-                gross_move_usd = (entry_bid - exit_bid) * lot * float(contract_size)
-                spread_cost_usd = float(spr_pts_exit) * point * lot * float(contract_size)
-
-            slippage_points_total = float(active_trade.get('entry_slippage_points', 0.0)) + float(slippage_pts)
-            slippage_usd = slippage_points_total * point * lot * float(contract_size)
-            commission_total = float(active_trade.get('commission_entry_usd', 0.0)) + float(commission_exit)
-
-            # Net PnL konsisten (gross_move - spread - slippage - commission)
-            net_pnl_usd = gross_move_usd - (spread_cost_usd + slippage_usd + commission_total)
-
-            # Bars held
-            bars_held = int(exit_i - int(active_trade.get('entry_index', exit_i)))
-
-            # Simpan field ML-ready; pertahankan profit_usd untuk kompatibilitas lama
-            active_trade.update({
-                'lot': lot,
-                'bars_held': bars_held,
-                'gross_pnl_usd': gross_move_usd,         # murni gerak harga (sebelum biaya)
-                'commission_usd': commission_total,
-                'slippage_usd': slippage_usd,
-                'spread_cost_usd': spread_cost_usd,
-                'net_pnl_usd': net_pnl_usd,
-                'profit_usd': net_pnl_usd,               # kompatibel dengan report lama
-            })
-        
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-        rates = self.mt5.copy_rates_range(self.symbol, self.timeframe, start_date, end_date)
-        if rates is None or len(rates) == 0:
-            print(f"Error: Tidak ada data historis untuk {start_date_str}.", file=sys.stderr)
-            return None
-
-        df = pd.DataFrame(rates)
-        df['time'] = pd.to_datetime(df['time'], unit='s', utc=True)
-        df.set_index('time', inplace=True)
-
-        df.ta.bbands(length=bb_length, std=2, append=True)
-        adx_col = f'ADX_{adx_period}'
-        if use_adx_filter:
-            df.ta.adx(length=adx_period, append=True)
-        df.dropna(inplace=True)
 
+        
         middle_band_col = f'BBM_{bb_length}_2.0'
-        symbol_info = get_symbol_info(self.symbol)
-        contract_size = symbol_info.trade_contract_size if symbol_info else 1.0
+        adx_col = f'ADX_{adx_period}'
 
         current_balance = initial_balance
-        peak_balance = initial_balance
-        trough_balance = initial_balance
-
-        eq_ds = self._EquityDownsampler(self.eq_every_n_bars, self.eq_window_size, self.eq_max_points)
         realized_balance = current_balance  # saldo yang hanya berubah saat exit
 
+        bar_ms = _epoch_ms_array(df.index).tolist()  # t_ms per bar, tanpa konversi Timestamp di loop
+        session_mask = self._session_mask(df.index)     # tanpa tz_convert per bar
+        intrabar = self._intrabar_model(df)              # bar yang menyentuh SL & TP sekaligus
+
         # seed titik awal di bar pertama
         equity_seed = realized_balance  # belum ada posisi → unrealized 0
-        eq_ds.add(_to_epoch_ms(df.index[0]), float(equity_seed), is_event=True)
+        eq_ds.add(bar_ms[0], float(equity_seed), is_event=True)
         start_time = df.index[0] if not df.empty else pd.Timestamp.now(tz='UTC')
         equity_curve = [(start_time, initial_balance)]
-        peak_balance_date = start_time
-        trough_balance_date = start_time
-        completed_trades = []
+        completed_trades = TradeLogBuilder()  # trade tertutup langsung jadi baris kolumnar
+        trade_log = None
         active_trade = None
         current_position = None
 
         margin_called = False
 
-        server_tz_name = str(self.config.get('server_tz', 'UTC'))
-        session_base = str(self.config.get('session_base_tz', 'UTC')).upper()
-        
         trade_seq = 0
 
-        for i in range(1, len(df)):
+        engine = str(self.config.get('engine', 'loop')).lower()
+        bar_range = range(1, len(df))
+        if engine in ('vectorized', 'tick'):
+            sim_args = dict(
+                middle_band_col=middle_band_col, adx_col=adx_col, bb_length=bb_length,
+                use_adx_filter=use_adx_filter, adx_threshold=adx_threshold,
+                use_stop_loss=use_stop_loss, stop_loss_points=stop_loss_points,
+                use_take_profit=use_take_profit, take_profit_points=take_profit_points,
+                intrabar=intrabar,
+                session_mask=session_mask,
+                spread_points=spread_arr,
+                lot_size=lot_size, lot_for_costs=float(self.config.get("fixed_lot_size", 0.1)),
+                contract_size=contract_size, point=point,
+                commission_rt_usd=commission_rt_usd, slippage_pts=slippage_pts,
+                initial_balance=initial_balance,
+            )
+            if engine == 'tick':
+                tf_s = timeframe_seconds(self.timeframe, strict=True)
+                ticks = self._open_ticks(bar_ms[0], bar_ms[-1] + tf_s * 1000)
+                sim = simulate_poseidon_ticks(df, ticks, bar_seconds=tf_s, **sim_args)
+            else:
+                sim = simulate_poseidon_vectorized(df, **sim_args)
+            eq_ds.extend(sim['eq_t_ms'], sim['eq_values'], sim['eq_is_event'])
+            trade_log = sim['completed_trades']
+            equity_curve = sim['equity_curve']
+            current_balance = sim['current_balance']
+            realized_balance = sim['realized_balance']
+            margin_called = sim['margin_called']
+            bar_range = range(0)  # loop per-bar dilewati
+
+        for i in bar_range:
             if current_balance < 0:
                 margin_called = True
                 if current_position is not None and active_trade is not None:
                     exit_i = i
-                    spr_pts = _spread_pts(exit_i)
-                    close_bid = float(df.iloc[exit_i]['close'])
-                    exit_exec = _exec_price(current_position, close_bid, spr_pts, leg='exit', is_market=True)
+                    exit_exec = _exec_price(current_position, exit_i, leg='exit', is_market=True)
                     commission_exit = _commission_leg_usd(lot_size)
 
                     gross_pnl = _pnl_usd(current_position, active_trade['entry_price'], exit_exec, lot_size)
@@ -389,15 +667,8 @@ class PoseidonWave:
                         'status': 'MARGIN CALL',
                         'reason_exit': 'margin_call'
                     })
-                    _augment_trade_fields(
-                        side=current_position,
-                        exit_i=i,
-                        spr_pts_exit=spr_pts,
-                        close_bid_exit=close_bid,
-                        commission_exit=commission_exit,
-                        net_pnl_exec_based=net_pnl
-                    )
                     active_trade.update({
+                        'bars_held': i - active_trade['entry_index'],
                         'side': current_position,
                         'exit_ts_epoch_ms': _to_epoch_ms(df.index[exit_i]),
                         'entry_ts_epoch_ms': _to_epoch_ms(active_trade['entry_time'])
@@ -409,12 +680,12 @@ class PoseidonWave:
 
             candle_sekarang = df.iloc[i]
             candle_sebelumnya = df.iloc[i-1]
-            is_in_trading_session = _in_session(df.index[i])
+            is_in_trading_session = bool(session_mask[i])
 
             close_bid_now = float(candle_sekarang['close'])
             unreal = _unrealized_pnl(current_position, active_trade['entry_price'] if active_trade else 0.0, close_bid_now, lot_size)
             equity_t = realized_balance + unreal
-            eq_ds.add(_to_epoch_ms(df.index[i]), float(equity_t), is_event=False)
+            eq_ds.add(bar_ms[i], float(equity_t), is_event=False)
 
             if current_position is not None and active_trade is not None:
                 entry_bid = float(active_trade['entry_price_ref_close_bid'])
@@ -429,19 +700,29 @@ class PoseidonWave:
                 active_trade['mfe_usd'] = max(float(active_trade.get('mfe_usd', 0.0)), float(mfe_usd))
                 active_trade['mae_usd'] = max(float(active_trade.get('mae_usd', 0.0)), float(mae_usd))
 
-            if current_position is not None and use_stop_loss:
-                exit_price = None
-                sl_buy = active_trade['entry_price'] - stop_loss_points
-                sl_sell = active_trade['entry_price'] + stop_loss_points
-                if current_position == 'BUY' and candle_sekarang['low'] <= sl_buy:
-                    exit_price = sl_buy
-                elif current_position == 'SELL' and candle_sekarang['high'] >= sl_sell:
-                    exit_price = sl_sell
-                
+            if current_position is not None and (use_stop_loss or use_take_profit):
+                exit_price, exit_reason = None, None
+                is_buy = current_position == 'BUY'
+                if is_buy:
+                    sl_level = active_trade['entry_price'] - stop_loss_points
+                    tp_level = active_trade['entry_price'] + take_profit_points
+                    sl_hit = use_stop_loss and candle_sekarang['low'] <= sl_level
+                    tp_hit = use_take_profit and candle_sekarang['high'] >= tp_level
+                else:
+                    sl_level = active_trade['entry_price'] + stop_loss_points
+                    tp_level = active_trade['entry_price'] - take_profit_points
+                    sl_hit = use_stop_loss and candle_sekarang['high'] >= sl_level
+                    tp_hit = use_take_profit and candle_sekarang['low'] <= tp_level
+                if sl_hit and tp_hit:
+                    # kedua level tersentuh di bar yang sama -> urutan dari model intrabar
+                    sl_hit = bool(intrabar.sl_first(i, is_buy, sl_level, tp_level)[0])
+                if sl_hit:
+                    exit_price, exit_reason = sl_level, 'sl'
+                elif tp_hit:
+                    exit_price, exit_reason = tp_level, 'tp'
+
                 if exit_price is not None:
-                    spr_pts = _spread_pts(i)
-                    close_bid = float(candle_sekarang['close'])
-                    exit_exec = _exec_price(current_position, close_bid, spr_pts, leg='exit', is_market=False, level_price=exit_price)
+                    exit_exec = _exec_price(current_position, i, leg='exit', is_market=False, level_price=exit_price)
                     commission_exit = _commission_leg_usd(lot_size)
 
                     gross_pnl = _pnl_usd(current_position, active_trade['entry_price'], exit_exec, lot_size)
@@ -449,7 +730,7 @@ class PoseidonWave:
 
                     realized_balance += net_pnl
                     current_balance = realized_balance
-                    eq_ds.add(_to_epoch_ms(df.index[i]), float(current_balance), is_event=True)
+                    eq_ds.add(bar_ms[i], float(current_balance), is_event=True)
                     equity_curve.append((df.index[i], current_balance))
 
                     active_trade.update({
@@ -459,28 +740,16 @@ class PoseidonWave:
                         'gross_pnl_usd': gross_pnl,
                         'commission_exit_usd': commission_exit,
                         'commission_total_usd': active_trade.get('commission_entry_usd', 0.0) + commission_exit,
-                        'reason_exit': 'sl'
+                        'reason_exit': exit_reason
                     })
-                    _augment_trade_fields(
-                        side=current_position,
-                        exit_i=i,
-                        spr_pts_exit=spr_pts,
-                        close_bid_exit=close_bid,
-                        commission_exit=commission_exit,
-                        net_pnl_exec_based=net_pnl
-                    )
                     active_trade.update({
+                        'bars_held': i - active_trade['entry_index'],
                         'side': current_position,
                         'exit_ts_epoch_ms': _to_epoch_ms(df.index[i]),
                         'entry_ts_epoch_ms': _to_epoch_ms(active_trade['entry_time'])
                     })
                     completed_trades.append(active_trade)
 
-                    if self.config.get('plot_individual_trades'):
-                        trade_df_slice = df.loc[active_trade['entry_time']:active_trade['exit_time']]
-                        chart_folder = os.path.join(run_directory, "Individual_Charts")
-                        self._plot_completed_trade(trade_df_slice, active_trade, len(completed_trades), chart_folder)
-
                     current_position = None; active_trade = None
                     continue
 
@@ -491,9 +760,7 @@ class PoseidonWave:
 
             # Close and Reverse Logic
             if (is_bullish_cross and current_position == 'SELL') or (is_bearish_cross and current_position == 'BUY'):
-                spr_pts = _spread_pts(i)
-                close_bid = float(candle_sekarang['close'])
-                exit_exec = _exec_price(current_position, close_bid, spr_pts, leg='exit', is_market=True)
+                exit_exec = _exec_price(current_position, i, leg='exit', is_market=True)
                 commission_exit = _commission_leg_usd(lot_size)
 
                 gross_pnl = _pnl_usd(current_position, active_trade['entry_price'], exit_exec, lot_size)
@@ -502,7 +769,7 @@ class PoseidonWave:
                 current_balance += net_pnl
                 realized_balance += net_pnl
                 current_balance = realized_balance
-                eq_ds.add(_to_epoch_ms(df.index[i]), float(current_balance), is_event=True)
+                eq_ds.add(bar_ms[i], float(current_balance), is_event=True)
                 equity_curve.append((df.index[i], current_balance))
 
                 active_trade.update({
@@ -514,26 +781,14 @@ class PoseidonWave:
                     'commission_total_usd': active_trade.get('commission_entry_usd', 0.0) + commission_exit,
                     'reason_exit': 'reverse'
                 })
-                _augment_trade_fields(
-                    side=current_position,
-                    exit_i=i,
-                    spr_pts_exit=spr_pts,
-                    close_bid_exit=close_bid,
-                    commission_exit=commission_exit,
-                    net_pnl_exec_based=net_pnl
-                )
                 active_trade.update({
+                    'bars_held': i - active_trade['entry_index'],
                     'side': current_position,
                     'exit_ts_epoch_ms': _to_epoch_ms(df.index[i]),
                     'entry_ts_epoch_ms': _to_epoch_ms(active_trade['entry_time'])
                 })
                 completed_trades.append(active_trade)
 
-                if self.config.get('plot_individual_trades'):
-                    trade_df_slice = df.loc[active_trade['entry_time']:active_trade['exit_time']]
-                    chart_folder = os.path.join(run_directory, "Individual_Charts")
-                    self._plot_completed_trade(trade_df_slice, active_trade, len(completed_trades), chart_folder)
-
                 current_position = None; active_trade = None
 
             # Entry Logic
@@ -545,8 +800,8 @@ class PoseidonWave:
                 
                 if current_position:
                     spr_pts = _spread_pts(i)
-                    close_bid = float(candle_sekarang['close'])
-                    entry_exec = _exec_price(current_position, close_bid, spr_pts, leg='entry', is_market=True)
+                    close_bid = float(close_arr[i])
+                    entry_exec = _exec_price(current_position, i, leg='entry', is_market=True)
                     commission_entry = _commission_leg_usd(lot_size)
 
                     trade_seq += 1
@@ -579,13 +834,11 @@ class PoseidonWave:
                         'mfe_usd': 0.0,
                         'mae_usd': 0.0
                     }
-                    eq_ds.add(_to_epoch_ms(df.index[i]), float(realized_balance), is_event=True)
+                    eq_ds.add(bar_ms[i], float(realized_balance), is_event=True)
 
         if not margin_called and current_position is not None and active_trade is not None:
             last_i = len(df) - 1
-            spr_pts = _spread_pts(last_i)
-            close_bid = float(df.iloc[last_i]['close'])
-            exit_exec = _exec_price(current_position, close_bid, spr_pts, leg='exit', is_market=True)
+            exit_exec = _exec_price(current_position, last_i, leg='exit', is_market=True)
             commission_exit = _commission_leg_usd(lot_size)
 
             gross_pnl = _pnl_usd(current_position, active_trade['entry_price'], exit_exec, lot_size)
@@ -594,7 +847,7 @@ class PoseidonWave:
             current_balance += net_pnl
             realized_balance += net_pnl
             current_balance = realized_balance
-            eq_ds.add(_to_epoch_ms(df.index[last_i]), float(current_balance), is_event=True)
+            eq_ds.add(bar_ms[last_i], float(current_balance), is_event=True)
             equity_curve.append((df.index[last_i], current_balance))
 
             active_trade.update({
@@ -606,15 +859,8 @@ class PoseidonWave:
                 'commission_total_usd': active_trade.get('commission_entry_usd', 0.0) + commission_exit,
                 'reason_exit': 'forced_close'
             })
-            _augment_trade_fields(
-                side=current_position,
-                exit_i=last_i,
-                spr_pts_exit=spr_pts,
-                close_bid_exit=close_bid,
-                commission_exit=commission_exit,
-                net_pnl_exec_based=net_pnl
-            )
             active_trade.update({
+                'bars_held': last_i - active_trade['entry_index'],
                 'side': current_position,
                 'exit_ts_epoch_ms': _to_epoch_ms(df.index[last_i]),
                 'entry_ts_epoch_ms': _to_epoch_ms(active_trade['entry_time'])
@@ -624,71 +870,72 @@ class PoseidonWave:
             current_position = None
             active_trade = None
 
-        equity_curve_ds = eq_ds.finalize()  # list[(t_ms:int, equity:float)]
-        equity_curve_json = [(t, round(float(e), 2)) for (t, e) in equity_curve_ds]
-
-        # Hitung max DD % dari curve downsampled
-        peak = equity_curve_ds[0][1] if equity_curve_ds else initial_balance
-        max_dd_val, peak_after, trough_after = 0.0, peak, peak
-        peak_ts, trough_ts = (pd.to_datetime(equity_curve_ds[0][0], unit='ms', utc=True),)*2 if equity_curve_ds else (start_time, start_time)
-        for t_ms, eq in equity_curve_ds:
-            if eq > peak:
-                peak = eq
-                peak_ts = pd.to_datetime(t_ms, unit='ms', utc=True)
-            dd = peak - eq
-            if dd > max_dd_val:
-                max_dd_val = dd
-                trough_after = eq
-                trough_ts = pd.to_datetime(t_ms, unit='ms', utc=True)
-        max_drawdown_percentage = (max_dd_val / peak) * 100 if peak > 0 else 0
-
-        tuw = 0.0
-        prev_below_peak = False
-        prev_ts = None
-        cur_peak = equity_curve_ds[0][1] if equity_curve_ds else initial_balance
-        for t_ms, eq in equity_curve_ds:
-            ts = pd.to_datetime(t_ms, unit='ms', utc=True)
-            if eq >= cur_peak:
-                if prev_below_peak and prev_ts is not None:
-                    tuw += (ts - prev_ts).total_seconds()
-                prev_below_peak = False
-                cur_peak = eq
-                prev_ts = ts
-            else:
-                if not prev_below_peak:
-                    prev_ts = ts
-                prev_below_peak = True
-        time_under_water_days = round(tuw / 86400.0, 2)
+        if trade_log is None:
+            # atribusi biaya (gross/spread/slippage/komisi/net) untuk semua trade sekaligus
+            trade_log = completed_trades.build()
+            apply_cost_attribution(trade_log, close_arr, spread_arr, float(self.config.get("fixed_lot_size", 0.1)),
+                                   contract_size, point, slippage_pts)
+        if self.plot_trades:
+            chart_folder = os.path.join(run_directory, "Individual_Charts")
+            plotted = np.isin(trade_log.rows['reason'], [REASONS.index(r) for r in ('sl', 'tp', 'reverse')])
+            for k in np.flatnonzero(plotted):
+                trade = trade_log.record(k)
+                trade_df_slice = df.loc[trade['entry_time']:trade['exit_time']]
+                self._plot_completed_trade(trade_df_slice, trade, int(k) + 1, chart_folder)
 
-        # Perbarui peak/trough balance setelah loop
-        for date, balance in equity_curve:
-            if balance > peak_balance: peak_balance, peak_balance_date = balance, date
-            if balance < trough_balance: trough_balance, trough_balance_date = balance, date
+        return {
+            'completed_trades': trade_log,
+            'equity_curve': equity_curve,
+            'current_balance': current_balance,
+            'realized_balance': realized_balance,
+            'margin_called': margin_called,
+            'start_time': start_time,
+        }
 
-        gross_profit = sum(t['profit_usd'] for t in completed_trades if t['profit_usd'] > 0)
-        gross_loss = sum(t['profit_usd'] for t in completed_trades if t['profit_usd'] < 0)
+    def _build_report(self, df: pd.DataFrame, sim: dict, equity_curve_ds: list, initial_balance: float,
+                      final_balance: float, start_date_str: str, end_date_str: str, period_key: str, ctx: dict) -> dict:
+        """Metrik, report_details, file ekuitas & gambar untuk satu periode laporan."""
+        adx_period, adx_threshold, use_adx_filter = ctx['adx_period'], ctx['adx_threshold'], ctx['use_adx_filter']
+        use_stop_loss, stop_loss_points = ctx['use_stop_loss'], ctx['stop_loss_points']
+        time_str_for_filename, param_str, run_directory = ctx['time_str_for_filename'], ctx['param_str'], ctx['run_directory']
+        server_tz_name, session_base = ctx['server_tz_name'], ctx['session_base']
+        point, contract_size = ctx['point'], ctx['contract_size']
 
-        final_balance = current_balance if not margin_called else 0
-        total_profit = final_balance - initial_balance
+        completed_trades = sim['completed_trades']
+        equity_curve = sim['equity_curve']
+        start_time = sim['start_time']
 
-        monthly_wins = [t for t in completed_trades if t['profit_usd'] > 0]
-        monthly_losses = [t for t in completed_trades if t['profit_usd'] < 0]
+        equity_curve_json = [(t, round(float(e), 2)) for (t, e) in equity_curve_ds]
 
-        max_single_win = max(t['profit_usd'] for t in monthly_wins) if monthly_wins else 0
-        max_single_loss = min(t['profit_usd'] for t in monthly_losses) if monthly_losses else 0
+        # Max DD % & time under water dari curve downsampled
+        if equity_curve_ds:
+            ds_t = np.fromiter((t for t, _ in equity_curve_ds), dtype=np.int64, count=len(equity_curve_ds))
+            ds_eq = np.fromiter((e for _, e in equity_curve_ds), dtype=float, count=len(equity_curve_ds))
+            dd_stats = metrics.drawdown_stats(ds_eq)
+            i_trough = dd_stats['trough_index'] or 0
+            peak, max_dd_val, trough_after = dd_stats['peak'], dd_stats['max_drawdown'], float(ds_eq[i_trough])
+            peak_ts = pd.to_datetime(int(ds_t[dd_stats['peak_index']]), unit='ms', utc=True)
+            trough_ts = pd.to_datetime(int(ds_t[i_trough]), unit='ms', utc=True)
+            time_under_water_days = round(metrics.time_under_water_seconds(ds_t, ds_eq) / 86400.0, 2)
+        else:
+            peak, max_dd_val, trough_after = initial_balance, 0.0, initial_balance
+            peak_ts = trough_ts = start_time
+            time_under_water_days = 0.0
+        max_drawdown_percentage = (max_dd_val / peak) * 100 if peak > 0 else 0
 
-        avg_win = sum(t['profit_usd'] for t in monthly_wins) / len(monthly_wins) if monthly_wins else 0
-        avg_loss = sum(t['profit_usd'] for t in monthly_losses) / len(monthly_losses) if monthly_losses else 0
+        # Peak/trough balance realisasi (kurva per trade)
+        peak_balance, peak_balance_date = initial_balance, start_time
+        trough_balance, trough_balance_date = initial_balance, start_time
+        if equity_curve:
+            balances = np.fromiter((b for _, b in equity_curve), dtype=float, count=len(equity_curve))
+            i_hi, i_lo = int(balances.argmax()), int(balances.argmin())
+            if balances[i_hi] > peak_balance:
+                peak_balance, peak_balance_date = equity_curve[i_hi][1], equity_curve[i_hi][0]
+            if balances[i_lo] < trough_balance:
+                trough_balance, trough_balance_date = equity_curve[i_lo][1], equity_curve[i_lo][0]
 
-        max_consecutive_losses = 0
-        current_consecutive_losses = 0
-        for t in completed_trades:
-            if t['profit_usd'] <= 0:
-                current_consecutive_losses += 1
-            else:
-                max_consecutive_losses = max(max_consecutive_losses, current_consecutive_losses)
-                current_consecutive_losses = 0
-        max_consecutive_losses = max(max_consecutive_losses, current_consecutive_losses)
+        total_profit = final_balance - initial_balance
+        stats = metrics.trade_stats(completed_trades.pnl)
 
         report_details = {
             "symbol": self.symbol,
@@ -707,12 +954,12 @@ class PoseidonWave:
             "total_profit": total_profit,
             "roi": (total_profit / initial_balance * 100) if initial_balance > 0 else 0,
             "total_trades": len(completed_trades),
-            "win_rate": (len([t for t in completed_trades if t['profit_usd'] > 0]) / len(completed_trades)) * 100 if completed_trades else 0,
-            "max_consecutive_losses": max_consecutive_losses,
-            "max_single_win": max_single_win,
-            "max_single_loss": max_single_loss,
-            "average_win": avg_win,
-            "average_loss": abs(avg_loss)
+            "win_rate": stats['win_rate'],
+            "max_consecutive_losses": stats['max_consecutive_losses'],
+            "max_single_win": stats['max_single_win'],
+            "max_single_loss": stats['max_single_loss'],
+            "average_win": stats['average_win'],
+            "average_loss": stats['average_loss'],
         }
         report_details['monthly_drawdown_details'] = {
             "percentage": max_drawdown_percentage,
@@ -722,10 +969,10 @@ class PoseidonWave:
             "start_date": peak_ts.strftime('%Y-%m-%d'),
             "end_date": trough_ts.strftime('%Y-%m-%d'),
             # opsional
-            "time_under_water_days": time_under_water_days if 'time_under_water_days' in locals() else None,
+            "time_under_water_days": time_under_water_days,
         }
         report_details["market_features"] = self._compute_market_features(
-            df, self.start_trade_time, self.end_trade_time
+            df, self.start_trade_time, self.end_trade_time, period_key=period_key
         )
         report_details['equity_curve'] = equity_curve
 
@@ -754,11 +1001,21 @@ class PoseidonWave:
         report_details['equity_curve_files'] = saved_files
         report_details["symbol_point"] = float(point)
         report_details["contract_size"] = float(contract_size)
-        try:
-            self._plot_equity_curve(report_details['equity_curve'], report_details)
-        except Exception as e:
-            print(f"Gagal membuat gambar equity bulanan: {e}", file=sys.stderr)
+        report_details['equity_image_rendered'] = False
+        if self.render_reports:
+            self.render_month_images([report_details])
         return report_details
+
+    def render_month_images(self, monthly_reports: list) -> None:
+        """Render gambar equity bulanan yang belum ada (dipakai PDF); untuk laporan dari mode metrics-only / checkpoint."""
+        for report_details in monthly_reports:
+            if report_details.get('equity_image_rendered'):
+                continue
+            try:
+                self._plot_equity_curve(report_details['equity_curve'], report_details)
+                report_details['equity_image_rendered'] = True
+            except Exception as e:
+                print(f"Gagal membuat gambar equity bulanan: {e}", file=sys.stderr)
     
     def _get_full_equity_curve(self, monthly_reports: list) -> list:
         """Menggabungkan semua equity curve dari laporan bulanan menjadi satu."""
@@ -824,133 +1081,90 @@ class PoseidonWave:
         # Kembalikan epoch-ms + balance
         return [(int(ts.timestamp()*1000), round(float(v), 2)) for ts, v in out.items()]
     
-    def _compute_market_features(self, df: pd.DataFrame, start_time: time, end_time: time) -> dict:
+    def _compute_market_features(self, df: pd.DataFrame, start_time: time, end_time: time, period_key: str = None) -> dict:
         # Pastikan ada kolom close
         if df.empty:
             return {}
 
-        # ATR & ADX (hitungan cepat)
-        df_calc = df.copy()
-        if not {'ATRr_14','ATR_14'}.intersection(df_calc.columns):
-            df_calc.ta.atr(length=14, append=True)
-        if not any(c.startswith('ADX_') for c in df_calc.columns):
-            df_calc.ta.adx(length=14, append=True)
+        # ATR & ADX (hitungan cepat); kolom dikumpulkan terpisah, df (bisa view shared memory) tidak disalin
+        cols = dict(df.items())
+        if not {'ATRr_14','ATR_14'}.intersection(cols):
+            cols.update(self._indicator_frame(df, period_key or 'features', 'atr', {'length': 14},
+                                              lambda: df.ta.atr(length=14)).items())
+        if not any(c.startswith('ADX_') for c in cols):
+            cols.update(self._indicator_frame(df, period_key or 'features', 'adx', {'length': 14},
+                                              lambda: df.ta.adx(length=14)).items())
 
-        atr_col = next((c for c in ['ATRr_14','ATR_14'] if c in df_calc.columns), None)
-        adx_col = next((c for c in df_calc.columns if c.startswith('ADX_') and not c.endswith('D')), None)
+        atr_col = next((c for c in ['ATRr_14','ATR_14'] if c in cols), None)
+        adx_col = next((c for c in cols if c.startswith('ADX_') and not c.endswith('D')), None)
 
         # Log returns untuk volatilitas lain
-        ret = np.log(df_calc['close']).diff().dropna()
+        ret = np.log(df['close']).diff().dropna()
 
-        # Filter jam sesi trading
-        in_session = (df_calc.index.time >= start_time) & (df_calc.index.time <= end_time)
-        session_ratio = float(np.mean(in_session)) if len(df_calc) else 0.0
+        # Filter jam sesi trading (basis zona waktu sama dengan engine)
+        in_session = self._session_mask(df.index)
+        session_ratio = float(np.mean(in_session)) if len(df) else 0.0
 
-        price_change = (df_calc['close'].iloc[-1] - df_calc['close'].iloc[0]) / df_calc['close'].iloc[0] * 100.0
+        price_change = (df['close'].iloc[-1] - df['close'].iloc[0]) / df['close'].iloc[0] * 100.0
 
         return {
             "market_price_change_pct": float(price_change),
-            "atr_mean": float(df_calc[atr_col].mean()) if atr_col else None,
-            "atr_std": float(df_calc[atr_col].std()) if atr_col else None,
-            "adx_mean": float(df_calc[adx_col].mean()) if adx_col else None,
+            "atr_mean": float(cols[atr_col].mean()) if atr_col else None,
+            "atr_std": float(cols[atr_col].std()) if atr_col else None,
+            "adx_mean": float(cols[adx_col].mean()) if adx_col else None,
             "ret_std_log": float(ret.std()) if len(ret) else None,
             "ret_skew": float(ret.skew()) if len(ret) else None,
             "ret_kurt": float(ret.kurt()) if len(ret) else None,
             "session_coverage_ratio": session_ratio
         }
     
-    def run_advanced_simulation(self, equity_curve: list, initial_balance: float, all_completed_trades: list, sl_percent: float, tp_percent: float, reset_rule: dict = None):
+    def run_advanced_simulation(self, equity_curve: list, initial_balance: float, all_completed_trades: TradeLog, sl_percent: float, tp_percent: float, reset_rule: dict = None):
         """
         Versi 3.0: Menjalankan simulasi canggih dengan sistem state (TRADING/STOPPED) dan aturan reset dinamis.
+        Satu skenario; untuk banyak skenario sekaligus pakai run_risk_scenarios.
         """
-        if not equity_curve:
-            return {'status': 'Data Kosong', 'net_profit': 0, 'trades': 0, 'max_drawdown': 0, 'win_rate': 0, 'profit_factor': 0, 'end_date': 'N/A', 'reset_count': 0, 'gross_profit': 0, 'gross_loss': 0, 'num_wins': 0}
-
-        timestamps = [item[0] for item in equity_curve]
-        balances = [item[1] for item in equity_curve]
-        equity_series = pd.Series(balances, index=pd.to_datetime(timestamps ,unit='ms', utc=True))
-        
-        sim_balance = initial_balance
-        sim_peak_balance = initial_balance
-        sim_max_drawdown = 0.0
-        phase_start_balance = initial_balance
-        last_known_balance = initial_balance
-
-        current_state = "TRADING"
-        restart_date = None
-        reset_count = 0
-        
-        status = "Completed"
-        final_stop_date = equity_series.index[-1]
-
-        for date, actual_balance in equity_series.items():
-            if current_state == "STOPPED":
-                if date.date() >= restart_date:
-                    current_state = "TRADING"
-                    phase_start_balance = sim_balance
-                    restart_date = None
-                    reset_count += 1
-                else:
-                    last_known_balance = actual_balance
-                    continue 
-
-            if current_state == "TRADING":
-                daily_pnl = actual_balance - last_known_balance
-                sim_balance += daily_pnl
-                
-                sim_peak_balance = max(sim_peak_balance, sim_balance)
-                drawdown = (sim_peak_balance - sim_balance) / sim_peak_balance if sim_peak_balance > 0 else 0
-                sim_max_drawdown = max(sim_max_drawdown, drawdown)
-
-                tp_level = phase_start_balance * (1 + tp_percent / 100)
-                sl_level = phase_start_balance * (1 - sl_percent / 100)
-                
-                if sim_balance >= tp_level:
-                    status = f"TP {tp_percent:.1f}% Hit"
-                    final_stop_date = date
-                    break
-
-                if sim_balance <= sl_level:
-                    final_stop_date = date
-                    if reset_rule and reset_rule.get('value', 0) > 0:
-                        current_state = "STOPPED"
-                        period_map = {'days': pd.Timedelta(days=1), 'weeks': pd.Timedelta(weeks=1), 'months': pd.Timedelta(days=30)}
-                        delta = period_map.get(reset_rule['period'], pd.Timedelta(days=1)) * reset_rule['value']
-                        restart_date = (date + delta).date()
-                        status = "SL Hit, Resetting"
-                    else:
-                        status = f"SL {sl_percent:.1f}% Hit & Stop"
-                        break
-
-            last_known_balance = actual_balance
-
-        trades_in_sim = [t for t in all_completed_trades if t['exit_time'].date() <= final_stop_date.date()]
-        trade_count = len(trades_in_sim)
-        wins = [t for t in trades_in_sim if t['profit_usd'] > 0]
-        num_wins = len(wins) # <-- DATA BARU
-        win_rate = (num_wins / trade_count) * 100 if trade_count > 0 else 0
-        
-        gross_profit = sum(t['profit_usd'] for t in wins) # <-- DATA BARU
-        gross_loss = sum(t['profit_usd'] for t in trades_in_sim if t['profit_usd'] < 0) # <-- DATA BARU
-        profit_factor = abs(gross_profit / gross_loss) if gross_loss != 0 else 999.9
-
-        return {
-            'status': status,
-            'net_profit': sim_balance - initial_balance,
-            'trades': trade_count,
-            'max_drawdown': sim_max_drawdown * 100,
-            'win_rate': win_rate,
-            'profit_factor': profit_factor,
-            'end_date': final_stop_date.strftime('%Y-%m-%d'),
-            'reset_count': reset_count,
-            'gross_profit': gross_profit,
-            'gross_loss': gross_loss,
-            'num_wins': num_wins
-        }
+        scenario = {'sl': sl_percent, 'tp': tp_percent, 'reset_rule': reset_rule}
+        result = simulate_risk_scenarios(equity_curve, initial_balance, all_completed_trades, [scenario])[0]
+        result.pop('name', None)
+        return result
+
+    def run_risk_scenarios(self, report: dict, mode: str) -> list:
+        """Semua skenario manajemen risiko ('adaptive' = 8 skenario tetap, 'grid' = matriks SL/TP/reset) atas satu report bulanan."""
+        curve = report.get('equity_curve', [])
+        scenarios = scenario_grid() if mode == 'grid' else self._generate_adaptive_scenarios(curve)
+        return simulate_risk_scenarios(curve, report['initial_balance'], report.get('completed_trades'), scenarios)
+
+    def _aggregate_simulation_results(self, monthly_reports: list) -> list:
+        """Gabungkan simulation_results bulanan per nama skenario (profit & trade dijumlah, max DD terbesar)."""
+        aggregated = {}
+        for report in monthly_reports:
+            for sim_result in report.get('simulation_results', []):
+                data = aggregated.setdefault(sim_result['name'], {
+                    'net_profit': 0, 'trades': 0, 'num_wins': 0,
+                    'gross_profit': 0, 'gross_loss': 0, 'reset_count': 0, 'max_drawdowns': []
+                })
+                for key in ('net_profit', 'trades', 'num_wins', 'gross_profit', 'gross_loss', 'reset_count'):
+                    data[key] += sim_result.get(key, 0)
+                data['max_drawdowns'].append(sim_result.get('max_drawdown', 0))
+
+        summary = []
+        for name, data in aggregated.items():
+            total_trades = data['trades']
+            summary.append({
+                'name': name,
+                'net_profit': data['net_profit'],
+                'win_rate': (data['num_wins'] / total_trades) * 100 if total_trades > 0 else 0,
+                'profit_factor': abs(data['gross_profit'] / data['gross_loss']) if data['gross_loss'] != 0 else 999.9,
+                'max_drawdown': max(data['max_drawdowns']) if data['max_drawdowns'] else 0,
+                'trades': total_trades,
+                'reset_count': data['reset_count'],
+            })
+        return summary
     
     def _format_simulation_table(self, simulation_results: list) -> str:
+        name_w = max([30] + [len(str(r.get('name', 'N/A'))) for r in simulation_results])
         header = (
-            f"| {'Skenario':<30} | {'Net Profit ($)':>15} | {'WinRate(%)':>11} | {'P. Factor':>9} | "
+            f"| {'Skenario':<{name_w}} | {'Net Profit ($)':>15} | {'WinRate(%)':>11} | {'P. Factor':>9} | "
             f"{'MaxDD(%)':>10} | {'Trades':>7} | {'Resets':>8} |\n"
         )
         separator = "-" * len(header)
@@ -970,7 +1184,7 @@ class PoseidonWave:
             reset_str = f"{result.get('reset_count', 0):>6}x"
             
             table_string += (
-                f"| {name:<30} | {profit_str} | {win_rate_str} | {pf_str} | "
+                f"| {name:<{name_w}} | {profit_str} | {win_rate_str} | {pf_str} | "
                 f"{dd_str} | {trades_str} | {reset_str} |\n"
             )
 
@@ -1004,7 +1218,9 @@ class PoseidonWave:
         """Membuat gambar yang HANYA berisi teks rekapitulasi dan grafik batang P/L."""
         # PERUBAHAN: Figure lebih tinggi & rasio diubah agar chart lebih besar
         fig = plt.figure(figsize=(16, 22))
-        gs = fig.add_gridspec(2, 1, height_ratios=[3, 7])
+        simulation_summary = self._aggregate_simulation_results(monthly_reports)
+        # Tabel simulasi risiko (jika ada) mendapat baris sendiri di antara teks & grafik
+        gs = fig.add_gridspec(3, 1, height_ratios=[3, 2, 5]) if simulation_summary else fig.add_gridspec(2, 1, height_ratios=[3, 7])
         fig.suptitle("Laporan Kinerja Strategi", fontsize=24, weight='bold')
 
         # --- Bagian Teks Rekapitulasi ---
@@ -1016,21 +1232,13 @@ class PoseidonWave:
         total_trades = sum(r['total_trades'] for r in monthly_reports)
         total_wins = sum(r['win_rate']/100 * r['total_trades'] for r in monthly_reports)
         overall_win_rate = (total_wins / total_trades) * 100 if total_trades > 0 else 0
-        all_completed_trades = [trade for r in monthly_reports for trade in r['completed_trades']]
-        gross_profit = sum(t['profit_usd'] for t in all_completed_trades if t['profit_usd'] > 0)
-        gross_loss = sum(t['profit_usd'] for t in all_completed_trades if t['profit_usd'] < 0)
-        profit_factor = abs(gross_profit / gross_loss) if gross_loss != 0 else 999.9
+        all_completed_trades = TradeLog.concat(r['completed_trades'] for r in monthly_reports)
+        stats = metrics.trade_stats(all_completed_trades.pnl)
+        profit_factor = stats['profit_factor'] if all_completed_trades else metrics.PROFIT_FACTOR_NO_LOSS
         
         initial_balance = config.get('initial_balance', 1000.0)
-        full_equity_curve = []
         full_equity_curve = self._get_full_equity_curve(monthly_reports)
-
-        peak_equity_total = initial_balance
-        max_drawdown_value_total = 0.0
-        for _, balance in full_equity_curve:
-            peak_equity_total = max(peak_equity_total, balance)
-            max_drawdown_value_total = max(max_drawdown_value_total, peak_equity_total - balance)
-        total_drawdown_percent = (max_drawdown_value_total / peak_equity_total) * 100 if peak_equity_total > 0 else 0
+        total_drawdown_percent = metrics.drawdown_stats([b for _, b in full_equity_curve], start_peak=initial_balance)['percentage']
 
         param_str = monthly_reports[0]['param_str']
         year = monthly_reports[0]['period_for_filename'][:4]
@@ -1073,53 +1281,17 @@ class PoseidonWave:
 
         initial_balance = config.get('initial_balance', 1000.0)
         full_equity_curve = self._get_full_equity_curve(monthly_reports)
-        all_completed_trades = [trade for r in monthly_reports for trade in r['completed_trades']]
-
-        # aggregated_sim_results = {}
-        # # Kumpulkan data dari setiap bulan
-        # for report in monthly_reports:
-        #     if 'simulation_results' in report:
-        #         for sim_result in report['simulation_results']:
-        #             name = sim_result['name']
-        #             if name not in aggregated_sim_results:
-        #                 aggregated_sim_results[name] = {
-        #                     'net_profit': 0, 'trades': 0, 'num_wins': 0,
-        #                     'gross_profit': 0, 'gross_loss': 0, 'reset_count': 0,
-        #                     'max_drawdowns': []
-        #                 }
-                    
-        #             aggregated_sim_results[name]['net_profit'] += sim_result.get('net_profit', 0)
-        #             aggregated_sim_results[name]['trades'] += sim_result.get('trades', 0)
-        #             aggregated_sim_results[name]['num_wins'] += sim_result.get('num_wins', 0)
-        #             aggregated_sim_results[name]['gross_profit'] += sim_result.get('gross_profit', 0)
-        #             aggregated_sim_results[name]['gross_loss'] += sim_result.get('gross_loss', 0)
-        #             aggregated_sim_results[name]['reset_count'] += sim_result.get('reset_count', 0)
-        #             aggregated_sim_results[name]['max_drawdowns'].append(sim_result.get('max_drawdown', 0))
-
-        # # Hitung metrik final dari data yang sudah diagregasi
-        # final_simulation_summary = []
-        # for name, data in aggregated_sim_results.items():
-        #     total_trades = data['trades']
-        #     win_rate = (data['num_wins'] / total_trades) * 100 if total_trades > 0 else 0
-        #     profit_factor = abs(data['gross_profit'] / data['gross_loss']) if data['gross_loss'] != 0 else 999.9
-        #     max_drawdown = max(data['max_drawdowns']) if data['max_drawdowns'] else 0
-            
-        #     final_simulation_summary.append({
-        #         'name': name,
-        #         'net_profit': data['net_profit'],
-        #         'win_rate': win_rate,
-        #         'profit_factor': profit_factor,
-        #         'max_drawdown': max_drawdown,
-        #         'trades': total_trades,
-        #         'reset_count': data['reset_count']
-        #     })
-            
-        # table_output_string = self._format_simulation_table(final_simulation_summary)
-        
-        # ax_text.text(0.5, 0.1, table_output_string, fontname='Courier New', fontsize=16, va='top', ha='center')
+
+        if simulation_summary:
+            ax_sim = fig.add_subplot(gs[1, 0])
+            ax_sim.axis('off')
+            top = sorted(simulation_summary, key=lambda r: r['net_profit'], reverse=True)[:10]
+            table_output_string = self._format_simulation_table(top)
+            ax_sim.text(0.5, 0.5, table_output_string, fontname='Courier New', fontsize=14,
+                        va='center', ha='center', transform=ax_sim.transAxes)
 
         # --- Bagian Grafik Batang Bawah ---
-        ax_bar = fig.add_subplot(gs[1, 0])
+        ax_bar = fig.add_subplot(gs[-1, 0])
         month_names = [datetime.strptime(r['period_for_filename'].split('_to_')[0], '%Y-%m-%d').strftime('%b') for r in monthly_reports]
         monthly_pnl = [r['total_profit'] for r in monthly_reports]
         colors = ['g' if p > 0 else 'r' for p in monthly_pnl]
@@ -1224,11 +1396,10 @@ class PoseidonWave:
         )
 
 # ==============================================================================
-#  BAGIAN UTAMA YANG DIUBAH UNTUK MENERIMA PERINTAH
+#  CLI & JOB BACKTEST (dipakai __main__ dan sweep_runner)
 # ==============================================================================
-if __name__ == '__main__':
-    import argparse
-
+def build_arg_parser():
+    """Parser argumen CLI worker (dipakai juga oleh sweep in-process)."""
     parser = argparse.ArgumentParser(description="Menjalankan satu instance backtest Poseidon Wave.")
     parser.add_argument('--symbol', type=str, default='XAUUSD', help='Simbol trading')
     parser.add_argument('--wave_period', type=int, default=36, help='Periode Bollinger Bands')
@@ -1240,6 +1411,10 @@ if __name__ == '__main__':
     parser.add_argument('--adx_threshold', type=int, default=15, help='Threshold ADX')
     parser.add_argument('--use_sl', action='store_true', help='Gunakan Stop Loss')
     parser.add_argument('--sl_points', type=float, default=10.0, help='Poin Stop Loss')
+    parser.add_argument('--use_tp', action='store_true', help='Gunakan Take Profit')
+    parser.add_argument('--tp_points', type=float, default=20.0, help='Poin Take Profit')
+    parser.add_argument('--intrabar_model', type=str, choices=list(INTRABAR_MODELS), default='sl_first',
+                        help='Urutan SL/TP bila keduanya tersentuh di satu bar: sl_first, ohlc (heuristik O-L-H-C/O-H-L-C), atau lower_tf (bar M1 dari bar store)')
     parser.add_argument('--commission_per_lot_roundturn', type=float, default=7.0, help='Komisi round-turn per 1.0 lot dalam USD (dibagi 2 per leg)')
     parser.add_argument('--slippage_points', type=float, default=2.0, help='Slippage (points) per leg, diterapkan merugikan')
     parser.add_argument('--use_dynamic_spread', action='store_true', help='Jika True, pakai kolom spread dari MT5 rates bila tersedia')
@@ -1252,27 +1427,58 @@ if __name__ == '__main__':
     parser.add_argument('--end_month', type=int, default=7, help='Bulan selesai')
     parser.add_argument('--initial_balance', type=float, default=1000.0, help='Modal awal backtest')
     parser.add_argument('--plot_trades', action='store_true', help='Aktifkan untuk menyimpan gambar chart per transaksi')
+    parser.add_argument('--chart_workers', type=int, default=1,
+                        help='Jumlah proses render chart trade per worker (0 = render di proses ini; launcher membagi sisa core)')
+    parser.add_argument('--charts_per_page', type=int, default=1, help='Jumlah trade per gambar chart (Individual_Charts)')
     parser.add_argument('--equity_every_n_bars', type=int, default=5)
     parser.add_argument('--equity_window_size', type=int, default=20)
     parser.add_argument('--equity_max_points', type=int, default=20000)
+    parser.add_argument('--equity_downsample', type=str, choices=list(DOWNSAMPLE_MODES), default='minmax',
+                        help='Ringkasan kurva ekuitas: minmax (event + min/max/last per window) atau lttb')
+    parser.add_argument('--equity_pixel_width', type=int, default=4800, help='Target jumlah titik mode lttb (lebar gambar ekuitas dalam piksel)')
     parser.add_argument('--equity_write_parquet', action='store_true')
     parser.add_argument('--equity_write_csv', action='store_true')
-    
-    args = parser.parse_args()
-
-    send_status({"status": "Inisialisasi MT5...", "progress": 0, "total": 1})
-    if not mt5.initialize():
-        print("initialize() gagal, error code =", mt5.last_error(), file=sys.stderr)
-        quit()
-    send_status({"status": "Koneksi MT5 OK", "progress": 1, "total": 1})
-
-    # PERUBAHAN: Masukkan semua argumen relevan ke config
-    config = {
+    parser.add_argument('--no_bar_store', action='store_true', help='Ambil data langsung dari terminal MT5 tanpa bar store lokal')
+    parser.add_argument('--bar_store_dir', type=str, default=None, help='Folder bar store lokal (default: env BAR_STORE_DIR atau data/bar_store)')
+    parser.add_argument('--offline', action='store_true', help='Jalankan tanpa terminal MT5: data & info simbol dari bar store lokal')
+    parser.add_argument('--engine', type=str, choices=['loop', 'vectorized', 'tick'], default='loop',
+                        help='Mesin eksekusi backtest: loop per bar, vektor NumPy, atau replay tick BID/ASK dari tick store')
+    parser.add_argument('--tick_store_dir', type=str, default=None, help='Folder tick store lokal untuk --engine tick (default: sama dengan bar store)')
+    parser.add_argument('--tick_chunk_size', type=int, default=DEFAULT_CHUNK_SIZE, help='Jumlah tick per potongan baca memmap (mode tick)')
+    parser.add_argument('--no_indicator_cache', action='store_true', help='Hitung ulang indikator tanpa cache bersama')
+    parser.add_argument('--indicator_cache_dir', type=str, default=None, help='Folder cache indikator (default: env INDICATOR_CACHE_DIR atau data/indicator_cache)')
+    parser.add_argument('--shared_manifest', type=str, default=None, help='Manifest dataset shared memory dari launcher (bar + indikator)')
+    parser.add_argument('--continuous', action='store_true', help='Satu pass kontinu semua bulan (data dimuat sekali + warm-up), laporan bulanan dipotong dari hasilnya')
+    parser.add_argument('--metrics_only', action='store_true', help='Hanya hitung metrik & kurva ringkas, tanpa gambar/PDF (render belakangan lewat render_reports.py)')
+    parser.add_argument('--result_db', type=str, default=None, help='File SQLite hasil backtest (default: env RESULT_DB_PATH atau History_Logs/backtest_results.sqlite)')
+    parser.add_argument('--no_result_store', action='store_true', help='Jangan menambahkan hasil ke store SQLite')
+    parser.add_argument('--resume', action='store_true', help='Lewati bulan yang sudah punya checkpoint valid (parameter & data sama)')
+    parser.add_argument('--no_checkpoint', action='store_true', help='Jangan menulis / membaca checkpoint per bulan')
+    parser.add_argument('--checkpoint_dir', type=str, default=None, help='Folder checkpoint (default: env CHECKPOINT_DIR atau data/checkpoints)')
+    parser.add_argument('--risk_scenarios', type=str, choices=['none', 'adaptive', 'grid'], default='none',
+                        help='Simulasi SL/TP/reset akun per bulan: adaptive (8 skenario) atau grid (matriks ratusan skenario)')
+    parser.add_argument('--mc_paths', type=int, default=1000, help='Jumlah path Monte Carlo urutan trade (0 = nonaktif)')
+    parser.add_argument('--mc_method', type=str, choices=list(MC_METHODS), default='block', help='Resampling Monte Carlo: shuffle, bootstrap, atau block (pertahankan streak)')
+    parser.add_argument('--mc_block_size', type=int, default=None, help='Panjang blok trade untuk mode block (default ~ n^(1/3))')
+    parser.add_argument('--mc_ruin_pct', type=float, default=50.0, help='Ambang ruin: saldo turun X%% dari modal awal')
+    parser.add_argument('--mc_seed', type=int, default=0, help='Seed RNG Monte Carlo (hasil bisa direproduksi)')
+    parser.add_argument('--abort_max_dd', type=float, default=None, help='Hentikan run bila max drawdown total melewati X%%')
+    parser.add_argument('--abort_min_balance', type=float, default=None, help='Hentikan run bila saldo turun di bawah nilai ini')
+    parser.add_argument('--abort_min_pf', type=float, default=None, help='Hentikan run bila profit factor di bawah nilai ini (setelah --abort_min_trades trade)')
+    parser.add_argument('--abort_min_trades', type=int, default=30, help='Jumlah trade minimal sebelum kriteria profit factor berlaku')
+    parser.add_argument('--abort_on_margin_call', action='store_true', help='Hentikan run pada bulan pertama yang terkena margin call')
+    parser.add_argument('--warmup_bars', type=int, default=None, help='Jumlah bar warm-up indikator untuk mode kontinu (default: 2x periode terpanjang + 10)')
+    return parser
+
+
+def build_config(args, mt5_instance) -> dict:
+    """Ubah argumen CLI menjadi dict config PoseidonWave."""
+    return {
         'symbol': args.symbol,
         'year': args.year,
         'initial_balance': args.initial_balance,
         'timeframe_str': 'm5',
-        'timeframe_int': mt5.TIMEFRAME_M5,
+        'timeframe_int': mt5_instance.TIMEFRAME_M5,
         'equity_mode': args.equity_mode,
         'server_tz': args.server_tz,
         'session_base_tz': args.session_base_tz,
@@ -1285,6 +1491,9 @@ if __name__ == '__main__':
         'adx_threshold': args.adx_threshold,
         'use_stop_loss': args.use_sl,
         'stop_loss_points': args.sl_points,
+        'use_take_profit': args.use_tp,
+        'take_profit_points': args.tp_points,
+        'intrabar_model': args.intrabar_model,
         'commission_per_lot_roundturn_usd': args.commission_per_lot_roundturn,
         'slippage_points': args.slippage_points,
         'use_dynamic_spread': args.use_dynamic_spread,
@@ -1292,117 +1501,185 @@ if __name__ == '__main__':
         'equity_every_n_bars': args.equity_every_n_bars,
         'equity_window_size': args.equity_window_size,
         'equity_max_points': args.equity_max_points,
+        'equity_downsample': args.equity_downsample,
+        'equity_pixel_width': args.equity_pixel_width,
         'equity_write_parquet': args.equity_write_parquet,
         'equity_write_csv': args.equity_write_csv,
-        'plot_individual_trades': args.plot_trades
+        'plot_individual_trades': args.plot_trades,
+        'chart_workers': args.chart_workers,
+        'charts_per_page': args.charts_per_page,
+        'render_reports': not args.metrics_only,
+        'engine': args.engine,
+        'tick_store_dir': args.tick_store_dir,
+        'tick_chunk_size': args.tick_chunk_size,
+        'use_bar_store': not args.no_bar_store,
+        'bar_store_dir': args.bar_store_dir,
+        'use_indicator_cache': not args.no_indicator_cache,
+        'indicator_cache_dir': args.indicator_cache_dir,
+        'shared_manifest': args.shared_manifest,
+        'continuous_run': args.continuous,
+        'warmup_bars': args.warmup_bars,
+        'risk_scenarios': args.risk_scenarios,
+        'mc_paths': args.mc_paths,
+        'mc_method': args.mc_method,
+        'mc_block_size': args.mc_block_size,
+        'mc_ruin_pct': args.mc_ruin_pct,
+        'mc_seed': args.mc_seed,
+        'abort_max_drawdown_pct': args.abort_max_dd,
+        'abort_min_balance': args.abort_min_balance,
+        'abort_min_profit_factor': args.abort_min_pf,
+        'abort_min_trades': args.abort_min_trades,
+        'abort_on_margin_call': args.abort_on_margin_call,
+        'result_db': args.result_db,
+        'use_result_store': not args.no_result_store,
+        'resume': args.resume,
+        'use_checkpoint': not args.no_checkpoint,
+        'checkpoint_dir': args.checkpoint_dir,
     }
 
-    strategy = PoseidonWave(mt5, config)
 
+def abort_reason(strategy, monthly_reports: list, config: dict, balance: float):
+    """Alasan menghentikan run lebih awal (kriteria abort_* di config), atau None jika run dilanjutkan."""
+    if not monthly_reports:
+        return None
+    if config.get('abort_on_margin_call') and float(monthly_reports[-1].get('final_balance', 1)) <= 0:
+        return "margin call"
+    min_balance = config.get('abort_min_balance')
+    if min_balance is not None and balance < float(min_balance):
+        return f"saldo ${balance:,.2f} < ${float(min_balance):,.2f}"
+    max_dd = config.get('abort_max_drawdown_pct')
+    if max_dd is not None:
+        # mode per_month: tiap bulan mulai dari initial_balance; geser ke saldo berjalan (seperti ComboMonths)
+        equity, running = [], float(monthly_reports[0]['initial_balance'])
+        for report in monthly_reports:
+            offset = running - float(report['initial_balance'])
+            equity.extend(float(b) + offset for _, b in report.get('equity_curve') or [])
+            running = float(report['final_balance']) + offset
+        dd_pct = metrics.drawdown_stats(equity, start_peak=monthly_reports[0]['initial_balance'])['percentage']
+        if dd_pct > float(max_dd):
+            return f"drawdown {dd_pct:.2f}% > {float(max_dd):g}%"
+    min_pf = config.get('abort_min_profit_factor')
+    if min_pf is not None:
+        pnl = TradeLog.concat(r['completed_trades'] for r in monthly_reports).pnl
+        if len(pnl) >= int(config.get('abort_min_trades', 30) or 0):
+            pf = metrics.trade_stats(pnl)['profit_factor']
+            if pf < float(min_pf):
+                return f"profit factor {pf:.2f} < {float(min_pf):g} setelah {len(pnl)} trade"
+    return None
+
+
+def run_backtest_job(strategy, config: dict, args, status=send_status, write_result_json: bool = True):
+    """
+    Jalankan backtest semua bulan untuk satu kombinasi parameter, buat PDF,
+    lalu hitung metrik akhir. Mengembalikan final_result_data (None jika gagal).
+    """
+    final_result_data = None
     monthly_reports = []
     total_months = (args.end_month - args.start_month) + 1
     rolling_balance = args.initial_balance
-    
-    for i, month in enumerate(range(args.start_month, args.end_month + 1)):
-        num_days = calendar.monthrange(args.year, month)[1]
-        start_date = f"{args.year}-{month:02d}-01"
-        end_date = f"{args.year}-{month:02d}-{num_days}"
-        month_name = calendar.month_name[month]
-        send_status({"status": f"Backtest {month_name}...", "progress": i, "total": total_months})
-
-        # pilih initial_balance per kebijakan equity_mode
-        init_bal_for_month = rolling_balance if args.equity_mode == 'rolling' else args.initial_balance
-
-        report = strategy.backtest(
-            start_date_str=start_date,
-            end_date_str=end_date,
-            initial_balance=init_bal_for_month
+    cumulative_profit = 0.0
+    pruned_reason = None   # kriteria abort_* terpenuhi -> bulan sisa, skenario, MC & PDF dilewati
+    continuous = bool(config.get('continuous_run'))
+
+    if continuous:
+        # Satu akun kontinu: saldo & posisi terbawa antar bulan (equity_mode tidak berlaku).
+        # Tanpa checkpoint per bulan; kriteria abort dicek di batas bulan dan bulan sesudahnya dibuang.
+        if config.get('resume'):
+            print("Peringatan: --resume tidak berlaku untuk --continuous (satu pass tanpa checkpoint bulanan).",
+                  file=sys.stderr)
+        status({"status": "Backtest kontinu...", "progress": 0, "total": total_months})
+        reports = strategy.backtest_continuous(
+            args.year, args.start_month, args.end_month, initial_balance=args.initial_balance
         )
-
-        if report:
+        for i, report in enumerate(reports):
             monthly_reports.append(report)
-            if args.equity_mode == 'rolling':
-                # pakai final_balance dari report (yang sudah handle margin call → 0)
-                rolling_balance = float(report.get('final_balance', rolling_balance))
-        
-            # # Langkah 2: Jika backtest berhasil, langsung jalankan simulasi HANYA untuk data bulan ini
-            # monthly_equity_curve = report.get('equity_curve', [])
-            # monthly_trades = report.get('completed_trades', [])
-            
-            # if monthly_equity_curve:
-            #     # Dapatkan daftar skenario yang akan diuji
-            #     scenarios_to_run = strategy._generate_adaptive_scenarios(monthly_equity_curve)
-                
-            #     monthly_simulation_results = []
-            #     for scenario in scenarios_to_run:
-            #         # Jalankan simulasi dengan data bulan ini
-            #         result = strategy.run_advanced_simulation(
-            #             monthly_equity_curve, 
-            #             args.initial_balance, 
-            #             monthly_trades, 
-            #             scenario['sl'], 
-            #             scenario['tp'], 
-            #             scenario.get('reset_rule')
-            #         )
-            #         result['name'] = scenario['name']
-            #         monthly_simulation_results.append(result)
-                
-            #     # Langkah 3: Simpan hasil simulasi ke dalam laporan bulanan
-            #     report['simulation_results'] = monthly_simulation_results
-    
-    send_status({"status": "Membuat Laporan PDF...", "progress": total_months, "total": total_months})
+            pruned_reason = abort_reason(strategy, monthly_reports, config, float(report['final_balance']))
+            if pruned_reason:
+                month_name = datetime.strptime(report['period_for_filename'].split('_to_')[0], '%Y-%m-%d').strftime('%B')
+                print(f"{month_name}: run dihentikan lebih awal ({pruned_reason}).")
+                status({"status": f"Dihentikan: {pruned_reason}", "progress": i + 1, "total": total_months})
+                break
+    else:
+        # Checkpoint per bulan: bulan yang selesai bisa dilewati saat --resume
+        checkpoint = None
+        if config.get('use_checkpoint', True):
+            checkpoint = MonthCheckpoint(config, config.get('checkpoint_dir'))
+            if strategy.rates_memo is None:
+                strategy.rates_memo = {}  # bar tiap bulan dimuat sekali untuk sidik data & backtest
+        # Chart per transaksi butuh simulasi ulang, jadi checkpoint tidak dipakai saat plot_trades aktif
+        resume = checkpoint is not None and bool(config.get('resume')) and not strategy.plot_trades
+
+        for i, month in enumerate(range(args.start_month, args.end_month + 1)):
+            num_days = calendar.monthrange(args.year, month)[1]
+            start_date = f"{args.year}-{month:02d}-01"
+            end_date = f"{args.year}-{month:02d}-{num_days}"
+            month_name = calendar.month_name[month]
+            status({"status": f"Backtest {month_name}...", "progress": i, "total": total_months})
+
+            # pilih initial_balance per kebijakan equity_mode
+            init_bal_for_month = rolling_balance if args.equity_mode == 'rolling' else args.initial_balance
+
+            data_version = strategy.data_version(start_date, end_date) if checkpoint is not None else ''
+            report = checkpoint.load(args.year, month, data_version, init_bal_for_month) if resume and data_version else None
+            if report is not None:
+                print(f"{month_name}: dipakai dari checkpoint, backtest dilewati.")
+            else:
+                report = strategy.backtest(
+                    start_date_str=start_date,
+                    end_date_str=end_date,
+                    initial_balance=init_bal_for_month
+                )
+                if report and data_version:
+                    checkpoint.save(args.year, month, data_version, init_bal_for_month, report)
+
+            if report:
+                monthly_reports.append(report)
+                if args.equity_mode == 'rolling':
+                    # pakai final_balance dari report (yang sudah handle margin call → 0)
+                    rolling_balance = float(report.get('final_balance', rolling_balance))
+                else:
+                    cumulative_profit += float(report['total_profit'])
+                balance = rolling_balance if args.equity_mode == 'rolling' else args.initial_balance + cumulative_profit
+                pruned_reason = abort_reason(strategy, monthly_reports, config, balance)
+                if pruned_reason:
+                    print(f"{month_name}: run dihentikan lebih awal ({pruned_reason}).")
+                    status({"status": f"Dihentikan: {pruned_reason}", "progress": i + 1, "total": total_months})
+                    break
+
+    # Simulasi manajemen risiko akun per bulan (semua skenario dalam satu pass vektor)
+    risk_mode = str(config.get('risk_scenarios') or 'none')
+    if risk_mode != 'none' and not pruned_reason:
+        for report in monthly_reports:
+            report['simulation_results'] = strategy.run_risk_scenarios(report, risk_mode)
+
+    charts_done = strategy.finish_charts()
+    if charts_done:
+        print(f"{charts_done} chart trade disimpan.")
+    final_stage = "Membuat Laporan PDF..." if strategy.render_reports else "Menghitung metrik akhir..."
+    status({"status": final_stage, "progress": total_months, "total": total_months})
     
     if monthly_reports:
         total_profit = sum(r['total_profit'] for r in monthly_reports)
         total_trades = sum(r['total_trades'] for r in monthly_reports)
-        all_completed_trades = [trade for r in monthly_reports for trade in r['completed_trades']]
-        total_wins = len([t for t in all_completed_trades if t['profit_usd'] > 0])
+        all_completed_trades = TradeLog.concat(r['completed_trades'] for r in monthly_reports)
+        total_wins = int((all_completed_trades.pnl > 0).sum())
         overall_win_rate = (total_wins / total_trades) * 100 if total_trades > 0 else 0
         trading_dynamics = {}
-        pdf_path = strategy.create_final_pdf_report(monthly_reports, config)
-        if pdf_path:
-            if all_completed_trades:
-                # --- 1. Kalkulasi Gross Profit & Loss ---
-                gross_profit = sum(t['profit_usd'] for t in all_completed_trades if t['profit_usd'] > 0)
-                gross_loss = sum(t['profit_usd'] for t in all_completed_trades if t['profit_usd'] < 0)
-
-                # --- 2. Hitung Profit Factor ---
-                if gross_loss == 0:
-                    trading_dynamics['profit_factor'] = 999.9
-                else:
-                    trading_dynamics['profit_factor'] = abs(gross_profit / gross_loss)
-
-                # --- 3. Hitung Payoff Ratio ---
-                total_losses = total_trades - total_wins
-                if total_wins > 0 and total_losses > 0:
-                    avg_win = gross_profit / total_wins
-                    avg_loss = abs(gross_loss / total_losses)
-                    trading_dynamics['payoff_ratio'] = avg_win / avg_loss
-                else:
-                    trading_dynamics['payoff_ratio'] = 0
-
-                # --- 4. Hitung Max Consecutive Losses ---
-                max_consecutive_losses = 0
-                current_consecutive_losses = 0
-                for t in all_completed_trades:
-                    if t['profit_usd'] <= 0:
-                        current_consecutive_losses += 1
-                    else:
-                        max_consecutive_losses = max(max_consecutive_losses, current_consecutive_losses)
-                        current_consecutive_losses = 0
-                trading_dynamics['max_consecutive_losses'] = max(max_consecutive_losses, current_consecutive_losses)
-
-                # --- 5. Hitung Average Trade Duration ---
-                total_duration_seconds = sum((t['exit_time'] - t['entry_time']).total_seconds() for t in all_completed_trades)
-                trading_dynamics['average_trade_duration_minutes'] = (total_duration_seconds / 60) / total_trades
-
-                # --- 6. Hitung Sharpe Ratio ---
-                trade_returns = [t['profit_usd'] for t in all_completed_trades]
-                std_dev_returns = np.std(trade_returns)
-                if std_dev_returns > 0:
-                    trading_dynamics['sharpe_ratio'] = np.mean(trade_returns) / std_dev_returns
-                else:
-                    trading_dynamics['sharpe_ratio'] = 0
+        render = strategy.render_reports and not pruned_reason
+        if render:
+            strategy.render_month_images(monthly_reports)  # bulan dari checkpoint metrics-only
+        pdf_path = strategy.create_final_pdf_report(monthly_reports, config) if render else None
+        if pdf_path or not render:
+            stats = metrics.trade_stats(all_completed_trades.pnl)
+            if len(all_completed_trades):
+                total_duration_seconds = float(all_completed_trades.duration_seconds().sum())
+                trading_dynamics = {
+                    'profit_factor': stats['profit_factor'],
+                    'payoff_ratio': stats['payoff_ratio'],
+                    'max_consecutive_losses': stats['max_consecutive_losses'],
+                    'average_trade_duration_minutes': (total_duration_seconds / 60) / total_trades,
+                    'sharpe_ratio': stats['sharpe_ratio'],
+                }
             else:
                 trading_dynamics = {
                     'profit_factor': 0, 'payoff_ratio': 0, 'max_consecutive_losses': 0,
@@ -1413,13 +1690,7 @@ if __name__ == '__main__':
             full_equity_curve = strategy._get_full_equity_curve(monthly_reports)
 
             if full_equity_curve:
-                # 1. Ubah list of tuples menjadi pandas Series dengan DatetimeIndex
-                timestamps = [item[0] for item in full_equity_curve]
-                balances   = [item[1] for item in full_equity_curve]
-                idx = pd.to_datetime(timestamps, unit='ms', utc=True)
-                equity_series = pd.Series(balances, index=idx)
-
-                # 2. Resample ke data harian, ambil nilai terakhir setiap hari
+                # Ringkas ke grid sesi (nilai terakhir per slot)
                 session_minutes = int(config.get('equity_session_sampling_minutes', 5))
                 session_curve = strategy._resample_equity_to_session_grid(full_equity_curve, minutes=session_minutes)
 
@@ -1431,97 +1702,45 @@ if __name__ == '__main__':
                 resampled_equity_curve = []
 
             # --- KALKULASI TOTAL DRAWDOWN BERDASARKAN DATA HARIAN YANG SUDAH DIRINGKAS ---
-            peak_equity_total = initial_balance
-            trough_after_peak_total = initial_balance
-            # Gunakan tanggal dari data yang sudah di-resample jika ada
-            peak_date_total = resampled_equity_curve[0][0] if resampled_equity_curve else datetime.now()
-            trough_date_total = resampled_equity_curve[0][0] if resampled_equity_curve else datetime.now()
-            max_drawdown_value_total = 0.0
-
-            # Loop melalui data harian yang jauh lebih sedikit
-            for date, balance in resampled_equity_curve:
-                if balance > peak_equity_total:
-                    peak_equity_total = balance
-                    trough_after_peak_total = balance
-                    peak_date_total = date
-                
-                drawdown = peak_equity_total - balance
-                if drawdown > max_drawdown_value_total:
-                    max_drawdown_value_total = drawdown
-                    trough_after_peak_total = balance
-                    trough_date_total = date
-
-            max_drawdown_percentage_total = (max_drawdown_value_total / peak_equity_total) * 100 if peak_equity_total > 0 else 0
+            session_balances = np.fromiter((b for _, b in resampled_equity_curve), dtype=float, count=len(resampled_equity_curve))
+            dd_stats = metrics.drawdown_stats(session_balances, start_peak=initial_balance)
+            first_date = resampled_equity_curve[0][0] if resampled_equity_curve else datetime.now()
+            peak_i, trough_i = dd_stats['peak_index'], dd_stats['trough_index']
+            # trough_equity = saldo pada titik terakhir yang memperbarui puncak atau drawdown maksimum
+            last_i = max((i for i in (peak_i, trough_i) if i is not None), default=None)
 
             total_drawdown_details = {
-                "percentage": max_drawdown_percentage_total,
-                "value": -max_drawdown_value_total,
-                "peak_equity": peak_equity_total,
-                "trough_equity": trough_after_peak_total,
-                "start_date": peak_date_total.strftime('%Y-%m-%d'),
-                "end_date": trough_date_total.strftime('%Y-%m-%d')
+                "percentage": dd_stats['percentage'],
+                "value": -dd_stats['max_drawdown'],
+                "peak_equity": dd_stats['peak'],
+                "trough_equity": resampled_equity_curve[last_i][1] if last_i is not None else initial_balance,
+                "start_date": (resampled_equity_curve[peak_i][0] if peak_i is not None else first_date).strftime('%Y-%m-%d'),
+                "end_date": (resampled_equity_curve[trough_i][0] if trough_i is not None else first_date).strftime('%Y-%m-%d')
             }
 
             # --- Siapkan data kurva yang ringkas untuk disimpan ke JSON ---
             serializable_curve = session_curve
 
-            trade_pnls = [t['profit_usd'] for t in all_completed_trades] if all_completed_trades else []
-            if trade_pnls:
-                pnl_series = pd.Series(trade_pnls)
-                median_trade_pnl = float(pnl_series.median())
-                pnl_std = float(pnl_series.std())
-                pnl_p05 = float(pnl_series.quantile(0.05))
-                pnl_p95 = float(pnl_series.quantile(0.95))
-                # VaR & ES (95%)
-                var_95 = float(pnl_series.quantile(0.05))
-                es_95 = float(pnl_series[pnl_series <= var_95].mean()) if (pnl_series <= var_95).any() else var_95
-            else:
-                median_trade_pnl = pnl_std = pnl_p05 = pnl_p95 = var_95 = es_95 = None
-
-            # --- Max consecutive wins ---
-            max_consecutive_wins = 0
-            _curr = 0
-            for t in all_completed_trades:
-                if t['profit_usd'] > 0:
-                    _curr += 1
-                    max_consecutive_wins = max(max_consecutive_wins, _curr)
-                else:
-                    _curr = 0
-
             # --- Stabilitas antar bulan ---
             monthly_profit = [r['total_profit'] for r in monthly_reports]
             monthly_winrate = [r['win_rate'] for r in monthly_reports]
             monthly_profit_std = float(np.std(monthly_profit)) if monthly_profit else 0.0
             monthly_winrate_std = float(np.std(monthly_winrate)) if monthly_winrate else 0.0
 
-            # --- Time under water (hari dalam drawdown) ---
-            def _time_under_water_days(curve):
-                if not curve: return 0
-                peak = curve[0][1]; tuw = 0
-                for _, bal in curve:
-                    if bal < peak: tuw += 1
-                    else: peak = bal
-                return int(tuw)
-
-            time_under_water_days = _time_under_water_days(resampled_equity_curve)
+            # --- Time under water (jumlah titik grid sesi di bawah puncak) ---
+            time_under_water_days = metrics.points_under_water(session_balances)
 
             # --- CAGR, Calmar, Sortino ---
-            def _annualized_cagr(curve, initial):
-                if not curve or initial <= 0: return 0.0
-                start_dt, end_dt = curve[0][0], curve[-1][0]
-                years = max((end_dt - start_dt).days / 365.25, 1e-9)
-                final = curve[-1][1]
-                return (final / initial) ** (1/years) - 1 if final > 0 else -1.0
-
-            cagr = _annualized_cagr(resampled_equity_curve, initial_balance)
-            max_dd_pct = total_drawdown_details["percentage"] if "percentage" in total_drawdown_details else 0.0
+            if resampled_equity_curve:
+                cagr = metrics.annualized_cagr(
+                    _to_epoch_ms(resampled_equity_curve[0][0]), _to_epoch_ms(resampled_equity_curve[-1][0]),
+                    initial_balance, resampled_equity_curve[-1][1],
+                )
+            else:
+                cagr = 0.0
+            max_dd_pct = total_drawdown_details["percentage"]
             calmar = (cagr * 100) / max_dd_pct if max_dd_pct > 0 else None
 
-            # Downside deviation (pakai trade returns negatif)
-            neg_returns = [x for x in trade_pnls if x < 0]
-            downside_std = float(np.std(neg_returns)) if neg_returns else 0.0
-            sortino = (np.mean(trade_pnls) / downside_std) if downside_std > 0 and trade_pnls else None
-
             agg_market = {}
             if monthly_reports and 'market_features' in monthly_reports[0]:
                 keys = monthly_reports[0]['market_features'].keys()
@@ -1532,19 +1751,19 @@ if __name__ == '__main__':
                 agg_market = {}
 
             ml_features = {
-                "median_trade_pnl": median_trade_pnl,
-                "pnl_std": pnl_std,
-                "pnl_p05": pnl_p05,
-                "pnl_p95": pnl_p95,
-                "var_95": var_95,
-                "es_95": es_95,
-                "max_consecutive_wins": int(max_consecutive_wins),
+                "median_trade_pnl": stats['median_trade_pnl'],
+                "pnl_std": stats['pnl_std'],
+                "pnl_p05": stats['pnl_p05'],
+                "pnl_p95": stats['pnl_p95'],
+                "var_95": stats['var_95'],
+                "es_95": stats['es_95'],
+                "max_consecutive_wins": stats['max_consecutive_wins'],
                 "monthly_profit_std": monthly_profit_std,
                 "monthly_winrate_std": monthly_winrate_std,
                 "time_under_water_days": time_under_water_days,
                 "cagr_annualized_pct": float(cagr * 100.0),
                 "calmar_ratio": calmar,
-                "sortino_ratio": sortino,
+                "sortino_ratio": stats['sortino_ratio'],
                 **{f"mkt_{k}": v for k, v in agg_market.items()},
             }
 
@@ -1579,6 +1798,30 @@ if __name__ == '__main__':
                 'labels': labels,
                 'metadata': metadata
             }
+            if pruned_reason:
+                # Hasil parsial: launcher / store memperlakukannya sebagai kandidat gugur
+                final_result_data['pruned'] = True
+                final_result_data['prune_reason'] = pruned_reason
+                final_result_data['months_completed'] = len(monthly_reports)
+                final_result_data['months_planned'] = total_months
+            simulation_summary = strategy._aggregate_simulation_results(monthly_reports)
+            if simulation_summary:
+                final_result_data['simulation_summary'] = simulation_summary
+
+            # Robustness: distribusi saldo akhir / drawdown / ruin dari urutan trade yang di-resample,
+            # dengan model akun yang sama seperti backtest (per_month: reset tiap bulan, selain itu bersambung)
+            mc_paths = int(config.get('mc_paths', 1000) or 0)
+            if mc_paths > 0 and len(all_completed_trades) and not pruned_reason:
+                if args.equity_mode == 'per_month' and not continuous:
+                    mc_fn, mc_pnl = monte_carlo_months, [r['completed_trades'].pnl for r in monthly_reports]
+                else:
+                    mc_fn, mc_pnl = monte_carlo_trades, all_completed_trades.pnl
+                final_result_data['monte_carlo'] = mc_fn(
+                    mc_pnl, initial_balance,
+                    n_paths=mc_paths, method=config.get('mc_method', 'block'),
+                    block_size=config.get('mc_block_size'), ruin_pct=float(config.get('mc_ruin_pct', 50.0)),
+                    seed=config.get('mc_seed', 0),
+                )
             params_alias = {
                 'lot_size':       config.get('fixed_lot_size'),
                 'start_time':     config.get('trade_start_time'),
@@ -1586,6 +1829,8 @@ if __name__ == '__main__':
                 'use_adx':        config.get('use_adx_filter'),
                 'use_sl':         config.get('use_stop_loss'),
                 'sl_points':      config.get('stop_loss_points'),
+                'use_tp':         config.get('use_take_profit'),
+                'tp_points':      config.get('take_profit_points'),
                 # yang sudah sama namanya:
                 'wave_period':    config.get('wave_period'),
                 'adx_threshold':  config.get('adx_threshold'),
@@ -1595,38 +1840,12 @@ if __name__ == '__main__':
             final_result_data["ml_features"] = ml_features
             final_result_data["labels"] = labels
             final_result_data["metadata"] = metadata
-            
-            output_dir = os.path.dirname(pdf_path)
+            # Argumen CLI lengkap agar render_reports.py bisa merender PDF run ini belakangan
+            final_result_data["cli_args"] = vars(args)
+
+            output_dir = os.path.dirname(pdf_path) if pdf_path else report_output_dir(config)
             result_json_path = os.path.join(output_dir, 'result.json')
-            def _ts_ms(ts):
-                import pandas as pd
-                if isinstance(ts, pd.Timestamp):
-                    return int(ts.tz_convert('UTC').timestamp() * 1000)
-                return int(pd.to_datetime(ts, utc=True).timestamp() * 1000)
-
-            trades_out = []
-            for t in all_completed_trades:
-                trades_out.append({
-                    "trade_id": int(t.get("trade_id")),
-                    "side": t.get("type"),  # BUY/SELL
-                    "entry_ts": _ts_ms(t.get("entry_time")),
-                    "exit_ts": _ts_ms(t.get("exit_time")),
-                    "entry_price": float(t.get("entry_price")),
-                    "exit_price": float(t.get("exit_price")),
-                    "lot": float(t.get("lot", args.lot_size)),
-                    "gross_pnl_usd": float(t.get("gross_pnl_usd")),         # murni gerak harga
-                    "commission_usd": float(t.get("commission_usd", t.get("commission_total_usd", 0.0))),
-                    "slippage_usd": float(t.get("slippage_usd", 0.0)),
-                    "spread_cost_usd": float(t.get("spread_cost_usd", 0.0)),
-                    "net_pnl_usd": float(t.get("net_pnl_usd", t.get("profit_usd", 0.0))),
-                    "bars_held": int(t.get("bars_held", 0)),
-                    "reason_exit": t.get("reason_exit", ""),
-                    # Opsional ML
-                    "mfe_usd": float(t.get("mfe_usd", 0.0)),
-                    "mae_usd": float(t.get("mae_usd", 0.0)),
-                    "spread_points_at_entry": float(t.get("entry_spread_points", 0.0)),
-                    "features_at_entry": t.get("features_at_entry", {})
-                })
+            trades_out = all_completed_trades.to_json_records()  # dict hanya di batas JSON
 
             # Metadata biaya untuk transparansi downstream
             cost_metadata = {
@@ -1639,11 +1858,41 @@ if __name__ == '__main__':
             final_result_data["trades"] = trades_out
             final_result_data["net_pnl_total_usd"] = float(sum(x["net_pnl_usd"] for x in trades_out))
             final_result_data["cost_metadata"] = cost_metadata
-            with open(result_json_path, 'w') as f:
-                json.dump(final_result_data, f, indent=4)
-            send_status({"status": "Menyimpan hasil JSON...", "progress": 1, "total": 1})
+            if config.get('use_result_store', True):
+                # Hasil langsung masuk store terindeks (launcher tidak perlu memindai result.json)
+                get_result_store(config.get('result_db')).add_result(config['symbol'], final_result_data)
+            if write_result_json:
+                os.makedirs(output_dir, exist_ok=True)
+                with open(result_json_path, 'w') as f:
+                    json.dump(final_result_data, f, indent=4)
+                status({"status": "Menyimpan hasil JSON...", "progress": 1, "total": 1})
         else:
             print("PERINGATAN: Laporan PDF gagal dibuat, file result.json tidak akan disimpan.", file=sys.stderr)
 
+    return final_result_data
+
+
+# ==============================================================================
+#  BAGIAN UTAMA YANG DIUBAH UNTUK MENERIMA PERINTAH
+# ==============================================================================
+if __name__ == '__main__':
+    args = build_arg_parser().parse_args()
+
+    if args.offline or getattr(mt5, 'is_offline', False):
+        mt5 = OfflineMT5(store_root=args.bar_store_dir)
+    send_status({"status": "Inisialisasi MT5...", "progress": 0, "total": 1})
+    if not mt5.initialize():
+        print("initialize() gagal, error code =", mt5.last_error(), file=sys.stderr)
+        quit()
+    send_status({"status": "Koneksi MT5 OK", "progress": 1, "total": 1})
+
+    # PERUBAHAN: Masukkan semua argumen relevan ke config
+    config = build_config(args, mt5)
+    strategy = PoseidonWave(mt5, config)
+    try:
+        run_backtest_job(strategy, config, args)
+    finally:
+        strategy.close()
+
     send_status({"status": "Selesai", "progress": 1, "total": 1})
     mt5.shutdown()
\ No newline at end of file
@@ -1,6 +1,8 @@
-import MetaTrader5 as mt5
+from Library.data_handler.offline_mt5 import load_mt5
 import time
 
+mt5 = load_mt5()
+
 def get_open_positions(symbol: str, magic_number: int):
     """Mengambil posisi terbuka untuk simbol dan magic number tertentu."""
     try:
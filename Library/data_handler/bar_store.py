@@ -0,0 +1,393 @@
+# Library/data_handler/bar_store.py
+"""
+Penyimpanan bar OHLC lokal berbasis kolom (NumPy .npy, dibaca via memory-map).
+
+Struktur di disk:
+    <root>/<SYMBOL>/<timeframe>/<YYYY-MM>/<kolom>.npy + _meta.json
+
+Setiap partisi bulan menyimpan satu file per kolom (time, open, high, low, close,
+tick_volume, spread, real_volume) sehingga pembacaan hanya menyentuh kolom yang
+diminta. Terminal MT5 hanya dipanggil untuk mengisi bulan yang belum ada / belum
+lengkap; bulan yang sudah lewat dan terisi utuh ditandai 'complete' dan tidak pernah
+diunduh ulang. Bar live (latest) ditahan di memori dan ditulis per batch.
+
+Waktu bar disimpan sebagai epoch detik (sama seperti output copy_rates_*).
+datetime naive diperlakukan sebagai UTC.
+"""
+import os
+import glob
+import atexit
+import json
+import time
+import shutil
+import calendar
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_ROOT = os.environ.get('BAR_STORE_DIR') or os.path.join(_REPO_ROOT, 'data', 'bar_store')
+
+_META_FILE = '_meta.json'
+# Bulan dianggap lengkap bila sudah lewat lebih dari ini (toleransi offset jam server).
+_COMPLETE_SLACK_S = 3 * 86400
+# Celah maksimum bar pertama/terakhir dari tepi bulan (akhir pekan + libur) agar bulan dianggap utuh.
+_EDGE_GAP_S = 4 * 86400
+# Bar live yang ditahan di memori sebelum ditulis ke partisi bulan berjalan.
+_LIVE_FLUSH_BARS = 256
+_READ_RETRIES = 3
+
+
+def _to_epoch_s(dt) -> int:
+    """datetime (naive = UTC) / angka epoch detik -> int epoch detik."""
+    if isinstance(dt, (int, float, np.integer)):
+        return int(dt)
+    if dt.tzinfo is None:
+        return calendar.timegm(dt.timetuple())
+    return int(dt.timestamp())
+
+
+def _month_bounds(year: int, month: int):
+    """(awal bulan, awal bulan berikutnya) sebagai epoch detik UTC."""
+    start = calendar.timegm((year, month, 1, 0, 0, 0))
+    ny, nm = (year + 1, 1) if month == 12 else (year, month + 1)
+    return start, calendar.timegm((ny, nm, 1, 0, 0, 0))
+
+
+def _iter_months(start_s: int, end_s: int):
+    """Semua (tahun, bulan) yang beririsan dengan [start_s, end_s]."""
+    d = datetime.fromtimestamp(start_s, tz=timezone.utc)
+    last = datetime.fromtimestamp(end_s, tz=timezone.utc)
+    y, m = d.year, d.month
+    while (y, m) <= (last.year, last.month):
+        yield y, m
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+
+
+def timeframe_seconds(timeframe, strict: bool = False) -> int:
+    """
+    Panjang satu bar (detik) dari konstanta TIMEFRAME_* MetaTrader5. W1 = 7 hari, MN1 = 31 hari
+    (batas atas); strict=True -> ValueError untuk W1/MN1 (bar berukuran tetap, mis. agregasi tick).
+    """
+    tf = int(timeframe)
+    if 0 < tf < 0x4000:
+        return tf * 60                      # TIMEFRAME_M<n> = n
+    if 0x4000 < tf <= 0x4000 + 24:
+        return (tf - 0x4000) * 3600         # TIMEFRAME_H<n> = 0x4000 | n, D1 = H24
+    if strict or tf not in (0x8001, 0xC001):
+        raise ValueError(f"Timeframe {timeframe} tidak didukung (panjang bar tidak tetap / tidak dikenal)")
+    return 7 * 86400 if tf == 0x8001 else 31 * 86400   # TIMEFRAME_W1, TIMEFRAME_MN1
+
+
+def _covers_month(rates, timeframe, month_start: int, month_end: int) -> bool:
+    """True bila rates berisi dan bar pertama/terakhirnya dekat tepi bulan (bukan potongan)."""
+    if rates is None or not len(rates):
+        return False
+    slack = _EDGE_GAP_S + timeframe_seconds(timeframe)
+    return int(rates['time'][0]) - month_start <= slack and month_end - int(rates['time'][-1]) <= slack
+
+
+def _swap_dir(tmp_dir: str, final_dir: str) -> None:
+    """
+    Pasang partisi baru: dir lama disingkirkan (rename), dir baru masuk, lalu yang lama dihapus.
+    Pembaca yang melihat celah singkat di antaranya membaca ulang (lihat _swap_pending).
+    """
+    old_dir = f"{final_dir}.old-{os.getpid()}-{time.monotonic_ns()}"
+    try:
+        os.replace(final_dir, old_dir)
+    except FileNotFoundError:
+        old_dir = None
+    try:
+        os.replace(tmp_dir, final_dir)
+    except OSError:
+        # proses lain sudah menulis partisi yang sama lebih dulu
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _swap_pending(final_dir: str) -> bool:
+    """True bila partisi ini sedang ditukar (atau sisa dir lama belum terhapus)."""
+    return bool(glob.glob(glob.escape(final_dir) + '.old-*'))
+
+
+def _merge_rates(*arrays):
+    """Gabungkan beberapa array rates, urut waktu, duplikat waktu -> ambil yang terakhir."""
+    parts = [a for a in arrays if a is not None and len(a)]
+    if not parts:
+        return arrays[0] if arrays and arrays[0] is not None else None
+    merged = np.concatenate(parts)
+    rev = merged[::-1]
+    _, first_in_rev = np.unique(rev['time'], return_index=True)
+    return rev[first_in_rev]
+
+
+class BarStore:
+    """Bar store per simbol/timeframe/bulan dengan baca rentang & pruning kolom."""
+
+    def __init__(self, root: str = None):
+        self.root = root or DEFAULT_ROOT
+        self._live = {}      # (symbol, timeframe) -> ekor bar terbaru di memori
+        self._pending = {}   # (symbol, timeframe) -> bar live yang belum ditulis ke store
+
+    # --- Lokasi & metadata partisi ---
+    def _series_dir(self, symbol: str, timeframe) -> str:
+        return os.path.join(self.root, str(symbol), str(int(timeframe)))
+
+    def _partition_dir(self, symbol: str, timeframe, year: int, month: int) -> str:
+        return os.path.join(self._series_dir(symbol, timeframe), f"{year:04d}-{month:02d}")
+
+    def _read_meta(self, part_dir: str):
+        try:
+            with open(os.path.join(part_dir, _META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_complete(self, symbol: str, timeframe, year: int, month: int) -> bool:
+        meta = self._read_meta(self._partition_dir(symbol, timeframe, year, month))
+        return bool(meta and meta.get('complete'))
+
+    def months(self, symbol: str, timeframe) -> list:
+        """Daftar (tahun, bulan) yang tersimpan, urut naik."""
+        base = self._series_dir(symbol, timeframe)
+        if not os.path.isdir(base):
+            return []
+        out = []
+        for name in os.listdir(base):
+            try:
+                y, m = name.split('-')
+                if os.path.exists(os.path.join(base, name, _META_FILE)):
+                    out.append((int(y), int(m)))
+            except ValueError:
+                continue
+        return sorted(out)
+
+    # --- Snapshot metadata simbol (point, digits, contract size, dst.) ---
+    def _symbol_info_path(self, symbol: str) -> str:
+        return os.path.join(self.root, str(symbol), 'symbol_info.json')
+
+    def write_symbol_info(self, symbol: str, info) -> None:
+        """Simpan snapshot symbol_info (namedtuple MT5 atau dict) untuk dipakai offline."""
+        if hasattr(info, '_asdict'):
+            data = info._asdict()
+        elif isinstance(info, dict):
+            data = dict(info)
+        else:
+            data = dict(vars(info))
+        data = {k: v for k, v in data.items() if isinstance(v, (int, float, str, bool)) or v is None}
+        path = self._symbol_info_path(symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def read_symbol_info(self, symbol: str):
+        """Snapshot symbol_info sebagai dict, atau None jika belum ada."""
+        try:
+            with open(self._symbol_info_path(symbol), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    # --- Baca / tulis satu partisi ---
+    def read_month(self, symbol: str, timeframe, year: int, month: int, columns=None):
+        """
+        Array rates (structured) untuk satu bulan, atau None jika belum tersimpan.
+        Partisi yang sedang ditukar penulis lain (write_month) dibaca ulang sebentar kemudian.
+        """
+        part_dir = self._partition_dir(symbol, timeframe, year, month)
+        for attempt in range(_READ_RETRIES):
+            meta = self._read_meta(part_dir)
+            if meta is None:
+                if not _swap_pending(part_dir):
+                    return None
+            else:
+                fields = [(name, np.dtype(dt)) for name, dt in meta['fields']]
+                if columns is not None:
+                    wanted = {'time', *columns}
+                    fields = [(name, dt) for name, dt in fields if name in wanted]
+                out = np.empty(int(meta['rows']), dtype=fields)
+                try:
+                    for name, _ in fields:
+                        out[name] = np.load(os.path.join(part_dir, f"{name}.npy"), mmap_mode='r')
+                    return out
+                except (FileNotFoundError, ValueError):
+                    pass   # partisi ditukar di tengah pembacaan
+            time.sleep(0.05 * (attempt + 1))
+        return None
+
+    def write_month(self, symbol: str, timeframe, year: int, month: int, rates, complete: bool):
+        """Tulis partisi bulan (dir sementara -> tukar lewat rename, lihat _swap_dir)."""
+        part_dir = self._partition_dir(symbol, timeframe, year, month)
+        os.makedirs(os.path.dirname(part_dir), exist_ok=True)
+        tmp_dir = f"{part_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in rates.dtype.names:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(rates[name]))
+        meta = {
+            'symbol': symbol, 'timeframe': int(timeframe), 'month': f"{year:04d}-{month:02d}",
+            'rows': int(len(rates)), 'complete': bool(complete),
+            'fields': [(name, rates.dtype[name].str) for name in rates.dtype.names],
+            'written_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(tmp_dir, _META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        _swap_dir(tmp_dir, part_dir)
+
+    # --- Isi celah dari terminal ---
+    def _month_is_past(self, year: int, month: int) -> bool:
+        _, month_end = _month_bounds(year, month)
+        now_s = int(datetime.now(timezone.utc).timestamp())
+        return month_end + _COMPLETE_SLACK_S <= now_s
+
+    def fill_month(self, mt5_instance, symbol: str, timeframe, year: int, month: int):
+        """Unduh satu bulan penuh dari terminal dan simpan. Return rates atau None."""
+        month_start, month_end = _month_bounds(year, month)
+        rates = mt5_instance.copy_rates_range(
+            symbol, timeframe,
+            datetime.fromtimestamp(month_start, tz=timezone.utc).replace(tzinfo=None),
+            datetime.fromtimestamp(month_end - 1, tz=timezone.utc).replace(tzinfo=None),
+        )
+        if rates is None:
+            return None
+        rates = np.asarray(rates)
+        if len(rates):
+            rates = rates[(rates['time'] >= month_start) & (rates['time'] < month_end)]
+        # Bulan kosong / terpotong (gangguan terminal atau history) tidak ditandai lengkap -> diunduh lagi nanti
+        complete = self._month_is_past(year, month) and _covers_month(rates, timeframe, month_start, month_end)
+        self.write_month(symbol, timeframe, year, month, rates, complete=complete)
+        return rates
+
+    def data_version(self, symbol: str, timeframe, start, end):
+        """
+        Versi isi store untuk [start, end] dari metadata partisi (tanpa membaca / hash bar);
+        berubah setiap kali partisi ditulis ulang. None bila ada bulan yang belum tersimpan.
+        """
+        start_s, end_s = _to_epoch_s(start), _to_epoch_s(end)
+        parts = []
+        for y, m in _iter_months(start_s, end_s):
+            part_dir = self._partition_dir(symbol, timeframe, y, m)
+            meta = self._read_meta(part_dir)
+            try:
+                mtime_ns = os.stat(os.path.join(part_dir, _META_FILE)).st_mtime_ns
+            except OSError:
+                return None
+            if meta is None:
+                return None
+            parts.append(f"{y:04d}-{m:02d}:{meta['rows']}:{meta.get('written_at')}:{mtime_ns}")
+        return f"{start_s}-{end_s}|{','.join(parts)}"
+
+    def read_range(self, symbol: str, timeframe, start, end, columns=None):
+        """Baca bar tersimpan dengan time di [start, end] (tanpa menyentuh terminal)."""
+        start_s, end_s = _to_epoch_s(start), _to_epoch_s(end)
+        parts = []
+        for y, m in _iter_months(start_s, end_s):
+            rates = self.read_month(symbol, timeframe, y, m, columns)
+            if rates is not None and len(rates):
+                parts.append(rates[(rates['time'] >= start_s) & (rates['time'] <= end_s)])
+        if not parts:
+            return None
+        return np.concatenate(parts)
+
+    def copy_rates_range(self, mt5_instance, symbol: str, timeframe, start, end, columns=None):
+        """
+        Pengganti mt5.copy_rates_range: baca dari store, isi bulan yang hilang /
+        belum lengkap dari terminal. Return structured array atau None.
+        """
+        start_s, end_s = _to_epoch_s(start), _to_epoch_s(end)
+        for y, m in _iter_months(start_s, end_s):
+            if self.is_complete(symbol, timeframe, y, m):
+                continue
+            if mt5_instance is None or getattr(mt5_instance, 'is_offline', False):
+                continue
+            if self.fill_month(mt5_instance, symbol, timeframe, y, m) is None:
+                return mt5_instance.copy_rates_range(symbol, timeframe, start, end)
+        return self.read_range(symbol, timeframe, start_s, end_s, columns)
+
+    def _stored_tail(self, symbol: str, timeframe, count: int):
+        """`count` bar terakhir dari partisi tersimpan + bar live yang belum ditulis."""
+        stored_parts, have = [], 0
+        for y, m in reversed(self.months(symbol, timeframe)):
+            rates = self.read_month(symbol, timeframe, y, m)
+            if rates is not None and len(rates):
+                stored_parts.insert(0, rates)
+                have += len(rates)
+            if have >= count:
+                break
+        stored = np.concatenate(stored_parts) if stored_parts else None
+        pending = self._pending.get((str(symbol), int(timeframe)))
+        if pending is not None and stored is not None and pending.dtype == stored.dtype:
+            stored = _merge_rates(stored, pending)
+        elif stored is None:
+            stored = pending
+        return stored[-count:] if stored is not None else None
+
+    def latest(self, mt5_instance, symbol: str, timeframe, count: int):
+        """
+        `count` bar terbaru: ekor di memori (dibaca dari store sekali) + bar baru dari
+        terminal sejak bar terakhir. Bar baru ditahan di memori dan ditulis ke partisi
+        bulan berjalan per _LIVE_FLUSH_BARS bar (atau lewat flush()).
+        """
+        key = (str(symbol), int(timeframe))
+        tail = self._live.get(key)
+        if tail is None or len(tail) < count:
+            tail = self._stored_tail(symbol, timeframe, count)
+
+        if tail is None:
+            fresh = mt5_instance.copy_rates_from_pos(symbol, timeframe, 0, count)
+        else:
+            last_s = int(tail['time'][-1])
+            fresh = mt5_instance.copy_rates_range(
+                symbol, timeframe,
+                datetime.fromtimestamp(last_s, tz=timezone.utc),
+                datetime.now(timezone.utc) + timedelta(days=1),
+            )
+        if fresh is None or len(fresh) == 0:
+            if tail is not None:
+                self._live[key] = tail
+                return tail[-count:]
+            return None
+        fresh = np.asarray(fresh)
+        if tail is not None and fresh.dtype != tail.dtype:
+            # skema tersimpan beda dengan terminal: jangan gabung, ambil `count` bar langsung dari terminal
+            if len(fresh) < count:
+                fresh = mt5_instance.copy_rates_from_pos(symbol, timeframe, 0, count)
+            return np.asarray(fresh)[-count:] if fresh is not None and len(fresh) else None
+
+        tail = _merge_rates(tail, fresh)[-count:]
+        self._live[key] = tail
+        # bar yang sedang terbentuk ikut diperbarui; feed live tidak pernah menandai bulan 'complete'
+        pending = _merge_rates(self._pending.get(key), fresh)
+        self._pending[key] = pending
+        if len(pending) >= _LIVE_FLUSH_BARS:
+            self.flush(symbol, timeframe)
+        return tail
+
+    def flush(self, symbol: str = None, timeframe=None) -> None:
+        """Tulis bar live yang masih di memori ke partisi bulannya (semua seri bila tanpa argumen)."""
+        keys = [k for k in self._pending if symbol is None or k == (str(symbol), int(timeframe))]
+        for key in keys:
+            pending = self._pending.pop(key)
+            if pending is None or not len(pending):
+                continue
+            sym, tf = key
+            for y, m in _iter_months(int(pending['time'][0]), int(pending['time'][-1])):
+                month_start, month_end = _month_bounds(y, m)
+                sel = pending[(pending['time'] >= month_start) & (pending['time'] < month_end)]
+                merged = _merge_rates(self.read_month(sym, tf, y, m), sel)
+                self.write_month(sym, tf, y, m, merged, complete=self.is_complete(sym, tf, y, m))
+
+
+_default_store = None
+
+
+def get_default_store() -> BarStore:
+    """Instance BarStore bersama (root dari env BAR_STORE_DIR atau <repo>/data/bar_store)."""
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+        atexit.register(_default_store.flush)   # bar live yang masih di memori ikut tersimpan
+    return _default_store
@@ -1,15 +1,36 @@
-import MetaTrader5 as mt5
+from Library.data_handler.offline_mt5 import load_mt5
 import pandas as pd
+from Library.data_handler.bar_store import get_default_store
 
-def get_rates(symbol: str, timeframe, count: int):
+_mt5 = None
+
+
+def _terminal():
+    """
+    Modul MetaTrader5 untuk pemanggilan live (dimuat saat pertama dipakai agar paket ini
+    tetap bisa diimpor backtester). ImportError bila tidak terpasang, kecuali MT5_OFFLINE=1.
+    """
+    global _mt5
+    if _mt5 is None:
+        _mt5 = load_mt5()
+    return _mt5
+
+
+def get_rates(symbol: str, timeframe, count: int, use_store: bool = False):
     """
-    Mengambil data harga (candlestick) dari MT5.
+    Mengambil data harga (candlestick) langsung dari terminal MT5.
+    use_store=True: ekor dari bar store lokal + bar baru dari terminal; hanya untuk
+    satu proses per simbol (bar live ditahan di memori dan ditulis tanpa kunci file).
 
     Returns:
         pd.DataFrame: DataFrame berisi data OHLC, atau DataFrame kosong jika gagal.
     """
+    mt5 = _terminal()
     try:
-        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
+        if use_store:
+            rates = get_default_store().latest(mt5, symbol, timeframe, count)
+        else:
+            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
         if rates is None or len(rates) == 0:
             print(f"Peringatan: Tidak ada data untuk {symbol} di {timeframe}.")
             return pd.DataFrame()
@@ -23,6 +44,7 @@ def get_rates(symbol: str, timeframe, count: int):
 
 def get_account_info():
     """Mengambil informasi akun yang sedang terhubung."""
+    mt5 = _terminal()
     try:
         return mt5.account_info()
     except Exception as e:
@@ -31,6 +53,7 @@ def get_account_info():
 
 def get_symbol_info(symbol: str):
     """Mengambil informasi spesifik untuk sebuah simbol (misal: point, contract size)."""
+    mt5 = _terminal()
     try:
         return mt5.symbol_info(symbol)
     except Exception as e:
@@ -39,6 +62,7 @@ def get_symbol_info(symbol: str):
 
 def get_live_tick(symbol: str):
     """Mengambil data tick (harga bid/ask) terbaru untuk sebuah simbol."""
+    mt5 = _terminal()
     try:
         return mt5.symbol_info_tick(symbol)
     except Exception as e:
@@ -47,6 +71,7 @@ def get_live_tick(symbol: str):
 
 def get_all_symbols():
     """Mengambil daftar semua simbol yang tersedia di broker."""
+    mt5 = _terminal()
     try:
         symbols = mt5.symbols_get()
         if symbols:
@@ -0,0 +1,240 @@
+# Library/data_handler/offline_mt5.py
+"""
+Pengganti offline untuk modul MetaTrader5 (tanpa terminal, jalan di Linux).
+
+OfflineMT5 meniru API modul MetaTrader5 yang dipakai repo ini: konstanta,
+initialize/shutdown, copy_rates_range / copy_rates_from / copy_rates_from_pos,
+copy_ticks_range, symbol_info, symbol_info_tick, account_info, dan fungsi trading
+yang selalu "kosong". Data bar dibaca dari BarStore lokal, tick dari TickStore,
+metadata simbol dari snapshot symbol_info.json yang disimpan saat backtest
+terakhir kali terhubung ke terminal.
+
+Pemakaian:
+    from Library.data_handler.offline_mt5 import load_mt5
+    mt5 = load_mt5()                     # MetaTrader5 asli (ImportError jika tidak terpasang)
+    mt5 = load_mt5(allow_offline=True)   # backtester: OfflineMT5 bila MetaTrader5 tidak ada
+Set env MT5_OFFLINE=1 (atau load_mt5(offline=True)) untuk memaksa mode offline.
+"""
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from Library.data_handler.bar_store import BarStore, _to_epoch_s
+from Library.data_handler.tick_store import TickStore
+
+# Nilai konstanta sama dengan paket MetaTrader5
+TIMEFRAME_M1, TIMEFRAME_M2, TIMEFRAME_M3, TIMEFRAME_M4, TIMEFRAME_M5 = 1, 2, 3, 4, 5
+TIMEFRAME_M6, TIMEFRAME_M10, TIMEFRAME_M12, TIMEFRAME_M15 = 6, 10, 12, 15
+TIMEFRAME_M20, TIMEFRAME_M30 = 20, 30
+TIMEFRAME_H1, TIMEFRAME_H2, TIMEFRAME_H3, TIMEFRAME_H4 = 16385, 16386, 16387, 16388
+TIMEFRAME_H6, TIMEFRAME_H8, TIMEFRAME_H12 = 16390, 16392, 16396
+TIMEFRAME_D1, TIMEFRAME_W1, TIMEFRAME_MN1 = 16408, 32769, 49153
+
+ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT = 2, 3
+ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP = 4, 5
+POSITION_TYPE_BUY, POSITION_TYPE_SELL = 0, 1
+ORDER_STATE_STARTED, ORDER_STATE_PLACED = 0, 1
+ORDER_TIME_GTC, ORDER_TIME_DAY = 0, 1
+ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN = 0, 1, 2
+TRADE_ACTION_DEAL, TRADE_ACTION_PENDING, TRADE_ACTION_SLTP = 1, 5, 6
+TRADE_ACTION_MODIFY, TRADE_ACTION_REMOVE, TRADE_ACTION_CLOSE_BY = 7, 8, 10
+TRADE_RETCODE_DONE = 10009
+COPY_TICKS_ALL, COPY_TICKS_INFO, COPY_TICKS_TRADE = -1, 1, 2
+
+_CONSTANTS = {k: v for k, v in dict(globals()).items() if k.isupper() and isinstance(v, int)}
+
+# Pelengkap field yang tidak ada di symbol_overrides untuk simbol tanpa snapshot symbol_info.json
+DEFAULT_SYMBOL_INFO = {
+    'point': 0.01, 'digits': 2, 'trade_contract_size': 100.0,
+    'volume_min': 0.01, 'volume_max': 100.0, 'volume_step': 0.01,
+    'trade_tick_size': 0.01, 'trade_tick_value': 1.0, 'spread': 0,
+    'visible': True, 'trade_fill_flags': 1, 'currency_profit': 'USD',
+}
+
+_Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+_AccountInfo = namedtuple(
+    'AccountInfo', 'login balance equity profit margin margin_free margin_level leverage currency server name'
+)
+
+
+def _as_namedtuple(typename: str, data: dict):
+    return namedtuple(typename, list(data.keys()))(**data)
+
+
+class OfflineMT5:
+    """Objek pengganti modul MetaTrader5 yang melayani data dari disk."""
+    is_offline = True
+
+    def __init__(self, store_root: str = None, balance: float = 10000.0,
+                 symbol_overrides: dict = None, clock=None):
+        self.store = BarStore(store_root)
+        self.tick_store = TickStore(store_root)
+        self.balance = float(balance)
+        self.symbol_overrides = dict(symbol_overrides or {})
+        self.clock = None if clock is None else _to_epoch_s(clock)
+        self._last_error = (1, 'Success')
+        self._warned_defaults = set()
+        for name, value in _CONSTANTS.items():
+            setattr(self, name, value)
+
+    # --- Siklus hidup koneksi ---
+    def initialize(self, *args, **kwargs) -> bool:
+        return True
+
+    def login(self, *args, **kwargs) -> bool:
+        return True
+
+    def shutdown(self) -> None:
+        return None
+
+    def last_error(self):
+        return self._last_error
+
+    def version(self):
+        return (0, 0, 'offline')
+
+    def set_clock(self, when) -> None:
+        """Batasi data 'terbaru' (copy_rates_from_pos / tick) sampai waktu ini (replay)."""
+        self.clock = None if when is None else _to_epoch_s(when)
+
+    # --- Data harga ---
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        rates = self.store.read_range(symbol, timeframe, date_from, date_to)
+        if rates is None:
+            self._last_error = (-1, f'No stored bars for {symbol}')
+        return rates
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        return self._tail(symbol, timeframe, _to_epoch_s(date_from), int(count))
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        rates = self._tail(symbol, timeframe, self.clock, int(start_pos) + int(count))
+        if rates is None:
+            return None
+        return rates[:len(rates) - int(start_pos)] if start_pos else rates
+
+    def _tail(self, symbol, timeframe, end_s, count):
+        """`count` bar terakhir dengan time <= end_s (None = tanpa batas)."""
+        parts, have = [], 0
+        for y, m in reversed(self.store.months(symbol, timeframe)):
+            rates = self.store.read_month(symbol, timeframe, y, m)
+            if rates is None or not len(rates):
+                continue
+            if end_s is not None:
+                rates = rates[rates['time'] <= end_s]
+                if not len(rates):
+                    continue
+            parts.insert(0, rates)
+            have += len(rates)
+            if have >= count:
+                break
+        if not parts:
+            self._last_error = (-1, f'No stored bars for {symbol}')
+            return None
+        return np.concatenate(parts)[-count:]
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags=COPY_TICKS_ALL):
+        ticks = self.tick_store.copy_ticks_range(symbol, date_from, date_to)
+        if not len(ticks):
+            self._last_error = (-1, f'No stored ticks for {symbol}')
+        return ticks
+
+    # --- Info simbol / tick / akun ---
+    def symbol_info(self, symbol):
+        """
+        Snapshot symbol_info.json (+ override). Simbol tanpa snapshot -> None seperti MT5,
+        kecuali ada symbol_overrides eksplisit (field lain diisi DEFAULT_SYMBOL_INFO + peringatan).
+        """
+        overrides = self.symbol_overrides.get(symbol)
+        data = self.store.read_symbol_info(symbol)
+        if data is None:
+            if not overrides:
+                self._last_error = (-1, f'No symbol_info snapshot for {symbol}')
+                return None
+            if symbol not in self._warned_defaults:
+                self._warned_defaults.add(symbol)
+                missing = sorted(set(DEFAULT_SYMBOL_INFO) - set(overrides))
+                print(f"Peringatan: {symbol} tanpa snapshot symbol_info; nilai default dipakai untuk {', '.join(missing)}.",
+                      file=sys.stderr)
+            data = dict(DEFAULT_SYMBOL_INFO)
+        data.update(overrides or {})
+        data['name'] = symbol
+        return _as_namedtuple('SymbolInfo', data)
+
+    def symbol_info_tick(self, symbol):
+        rates = None
+        for tf in (TIMEFRAME_M1, TIMEFRAME_M5, TIMEFRAME_M15, TIMEFRAME_H1):
+            rates = self._tail(symbol, tf, self.clock, 1)
+            if rates is not None:
+                break
+        if rates is None:
+            return None
+        info = self.symbol_info(symbol)
+        if info is None:
+            return None
+        bar = rates[-1]
+        point = float(info.point)
+        spread = float(bar['spread']) if 'spread' in rates.dtype.names else 0.0
+        bid = float(bar['close'])
+        t = int(bar['time'])
+        return _Tick(t, bid, bid + spread * point, bid, 0, t * 1000, 0, 0.0)
+
+    def symbol_select(self, symbol, enable=True) -> bool:
+        return True
+
+    def symbols_get(self, *args, **kwargs):
+        root = self.store.root
+        names = sorted(os.listdir(root)) if os.path.isdir(root) else []
+        return tuple(self.symbol_info(n) for n in names)
+
+    def account_info(self):
+        return _AccountInfo(0, self.balance, self.balance, 0.0, 0.0, self.balance, 0.0,
+                            100, 'USD', 'offline', 'offline')
+
+    # --- Trading: tidak ada posisi/order di mode offline ---
+    def positions_get(self, *args, **kwargs):
+        return ()
+
+    def orders_get(self, *args, **kwargs):
+        return ()
+
+    def history_deals_get(self, *args, **kwargs):
+        return ()
+
+    def history_orders_get(self, *args, **kwargs):
+        return ()
+
+    def order_send(self, request):
+        self._last_error = (-2, 'Trading is not available in offline mode')
+        return None
+
+    def Close(self, *args, **kwargs) -> bool:
+        return False
+
+
+_offline_instance = None
+
+
+def load_mt5(offline: bool = None, allow_offline: bool = False):
+    """
+    Modul MetaTrader5 asli, atau instance OfflineMT5 bersama bila offline=True / MT5_OFFLINE=1.
+    Paket MetaTrader5 tidak terpasang -> ImportError, kecuali pemanggil mengizinkan
+    fallback offline (allow_offline=True, mis. backtester) -> OfflineMT5 + peringatan.
+    """
+    global _offline_instance
+    if offline is None:
+        offline = os.environ.get('MT5_OFFLINE', '').strip().lower() in ('1', 'true', 'yes')
+    if not offline:
+        try:
+            import MetaTrader5
+            return MetaTrader5
+        except ImportError:
+            if not allow_offline:
+                raise
+            print("Peringatan: paket MetaTrader5 tidak terpasang, memakai data offline (OfflineMT5).", file=sys.stderr)
+    if _offline_instance is None:
+        _offline_instance = OfflineMT5(store_root=os.environ.get('BAR_STORE_DIR') or None)
+    return _offline_instance
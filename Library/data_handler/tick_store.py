@@ -0,0 +1,268 @@
+# Library/data_handler/tick_store.py
+"""
+Penyimpanan tick bid/ask lokal berbasis kolom (NumPy .npy, dibaca via memory-map).
+
+Struktur di disk (di bawah root yang sama dengan BarStore):
+    <root>/<SYMBOL>/ticks/<YYYY-MM-DD>/{time_msc,bid,ask}.npy + _meta.json
+
+Satu partisi per hari (UTC) agar file tetap kecil saat diisi dari terminal.
+Pembacaan tidak pernah memuat satu rentang penuh ke RAM: TickSeries memegang
+memmap per hari dan semua pemrosesan (agregasi bar, pencarian SL, MFE/MAE)
+berjalan per potongan berukuran tetap (chunk_size tick).
+"""
+import os
+import json
+import time
+import shutil
+import calendar
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+
+from Library.data_handler.bar_store import DEFAULT_ROOT, _READ_RETRIES, _to_epoch_s, _swap_dir, _swap_pending
+
+_META_FILE = '_meta.json'
+_COLUMNS = (('time_msc', np.int64), ('bid', np.float64), ('ask', np.float64))
+DEFAULT_CHUNK_SIZE = 1_000_000
+COPY_TICKS_ALL = -1   # nilai konstanta MetaTrader5.COPY_TICKS_ALL
+
+RATES_DTYPE = np.dtype([
+    ('time', np.int64), ('open', np.float64), ('high', np.float64), ('low', np.float64),
+    ('close', np.float64), ('tick_volume', np.int64), ('spread', np.int32), ('real_volume', np.int64),
+])
+
+
+def _iter_days(start_s: int, end_s: int):
+    """Semua tanggal UTC yang beririsan dengan [start_s, end_s]."""
+    d = datetime.fromtimestamp(start_s, tz=timezone.utc).date()
+    last = datetime.fromtimestamp(end_s, tz=timezone.utc).date()
+    while d <= last:
+        yield d
+        d += timedelta(days=1)
+
+
+class TickSeries:
+    """
+    Rangkaian tick terurut waktu dari beberapa partisi memmap, dengan posisi global.
+    Akses hanya lewat potongan (chunks / take / first_hit / range_extrema).
+    """
+
+    def __init__(self, parts: list, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.parts = [p for p in parts if len(p[0])]   # [(time_msc, bid, ask)] memmap
+        self.chunk_size = max(1, int(chunk_size))
+        self.offsets = np.cumsum([0] + [len(p[0]) for p in self.parts])
+        # tick pertama tiap partisi, untuk searchsorted lintas partisi
+        self._heads = np.array([int(p[0][0]) for p in self.parts], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def _pieces(self, lo: int, hi: int):
+        """(partisi, lo lokal, hi lokal) untuk posisi global [lo, hi), dipotong per chunk_size."""
+        lo, hi = max(0, int(lo)), min(len(self), int(hi))
+        while lo < hi:
+            k = int(np.searchsorted(self.offsets, lo, side='right')) - 1
+            local_lo = lo - int(self.offsets[k])
+            local_hi = min(int(self.offsets[k + 1]), hi, lo + self.chunk_size) - int(self.offsets[k])
+            yield k, local_lo, local_hi
+            lo += local_hi - local_lo
+
+    def chunks(self, lo: int = 0, hi: int = None):
+        """Yield (posisi global awal, time_msc, bid, ask) per potongan (view ke memmap, tidak disalin)."""
+        hi = len(self) if hi is None else hi
+        for k, a, b in self._pieces(lo, hi):
+            t, bid, ask = self.parts[k]
+            yield int(self.offsets[k]) + a, np.asarray(t[a:b]), np.asarray(bid[a:b]), np.asarray(ask[a:b])
+
+    def searchsorted(self, t_ms, side: str = 'left') -> np.ndarray:
+        """Posisi global untuk tiap t_ms (seperti np.searchsorted atas seluruh time_msc)."""
+        t_ms = np.asarray(t_ms, dtype=np.int64)
+        out = np.full(t_ms.shape, len(self), dtype=np.int64)
+        if not self.parts:
+            return np.zeros(t_ms.shape, dtype=np.int64)
+        k = np.clip(np.searchsorted(self._heads, t_ms, side='right') - 1, 0, len(self.parts) - 1)
+        for j in np.unique(k):
+            sel = k == j
+            times = self.parts[j][0]
+            out[sel] = self.offsets[j] + np.searchsorted(times, t_ms[sel], side=side)
+        return out
+
+    def take(self, pos) -> tuple:
+        """(time_msc, bid, ask) pada posisi global (array terurut naik)."""
+        pos = np.asarray(pos, dtype=np.int64)
+        t = np.empty(len(pos), dtype=np.int64)
+        bid = np.empty(len(pos))
+        ask = np.empty(len(pos))
+        k = np.searchsorted(self.offsets, pos, side='right') - 1
+        for j in np.unique(k):
+            sel = k == j
+            local = pos[sel] - self.offsets[j]
+            pt, pb, pa = self.parts[j]
+            t[sel], bid[sel], ask[sel] = pt[local], pb[local], pa[local]
+        return t, bid, ask
+
+    def first_hit(self, lo: int, hi: int, level: float, below: bool):
+        """Posisi global pertama di [lo, hi) dengan bid <= level (below) / bid >= level, atau None."""
+        for start, _, bid, _ in self.chunks(lo, hi):
+            hits = np.flatnonzero(bid <= level if below else bid >= level)
+            if len(hits):
+                return start + int(hits[0])
+        return None
+
+    def range_extrema(self, lo: int, hi: int):
+        """(max bid, min bid) di [lo, hi); (nan, nan) bila kosong."""
+        hi_v, lo_v = -np.inf, np.inf
+        for _, _, bid, _ in self.chunks(lo, hi):
+            if len(bid):
+                hi_v = max(hi_v, float(bid.max()))
+                lo_v = min(lo_v, float(bid.min()))
+        return (hi_v, lo_v) if hi_v >= lo_v else (np.nan, np.nan)
+
+    def aggregate_bars(self, timeframe_seconds: int, point: float) -> np.ndarray:
+        """
+        Bar OHLC (harga bid) per timeframe_seconds, format sama dengan copy_rates_*:
+        spread = spread tick penutup bar (points), tick_volume = jumlah tick.
+        Setiap potongan diringkas sendiri; bar yang terbelah batas potongan digabung di akhir.
+        """
+        tf = int(timeframe_seconds)
+        parts = []
+        for _, t, bid, ask in self.chunks():
+            t_s = t // 1000
+            bar_t = t_s - t_s % tf
+            starts = np.concatenate([[0], np.flatnonzero(bar_t[1:] != bar_t[:-1]) + 1])
+            ends = np.append(starts[1:], len(t)) - 1
+            part = np.empty(len(starts), dtype=RATES_DTYPE)
+            part['time'] = bar_t[starts]
+            part['open'] = bid[starts]
+            part['high'] = np.maximum.reduceat(bid, starts)
+            part['low'] = np.minimum.reduceat(bid, starts)
+            part['close'] = bid[ends]
+            part['tick_volume'] = ends - starts + 1
+            part['spread'] = np.rint((ask[ends] - bid[ends]) / float(point))
+            part['real_volume'] = 0
+            parts.append(part)
+        if not parts:
+            return np.empty(0, dtype=RATES_DTYPE)
+        bars = np.concatenate(parts)
+        starts = np.concatenate([[0], np.flatnonzero(bars['time'][1:] != bars['time'][:-1]) + 1])
+        if len(starts) == len(bars):
+            return bars
+        ends = np.append(starts[1:], len(bars)) - 1
+        merged = bars[starts].copy()
+        merged['high'] = np.maximum.reduceat(bars['high'], starts)
+        merged['low'] = np.minimum.reduceat(bars['low'], starts)
+        merged['close'] = bars['close'][ends]
+        merged['spread'] = bars['spread'][ends]
+        merged['tick_volume'] = np.add.reduceat(bars['tick_volume'], starts)
+        return merged
+
+
+class TickStore:
+    """Tick store per simbol/hari: isi dari terminal (copy_ticks_range), baca via memmap."""
+
+    def __init__(self, root: str = None):
+        self.root = root or DEFAULT_ROOT
+
+    def _day_dir(self, symbol: str, day) -> str:
+        return os.path.join(self.root, str(symbol), 'ticks', day.strftime('%Y-%m-%d'))
+
+    def _read_meta(self, day_dir: str):
+        try:
+            with open(os.path.join(day_dir, _META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_complete(self, symbol: str, day) -> bool:
+        meta = self._read_meta(self._day_dir(symbol, day))
+        return bool(meta and meta.get('complete'))
+
+    def read_day(self, symbol: str, day):
+        """
+        (time_msc, bid, ask) memmap untuk satu hari, atau None jika belum tersimpan.
+        Partisi yang sedang ditukar penulis lain (write_day) dibaca ulang sebentar kemudian.
+        """
+        day_dir = self._day_dir(symbol, day)
+        for attempt in range(_READ_RETRIES):
+            meta = self._read_meta(day_dir)
+            if meta is None:
+                if not _swap_pending(day_dir):
+                    return None
+            else:
+                try:
+                    cols = tuple(np.load(os.path.join(day_dir, f"{name}.npy"), mmap_mode='r') for name, _ in _COLUMNS)
+                    # kolom dari versi partisi yang berbeda -> panjang/meta tidak cocok, baca ulang
+                    if all(len(c) == int(meta['rows']) for c in cols) and self._read_meta(day_dir) == meta:
+                        return cols
+                except (FileNotFoundError, ValueError):
+                    pass   # partisi ditukar di tengah pembacaan
+            time.sleep(0.05 * (attempt + 1))
+        return None
+
+    def write_day(self, symbol: str, day, time_msc, bid, ask, complete: bool = True) -> None:
+        """Tulis partisi satu hari (dir sementara -> tukar lewat rename); tick diurutkan menurut waktu."""
+        time_msc = np.asarray(time_msc, dtype=np.int64)
+        order = np.argsort(time_msc, kind='stable')
+        day_dir = self._day_dir(symbol, day)
+        os.makedirs(os.path.dirname(day_dir), exist_ok=True)
+        tmp_dir = f"{day_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for (name, dtype), values in zip(_COLUMNS, (time_msc, bid, ask)):
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(values, dtype=dtype)[order])
+        meta = {
+            'symbol': symbol, 'day': day.strftime('%Y-%m-%d'), 'rows': int(len(time_msc)), 'complete': bool(complete),
+            'written_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(tmp_dir, _META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        _swap_dir(tmp_dir, day_dir)
+
+    def fill_day(self, mt5_instance, symbol: str, day) -> bool:
+        """Unduh tick satu hari dari terminal lalu simpan. Return False bila terminal tidak memberi data."""
+        day_start = calendar.timegm(day.timetuple())
+        ticks = mt5_instance.copy_ticks_range(
+            symbol,
+            datetime.fromtimestamp(day_start, tz=timezone.utc),
+            datetime.fromtimestamp(day_start + 86400, tz=timezone.utc),
+            getattr(mt5_instance, 'COPY_TICKS_ALL', COPY_TICKS_ALL),
+        )
+        if ticks is None:
+            return False
+        ticks = np.asarray(ticks)
+        if len(ticks):
+            ticks = ticks[(ticks['time_msc'] >= day_start * 1000) & (ticks['time_msc'] < (day_start + 86400) * 1000)]
+            ticks = ticks[(ticks['bid'] > 0) & (ticks['ask'] > 0)]   # tick last-only tanpa kuotasi
+        complete = day_start + 86400 + 3 * 86400 <= int(datetime.now(timezone.utc).timestamp())
+        self.write_day(symbol, day, ticks['time_msc'], ticks['bid'], ticks['ask'], complete=complete)
+        return True
+
+    def open_range(self, mt5_instance, symbol: str, start_ms: int, end_ms: int,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> TickSeries:
+        """TickSeries untuk time_msc di [start_ms, end_ms); hari yang belum lengkap diisi dari terminal bila online."""
+        parts = []
+        for day in _iter_days(int(start_ms) // 1000, (int(end_ms) - 1) // 1000):
+            if (not self.is_complete(symbol, day) and mt5_instance is not None
+                    and not getattr(mt5_instance, 'is_offline', False)):
+                self.fill_day(mt5_instance, symbol, day)
+            cols = self.read_day(symbol, day)
+            if cols is None or not len(cols[0]):
+                continue
+            t = cols[0]
+            a, b = np.searchsorted(t, [int(start_ms), int(end_ms)])
+            if a < b:
+                parts.append(tuple(c[a:b] for c in cols))
+        return TickSeries(parts, chunk_size)
+
+    def copy_ticks_range(self, symbol: str, start, end):
+        """Tick tersimpan di [start, end) sebagai structured array (time, time_msc, bid, ask) -- untuk rentang kecil."""
+        start_ms, end_ms = _to_epoch_s(start) * 1000, _to_epoch_s(end) * 1000
+        series = self.open_range(None, symbol, start_ms, end_ms)
+        out = np.empty(len(series), dtype=[('time', np.int64), ('bid', np.float64), ('ask', np.float64),
+                                            ('time_msc', np.int64)])
+        for pos, t, bid, ask in series.chunks():
+            out['time'][pos:pos + len(t)] = t // 1000
+            out['time_msc'][pos:pos + len(t)] = t
+            out['bid'][pos:pos + len(t)] = bid
+            out['ask'][pos:pos + len(t)] = ask
+        return out
@@ -0,0 +1,137 @@
+"""
+Kernel metrik kinerja berbasis NumPy, dipakai bersama oleh backtester
+(Backtester/worker_backtest.py) dan laporan sesi live (report_generator.py)
+supaya definisi & angka keduanya selalu sama.
+
+Konvensi:
+  - equity: array saldo/ekuitas terurut waktu, t_ms: epoch milliseconds.
+  - pnl: array profit per trade (urutan penutupan).
+  - Trade menang = pnl > 0, kalah = pnl < 0; streak kalah menghitung pnl <= 0.
+Semua fungsi O(n) tanpa loop Python per titik.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+PROFIT_FACTOR_NO_LOSS = 999.9   # nilai profit factor bila tidak ada trade rugi
+
+
+def running_drawdown(equity, start_peak: float = None):
+    """
+    (running peak, drawdown absolut) per titik. start_peak = puncak awal (mis. modal awal).
+    Array 2D diproses per baris (mis. path Monte Carlo x trade).
+    """
+    eq = np.asarray(equity, dtype=float)
+    peak = np.maximum.accumulate(eq, axis=-1) if eq.size else eq
+    if start_peak is not None:
+        peak = np.maximum(peak, float(start_peak))
+    return peak, peak - eq
+
+
+def drawdown_stats(equity, start_peak: float = None) -> dict:
+    """
+    Max drawdown sebuah kurva.
+      max_drawdown     : penurunan absolut terbesar dari running peak
+      peak             : puncak tertinggi kurva (termasuk start_peak)
+      percentage       : max_drawdown / peak * 100
+      peak_index       : index pertama puncak tertinggi (None jika tak pernah melewati start_peak)
+      trough_index     : index titik max drawdown (None jika tidak ada drawdown)
+    """
+    eq = np.asarray(equity, dtype=float)
+    if len(eq) == 0:
+        peak = float(start_peak) if start_peak is not None else 0.0
+        return {'max_drawdown': 0.0, 'peak': peak, 'percentage': 0.0, 'peak_index': None, 'trough_index': None}
+    peak, dd = running_drawdown(eq, start_peak)
+    i_trough = int(dd.argmax())
+    max_dd = float(dd[i_trough])
+    i_peak = int(eq.argmax())
+    if start_peak is not None and not eq[i_peak] > start_peak:
+        i_peak = None
+    top = float(peak[-1])
+    return {
+        'max_drawdown': max_dd,
+        'peak': top,
+        'percentage': (max_dd / top) * 100 if top > 0 else 0,
+        'peak_index': i_peak,
+        'trough_index': i_trough if max_dd > 0 else None,
+    }
+
+
+def points_under_water(equity) -> int:
+    """Jumlah titik yang berada di bawah running peak."""
+    _, dd = running_drawdown(equity)
+    return int(np.count_nonzero(dd > 0))
+
+
+def time_under_water_seconds(t_ms, equity) -> float:
+    """Total durasi (detik) episode drawdown yang sudah pulih: titik pertama di bawah peak -> titik pulih."""
+    t = np.asarray(t_ms, dtype=np.int64)
+    _, dd = running_drawdown(equity)
+    below = np.concatenate([[False], dd > 0])
+    starts = np.flatnonzero(below[1:] & ~below[:-1])
+    ends = np.flatnonzero(~below[1:] & below[:-1])
+    n = min(len(starts), len(ends))   # episode terakhir yang belum pulih tidak dihitung
+    return float((t[ends[:n]] - t[starts[:n]]).sum()) / 1000.0
+
+
+def max_streak(mask) -> int:
+    """Panjang run True berturut-turut terpanjang."""
+    m = np.asarray(mask, dtype=bool)
+    if not m.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], m.view(np.int8), [0]])))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def trade_stats(pnl) -> dict:
+    """Statistik menang/kalah, streak, rasio & risiko ekor (VaR/ES 95%) dari PnL per trade."""
+    p = np.asarray(pnl, dtype=float)
+    n = len(p)
+    if n == 0:
+        return {
+            'total_trades': 0, 'num_wins': 0, 'num_losses': 0, 'win_rate': 0,
+            'gross_profit': 0, 'gross_loss': 0, 'average_win': 0, 'average_loss': 0,
+            'max_single_win': 0, 'max_single_loss': 0, 'profit_factor': 0, 'payoff_ratio': 0,
+            'max_consecutive_wins': 0, 'max_consecutive_losses': 0, 'sharpe_ratio': 0, 'sortino_ratio': None,
+            'median_trade_pnl': None, 'pnl_std': None, 'pnl_p05': None, 'pnl_p95': None,
+            'var_95': None, 'es_95': None,
+        }
+    wins, losses = p[p > 0], p[p < 0]
+    gross_profit, gross_loss = float(wins.sum()), float(losses.sum())
+    std = float(p.std())
+    downside_std = float(losses.std()) if len(losses) else 0.0
+    p05, p50, p95 = (float(v) for v in np.quantile(p, [0.05, 0.5, 0.95]))
+    tail = p[p <= p05]
+    return {
+        'total_trades': n,
+        'num_wins': len(wins),
+        'num_losses': len(losses),
+        'win_rate': len(wins) / n * 100,
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'average_win': gross_profit / len(wins) if len(wins) else 0,
+        'average_loss': abs(gross_loss / len(losses)) if len(losses) else 0,
+        'max_single_win': float(wins.max()) if len(wins) else 0,
+        'max_single_loss': float(losses.min()) if len(losses) else 0,
+        'profit_factor': abs(gross_profit / gross_loss) if gross_loss != 0 else PROFIT_FACTOR_NO_LOSS,
+        'payoff_ratio': (gross_profit / len(wins)) / abs(gross_loss / len(losses)) if len(wins) and len(losses) else 0,
+        'max_consecutive_wins': max_streak(p > 0),
+        'max_consecutive_losses': max_streak(p <= 0),
+        'sharpe_ratio': float(p.mean()) / std if std > 0 else 0,
+        'sortino_ratio': float(p.mean()) / downside_std if downside_std > 0 else None,
+        'median_trade_pnl': p50,
+        'pnl_std': float(p.std(ddof=1)) if n > 1 else float('nan'),
+        'pnl_p05': p05,
+        'pnl_p95': p95,
+        'var_95': p05,
+        'es_95': float(tail.mean()) if len(tail) else p05,
+    }
+
+
+def annualized_cagr(start_ms: int, end_ms: int, initial: float, final: float) -> float:
+    """CAGR tahunan (pecahan) dengan durasi dalam hari penuh; -1.0 jika saldo akhir <= 0."""
+    if initial <= 0:
+        return 0.0
+    days = (int(end_ms) - int(start_ms)) // 86_400_000
+    years = max(days / 365.25, 1e-9)
+    return (final / initial) ** (1 / years) - 1 if final > 0 else -1.0
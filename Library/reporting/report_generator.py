@@ -4,6 +4,8 @@ from datetime import datetime
 import os
 import logging
 
+from Library.reporting import metrics
+
 # --- Konfigurasi Logger ---
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -57,23 +59,21 @@ class ReportGenerator:
         pnl_currency = df['profit'].sum() + df['commission'].sum() + df['swap'].sum()
         pnl_percent = (pnl_currency / initial_balance) * 100 if initial_balance > 0 else 0
         
-        total_trades = len(df)
-        wins_df = df[df['profit'] >= 0]
-        losses_df = df[df['profit'] < 0]
-        
-        winning_trades = len(wins_df)
-        losing_trades = len(losses_df)
-        
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-        
-        total_profit_gross = wins_df['profit'].sum()
-        total_loss_gross = abs(losses_df['profit'].sum())
-        profit_factor = total_profit_gross / total_loss_gross if total_loss_gross > 0 else float('inf')
-        
-        avg_win = wins_df['profit'].mean() if not wins_df.empty else 0
-        avg_loss = abs(losses_df['profit'].mean()) if not losses_df.empty else 0
+        # PnL bersih per trade (profit + komisi + swap), dipakai statistik maupun kurva saldo
+        net_pnl = (df['profit'] + df['commission'] + df['swap']).to_numpy(dtype=float)
+
+        # Definisi menang/kalah, streak & profit factor sama dengan backtester (kernel metrics)
+        stats = metrics.trade_stats(net_pnl)
+        total_trades = stats['total_trades']
+        winning_trades = stats['num_wins']
+        losing_trades = stats['num_losses']
+        win_rate = stats['win_rate']
+        profit_factor = stats['profit_factor']
+        avg_win = stats['average_win']
+        avg_loss = stats['average_loss']
         
-        expectancy = ((win_rate / 100) * avg_win) - ((100 - win_rate) / 100 * avg_loss)
+        # trade impas (PnL 0) bukan kerugian: bobot rugi = num_losses / total
+        expectancy = ((win_rate / 100) * avg_win) - (losing_trades / total_trades * avg_loss)
 
         # --- 2. Kalkulasi Analisis Profesional Tambahan ---
         
@@ -86,20 +86,9 @@ class ReportGenerator:
         df['duration_seconds'] = (df['time_close_dt'] - df['time_open_dt']).dt.total_seconds()
         avg_trade_duration_seconds = df['duration_seconds'].mean() if not df.empty else 0
 
-        # Max Consecutive Wins/Losses
-        max_consecutive_wins = 0
-        max_consecutive_losses = 0
-        current_wins = 0
-        current_losses = 0
-        for profit in df['profit']:
-            if profit >= 0:
-                current_wins += 1
-                current_losses = 0
-            else:
-                current_losses += 1
-                current_wins = 0
-            max_consecutive_wins = max(max_consecutive_wins, current_wins)
-            max_consecutive_losses = max(max_consecutive_losses, current_losses)
+        # Risiko & drawdown kurva saldo sesi (saldo awal + kumulatif PnL bersih per trade)
+        balance_curve = initial_balance + net_pnl.cumsum()
+        dd_stats = metrics.drawdown_stats(balance_curve, start_peak=initial_balance)
 
         # --- 3. Susun Struktur File JSON Final ---
         report_content = {
@@ -118,14 +107,19 @@ class ReportGenerator:
                 'win_rate': round(win_rate, 2),
             },
             'analytics': {
-                'profit_factor': round(profit_factor, 2) if profit_factor != float('inf') else 'inf',
+                'profit_factor': round(profit_factor, 2),
                 'expectancy_per_trade': round(expectancy, 2),
                 'average_win_currency': round(avg_win, 2),
                 'average_loss_currency': round(avg_loss, 2),
                 'pnl_per_symbol': pnl_by_symbol,
                 'average_trade_duration_seconds': round(avg_trade_duration_seconds, 2),
-                'max_consecutive_wins': max_consecutive_wins,
-                'max_consecutive_losses': max_consecutive_losses,
+                'max_consecutive_wins': stats['max_consecutive_wins'],
+                'max_consecutive_losses': stats['max_consecutive_losses'],
+                'max_drawdown_currency': round(dd_stats['max_drawdown'], 2),
+                'max_drawdown_percent': round(dd_stats['percentage'], 2),
+                'sharpe_ratio': round(stats['sharpe_ratio'], 4),
+                'var_95': round(stats['var_95'], 2),
+                'es_95': round(stats['es_95'], 2),
             },
             'trades': df.to_dict('records')
         }
@@ -1,6 +1,6 @@
 # Library/risk_management/trade_manager.py
 
-import MetaTrader5 as mt5
+from Library.data_handler.offline_mt5 import load_mt5
 from datetime import datetime, timedelta, time
 import pytz
 import logging
@@ -8,6 +8,8 @@ import time as time_mod
 from Library.reporting.report_generator import ReportGenerator
 from PyQt6.QtCore import QObject, QThread, pyqtSignal
 
+mt5 = load_mt5()
+
 # --- Konfigurasi Logger ---
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -0,0 +1,9 @@
+# Nama File: conftest.py
+"""Path impor tes: root repo (Library.*) dan Backtester (impor datar seperti worker)."""
+import os
+import sys
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (_REPO_ROOT, os.path.join(_REPO_ROOT, 'Backtester')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,160 @@
+# Nama File: test_bar_store.py
+"""BarStore: tulis/baca partisi bulan, pruning kolom, penukaran partisi lewat rename, latest(), dekoder timeframe."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Library.data_handler.bar_store import BarStore, _swap_pending, timeframe_seconds
+from utils import timeframe_minutes
+
+TIMEFRAME_M5 = 5
+RATES_DTYPE = np.dtype([('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                        ('close', '<f8'), ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8')])
+
+
+def _rates(start: str, end: str, offset: float = 0.0) -> np.ndarray:
+    times = pd.date_range(start, end, freq='5min', tz='UTC', inclusive='left')
+    out = np.zeros(len(times), dtype=RATES_DTYPE)
+    out['time'] = times.as_unit('s').asi8
+    out['close'] = 2000.0 + offset + np.arange(len(times)) * 0.01
+    out['open'] = out['close'] - 0.05
+    out['high'] = out['close'] + 0.2
+    out['low'] = out['close'] - 0.2
+    out['spread'] = 20
+    return out
+
+
+def test_write_read_month_round_trip(tmp_path):
+    store = BarStore(str(tmp_path))
+    rates = _rates('2025-03-01', '2025-04-01')
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, rates, complete=True)
+
+    back = store.read_month('XAUUSD', TIMEFRAME_M5, 2025, 3)
+    assert back.dtype == rates.dtype
+    np.testing.assert_array_equal(back, rates)
+    assert store.is_complete('XAUUSD', TIMEFRAME_M5, 2025, 3)
+    assert store.months('XAUUSD', TIMEFRAME_M5) == [(2025, 3)]
+    assert store.read_month('XAUUSD', TIMEFRAME_M5, 2025, 4) is None
+
+
+def test_read_month_prunes_columns(tmp_path):
+    store = BarStore(str(tmp_path))
+    rates = _rates('2025-03-01', '2025-04-01')
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, rates, complete=True)
+
+    back = store.read_month('XAUUSD', TIMEFRAME_M5, 2025, 3, columns=['close'])
+    assert back.dtype.names == ('time', 'close')
+    np.testing.assert_array_equal(back['close'], rates['close'])
+
+
+def test_rewrite_swaps_partition(tmp_path):
+    store = BarStore(str(tmp_path))
+    partial = _rates('2025-03-01', '2025-03-15')
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, partial, complete=False)
+    assert not store.is_complete('XAUUSD', TIMEFRAME_M5, 2025, 3)
+
+    full = _rates('2025-03-01', '2025-04-01', offset=1.0)
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, full, complete=True)
+
+    back = store.read_month('XAUUSD', TIMEFRAME_M5, 2025, 3)
+    np.testing.assert_array_equal(back, full)
+    assert store.is_complete('XAUUSD', TIMEFRAME_M5, 2025, 3)
+    # tidak ada sisa dir sementara / dir lama setelah penukaran
+    part_dir = store._partition_dir('XAUUSD', TIMEFRAME_M5, 2025, 3)
+    assert not _swap_pending(part_dir)
+    assert sorted(os.listdir(os.path.dirname(part_dir))) == ['2025-03']
+
+
+def test_read_range_spans_months(tmp_path):
+    store = BarStore(str(tmp_path))
+    march = _rates('2025-03-01', '2025-04-01')
+    april = _rates('2025-04-01', '2025-05-01')
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, march, complete=True)
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 4, april, complete=True)
+
+    back = store.read_range('XAUUSD', TIMEFRAME_M5, pd.Timestamp('2025-03-31', tz='UTC'),
+                            pd.Timestamp('2025-04-02', tz='UTC'))
+    expected = np.concatenate([march, april])
+    expected = expected[(expected['time'] >= pd.Timestamp('2025-03-31', tz='UTC').timestamp())
+                        & (expected['time'] <= pd.Timestamp('2025-04-02', tz='UTC').timestamp())]
+    np.testing.assert_array_equal(back['time'], expected['time'])
+
+
+class _Terminal:
+    """Terminal palsu: seluruh bar `rates`, kuotasi terbaru di ujung."""
+    is_offline = False
+
+    def __init__(self, rates):
+        self.rates = rates
+        self.from_pos_calls = 0
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        lo, hi = int(date_from.timestamp()), int(date_to.timestamp())
+        return self.rates[(self.rates['time'] >= lo) & (self.rates['time'] <= hi)]
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        self.from_pos_calls += 1
+        return self.rates[len(self.rates) - start_pos - count:len(self.rates) - start_pos]
+
+
+def test_latest_merges_stored_tail_with_new_bars(tmp_path):
+    store = BarStore(str(tmp_path))
+    march = _rates('2025-03-01', '2025-04-01')
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, march[:-20], complete=False)
+    terminal = _Terminal(march)
+
+    out = store.latest(terminal, 'XAUUSD', TIMEFRAME_M5, 100)
+    np.testing.assert_array_equal(out, march[-100:])
+    assert terminal.from_pos_calls == 0
+
+
+def test_latest_schema_mismatch_returns_full_count_from_terminal(tmp_path):
+    store = BarStore(str(tmp_path))
+    march = _rates('2025-03-01', '2025-04-01')
+    stored = march[['time', 'open', 'high', 'low', 'close']]
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, np.array(stored.tolist(), dtype=stored.dtype)[:-20],
+                      complete=False)
+    terminal = _Terminal(march)
+
+    out = store.latest(terminal, 'XAUUSD', TIMEFRAME_M5, 100)
+    assert out.dtype == march.dtype
+    np.testing.assert_array_equal(out, march[-100:])
+    assert terminal.from_pos_calls == 1
+
+
+@pytest.mark.parametrize('timeframe, seconds', [
+    (1, 60), (5, 300), (30, 1800), (16385, 3600), (16388, 4 * 3600), (16408, 86400),
+    (32769, 7 * 86400), (49153, 31 * 86400),
+])
+def test_timeframe_seconds(timeframe, seconds):
+    assert timeframe_seconds(timeframe) == seconds
+    assert timeframe_minutes(timeframe) * 60 == seconds
+
+
+@pytest.mark.parametrize('timeframe', [32769, 49153])
+def test_timeframe_seconds_strict_rejects_calendar_bars(timeframe):
+    with pytest.raises(ValueError):
+        timeframe_seconds(timeframe, strict=True)
+
+
+def test_timeframe_seconds_unknown():
+    with pytest.raises(ValueError):
+        timeframe_seconds(0)
+
+
+def test_data_version_changes_on_rewrite(tmp_path):
+    store = BarStore(str(tmp_path))
+    start, end = pd.Timestamp('2025-03-01', tz='UTC'), pd.Timestamp('2025-03-31', tz='UTC')
+    assert store.data_version('XAUUSD', TIMEFRAME_M5, start, end) is None
+
+    march = _rates('2025-03-01', '2025-04-01')
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, march, complete=True)
+    v1 = store.data_version('XAUUSD', TIMEFRAME_M5, start, end)
+    assert v1 is not None and v1 == store.data_version('XAUUSD', TIMEFRAME_M5, start, end)
+
+    store.write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, march, complete=True)
+    assert store.data_version('XAUUSD', TIMEFRAME_M5, start, end) != v1
+    # rentang yang menyentuh bulan belum tersimpan -> tanpa versi
+    assert store.data_version('XAUUSD', TIMEFRAME_M5, start, pd.Timestamp('2025-04-02', tz='UTC')) is None
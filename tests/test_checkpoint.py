@@ -0,0 +1,48 @@
+# Nama File: test_checkpoint.py
+"""MonthCheckpoint: simpan/baca report bulanan, tolak bila versi data atau saldo awal berbeda."""
+import numpy as np
+
+from checkpoint import MonthCheckpoint, run_key
+from trade_log import TradeLog
+
+CONFIG = {'symbol': 'XAUUSD', 'wave_period': 36, 'lot_size': 0.1, 'use_bar_store': True}
+
+
+def _report() -> dict:
+    trades = TradeLog.from_columns(
+        trade_id=np.arange(3), entry_ms=np.array([1, 2, 3]) * 60_000, exit_ms=np.array([2, 3, 4]) * 60_000,
+        net_pnl_usd=np.array([10.0, -4.5, 2.25]),
+    )
+    return {'completed_trades': trades, 'final_balance': 1007.75, 'equity_curve': [(0, 1000.0), (240_000, 1007.75)]}
+
+
+def test_round_trip(tmp_path):
+    ckpt = MonthCheckpoint(CONFIG, str(tmp_path))
+    ckpt.save(2025, 3, 'v1', 1000.0, _report())
+
+    loaded = MonthCheckpoint(CONFIG, str(tmp_path)).load(2025, 3, 'v1', 1000.0)
+    assert loaded['final_balance'] == 1007.75
+    assert loaded['equity_curve'] == [(0, 1000.0), (240_000, 1007.75)]
+    assert isinstance(loaded['completed_trades'], TradeLog)
+    np.testing.assert_array_equal(loaded['completed_trades'].rows, _report()['completed_trades'].rows)
+    assert ckpt.load(2025, 4, 'v1', 1000.0) is None
+
+
+def test_mismatch_forces_recompute(tmp_path):
+    ckpt = MonthCheckpoint(CONFIG, str(tmp_path))
+    ckpt.save(2025, 3, 'v1', 1000.0, _report())
+    assert ckpt.load(2025, 3, 'v2', 1000.0) is None
+    assert ckpt.load(2025, 3, 'v1', 1000.01) is None
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    ckpt = MonthCheckpoint(CONFIG, str(tmp_path))
+    ckpt.save(2025, 3, 'v1', 1000.0, _report())
+    with open(ckpt._path(2025, 3), 'wb') as f:
+        f.write(b'not a checkpoint')
+    assert ckpt.load(2025, 3, 'v1', 1000.0) is None
+
+
+def test_run_key_ignores_non_result_keys():
+    assert run_key(CONFIG) == run_key({**CONFIG, 'use_bar_store': False, 'chart_workers': 4, 'resume': True})
+    assert run_key(CONFIG) != run_key({**CONFIG, 'wave_period': 48})
@@ -0,0 +1,93 @@
+# Nama File: test_engine_parity.py
+"""
+Paritas engine: loop per-bar vs vectorized pada bar sintetis (tanpa MT5 / bar store).
+Trade, ekuitas dan saldo akhir harus sama; float boleh beda beberapa ulp (urutan penjumlahan).
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import worker_backtest as wb
+
+BB_LENGTH = 20
+ADX_PERIOD = 14
+TIMEFRAME_M5 = 5
+
+
+def _synthetic_bars(n: int = 3000, seed: int = 7) -> pd.DataFrame:
+    """Random walk OHLC M5 (BID) + spread, BBM (SMA close) dan ADX acak."""
+    rng = np.random.default_rng(seed)
+    close = 2000.0 + np.cumsum(rng.normal(0.0, 0.8, n))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0.0, 1.5, n)
+    low = np.minimum(open_, close) - rng.uniform(0.0, 1.5, n)
+    index = pd.date_range('2025-03-03', periods=n, freq='5min', tz='UTC', name='time')
+    df = pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                       'spread': rng.integers(10, 40, n).astype(float)}, index=index)
+    df[f'BBM_{BB_LENGTH}_2.0'] = df['close'].rolling(BB_LENGTH).mean()
+    df[f'ADX_{ADX_PERIOD}'] = rng.uniform(10.0, 40.0, n)
+    return df.dropna()
+
+
+def _run(df: pd.DataFrame, engine: str, params: dict, initial_balance: float):
+    config = {
+        'symbol': 'SYNTH', 'timeframe_int': TIMEFRAME_M5, 'engine': engine,
+        'trade_start_time': '07:00', 'trade_end_time': '20:00',
+        'use_bar_store': False, 'use_indicator_cache': False, 'render_reports': False,
+        'fixed_lot_size': params['lot_size'], 'intrabar_model': params['intrabar_model'],
+    }
+    strategy = wb.PoseidonWave(None, config)
+    ctx = {
+        'lot_size': params['lot_size'], 'bb_length': BB_LENGTH,
+        'use_adx_filter': params['use_adx_filter'], 'adx_period': ADX_PERIOD, 'adx_threshold': 25,
+        'use_stop_loss': params['use_stop_loss'], 'stop_loss_points': 3.0,
+        'use_take_profit': params['use_take_profit'], 'take_profit_points': 4.0,
+        'run_directory': None, 'contract_size': 100.0, 'point': 0.01,
+        'commission_rt_usd': 7.0, 'slippage_pts': 2.0,
+        'use_dyn_spread': params['use_dyn_spread'], 'fallback_spread_pts': 20.0,
+    }
+    recorder = wb.PoseidonWave._EquityRecorder()
+    sim = strategy._simulate(df.copy(), initial_balance, ctx, recorder)
+    return sim, recorder.arrays()
+
+
+_GRID = [dict(zip(('use_stop_loss', 'use_take_profit', 'use_adx_filter', 'use_dyn_spread', 'intrabar_model'), combo))
+         for combo in itertools.product((False, True), (False, True), (False, True), (False, True), ('sl_first', 'ohlc'))]
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return _synthetic_bars()
+
+
+@pytest.mark.parametrize('initial_balance', [1000.0, 60.0])
+@pytest.mark.parametrize('params', _GRID, ids=lambda p: '-'.join(f'{k}={v}' for k, v in p.items()))
+def test_loop_and_vectorized_match(bars, params, initial_balance):
+    params = {**params, 'lot_size': 0.5}
+    loop, loop_eq = _run(bars, 'loop', params, initial_balance)
+    vec, vec_eq = _run(bars, 'vectorized', params, initial_balance)
+
+    a, b = loop['completed_trades'], vec['completed_trades']
+    assert len(a) > 0
+    assert len(a) == len(b)
+    for name in a.rows.dtype.names:
+        if a.rows.dtype[name].kind == 'f':
+            np.testing.assert_allclose(a.rows[name], b.rows[name], rtol=1e-12, atol=1e-9, err_msg=name)
+        else:
+            np.testing.assert_array_equal(a.rows[name], b.rows[name], err_msg=name)
+    assert a.features.dtype.names == b.features.dtype.names
+    for name in a.features.dtype.names or ():
+        np.testing.assert_allclose(a.features[name], b.features[name], rtol=1e-12, err_msg=name)
+
+    assert loop['margin_called'] == vec['margin_called']
+    assert loop['current_balance'] == pytest.approx(vec['current_balance'], rel=1e-12, abs=1e-9)
+    assert loop['realized_balance'] == pytest.approx(vec['realized_balance'], rel=1e-12, abs=1e-9)
+    assert [t for t, _ in loop['equity_curve']] == [t for t, _ in vec['equity_curve']]
+    np.testing.assert_allclose([e for _, e in loop['equity_curve']], [e for _, e in vec['equity_curve']],
+                               rtol=1e-12, atol=1e-9)
+
+    np.testing.assert_array_equal(loop_eq[0], vec_eq[0])
+    np.testing.assert_allclose(loop_eq[1], vec_eq[1], rtol=1e-12, atol=1e-9)
+    np.testing.assert_array_equal(loop_eq[2], vec_eq[2])
@@ -0,0 +1,46 @@
+# Nama File: test_equity_downsample.py
+"""Downsample ekuitas LTTB: titik ujung selalu ikut, jumlah titik = jumlah bucket, event dipertahankan."""
+import numpy as np
+import pytest
+
+from equity_downsample import _lttb_indices, downsample_equity
+
+
+def _curve(n: int = 5000, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    t_ms = 1_740_000_000_000 + np.arange(n, dtype=np.int64) * 300_000
+    return t_ms, 1000.0 + np.cumsum(rng.normal(0.0, 1.0, n))
+
+
+@pytest.mark.parametrize('n_out', [3, 10, 257, 1000])
+def test_lttb_endpoints_and_bucket_count(n_out):
+    t_ms, eq = _curve()
+    idx = _lttb_indices(t_ms, eq, n_out)
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == len(eq) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_small_input_kept_whole():
+    t_ms, eq = _curve(50)
+    np.testing.assert_array_equal(_lttb_indices(t_ms, eq, 50), np.arange(50))
+    np.testing.assert_array_equal(_lttb_indices(t_ms, eq, 2), np.arange(50))
+
+
+def test_lttb_keeps_spike():
+    t_ms, eq = _curve()
+    eq = eq.copy()
+    eq[2345] -= 500.0
+    assert 2345 in _lttb_indices(t_ms, eq, 100)
+
+
+def test_downsample_lttb_keeps_events():
+    t_ms, eq = _curve()
+    is_event = np.zeros(len(eq), dtype=bool)
+    is_event[[17, 1234, 4321]] = True
+    out = downsample_equity(t_ms, eq, is_event, mode='lttb', pixel_width=200)
+    times = [t for t, _ in out]
+    assert times[0] == t_ms[0] and times[-1] == t_ms[-1]
+    assert {t_ms[17], t_ms[1234], t_ms[4321]} <= set(times)
+    assert len(out) <= 200 + 3
+    assert times == sorted(times)
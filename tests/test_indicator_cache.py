@@ -0,0 +1,72 @@
+# Nama File: test_indicator_cache.py
+"""IndicatorCache: kunci dari versi data store (tanpa hash bar), potongan df terpisah, fallback hash."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicator_cache
+from indicator_cache import IndicatorCache
+
+
+def _bars(n: int = 500) -> pd.DataFrame:
+    index = pd.date_range('2025-03-03', periods=n, freq='5min', tz='UTC', name='time')
+    close = 2000.0 + np.cumsum(np.random.default_rng(4).normal(0.0, 1.0, n))
+    return pd.DataFrame({'open': close, 'high': close + 1, 'low': close - 1, 'close': close}, index=index)
+
+
+class _Counter:
+    def __init__(self, df):
+        self.df, self.calls = df, 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.df['close'].rolling(20).mean().rename('SMA_20').to_frame()
+
+
+def test_store_version_skips_fingerprint(tmp_path, monkeypatch):
+    def no_hash(df):
+        raise AssertionError('data_fingerprint tidak boleh dipanggil bila versi store ada')
+    monkeypatch.setattr(indicator_cache, 'data_fingerprint', no_hash)
+
+    df = _bars()
+    compute = _Counter(df)
+    first = IndicatorCache(str(tmp_path)).get_or_compute(df, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, compute,
+                                                          data_version='v1')
+    # proses lain: hit dari disk
+    again = IndicatorCache(str(tmp_path)).get_or_compute(df, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, compute,
+                                                          data_version='v1')
+    assert compute.calls == 1
+    pd.testing.assert_frame_equal(first, again)
+
+    IndicatorCache(str(tmp_path)).get_or_compute(df, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, compute,
+                                                 data_version='v2')
+    assert compute.calls == 2
+
+
+def test_slices_of_same_version_do_not_collide(tmp_path):
+    cache = IndicatorCache(str(tmp_path))
+    df = _bars()
+    full = cache.get_or_compute(df, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, _Counter(df), data_version='v1')
+    tail = df.iloc[19:]
+    sliced = cache.get_or_compute(tail, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, _Counter(tail), data_version='v1')
+    assert len(full) == len(df) and len(sliced) == len(tail)
+    assert sliced['SMA_20'].isna().sum() == 19
+
+
+def test_without_version_falls_back_to_fingerprint(tmp_path):
+    cache = IndicatorCache(str(tmp_path))
+    df = _bars()
+    compute = _Counter(df)
+    cache.get_or_compute(df, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, compute)
+    cache.get_or_compute(df, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, compute)
+    assert compute.calls == 1
+
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc('close')] += 1.0
+    cache.get_or_compute(changed, 'XAUUSD', 5, 'p', 'sma', {'length': 20}, _Counter(changed))
+    assert cache.misses == 2
+
+
+@pytest.fixture(autouse=True)
+def _no_global_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(indicator_cache, 'DEFAULT_CACHE_DIR', str(tmp_path / 'default'))
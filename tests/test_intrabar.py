@@ -0,0 +1,40 @@
+# Nama File: test_intrabar.py
+"""Model intrabar: urutan sentuhan SL/TP pada bar ambigu."""
+import numpy as np
+import pytest
+
+from intrabar import IntrabarModel, low_first_ohlc
+
+# bar 0 naik (O->L->H->C), bar 1 turun (O->H->L->C),
+# bar 2 doji dengan low lebih dekat ke open, bar 3 doji dengan high lebih dekat ke open
+OPEN = np.array([100.0, 100.0, 100.0, 100.0])
+HIGH = np.array([105.0, 105.0, 104.0, 101.0])
+LOW = np.array([95.0, 95.0, 99.0, 96.0])
+CLOSE = np.array([103.0, 97.0, 100.0, 100.0])
+
+
+def test_low_first_ohlc():
+    np.testing.assert_array_equal(low_first_ohlc(OPEN, HIGH, LOW, CLOSE), [True, False, True, False])
+
+
+def test_sl_first_mode_always_sl():
+    model = IntrabarModel('sl_first', OPEN, HIGH, LOW, CLOSE)
+    out = model.sl_first([0, 1, 2, 3], is_buy=[True, False, True, False], sl_level=96.0, tp_level=104.0)
+    assert out.tolist() == [True] * 4
+    assert model.ambiguous_bars == 4
+
+
+def test_ohlc_mode_orders_by_bar_direction():
+    model = IntrabarModel('ohlc', OPEN, HIGH, LOW, CLOSE)
+    bars = [0, 1, 2, 3]
+    # BUY: SL di sisi low -> SL dulu bila low tersentuh lebih dulu
+    buy = model.sl_first(bars, is_buy=True, sl_level=96.0, tp_level=104.0)
+    assert buy.tolist() == [True, False, True, False]
+    # SELL: SL di sisi high -> kebalikannya
+    sell = model.sl_first(bars, is_buy=False, sl_level=104.0, tp_level=96.0)
+    assert sell.tolist() == [False, True, False, True]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        IntrabarModel('random', OPEN, HIGH, LOW, CLOSE)
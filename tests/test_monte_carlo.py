@@ -0,0 +1,72 @@
+# Nama File: test_monte_carlo.py
+"""Monte Carlo trade: bentuk index resampling, ringkasan hasil, peluang ruin, akun bersambung vs per bulan."""
+import numpy as np
+import pytest
+
+from monte_carlo import monte_carlo_months, monte_carlo_trades, resample_indices
+
+
+@pytest.mark.parametrize('method', ['shuffle', 'bootstrap', 'block'])
+def test_resample_indices_shape(method):
+    idx = resample_indices(50, 8, method, block_size=7, rng=np.random.default_rng(1))
+    assert idx.shape == (8, 50)
+    assert idx.min() >= 0 and idx.max() < 50
+    if method == 'shuffle':
+        assert all(sorted(row) == list(range(50)) for row in idx.tolist())
+
+
+def test_resample_indices_unknown_method():
+    with pytest.raises(ValueError):
+        resample_indices(10, 2, 'nope')
+
+
+def test_summary_keys_and_order():
+    pnl = np.random.default_rng(3).normal(1.0, 10.0, 200)
+    mc = monte_carlo_trades(pnl, 1000.0, n_paths=300, method='block', seed=5)
+    assert mc['paths'] == 300 and mc['method'] == 'block' and mc['block_size'] > 0
+    fb = mc['final_balance']
+    assert fb['p05'] <= fb['p25'] <= fb['p50'] <= fb['p75'] <= fb['p95']
+    dd = mc['max_drawdown_pct']
+    assert 0.0 <= dd['p50'] <= dd['p75'] <= dd['p95'] <= dd['p99'] <= dd['max'] <= 100.0
+    assert 0.0 <= mc['prob_ruin'] <= 1.0 and 0.0 <= mc['prob_loss'] <= 1.0
+    # saldo akhir shuffle = initial + total PnL di semua path
+    shuffled = monte_carlo_trades(pnl, 1000.0, n_paths=50, method='shuffle', seed=5)
+    assert shuffled['final_balance']['p05'] == pytest.approx(1000.0 + pnl.sum())
+    assert shuffled['final_balance']['p95'] == pytest.approx(1000.0 + pnl.sum())
+    assert monte_carlo_trades(pnl, 1000.0, n_paths=300, method='block', seed=5) == mc
+
+
+def test_ruin_and_wiped_out_account():
+    mc = monte_carlo_trades([-600.0, -600.0, 500.0], 1000.0, n_paths=20, method='shuffle', ruin_pct=50.0, seed=0)
+    # dua kerugian beruntun menghabiskan akun (saldo 0 dan tetap 0) di sebagian path
+    assert mc['prob_ruin'] == 1.0
+    assert mc['final_balance']['p05'] == 0.0
+    assert mc['max_drawdown_pct']['max'] == pytest.approx(100.0)
+
+    safe = monte_carlo_trades([10.0, -5.0, 10.0], 1000.0, n_paths=20, method='shuffle', seed=0)
+    assert safe['prob_ruin'] == 0.0 and safe['prob_loss'] == 0.0
+
+
+def test_empty_pnl():
+    assert monte_carlo_trades([], 1000.0) == {}
+
+
+def test_per_month_resets_account_each_month():
+    # tiap bulan rugi 600 dari 1000: per bulan tidak pernah habis, akun bersambung habis di bulan kedua
+    months = [[-300.0, -300.0], [-300.0, -300.0]]
+    chained = monte_carlo_trades(np.concatenate(months), 1000.0, n_paths=20, method='shuffle', seed=0)
+    per_month = monte_carlo_months(months, 1000.0, n_paths=20, method='shuffle', seed=0)
+    assert chained['account'] == 'chained' and per_month['account'] == 'per_month'
+    assert chained['final_balance']['p50'] == 0.0
+    assert per_month['final_balance']['p50'] == pytest.approx(1000.0 - 1200.0)
+    assert per_month['max_drawdown_pct']['max'] == pytest.approx(60.0)
+    assert per_month['prob_ruin'] == 1.0 and per_month['prob_loss'] == 1.0
+
+
+def test_per_month_block_size_follows_each_month():
+    rng = np.random.default_rng(2)
+    months = [rng.normal(0.0, 5.0, 8), [], rng.normal(0.0, 5.0, 125)]
+    mc = monte_carlo_months(months, 1000.0, n_paths=50, method='block', seed=1)
+    assert mc['block_size'] == [2, 5]
+    assert monte_carlo_months(months, 1000.0, n_paths=50, method='block', block_size=3, seed=1)['block_size'] == 3
+    assert monte_carlo_months([[], []], 1000.0) == {}
@@ -0,0 +1,74 @@
+# Nama File: test_offline_mt5.py
+"""OfflineMT5 & load_mt5: symbol_info dari snapshot, None untuk simbol tak dikenal, data bar dari BarStore."""
+import sys
+
+import numpy as np
+import pytest
+
+from Library.data_handler import offline_mt5
+from Library.data_handler.bar_store import BarStore
+from Library.data_handler.offline_mt5 import OfflineMT5, load_mt5
+from test_bar_store import TIMEFRAME_M5, _rates
+
+
+def test_symbol_info_unknown_symbol_is_none(tmp_path):
+    mt5 = OfflineMT5(store_root=str(tmp_path))
+    assert mt5.symbol_info('NOPE') is None
+    assert mt5.last_error()[0] == -1
+    assert mt5.symbol_info_tick('NOPE') is None
+
+
+def test_symbol_info_from_snapshot_with_overrides(tmp_path):
+    BarStore(str(tmp_path)).write_symbol_info('XAUUSD', {'point': 0.01, 'digits': 2, 'trade_contract_size': 100.0})
+    mt5 = OfflineMT5(store_root=str(tmp_path), symbol_overrides={'XAUUSD': {'spread': 25}})
+    info = mt5.symbol_info('XAUUSD')
+    assert info.name == 'XAUUSD'
+    assert info.point == 0.01 and info.trade_contract_size == 100.0
+    assert info.spread == 25
+
+
+def test_symbol_info_overrides_without_snapshot_use_defaults(tmp_path):
+    mt5 = OfflineMT5(store_root=str(tmp_path), symbol_overrides={'EURUSD': {'point': 0.00001, 'digits': 5}})
+    info = mt5.symbol_info('EURUSD')
+    assert info.point == 0.00001 and info.digits == 5
+    assert info.volume_min == 0.01
+
+
+def test_copy_rates_from_pos_respects_clock(tmp_path):
+    rates = _rates('2025-03-01', '2025-04-01')
+    BarStore(str(tmp_path)).write_month('XAUUSD', TIMEFRAME_M5, 2025, 3, rates, complete=True)
+    mt5 = OfflineMT5(store_root=str(tmp_path))
+
+    np.testing.assert_array_equal(mt5.copy_rates_from_pos('XAUUSD', TIMEFRAME_M5, 0, 10), rates[-10:])
+    mt5.set_clock(int(rates['time'][99]))
+    np.testing.assert_array_equal(mt5.copy_rates_from_pos('XAUUSD', TIMEFRAME_M5, 0, 10), rates[90:100])
+    np.testing.assert_array_equal(mt5.copy_rates_from_pos('XAUUSD', TIMEFRAME_M5, 5, 10), rates[85:95])
+    assert mt5.copy_rates_from_pos('NOPE', TIMEFRAME_M5, 0, 10) is None
+
+
+@pytest.fixture
+def no_mt5_package(monkeypatch, tmp_path):
+    """Paket MetaTrader5 dianggap tidak terpasang; instance offline bersama di-reset."""
+    monkeypatch.setitem(sys.modules, 'MetaTrader5', None)
+    monkeypatch.delenv('MT5_OFFLINE', raising=False)
+    monkeypatch.setenv('BAR_STORE_DIR', str(tmp_path))
+    monkeypatch.setattr(offline_mt5, '_offline_instance', None)
+
+
+def test_load_mt5_without_package_raises(no_mt5_package):
+    with pytest.raises(ImportError):
+        load_mt5()
+
+
+def test_load_mt5_offline_only_when_requested(no_mt5_package, monkeypatch):
+    assert load_mt5(offline=True).is_offline
+    assert load_mt5(allow_offline=True) is load_mt5(offline=True)
+    monkeypatch.setenv('MT5_OFFLINE', '1')
+    assert load_mt5().is_offline
+
+
+def test_live_data_handler_does_not_fall_back(no_mt5_package, monkeypatch):
+    from Library.data_handler import data_handler
+    monkeypatch.setattr(data_handler, '_mt5', None)
+    with pytest.raises(ImportError):
+        data_handler.get_rates('XAUUSD', 5, 10)
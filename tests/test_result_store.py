@@ -0,0 +1,130 @@
+# Nama File: test_result_store.py
+"""ResultStore: upsert, penimpaan run yang dihentikan dini (pruned), run_id dan folder laporan."""
+import sqlite3
+
+from result_store import ResultStore, get_run_id
+
+PARAMS = {'lot_size': 0.1, 'start_time': '07:00', 'end_time': '20:00', 'wave_period': 36,
+          'use_adx': True, 'adx_threshold': 25, 'use_sl': True, 'sl_points': 300.0}
+ABORT_ARGS = {'abort_max_dd': 40.0}
+
+
+def _result(profit: float, pruned: bool = False, params: dict = None) -> dict:
+    result = {
+        'parameters': dict(params or PARAMS), 'total_profit': profit,
+        'total_drawdown_details': {'percentage': 10.0}, 'overall_win_rate': 55.0, 'total_trades': 120,
+        'trading_dynamics': {'profit_factor': 1.4, 'sharpe_ratio': 1.1},
+    }
+    if pruned:
+        result.update(pruned=True, cli_args=dict(ABORT_ARGS))
+    return result
+
+
+def test_upsert_keeps_existing_complete_run(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite'))
+    try:
+        assert store.add_result('XAUUSD', _result(500.0))
+        assert not store.add_result('XAUUSD', _result(900.0))
+        assert store.count('XAUUSD') == 1
+        assert store.get_result('XAUUSD', get_run_id(PARAMS))['total_profit'] == 500.0
+    finally:
+        store.close()
+
+
+def test_pruned_run_is_overwritten(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite'))
+    try:
+        assert store.add_result('XAUUSD', _result(-50.0, pruned=True))
+        run_id = get_run_id(PARAMS)
+        # run gugur hanya dianggap selesai untuk kriteria abort yang sama
+        assert run_id in store.run_ids('XAUUSD', ABORT_ARGS)
+        assert run_id not in store.run_ids('XAUUSD', {})
+
+        assert store.add_result('XAUUSD', _result(700.0))
+        stored = store.get_result('XAUUSD', run_id)
+        assert stored['total_profit'] == 700.0 and not stored.get('pruned')
+        assert run_id in store.run_ids('XAUUSD', {})
+        assert store.count('XAUUSD') == 1
+    finally:
+        store.close()
+
+
+def test_add_results_batch_counts_new_rows(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.sqlite'))
+    try:
+        other = {**PARAMS, 'wave_period': 48}
+        assert store.add_results('XAUUSD', [_result(1.0), _result(2.0, params=other), None]) == 2
+        assert store.add_results('XAUUSD', [_result(3.0)]) == 0
+        assert [r['total_profit'] for r in store.top_results('XAUUSD', 5, order_by='total_profit')] == [2.0, 1.0]
+    finally:
+        store.close()
+
+
+def test_run_id_accepts_old_and_new_names():
+    old_names = {'fixed_lot_size': 0.1, 'trade_start_time': '07:00', 'trade_end_time': '20:00', 'wave_period': 36,
+                 'use_adx_filter': True, 'adx_threshold': 25, 'use_stop_loss': True, 'stop_loss_points': 300.0}
+    assert get_run_id(old_names) == get_run_id(PARAMS)
+
+
+def test_run_id_separates_result_affecting_params():
+    base = get_run_id(PARAMS)
+    assert get_run_id({**PARAMS, 'use_tp': True, 'tp_points': 400.0}) != base
+    assert get_run_id({**PARAMS, 'use_tp': True, 'tp_points': 400.0}) != get_run_id({**PARAMS, 'use_tp': True, 'tp_points': 500.0})
+    assert get_run_id({**PARAMS, 'intrabar_model': 'ohlc'}) != base
+    assert get_run_id({**PARAMS, 'engine': 'tick'}) != base
+    assert get_run_id({**PARAMS, 'engine': 'vectorized'}) != base
+    assert get_run_id({**PARAMS, 'year': 2024}) != base
+    assert get_run_id({**PARAMS, 'commission_per_lot_roundturn': 5.0}) != base
+    # nilai default eksplisit = kunci yang tidak disebut
+    assert get_run_id({**PARAMS, 'intrabar_model': 'sl_first', 'engine': 'loop', 'year': 2025}) == base
+    # parameter nonaktif tidak memecah run_id
+    assert get_run_id({**PARAMS, 'use_adx': False, 'adx_threshold': 25}) == get_run_id({**PARAMS, 'use_adx': False, 'adx_threshold': 30})
+
+
+def test_launcher_params_match_worker_config():
+    import worker_backtest as wb
+
+    class _MT5:
+        TIMEFRAME_M5 = 5
+
+    launcher = {'symbol': 'XAUUSD', 'year': 2025, 'initial_balance': 10000.0, 'start_month': 1, 'end_month': 7,
+                'lot_size': 0.5, 'wave_period': 54, 'adx_period': 15, 'use_adx': True, 'use_tp': True, 'tp_points': 30}
+    argv = [f'--{k}' if v is True else f'--{k} {v}' for k, v in launcher.items()]
+    config = wb.build_config(wb.build_arg_parser().parse_args(' '.join(argv).split()), _MT5())
+    assert get_run_id(config) == get_run_id(launcher)
+    assert get_run_id(config) != get_run_id({**launcher, 'adx_period': 14})
+
+
+def test_report_dir_follows_run_id():
+    from reporting import report_output_dir
+
+    config = {'symbol': 'XAUUSD', **PARAMS}
+    base = report_output_dir(config)
+    variants = [{'engine': 'vectorized'}, {'engine': 'tick'}, {'intrabar_model': 'ohlc'},
+                {'use_tp': True, 'tp_points': 400.0}, {'use_tp': True, 'tp_points': 500.0}, {'slippage_points': 0.0}]
+    dirs = {report_output_dir({**config, **v}) for v in variants}
+    assert base not in dirs and len(dirs) == len(variants)
+    # nama lama/baru -> folder sama, seperti run_id
+    assert report_output_dir({'symbol': 'XAUUSD', 'fixed_lot_size': 0.1, 'trade_start_time': '07:00',
+                              'trade_end_time': '20:00', 'wave_period': 36, 'use_adx_filter': True,
+                              'adx_threshold': 25, 'use_stop_loss': True, 'stop_loss_points': 300.0}) == base
+
+
+def test_old_run_ids_migrated_on_open(tmp_path):
+    db_path = str(tmp_path / 'results.sqlite')
+    store = ResultStore(db_path)
+    store.add_result('XAUUSD', _result(500.0))
+    store.close()
+    # store skema lama: run_id tanpa kunci default, user_version 0
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE runs SET run_id = 'old-format'")
+    conn.execute('PRAGMA user_version = 0')
+    conn.commit()
+    conn.close()
+
+    store = ResultStore(db_path)
+    try:
+        assert get_run_id(PARAMS) in store.run_ids('XAUUSD')
+        assert store.get_result('XAUUSD', get_run_id(PARAMS))['total_profit'] == 500.0
+    finally:
+        store.close()
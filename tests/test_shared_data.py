@@ -0,0 +1,114 @@
+# Nama File: test_shared_data.py
+"""Dataset shared memory: worker memakai view segmen langsung (tanpa salinan per worker)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import worker_backtest as wb
+from shared_data import SharedDataset, period_key, continuous_period, default_warmup_bars
+
+BB_LENGTH = 20
+TIMEFRAME_M5 = 5
+
+
+class _Captured(Exception):
+    pass
+
+
+def _rates(start: str, end: str, seed: int = 3) -> np.ndarray:
+    """Bar M5 sintetis [start, end) sebagai structured array (format copy_rates_range)."""
+    times = pd.date_range(start, end, freq='5min', tz='UTC', inclusive='left')
+    rng = np.random.default_rng(seed)
+    close = 2000.0 + np.cumsum(rng.normal(0.0, 0.8, len(times)))
+    rates = np.zeros(len(times), dtype=[('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                                        ('close', '<f8'), ('spread', '<i4')])
+    rates['time'] = times.as_unit('s').asi8
+    rates['open'] = np.r_[close[0], close[:-1]]
+    rates['close'] = close
+    rates['high'] = np.maximum(rates['open'], close) + 0.5
+    rates['low'] = np.minimum(rates['open'], close) - 0.5
+    rates['spread'] = 20
+    return rates
+
+
+def _bbands(rates: np.ndarray, length: int) -> pd.DataFrame:
+    """Kolom BBands gaya pandas_ta (SMA +- 2 std) untuk dipublish tanpa pandas_ta."""
+    close = pd.Series(rates['close'], index=pd.to_datetime(rates['time'], unit='s', utc=True))
+    mid, std = close.rolling(length).mean(), close.rolling(length).std(ddof=0)
+    return pd.DataFrame({f'BBL_{length}_2.0': mid - 2 * std, f'BBM_{length}_2.0': mid,
+                         f'BBU_{length}_2.0': mid + 2 * std})
+
+
+def _ctx() -> dict:
+    return {
+        'lot_size': 0.5, 'bb_length': BB_LENGTH, 'use_adx_filter': False, 'adx_period': 14, 'adx_threshold': 25,
+        'use_stop_loss': True, 'stop_loss_points': 3.0, 'use_take_profit': False, 'take_profit_points': 0.0,
+        'run_directory': None, 'contract_size': 100.0, 'point': 0.01, 'commission_rt_usd': 7.0, 'slippage_pts': 2.0,
+        'use_dyn_spread': False, 'fallback_spread_pts': 20.0,
+    }
+
+
+def _strategy(manifest: str) -> 'wb.PoseidonWave':
+    return wb.PoseidonWave(None, {
+        'symbol': 'SYNTH', 'timeframe_int': TIMEFRAME_M5, 'engine': 'vectorized', 'shared_manifest': manifest,
+        'trade_start_time': '00:00', 'trade_end_time': '23:59',
+        'use_bar_store': False, 'use_indicator_cache': False, 'render_reports': False,
+    })
+
+
+def _engine_input(strategy, df, monkeypatch) -> pd.DataFrame:
+    """DataFrame yang benar-benar diterima engine vectorized dari _simulate."""
+    def capture(frame, **kwargs):
+        raise _Captured(frame)
+    monkeypatch.setattr(wb, 'simulate_poseidon_vectorized', capture)
+    with pytest.raises(_Captured) as exc:
+        strategy._simulate(df, 1000.0, _ctx(), wb.PoseidonWave._EquityRecorder())
+    return exc.value.args[0]
+
+
+def _assert_shared(strategy, frame: pd.DataFrame, columns) -> None:
+    segments = [np.frombuffer(shm.buf, dtype=np.uint8) for shm in strategy.shared_data._segments]
+    for name in columns:
+        values = frame[name].to_numpy(dtype=float)
+        assert any(np.shares_memory(values, seg) for seg in segments), name
+
+
+def test_monthly_frame_uses_segment_views(tmp_path, monkeypatch):
+    start, end = '2025-03-01', '2025-03-31'
+    rates = _rates(start, end)
+    with SharedDataset({'symbol': 'SYNTH', 'timeframe': TIMEFRAME_M5, 'periods': {}}) as dataset:
+        period = period_key(start, end)
+        dataset.publish_period(period, rates)
+        dataset.publish_indicator(period, 'bbands', {'length': BB_LENGTH, 'std': 2}, _bbands(rates, BB_LENGTH))
+        manifest = dataset.save_manifest(str(tmp_path / 'manifest.json'))
+
+        strategy = _strategy(manifest)
+        try:
+            assert strategy.shared_data is not None
+            df = strategy._prepare_indicators(strategy._load_bars(start, end), period, _ctx())
+            assert len(df) == len(rates) - (BB_LENGTH - 1)   # baris warm-up dipotong
+            frame = _engine_input(strategy, df, monkeypatch)
+            _assert_shared(strategy, frame, ('open', 'high', 'low', 'close', f'BBM_{BB_LENGTH}_2.0'))
+        finally:
+            strategy.close()
+
+
+def test_continuous_span_uses_segment_views(tmp_path, monkeypatch):
+    warm_start, period_end = continuous_period(2025, 3, 4, default_warmup_bars(BB_LENGTH), TIMEFRAME_M5)
+    rates = _rates(warm_start, period_end)
+    with SharedDataset({'symbol': 'SYNTH', 'timeframe': TIMEFRAME_M5, 'periods': {}}) as dataset:
+        period = period_key(warm_start, period_end)
+        dataset.publish_period(period, rates)
+        dataset.publish_indicator(period, 'bbands', {'length': BB_LENGTH, 'std': 2}, _bbands(rates, BB_LENGTH))
+        manifest = dataset.save_manifest(str(tmp_path / 'manifest.json'))
+
+        strategy = _strategy(manifest)
+        try:
+            df = strategy._load_continuous_frame(2025, 3, 4, _ctx())
+            # satu bar sebelum periode dipakai sebagai candle_sebelumnya bar pertama
+            assert df.index[1] == pd.Timestamp('2025-03-01', tz='UTC')
+            assert df.index[-1] < pd.Timestamp(period_end, tz='UTC')
+            frame = _engine_input(strategy, df, monkeypatch)
+            _assert_shared(strategy, frame, ('open', 'high', 'low', 'close', f'BBM_{BB_LENGTH}_2.0'))
+        finally:
+            strategy.close()
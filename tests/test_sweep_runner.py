@@ -0,0 +1,68 @@
+# Nama File: test_sweep_runner.py
+"""sweep_runner: hasil ditulis ke store per batch (satu transaksi), bukan upsert per kombinasi."""
+import pytest
+
+import sweep_runner
+import worker_backtest as wb
+from result_store import ResultStore, get_result_store
+
+
+class _FakeMT5:
+    TIMEFRAME_M5 = 5
+
+    def initialize(self):
+        return True
+
+
+class _FakeStrategy:
+    def __init__(self, mt5, config, rates_memo=None):
+        self.config = config
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sweep(monkeypatch, tmp_path):
+    db_path = str(tmp_path / 'results.sqlite')
+    writes = []
+
+    def fake_job(strategy, config, args, status=None, write_result_json=True):
+        assert not config['use_result_store']  # worker tidak menulis per kombinasi
+        if config['fixed_lot_size'] == 0.3:
+            raise RuntimeError('kombinasi gagal')
+        return {'parameters': dict(config), 'total_profit': 10.0 * config['fixed_lot_size'],
+                'total_drawdown_details': {'percentage': 5.0}}
+
+    store = get_result_store(db_path)
+    original = ResultStore.add_results
+
+    def counting_add_results(self, symbol, results):
+        writes.append(len(results))
+        return original(self, symbol, results)
+
+    monkeypatch.setattr(wb, 'PoseidonWave', _FakeStrategy)
+    monkeypatch.setattr(wb, 'run_backtest_job', fake_job)
+    monkeypatch.setattr(ResultStore, 'add_results', counting_add_results)
+    return db_path, store, writes
+
+
+def _params(db_path, lots):
+    return [{'symbol': 'XAUUSD', 'lot_size': lot, 'result_db': db_path} for lot in lots]
+
+
+def test_results_written_in_batches(sweep, capsys):
+    db_path, store, writes = sweep
+    results = sweep_runner.run_sweep(_params(db_path, [0.1, 0.2, 0.3, 0.4, 0.5]), _FakeMT5(),
+                                     status=lambda data: None, flush_every=2)
+    assert len(results) == 4
+    assert '❌ Error pada Parameter' in capsys.readouterr().err
+    assert writes == [2, 2]
+    assert store.count('XAUUSD') == 4
+
+
+def test_no_result_store_skips_writes(sweep):
+    db_path, store, writes = sweep
+    params = [dict(p, no_result_store=True) for p in _params(db_path, [0.1, 0.2])]
+    assert len(sweep_runner.run_sweep(params, _FakeMT5(), status=lambda data: None)) == 2
+    assert writes == [] and store.count('XAUUSD') == 0
@@ -0,0 +1,54 @@
+# Nama File: test_tick_engine.py
+"""Eksekusi tick: SL/TP terisi di harga tick pertama yang menyentuh level (gap -> harga gap, bukan level)."""
+import numpy as np
+import pytest
+
+from Library.data_handler.tick_store import TickSeries
+from tick_engine import TickFills
+
+BAR_MS = 60_000
+POINT = 0.01
+SLIPPAGE_PTS = 2.0
+
+
+def _fills(chunk_size: int = 3) -> TickFills:
+    """Tiga bar M1, tick dari dua partisi; bar 1 gap turun dari 2000.6 ke 1990."""
+    day1 = (np.array([0, 10_000, 30_000, 59_000], dtype=np.int64),
+            np.array([2000.0, 2000.5, 2001.0, 2000.8]), np.array([2000.2, 2000.7, 2001.2, 2001.0]))
+    day2 = (np.array([60_000, 61_000, 90_000, 119_000, 150_000], dtype=np.int64),
+            np.array([2000.6, 1990.0, 1989.0, 1992.0, 1993.0]), np.array([2000.8, 1990.3, 1989.2, 1992.2, 1993.2]))
+    ticks = TickSeries([day1, day2], chunk_size=chunk_size)
+    return TickFills(ticks, np.array([0, BAR_MS, 2 * BAR_MS], dtype=np.int64), BAR_MS, POINT, SLIPPAGE_PTS)
+
+
+def test_market_fill_at_bar_close_tick():
+    fills = _fills()
+    price, ref = fills.market('BUY', 0, 'entry')
+    assert ref == 3
+    assert price == pytest.approx(2001.0 + SLIPPAGE_PTS * POINT)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 1000])
+def test_buy_stop_loss_fills_at_gap_price(chunk_size):
+    fills = _fills(chunk_size)
+    _, e_ref = fills.market('BUY', 0, 'entry')
+    x, price, ref, reason = fills.levels('BUY', 0, e_ref, 2, sl_level=1995.0, tp_level=2010.0)
+    assert (x, ref, reason) == (1, 5, 'sl')
+    # harga exit = BID tick gap dikurangi slippage, lebih buruk dari level SL
+    assert price == pytest.approx(1990.0 - SLIPPAGE_PTS * POINT)
+    assert price < 1995.0
+
+
+def test_sell_take_profit_fills_at_gap_price():
+    fills = _fills()
+    _, e_ref = fills.market('SELL', 0, 'entry')
+    x, price, ref, reason = fills.levels('SELL', 0, e_ref, 2, sl_level=2010.0, tp_level=1995.0)
+    assert (x, ref, reason) == (1, 5, 'tp')
+    assert price == pytest.approx(1990.3 + SLIPPAGE_PTS * POINT)
+
+
+def test_levels_without_touch():
+    fills = _fills()
+    _, e_ref = fills.market('BUY', 0, 'entry')
+    assert fills.levels('BUY', 0, e_ref, 2, sl_level=1980.0, tp_level=None) is None
+    assert fills.levels('BUY', 0, e_ref, 0, sl_level=1995.0, tp_level=None) is None